@@ -20,23 +20,33 @@ import argparse
 import multiprocessing
 import sys
 
-from PyQt5.QtWidgets import QApplication, QMessageBox
-
-from myfyrio import resources
-from myfyrio.gui import mainwindow
-from myfyrio.logger import Logger
-
 
 def main() -> None:
+    # The worker processes started with "spawn" import this module again,
+    # so the other modules (and Qt) are imported only when they are needed
+    # pylint: disable=import-outside-toplevel
     multiprocessing.freeze_support()
 
+    from myfyrio import cli, resources
+
     parser = argparse.ArgumentParser()
     parser.add_argument('-u', '--user', action='store_true')
+    subparsers = parser.add_subparsers(dest='command')
+    cli.add_scan_parser(subparsers)
     args = parser.parse_args()
 
     if args.user and getattr(sys, 'frozen', False):
         resources.USER = True
 
+    if args.command == 'scan':
+        # No widgets (and no display) are needed
+        sys.exit(cli.scan(args))
+
+    from PyQt5.QtWidgets import QApplication, QMessageBox
+
+    from myfyrio.gui import mainwindow
+    from myfyrio.logger import Logger
+
     app = QApplication(sys.argv)
 
     try:
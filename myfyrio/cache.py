@@ -20,50 +20,668 @@ along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
 Module implementing cache for keeping image hashes
 '''
 
+import os
 import pickle
-from collections import UserDict
+import sqlite3
+from collections.abc import MutableMapping
+from typing import (Collection, Container, Dict, Iterable, Iterator, List,
+                    Mapping, NamedTuple, Optional, Set, Tuple)
 
 ################################## Types ######################################
 CacheFile = str # Path to the cache file
+FolderPath = str # Path to a folder
+ImagePath = str # Path to an image
+Hash = int # Perceptual hash of an image
+HashVersion = str # Version of the hashes (see "hashing.DecodeBackend")
+Distance = int # Distance between 2 hashes
+Pair = Tuple[ImagePath, ImagePath, Distance] # Pair of similar images
 ###############################################################################
 
+# Version of the hashes calculated with Qt (all the hashes in the cache
+# files of the older versions)
+DEFAULT_HASH_VERSION: HashVersion = 'qt'
 
-class Cache(UserDict):
-    '''Represent cache containing image hashes. The cache is a dictionary with
-    pairs "ImagePath: Hash". The cache is empty when a new instance is created.
-    The dictionary is kept in the attribute "data"
+
+class Entry(NamedTuple):
+    '''Cache entry: the hash of an image, the status of the image file
+    when the hash was calculated (modification time in nanoseconds, size,
+    device and inode), whether the pairs of the image are in the cache
+    (see "Cache"), the info read from the image file with the hash
+    (width, height and format) and the version of the hash. Entries made
+    by the older versions of the programme have no file status or no image
+    info
     '''
 
-    def load(self, file: CacheFile) -> None:
-        '''Load the cache with the earlier calculated hashes
+    dhash: Hash
+    mtime_ns: Optional[int] = None
+    size: Optional[int] = None
+    dev: Optional[int] = None
+    ino: Optional[int] = None
+    indexed: bool = False
+    width: Optional[int] = None
+    height: Optional[int] = None
+    format: Optional[str] = None
+    hash_version: HashVersion = DEFAULT_HASH_VERSION
+
+    @classmethod
+    def from_stat(cls, dhash: Hash, stat: os.stat_result,
+                  width: Optional[int] = None, height: Optional[int] = None,
+                  img_format: Optional[str] = None,
+                  hash_version: HashVersion = DEFAULT_HASH_VERSION) \
+        -> 'Entry':
+        '''Make a new entry
+
+        :param dhash:           hash of the image,
+        :param stat:            status of the image file (see "os.stat"),
+        :param width:           width of the image (optional),
+        :param height:          height of the image (optional),
+        :param img_format:      format of the image file (optional),
+        :param hash_version:    version of the hash (optional, the one
+                                of the Qt hashes by default),
+        :return:                "Entry" object
+        '''
+
+        return cls(dhash, stat.st_mtime_ns, stat.st_size, stat.st_dev,
+                   stat.st_ino, False, width, height, img_format,
+                   hash_version)
+
+    def has_info(self) -> bool:
+        '''Check if the entry keeps the image info
 
-        :param file:                path to the cache file,
-        :raise FileNotFoundError:   cache file does not exist,
-        :raise EOFError:            cache file might be corrupted (or empty),
-        :raise OSError:             some problem while opening cache file
+        :return: True - it does, False - the entry is made by an older
+                 version of the programme
+        '''
+
+        return self.width is not None and self.height is not None
+
+    def matches(self, stat: os.stat_result) -> bool:
+        '''Check if the image file has not been changed since the hash
+        was calculated
+
+        :param stat:    current status of the image file,
+        :return:        True - the hash is still valid, False - otherwise
+        '''
+
+        if self.mtime_ns is None:
+            # Nothing to compare with, trust the hash as it used to be
+            return True
+        return self.mtime_ns == stat.st_mtime_ns and self.size == stat.st_size
+
+
+class Cache(MutableMapping):
+    '''Represent cache containing image hashes. The cache is a mapping with
+    pairs "ImagePath: Entry" kept in an SQLite database (in WAL mode). The
+    cache is empty when a new instance is created and works in memory
+    until the cache file is loaded. New entries are kept in memory and
+    written into the file (only the new ones) when "save" is called.
+    Only the entries with the hashes of :hash_version: are found, the
+    other ones are replaced when their images are hashed again. The rows
+    are indexed by the folder of the image, so the entries of the deleted
+    images are found without reading all the rows (see "prune")
+
+    The cache also keeps the pairs of similar images (the similarity
+    index): if 2 entries are indexed, their pair is in the cache when
+    the distance between their hashes is at most "radius" (the radius
+    the pairs have been searched with, see "widen"). When
+    the entry of an image is replaced (the file has been changed
+    or moved), the pairs of the image are removed and the new entry
+    is not indexed. The pairs of a replaced entry are not found
+    (and not saved) since the entry is rejected by "lookup"
+
+    :param hash_version: version of the hashes in use (optional, the hashes
+                         calculated with Qt by default)
+    '''
+
+    # Version of the database schema ("user_version" pragma)
+    VERSION = 6
+
+    COLUMNS = ('path, hash, mtime_ns, size, dev, ino, indexed, '
+               'width, height, format, hash_version')
+
+    # Max radius of the pairs (the lowest sensitivity)
+    RADIUS = 20
+
+    # Max number of paths in one query
+    MAX_PARAMS = 500
+
+    def __init__(self, hash_version: HashVersion = DEFAULT_HASH_VERSION) \
+        -> None:
+        self.hash_version = hash_version
+        # Max distance between the hashes of a pair (no pairs yet)
+        self.radius: Optional[Distance] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._new: Dict[ImagePath, Entry] = {}
+
+        # Paths with the pairs to remove and new pairs by the paths
+        self._unindexed: Set[ImagePath] = set()
+        self._new_pairs: Dict[ImagePath, List[Pair]] = {}
+        # Paths of the rejected indexed entries not indexed again yet
+        self._stale: Set[ImagePath] = set()
+        # Old paths of the moved files and paths of the deleted ones
+        # (the rows to remove)
+        self._dropped: Set[ImagePath] = set()
+
+    def load(self, file: CacheFile, legacy_file: CacheFile = None) -> None:
+        '''Load (open) the cache file with the earlier calculated hashes.
+        If the file does not exist, make a new one. If :legacy_file: (the
+        pickled cache of the old format) exists, move its hashes into
+        the cache file and rename it to "<legacy_file>.bak"
+
+        :param file:        path to the cache file,
+        :param legacy_file: path to the old cache file (optional),
+        :raise EOFError:    cache file might be corrupted (or it is not
+                            a cache file at all),
+        :raise OSError:     some problem while opening cache file
         '''
 
         try:
-            with open(file, 'rb') as f:
-                cache = pickle.load(f)
-        except FileNotFoundError:
-            raise FileNotFoundError(f'Cache file does not exist')
-        except EOFError:
-            raise EOFError('Cache file might be corrupted (or empty)')
-        except OSError as e:
+            conn = sqlite3.connect(file)
+        except sqlite3.Error as e:
             raise OSError(e)
-        else:
-            self.data = cache # pylint: disable=attribute-defined-outside-init
 
-    def save(self, file: CacheFile) -> None:
-        '''Save cache on the disk
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            # Cannot corrupt the file in WAL mode (only the last commits
+            # can be lost if the power goes off)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._create_tables(conn)
+            row = conn.execute('SELECT value FROM settings '
+                               "WHERE name = 'radius'").fetchone()
+        except sqlite3.DatabaseError:
+            conn.close()
+            raise EOFError('Cache file might be corrupted')
+
+        self.close()
+        self._conn = conn
+        self.radius = None if row is None else row[0]
+
+        if legacy_file is not None and os.path.exists(legacy_file):
+            self._migrate(legacy_file)
+
+    def _create_tables(self, conn: sqlite3.Connection) -> None:
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version == self.VERSION:
+            return
+
+        with conn:
+            if version < 1:
+                conn.execute('CREATE TABLE IF NOT EXISTS hashes ('
+                             'path TEXT PRIMARY KEY, '
+                             'folder TEXT NOT NULL, '
+                             'hash BLOB NOT NULL)')
+                conn.execute('CREATE INDEX IF NOT EXISTS hashes_folder '
+                             'ON hashes (folder)')
+            if version < 2:
+                for column in ('mtime_ns', 'size', 'dev', 'ino'):
+                    conn.execute(f'ALTER TABLE hashes ADD COLUMN {column} '
+                                 'INTEGER')
+                # Moved (renamed) files are found by the inode
+                conn.execute('CREATE INDEX IF NOT EXISTS hashes_inode '
+                             'ON hashes (dev, ino)')
+            if version < 3:
+                conn.execute('ALTER TABLE hashes ADD COLUMN indexed INTEGER')
+                conn.execute('CREATE TABLE IF NOT EXISTS pairs ('
+                             'path1 TEXT NOT NULL, '
+                             'path2 TEXT NOT NULL, '
+                             'distance INTEGER NOT NULL, '
+                             'PRIMARY KEY (path1, path2)) WITHOUT ROWID')
+                conn.execute('CREATE INDEX IF NOT EXISTS pairs_path2 '
+                             'ON pairs (path2)')
+            if version < 4:
+                # The info is read with the hash, so the images do not
+                # have to be opened again to filter them by the size
+                for column, column_type in (('width', 'INTEGER'),
+                                            ('height', 'INTEGER'),
+                                            ('format', 'TEXT')):
+                    conn.execute(f'ALTER TABLE hashes ADD COLUMN {column} '
+                                 f'{column_type}')
+            if version < 5:
+                # The rows without the version (also the legacy hashes
+                # moved into the file) are the hashes calculated with Qt
+                conn.execute('ALTER TABLE hashes ADD COLUMN hash_version '
+                             f"TEXT DEFAULT '{DEFAULT_HASH_VERSION}'")
+            if version < 6:
+                conn.execute('CREATE TABLE IF NOT EXISTS settings ('
+                             'name TEXT PRIMARY KEY, value)')
+                if version >= 3:
+                    # The pairs used to be found within the max radius
+                    conn.execute('INSERT OR IGNORE INTO settings '
+                                 "VALUES ('radius', ?)", (self.RADIUS,))
+            conn.execute(f'PRAGMA user_version={self.VERSION}')
+
+    def _migrate(self, legacy_file: CacheFile) -> None:
+        try:
+            with open(legacy_file, 'rb') as f:
+                hashes = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # Nothing to move, the hashes will be calculated again
+            hashes = {}
+
+        rows = [(path, os.path.dirname(path), _to_blob(dhash))
+                for path, dhash in hashes.items()]
+        try:
+            with self._conn:
+                # The hashes in the cache file are newer
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO hashes (path, folder, hash) '
+                    'VALUES (?, ?, ?)', rows
+                )
+            os.replace(legacy_file, legacy_file + '.bak')
+        except (sqlite3.Error, OSError) as e:
+            raise OSError(e)
+
+    def lookup(self, files: Mapping[ImagePath, os.stat_result]) \
+        -> Dict[ImagePath, Entry]:
+        '''Find the valid entries of the image files. The cache file is
+        queried once per "MAX_PARAMS" paths, not once per image (the rows
+        of the other images are not read). An entry is valid if
+        the file has not been changed since the hash was calculated and
+        the hash is of the version in use. If there is no valid entry for
+        the path, but the file has been moved (renamed), the entry is found
+        by the inode and added to the cache with the new path (the entry
+        with the old path and its pairs are removed if there is no such
+        file at the old path any more). Old entries without file status
+        are updated with it
+
+        :param files:   dict "ImagePath: os.stat_result" with the paths to
+                        the image files and their current status,
+        :return:        dict "ImagePath: Entry" with the valid entries only,
+        :raise OSError: some problem while reading cache file
+        '''
+
+        saved = self._saved([path for path in files
+                             if path not in self._new])
+
+        found = {}
+        for path, stat in files.items():
+            entry = self._new.get(path, saved.get(path))
+
+            if entry is None or not self._valid(entry, stat):
+                if entry is not None and entry.indexed:
+                    self._reject(path)
+                moved = self._moved(stat)
+                if moved is None:
+                    continue
+                old_path, entry = moved
+                if old_path not in files and not _same_file(old_path, stat):
+                    self._drop(old_path)
+                # No pairs of the new path have been found yet
+                entry = entry._replace(indexed=False)
+                self[path] = entry
+            elif entry.mtime_ns is None:
+                entry = Entry.from_stat(entry.dhash, stat,
+                                        hash_version=entry.hash_version)
+                self[path] = entry
+
+            found[path] = entry
+
+        return found
+
+    def _reject(self, path: ImagePath) -> None:
+        # The pairs of the old hash are wrong and the pairs with it
+        # might have been found already
+        self._stale.add(path)
+        self._unindexed.add(path)
+        self._remove_new_pairs(path)
+
+    def _drop(self, path: ImagePath) -> None:
+        # The entry and its pairs are removed when saving
+        self._reject(path)
+        self._new.pop(path, None)
+        self._dropped.add(path)
+
+    def _remove_new_pairs(self, path: ImagePath) -> None:
+        for pair in self._new_pairs.pop(path, []):
+            other = pair[1] if pair[0] == path else pair[0]
+            self._new_pairs[other].remove(pair)
+
+    def _saved(self, paths: List[ImagePath]) -> Dict[ImagePath, Entry]:
+        saved = {}
+        for i in range(0, len(paths), self.MAX_PARAMS):
+            chunk = paths[i:i+self.MAX_PARAMS]
+            marks = ', '.join('?' * len(chunk))
+            rows = self._query(f'SELECT {self.COLUMNS} FROM hashes '
+                               f'WHERE path IN ({marks})', tuple(chunk))
+            saved.update((row[0], _entry(row)) for row in rows
+                         if row[0] not in self._dropped)
+        return saved
+
+    def _moved(self, stat: os.stat_result) \
+        -> Optional[Tuple[ImagePath, Entry]]:
+        rows = self._query(f'SELECT {self.COLUMNS} FROM hashes '
+                           'WHERE dev = ? AND ino = ?',
+                           (stat.st_dev, stat.st_ino))
+        for row in rows:
+            entry = _entry(row)
+            if row[0] not in self._dropped and self._valid(entry, stat):
+                return row[0], entry
+        return None
+
+    def prune(self, folders: Iterable[FolderPath], recursive: bool,
+              found: Container[ImagePath]) -> None:
+        '''Remove the entries of the deleted image files in the folders
+        (and their pairs) when saving. The entries are queried by
+        the folder, only the files not found in the folders are checked
+
+        :param folders:     paths to the folders searched for the images,
+        :param recursive:   the subfolders have been searched too,
+        :param found:       paths to all the images found in the folders,
+        :raise OSError:     some problem while reading cache file
+        '''
+
+        for folder in folders:
+            folder = os.path.normpath(folder)
+            if recursive:
+                # The subfolders are between "<folder>/" and "<folder>0"
+                # ("0" follows "/"), so the index of the folders is used
+                start = os.path.join(folder, '')
+                end = start[:-1] + chr(ord(start[-1]) + 1)
+                rows = self._query('SELECT path FROM hashes WHERE folder = ? '
+                                   'OR (folder >= ? AND folder < ?)',
+                                   (folder, start, end))
+            else:
+                rows = self._query('SELECT path FROM hashes '
+                                   'WHERE folder = ?', (folder,))
+
+            for (path,) in rows:
+                if (path not in found and path not in self._new
+                        and not os.path.lexists(path)):
+                    self._drop(path)
+
+    def _valid(self, entry: Entry, stat: os.stat_result) -> bool:
+        return entry.hash_version == self.hash_version and entry.matches(stat)
+
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        if self._conn is None:
+            return []
+
+        try:
+            return self._conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            raise OSError(e)
+
+    def add(self, path: ImagePath, dhash: Hash, stat: os.stat_result,
+            width: Optional[int] = None, height: Optional[int] = None,
+            img_format: Optional[str] = None) -> None:
+        '''Add the hash (of the version in use) of the image to the cache
+
+        :param path:        path to the image,
+        :param dhash:       hash of the image,
+        :param stat:        status of the image file when the hash was
+                            calculated,
+        :param width:       width of the image (optional),
+        :param height:      height of the image (optional),
+        :param img_format:  format of the image file (optional)
+        '''
+
+        self[path] = Entry.from_stat(dhash, stat, width, height, img_format,
+                                     self.hash_version)
+
+    def indexed(self) -> Dict[ImagePath, Hash]:
+        '''Return the hashes of the indexed entries (of the version in use,
+        the hashes of different versions cannot be compared)
+
+        :return:        dict "ImagePath: Hash",
+        :raise OSError: some problem while reading cache file
+        '''
+
+        rows = self._query('SELECT path, hash FROM hashes WHERE indexed '
+                           'AND hash_version = ?', (self.hash_version,))
+        hashes = {path: _from_blob(blob) for path, blob in rows}
+        for path, entry in self._new.items():
+            if entry.indexed and entry.hash_version == self.hash_version:
+                hashes[path] = entry.dhash
+            else:
+                hashes.pop(path, None)
+        for path in self._stale:
+            hashes.pop(path, None)
+        return hashes
+
+    def replaced(self, path: ImagePath) -> bool:
+        '''Check if the indexed entry of the image has been rejected
+        by "lookup" (the file has been changed) and the image has not
+        been indexed again yet. The pairs with the old hash are wrong
+
+        :param path:    path to the image,
+        :return:        True - the entry has been replaced, False - otherwise
+        '''
+
+        return path in self._stale
+
+    def widen(self, radius: Distance) -> None:
+        '''Make the pairs be found within :radius: at least. The pairs
+        found within a smaller radius lack the pairs at the bigger
+        distances, so they are removed (from the cache file too) and
+        all the entries become not indexed
+
+        :param radius:      max distance between the hashes of a pair,
+        :raise ValueError:  :radius: is bigger than "RADIUS",
+        :raise OSError:     some problem while writing cache file
+        '''
+
+        if radius > self.RADIUS:
+            raise ValueError(f'The radius cannot be bigger than {self.RADIUS}')
+        if self.radius is not None and radius <= self.radius:
+            return
+
+        if self._conn is not None:
+            try:
+                with self._conn:
+                    self._conn.execute('UPDATE hashes SET indexed = 0')
+                    self._conn.execute('DELETE FROM pairs')
+                    self._conn.execute('INSERT OR REPLACE INTO settings '
+                                       "VALUES ('radius', ?)", (radius,))
+            except sqlite3.Error as e:
+                raise OSError(e)
+
+        for path, entry in self._new.items():
+            self._new[path] = entry._replace(indexed=False)
+        self._new_pairs.clear()
+        self._stale.clear()
+        self.radius = radius
+
+    def pairs(self, paths: Collection[ImagePath]) -> List[Pair]:
+        '''Find the pairs of the images (the images of a pair
+        are in any order)
+
+        :param paths:   paths to the images,
+        :return:        list with tuples (path1, path2, distance),
+        :raise OSError: some problem while reading cache file
+        '''
+
+        paths = list(paths)
+        found: Set[Pair] = set()
+        for i in range(0, len(paths), self.MAX_PARAMS):
+            chunk = paths[i:i+self.MAX_PARAMS]
+            marks = ', '.join('?' * len(chunk))
+            found.update(self._query(
+                'SELECT path1, path2, distance FROM pairs '
+                f'WHERE path1 IN ({marks}) UNION '
+                'SELECT path1, path2, distance FROM pairs '
+                f'WHERE path2 IN ({marks})', (*chunk, *chunk)
+            ))
+        # The saved pairs of the replaced entries are removed when saving
+        found = {pair for pair in found
+                 if pair[0] not in self._unindexed
+                 and pair[1] not in self._unindexed}
+
+        for path in paths:
+            found.update(pair for pair in self._new_pairs.get(path, ())
+                         if not self._has_stale(pair))
+        return list(found)
+
+    def _has_stale(self, pair: Pair) -> bool:
+        return pair[0] in self._stale or pair[1] in self._stale
+
+    def add_pairs(self, paths: Iterable[ImagePath], pairs: Iterable[Pair]) \
+        -> None:
+        '''Add the found pairs of the images and mark the images
+        as indexed: the pairs of every image with every other indexed
+        image (within "radius") have to be added
+
+        :param paths:   paths to the images (they have to be in the cache),
+        :param pairs:   tuples (path1, path2, distance)
+        '''
+
+        for path in paths:
+            self._new[path] = self[path]._replace(indexed=True)
+            self._stale.discard(path)
+
+        for pair in pairs:
+            if self._has_stale(pair):
+                continue
+            self._new_pairs.setdefault(pair[0], []).append(pair)
+            self._new_pairs.setdefault(pair[1], []).append(pair)
+
+    def unsaved(self) -> int:
+        '''Return the number of the new entries not written into the cache
+        file yet
+
+        :return: number of the entries
+        '''
+
+        return len(self._new)
+
+    def save(self) -> None:
+        '''Write the new hashes and pairs into the cache file (the hashes
+        that are already there are not rewritten)
 
-        :param file:    path to the cache file,
         :raise OSError: some problem while saving cache file
         '''
 
+        if self._conn is None or not (self._new or self._unindexed
+                                      or self._dropped):
+            return
+
+        rows = [(path, os.path.dirname(path), _to_blob(entry.dhash),
+                 *entry[1:]) for path, entry in self._new.items()]
+        pairs = {pair for path_pairs in self._new_pairs.values()
+                 for pair in path_pairs if not self._has_stale(pair)}
+        stale = [(path,) for path in self._stale]
+        removed = [(path,) for path in self._unindexed]
+        dropped = [(path,) for path in self._dropped]
         try:
-            with open(file, 'wb') as f:
-                pickle.dump(self.data, f)
-        except OSError as e:
+            with self._conn:
+                self._conn.executemany('DELETE FROM hashes WHERE path = ?',
+                                       dropped)
+                # The pairs of the old entries
+                self._conn.executemany('DELETE FROM pairs WHERE path1 = ?',
+                                       removed)
+                self._conn.executemany('DELETE FROM pairs WHERE path2 = ?',
+                                       removed)
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO hashes (path, folder, hash, '
+                    'mtime_ns, size, dev, ino, indexed, width, height, '
+                    'format, hash_version) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows
+                )
+                if stale:
+                    # The old hashes have no pairs now
+                    self._conn.executemany('UPDATE hashes SET indexed = 0 '
+                                           'WHERE path = ?', stale)
+                if pairs:
+                    self._conn.executemany(
+                        'INSERT OR REPLACE INTO pairs (path1, path2, '
+                        'distance) VALUES (?, ?, ?)', pairs
+                    )
+        except sqlite3.Error as e:
             raise OSError(e)
+
+        self._new.clear()
+        self._unindexed.clear()
+        self._new_pairs.clear()
+        self._stale.difference_update(self._dropped)
+        self._dropped.clear()
+
+    def close(self) -> None:
+        '''Close the cache file. New hashes that have not been saved
+        are lost
+        '''
+
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def remove(file: CacheFile) -> None:
+        '''Remove the cache file (e.g. if it is corrupted)
+
+        :param file:    path to the cache file,
+        :raise OSError: some problem while removing cache file
+        '''
+
+        # SQLite keeps the data not written into the main file yet
+        # in the "-wal" file and the index of it in the "-shm" one
+        for path in (file, file + '-wal', file + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def __getitem__(self, path: ImagePath) -> Entry:
+        if path in self._new:
+            return self._new[path]
+        if path in self._dropped:
+            raise KeyError(path)
+
+        rows = self._query(f'SELECT {self.COLUMNS} FROM hashes '
+                           'WHERE path = ?', (path,))
+        if not rows:
+            raise KeyError(path)
+        return _entry(rows[0])
+
+    def __setitem__(self, path: ImagePath, entry: Entry) -> None:
+        self._new[path] = entry
+        self._dropped.discard(path)
+        if not entry.indexed:
+            self._unindexed.add(path)
+
+    def __delitem__(self, path: ImagePath) -> None:
+        in_new = self._new.pop(path, None) is not None
+        self._unindexed.discard(path)
+        self._dropped.discard(path)
+        self._stale.discard(path)
+        self._remove_new_pairs(path)
+
+        deleted = 0
+        if self._conn is not None:
+            try:
+                with self._conn:
+                    cursor = self._conn.execute(
+                        'DELETE FROM hashes WHERE path = ?', (path,)
+                    )
+                    self._conn.execute('DELETE FROM pairs WHERE path1 = ? '
+                                       'OR path2 = ?', (path, path))
+                deleted = cursor.rowcount
+            except sqlite3.Error as e:
+                raise OSError(e)
+
+        if not in_new and not deleted:
+            raise KeyError(path)
+
+    def __iter__(self) -> Iterator[ImagePath]:
+        yield from self._new
+        for (path,) in self._query('SELECT path FROM hashes'):
+            if path not in self._new and path not in self._dropped:
+                yield path
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+def _same_file(path: ImagePath, stat: os.stat_result) -> bool:
+    # The file at the path is the file with the status (e.g. a hard link)
+    try:
+        path_stat = os.stat(path)
+    except OSError:
+        return False
+    return (path_stat.st_dev, path_stat.st_ino) == (stat.st_dev, stat.st_ino)
+
+def _to_blob(dhash: Hash) -> bytes:
+    # SQLite integers are 64-bit, hashes are 128-bit
+    return dhash.to_bytes(16, 'big')
+
+def _from_blob(blob: bytes) -> Hash:
+    return int.from_bytes(blob, 'big')
+
+def _entry(row: tuple) -> Entry:
+    # Row with the columns "Cache.COLUMNS"
+    return Entry(_from_blob(row[1]), *row[2:6], bool(row[6]), *row[7:11])
@@ -0,0 +1,317 @@
+'''Copyright 2020 Maxim Shpak <maxim.shpak@posteo.uk>
+
+This file is part of Myfyrio.
+
+Myfyrio is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Myfyrio is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
+
+-------------------------------------------------------------------------------
+
+Module implementing the headless command-line scanner ("myfyrio scan"):
+the images are processed as in the GUI (see "workers.ImageProcessing"),
+but no widgets are made and the found groups are written to stdout
+while they are found
+'''
+
+import argparse
+import csv
+import json
+import os
+import signal
+import sys
+import time
+from enum import IntEnum
+from typing import Any, Callable, Dict, Iterable, Optional, TextIO, Tuple
+
+from myfyrio import config, core, hashing, workers
+from myfyrio.logger import Logger
+
+################################## Types ######################################
+Record = Dict[str, Any] # Info about a duplicate image written to the output
+###############################################################################
+
+
+class ExitCode(IntEnum):
+    '''Exit codes of the scanner (as "diff" does, 1 means "found")'''
+
+    NO_DUPLICATES = 0
+    DUPLICATES = 1
+    ERROR = 2
+    INTERRUPTED = 130 # 128 + SIGINT, as the shells do
+
+
+class OutputFormat:
+    '''Output formats of the scanner'''
+
+    JSONL = 'jsonl'
+    CSV = 'csv'
+
+
+class GroupWriter:
+    '''Writer of the found groups. Every duplicate image is a record (a JSON
+    object per line or a CSV row) with the index of its group. The groups
+    change while the images are processed: the images are written once they
+    join a group and written again with the new group index if their group
+    is joined with another one, so the last record of an image is the valid
+    one. The output is flushed after every change, so it can be read while
+    the scan is running
+
+    :param stream:      text stream to write the records to,
+    :param out_format:  any of "OutputFormat"
+    '''
+
+    FIELDS = ('group', 'path', 'difference', 'width', 'height', 'size',
+              'format')
+
+    def __init__(self, stream: TextIO,
+                 out_format: str = OutputFormat.JSONL) -> None:
+        self._stream = stream
+        # Number of the written images by the group indices
+        self._written: Dict[core.GroupIndex, int] = {}
+
+        self._csv: Optional[Any] = None
+        if out_format == OutputFormat.CSV:
+            self._csv = csv.DictWriter(stream, self.FIELDS,
+                                       lineterminator='\n')
+            self._csv.writeheader()
+
+    def write(self, group: Tuple[core.GroupIndex, core.Group]) -> None:
+        '''Write the images of the group that have not been written yet
+        (the images keep their positions in a group, the new ones are
+        at the end of it)
+
+        :param group: tuple with the group index and the group
+        '''
+
+        group_index, images = group
+        if not images:
+            # The group has been joined with another one, its images
+            # are written with the other group
+            self._written.pop(group_index, None)
+            return
+
+        written = self._written.get(group_index, 0)
+        for image in images[written:]:
+            self._write(self._record(group_index, image))
+        self._written[group_index] = len(images)
+        self._stream.flush()
+
+    @staticmethod
+    def _record(group_index: core.GroupIndex, image: core.Image) -> Record:
+        # Only the known info is written, the images are not read again
+        try:
+            size: Optional[int] = int(image.filesize(core.SizeFormat.B))
+        except OSError:
+            size = None
+        width, height, img_format = image.info()
+        return {'group': group_index, 'path': image.path,
+                'difference': image.difference, 'width': width,
+                'height': height, 'size': size, 'format': img_format}
+
+    def _write(self, record: Record) -> None:
+        if self._csv is None:
+            self._stream.write(json.dumps(record) + '\n')
+        else:
+            self._csv.writerow(record)
+
+
+class Scanner:
+    '''Scanner running image processing in the current thread with
+    the signals of "ImageProcessing" connected directly
+
+    :param folders: folders to search for images in,
+    :param conf:    "Config" object with the processing settings,
+    :param writer:  "GroupWriter" the found groups are written with
+    '''
+
+    def __init__(self, folders: Iterable[core.FolderPath], conf: config.Config,
+                 writer: GroupWriter) -> None:
+        self._processing = workers.ImageProcessing(folders, conf)
+        self._writer = writer
+
+        self._stats = {'images': 0, 'cached': 0, 'hashed': 0,
+                       'duplicates': 0, 'groups': 0}
+        self._elapsed = 0.0
+        self._failed = False
+        self._interrupted = False
+
+        p = self._processing
+        p.images_loaded.connect(self._stat('images'))
+        p.found_in_cache.connect(self._stat('cached'))
+        p.hashes_calculated.connect(self._stat('hashed'))
+        p.duplicates_found.connect(self._stat('duplicates'))
+        p.groups_found.connect(self._stat('groups'))
+        p.image_group.connect(writer.write)
+        p.interrupted.connect(self._set_failed)
+
+    def _stat(self, key: str) -> Callable[[int], None]:
+        def update(value: int) -> None:
+            self._stats[key] = value
+        return update
+
+    def _set_failed(self) -> None:
+        # "interrupted" is emitted also when the processing fails
+        self._failed = not self._interrupted
+
+    def interrupt(self) -> None:
+        '''Stop the processing, the hashes calculated so far are saved
+        into the cache
+        '''
+
+        self._interrupted = True
+        self._processing.interrupt()
+
+    def run(self) -> ExitCode:
+        '''Process the images
+
+        :return: exit code of the scan (see "ExitCode")
+        '''
+
+        start = time.monotonic()
+        self._processing.run()
+        self._elapsed = time.monotonic() - start
+
+        if self._interrupted:
+            return ExitCode.INTERRUPTED
+        if self._failed:
+            return ExitCode.ERROR
+        if self._stats['duplicates']:
+            return ExitCode.DUPLICATES
+        return ExitCode.NO_DUPLICATES
+
+    def summary(self) -> str:
+        '''Return the summary line with the numbers of the processed
+        images and the throughput
+
+        :return: summary of the last run
+        '''
+
+        stats = self._stats
+        elapsed = self._elapsed
+        rate = stats['images'] / elapsed if elapsed > 0 else 0.0
+        return (f"{stats['images']} images ({stats['cached']} from cache, "
+                f"{stats['hashed']} hashed), {stats['duplicates']} "
+                f"duplicates in {stats['groups']} groups, {elapsed:.2f} s, "
+                f'{rate:.1f} images/s')
+
+
+def _non_negative(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f'{value} is negative')
+    return number
+
+def _positive(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'{value} is not positive')
+    return number
+
+def add_scan_parser(subparsers: Any) -> None:
+    '''Add the parser of the "scan" command
+
+    :param subparsers: object returned by "ArgumentParser.add_subparsers"
+    '''
+
+    defaults = config.Config.default()
+    parser = subparsers.add_parser(
+        'scan', help='search for duplicate images without the GUI',
+        description='Search for duplicate images and write them to stdout '
+                    'while they are found. Exit code: 0 - no duplicates, '
+                    '1 - duplicates found, 2 - error, 130 - interrupted'
+    )
+    parser.add_argument('folders', nargs='+', metavar='FOLDER',
+                        help='folder to search for images in')
+    parser.add_argument('-s', '--sensitivity', type=_non_negative,
+                        default=defaults['sensitivity'],
+                        help='max difference between the hashes of similar '
+                             'images (default: %(default)s)')
+    parser.add_argument('-c', '--cores', type=_positive,
+                        default=defaults['cores'],
+                        help='number of CPU cores to use '
+                             '(default: %(default)s)')
+    parser.add_argument('-b', '--backend', choices=sorted(hashing.BACKENDS),
+                        default=defaults['backend'],
+                        help='backend decoding the images for hashing, '
+                             '"pillow" needs Pillow installed (default: '
+                             '%(default)s)')
+    parser.add_argument('--no-subfolders', action='store_true',
+                        help='do not search in the subfolders')
+    for dimension in ('width', 'height'):
+        for limit in ('min', 'max'):
+            parser.add_argument(f'--{limit}-{dimension}',
+                                type=_non_negative,
+                                help=f'{limit} {dimension} of the images')
+    parser.add_argument('-f', '--format', dest='out_format',
+                        choices=(OutputFormat.JSONL, OutputFormat.CSV),
+                        default=OutputFormat.JSONL,
+                        help='output format (default: %(default)s)')
+
+def scan_config(args: argparse.Namespace) -> config.Config:
+    '''Make the config of the scan from the command-line arguments (the
+    preferences of the GUI are not used)
+
+    :param args:    parsed arguments of the "scan" command,
+    :return:        "Config" object
+    '''
+
+    conf = config.Config.default()
+    conf['sensitivity'] = args.sensitivity
+    conf['cores'] = args.cores
+    conf['backend'] = args.backend
+    conf['subfolders'] = not args.no_subfolders
+
+    for key in ('min_width', 'max_width', 'min_height', 'max_height'):
+        value = getattr(args, key)
+        if value is not None:
+            conf[key] = value
+            conf['filter_img_size'] = True
+    return conf
+
+def scan(args: argparse.Namespace, stream: TextIO = sys.stdout) -> ExitCode:
+    '''Run the "scan" command. The groups are written to :stream:,
+    the errors and the summary line go to stderr
+
+    :param args:    parsed arguments of the "scan" command,
+    :param stream:  text stream to write the groups to (optional,
+                    stdout by default),
+    :return:        exit code
+    '''
+
+    for folder in args.folders:
+        if not os.path.isdir(folder):
+            print(f'scan: "{folder}" is not a folder', file=sys.stderr)
+            return ExitCode.ERROR
+    try:
+        hashing.decode_backend(args.backend)
+    except ImportError:
+        print(f'scan: the library of the "{args.backend}" backend is not '
+              'installed', file=sys.stderr)
+        return ExitCode.ERROR
+
+    Logger.setConsoleLogger()
+
+    writer = GroupWriter(stream, args.out_format)
+    scanner = Scanner(args.folders, scan_config(args), writer)
+
+    # Ctrl+C stops the processing gracefully, so the hashes calculated
+    # so far are kept in the cache
+    handler = signal.signal(signal.SIGINT,
+                            lambda signum, frame: scanner.interrupt())
+    try:
+        code = scanner.run()
+    finally:
+        signal.signal(signal.SIGINT, handler)
+
+    print(scanner.summary(), file=sys.stderr)
+    return code
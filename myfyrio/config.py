@@ -60,12 +60,30 @@ class Config(UserDict):
                             of images,
         cores:              int - number of CPU cores to use,
         lazy:               bool - use lazy thumbnail loading (or not),
+        thumbnail_cache:    int - max memory (in megabytes) the thumbnails
+                            kept in memory can take,
+        disk_thumbnails:    bool - keep the thumbnails in the shared
+                            thumbnail folder on the disk (or not),
+        backend:            str - name of the backend decoding the images
+                            for hashing (see "hashing.BACKENDS"),
         sensitivity:        int - threshold used when images are compared to
                             find out whether they are similar or not
 
     The dictionary is kept in the attribute "data"
     '''
 
+    @classmethod
+    def default(cls) -> 'Config':
+        '''Return the config with the default preferences (the config file
+        is not read)
+
+        :return: "Config" object
+        '''
+
+        conf = cls()
+        conf._default() # pylint: disable=protected-access
+        return conf
+
     def _default(self) -> None:
         DEFAULT_CONFIG = {
             'size': 200,
@@ -84,6 +102,9 @@ class Config(UserDict):
             'max_height': 1000000,
             'cores': os.cpu_count() or 1,
             'lazy': False,
+            'thumbnail_cache': 256,
+            'disk_thumbnails': True,
+            'backend': 'qt',
             'sensitivity': 0
         }
 
@@ -112,9 +133,14 @@ class Config(UserDict):
 
         try:
             with open(file, 'rb') as f:
-                self.data = pickle.load(f) # pylint: disable=attribute-defined-outside-init
+                data = pickle.load(f)
         except FileNotFoundError as e:
             self._default()
         except (EOFError, OSError, pickle.UnpicklingError) as e:
             self._default()
             raise OSError(e)
+        else:
+            # The preferences added since the config file was saved
+            # get their default values
+            self._default()
+            self.data.update(data)
@@ -46,15 +46,21 @@ permission notice:
 This module provides core functions for processing images and find duplicates
 '''
 
+import hashlib
 import os
+from collections import deque
+from concurrent.futures import (FIRST_COMPLETED, Future, ThreadPoolExecutor,
+                                wait)
 from enum import Enum
 from pathlib import Path
-from typing import (Callable, Collection, Dict, Generator, Iterable, List,
-                    Optional, Tuple, TypeVar, Union)
+from typing import (Callable, Container, Deque, Dict, Generator, Iterable,
+                    List, Optional, Sequence, Set, Tuple, TypeVar, Union)
 
-import pybktree
+import numpy as np
 from PyQt5 import QtCore, QtGui
 
+from myfyrio import cache, hashing, index
+
 ################################## Types ######################################
 FilePath = str # Path to a file
 FolderPath = FilePath # Path to a folder
@@ -63,10 +69,12 @@ Hash = int # Perceptual hash of an image
 Distance = int # Distance between 2 hashes
 Sensitivity = int # Max 'Distance' when images are considered similar
 Suffix = str # 'jpg', 'png', etc.
+ImageFormat = str # Format of an image file: 'jpeg', 'png', etc.
 Width = int # Width of a image
 Height = int # Height of a image
 FileSize = Union[int, float] # Size of a file
 Group = List['Image'] # Group of similar images
+Pair = Tuple[ImagePath, ImagePath, Distance] # Pair of similar images
 GroupIndex = int # Index of a group
 KeyFunc = TypeVar('KeyFunc', Callable[['Image'], Distance],
                   Callable[['Image'], FileSize], Callable[['Image'], int],
@@ -74,110 +82,535 @@ KeyFunc = TypeVar('KeyFunc', Callable[['Image'], Distance],
 ###############################################################################
 
 
-def find_image(folders: Iterable[FolderPath],
-               recursive: bool = True) -> Generator['Image', None, None]:
+def find_image(folders: Iterable[FolderPath], recursive: bool = True,
+               threads: int = None, ordered: bool = False) \
+    -> Generator['Image', None, None]:
     '''Find next image in :folders: and yield its representation
-    as "Image" object
+    as "Image" object. The folders are scanned by a pool of threads,
+    images are yielded as soon as they are found. Every folder is scanned
+    only once even if it can be reached through symbolic links (no loops)
 
     :param folders:             paths to the folders,
     :param recursive:           recursive search - include subfolders
                                 (optional, "True" by default),
+    :param threads:             max number of threads scanning the folders
+                                (optional, "min(32, CPU number + 4)"
+                                by default),
+    :param ordered:             yield images in the same order every time:
+                                folder by folder (parent folders first),
+                                the images of a folder sorted by name
+                                (optional, "False" by default),
     :yield:                     next image as "Image" object,
     :raise FileNotFoundError:   any of the folders does not exist
     '''
 
+    pending: Deque[Tuple[FolderPath, FolderPath]] = deque()
+    visited: Set[FolderPath] = set() # Real paths of the folders
+    for path in folders:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f'File at "{path}" does not exist')
+
+        real_path = os.path.realpath(path)
+        if real_path not in visited:
+            visited.add(real_path)
+            pending.append((path, real_path))
+
+    if threads is None:
+        threads = min(32, (os.cpu_count() or 1) + 4)
+
+    running: Deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        try:
+            while pending or running:
+                # Do not queue up all the folders at once, there can be
+                # hundreds of thousands of them
+                while pending and len(running) < threads * 2:
+                    folder, real_path = pending.popleft()
+                    running.append(executor.submit(_scan_folder, folder,
+                                                   real_path, recursive,
+                                                   ordered))
+
+                if ordered:
+                    done = [running.popleft()]
+                else:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        running.remove(future)
+
+                for future in done:
+                    images, subfolders = future.result()
+                    for folder, real_path in subfolders:
+                        if real_path not in visited:
+                            visited.add(real_path)
+                            pending.append((folder, real_path))
+
+                    for path in images:
+                        yield Image(path)
+        finally:
+            # The search can be stopped before all the folders are scanned
+            for future in running:
+                future.cancel()
+
+def _scan_folder(folder: FolderPath, real_path: FolderPath, recursive: bool,
+                 ordered: bool) \
+    -> Tuple[List[ImagePath], List[Tuple[FolderPath, FolderPath]]]:
     IMG_SUFFIXES = {'.png', '.jpg', '.jpeg', '.bmp', '.pbm', '.pgm', '.ppm',
                     '.xbm', '.xpm'}
-    pattern = '**/*' if recursive else '*'
 
-    for path in folders:
-        p = Path(path)
-        if not p.exists():
-            raise FileNotFoundError(f'File at "{path}" does not exist')
+    images: List[ImagePath] = []
+    subfolders: List[Tuple[FolderPath, FolderPath]] = []
+    try:
+        with os.scandir(folder) as it:
+            entries = sorted(it, key=lambda e: e.name) if ordered else list(it)
+    except OSError:
+        # The folder cannot be read (no permission, removed, etc.)
+        return images, subfolders
+
+    # The file type is known from the folder listing on most file systems,
+    # so "is_file" and "is_dir" do not need the "stat" call
+    for entry in entries:
+        try:
+            suffix = os.path.splitext(entry.name)[1]
+            if suffix in IMG_SUFFIXES and entry.is_file():
+                images.append(entry.path)
+            elif recursive and entry.is_dir():
+                if entry.is_symlink():
+                    sub_real_path = os.path.realpath(entry.path)
+                else:
+                    sub_real_path = os.path.join(real_path, entry.name)
+                subfolders.append((entry.path, sub_real_path))
+        except OSError:
+            continue
+
+    return images, subfolders
+
+def _file_digest(path: FilePath, part_size: int = None) -> bytes:
+    # Digest of the first and last :part_size: bytes of the file
+    # or of the whole file if :part_size: is None
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        if part_size is None:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        else:
+            digest.update(f.read(part_size))
+            size = os.fstat(f.fileno()).st_size
+            f.seek(max(size - part_size, 0))
+            digest.update(f.read(part_size))
+
+    return digest.digest()
+
+class CopyFinder:
+    '''Find byte-identical image files among the images checked one
+    by one, so the copies are found while the images are still being
+    found. The files are compared by the size first, then by the digest
+    of their first and last 64 KB and only then by the digest of the whole
+    file, so most of the files are not read at all. The images are kept
+    in dicts by these keys, so an image is looked up at once (not compared
+    with every image of the same size) and every digest is calculated once
+    '''
 
-        for filename in p.glob(pattern):
-            if filename.is_file() and filename.suffix in IMG_SUFFIXES:
-                yield Image(str(filename))
+    PART_SIZE = 64 * 1024
 
-def image_grouping(images: Collection['Image'], sensitivity: Sensitivity) \
-    -> Generator[Tuple[GroupIndex, Group], None, None]:
-    '''Find similar images and group them. Yield a tuple with the group
-    index and image group when a new group has been added or existing one
-    has been modified (a new image has been added to the group)
+    def __init__(self) -> None:
+        # Images not read further yet by the first part of their key
+        # (the size and the digests known so far): they are read only
+        # when another image with the same part comes
+        self._pending: Dict[tuple, List['Image']] = {}
+        # Originals (images with no earlier identical image) by the full key
+        self._originals: Dict[tuple, 'Image'] = {}
+
+    def add(self, image: 'Image') -> None:
+        '''Add the image without checking it (e.g. the hash of it is
+        already known), so it can be found as the original of the next
+        images. The file is not read
+
+        :param image:   "Image" object
+        '''
+
+        try:
+            size = image.stat().st_size
+        except OSError:
+            return
+        self._pending.setdefault((size,), []).append(image)
+
+    def original(self, image: 'Image') -> Optional['Image']:
+        '''Find the earlier checked (or added) image identical to
+        the image and add the image if it is not a copy
+
+        :param image:   "Image" object,
+        :return:        the identical image or None if the image is not
+                        a copy (or the file cannot be read)
+        '''
+
+        try:
+            size = image.stat().st_size
+        except OSError:
+            return None
+
+        parts: List[Optional[int]] = [self.PART_SIZE]
+        if size > 2 * self.PART_SIZE:
+            # Otherwise the ends are the whole file
+            parts.append(None)
+        return self._find(image, (size,), parts)
+
+    def _find(self, image: 'Image', key: tuple,
+              parts: List[Optional[int]]) -> Optional['Image']:
+        for i, part_size in enumerate(parts):
+            if key not in self._pending:
+                self._pending[key] = [image]
+                return None
+
+            # The images with the same key so far are read now, they are
+            # earlier than the image
+            pending, self._pending[key] = self._pending[key], []
+            for other in pending:
+                other_key = self._extend(key, other, part_size)
+                if other_key is not None:
+                    self._find(other, other_key, parts[i+1:])
+
+            key = self._extend(key, image, part_size)
+            if key is None:
+                return None
+
+        original = self._originals.setdefault(key, image)
+        return None if original is image else original
+
+    @staticmethod
+    def _extend(key: tuple, image: 'Image', part_size: Optional[int]) \
+        -> Optional[tuple]:
+        try:
+            return key + (_file_digest(image.path, part_size),)
+        except OSError:
+            return None
+
+
+class Grouping:
+    '''Group similar images added block by block, so the groups are found
+    while the hashes are still being calculated. Two images are in the same
+    group if there is a chain of images between them where every 2
+    neighbours are similar (single linkage), so the groups do not depend
+    on the order of the images. A group keeps its index while new images
+    are added to it. If 2 groups are joined, the group with the smaller
+    index gets the images of the other one and the other group becomes
+    empty
 
-    :param images:      images to process,
     :param sensitivity: maximal difference between hashes of 2 images
-                        when they are considered similar,
-    :yield:             tuple with the group index and list with grouped
-                        similar images,
-    :raise TypeError:   any of the hashes is not integer
+                        when they are considered similar
     '''
 
-    image_groups: List[Group] = []
+    def __init__(self, sensitivity: Sensitivity) -> None:
+        self.sensitivity = sensitivity
+        self._index = index.IncrementalIndex(sensitivity)
+        self._sets = index.DisjointSet()
+        self._images: List['Image'] = []
+        self._numbers: Dict[ImagePath, int] = {}
+
+        # Image indices (in the order they joined the group) and the group
+        # indices by the roots, number of the images with the difference
+        # set by the group indices
+        self._members: Dict[int, List[int]] = {}
+        self._group_index: Dict[int, GroupIndex] = {}
+        self._ready: Dict[GroupIndex, int] = {}
+        self._next_index: GroupIndex = 0
+        # All the known pairs of the images (also the ones with bigger
+        # distance than the sensitivity) for "dendrogram"
+        self._links: List[index.Pairs] = []
+
+        self.duplicates_num = 0
 
-    try:
-        bktree = pybktree.BKTree(Image.hamming, images)
-    except TypeError:
-        raise TypeError('Hashes must be integers')
+    @property
+    def groups_num(self) -> int:
+        '''Number of the (not empty) groups'''
+
+        return len(self._group_index)
+
+    def add(self, images: Sequence['Image'],
+            pairs: Iterable[Pair] = None) -> List[Tuple[GroupIndex, Group]]:
+        '''Add images and find the groups changed by them. The images
+        already in a group keep their positions, the new images are
+        at the end of it. The attribute "difference" of a new image
+        of a group is set to the difference between it and the first
+        image of the group
+
+        :param images:      images to add,
+        :param pairs:       pairs of the new images with all the images
+                            (e.g. from "SimilarityIndex", the pairs with
+                            the images not added and the pairs with bigger
+                            distance than the sensitivity are skipped),
+                            if None, the pairs are found by comparing
+                            the hashes (optional),
+        :return:            list with tuples (group index, group) of the new
+                            and changed groups sorted by the index, the group
+                            is empty if it has been joined with another one,
+        :raise TypeError:   any of the hashes is not integer,
+        :raise ValueError:  any of the hashes is not 128-bit unsigned integer
+        '''
 
-    checked: Dict['Image', GroupIndex] = dict()
+        if pairs is None:
+            hashes = hashing.to_hash_array([image.dhash for image in images])
 
-    for image in images:
-        distance, closest = _closest(bktree, image, sensitivity)
-        if closest is None:
-            continue
+        start = len(self._images)
+        self._images.extend(images)
+        self._sets.add(len(images))
+        for number, image in enumerate(images, start):
+            self._numbers[image.path] = number
+
+        if pairs is None:
+            i, j, d = self._index.add(hashes)
+        else:
+            # The earlier added image goes first as with the hashes
+            numbers = self._numbers
+            known = [(*sorted((numbers[path1], numbers[path2])), distance)
+                     for path1, path2, distance in pairs
+                     if path1 in numbers and path2 in numbers]
+            i, j, d = np.array(known, np.intp).reshape(-1, 3).T
+        self._links.append((i, j, d))
+        similar = d <= self.sensitivity
+        links = zip(i[similar].tolist(), j[similar].tolist())
+
+        changed = set()
+        emptied = []
+        for item1, item2 in links:
+            root1, root2 = self._sets.find(item1), self._sets.find(item2)
+            if root1 == root2:
+                continue
+
+            members1 = self._members.pop(root1, [root1])
+            members2 = self._members.pop(root2, [root2])
+            self.duplicates_num += (len(members1) == 1) + (len(members2) == 1)
+
+            # The group with the smaller index keeps its images first
+            index1 = self._group_index.pop(root1, None)
+            index2 = self._group_index.pop(root2, None)
+            if index2 is not None and (index1 is None or index2 < index1):
+                members1, members2 = members2, members1
+                index1, index2 = index2, index1
+            if index2 is not None:
+                emptied.append(index2)
+                del self._ready[index2]
+
+            root, _ = self._sets.union(root1, root2)
+            members1.extend(members2)
+            self._members[root] = members1
+            if index1 is not None:
+                self._group_index[root] = index1
+            changed.add(root)
+
+        # A root might have been joined with another group since
+        roots = sorted({self._sets.find(root) for root in changed},
+                       key=lambda root: self._members[root][0])
+        for root in roots:
+            if root not in self._group_index:
+                self._group_index[root] = self._next_index
+                self._ready[self._next_index] = 0
+                self._next_index += 1
+
+        res = [(group_index, []) for group_index in emptied]
+        res.extend((self._group_index[root], self._group(root))
+                   for root in roots)
+        res.sort(key=lambda group: group[0])
+        return res
+
+    def dendrogram(self, max_sensitivity: Sensitivity = None) \
+        -> 'Dendrogram':
+        '''Make the dendrogram of all the added images, so they can be
+        regrouped with another sensitivity
+
+        :param max_sensitivity: maximal distance of the pairs known
+                                for all the images (e.g. the radius
+                                of "SimilarityIndex" if the pairs come
+                                from it), the sensitivity by default
+                                (optional),
+        :return:                "Dendrogram" object
+        '''
+
+        if max_sensitivity is None:
+            max_sensitivity = self.sensitivity
+        links = self._links or [(np.empty(0, np.intp),) * 3]
+        i, j, d = (np.concatenate(column) for column in zip(*links))
+        return Dendrogram(self._images, (i, j, d), max_sensitivity)
+
+    def _group(self, root: int) -> Group:
+        group_index = self._group_index[root]
+        group = [self._images[i] for i in self._members[root]]
+        first = group[0].dhash
+        for image in group[self._ready[group_index]:]:
+            image.difference = bin(first ^ image.dhash).count('1')
+        self._ready[group_index] = len(group)
+        return group
+
+
+class Dendrogram:
+    '''Single-linkage dendrogram of images: the minimum spanning forest
+    of the graph of the similar images. The images are in the same group
+    with a sensitivity if they are connected by the edges with the distance
+    not bigger than the sensitivity, so the images are regrouped with
+    another sensitivity without comparing the hashes again
+
+    :param images:          images,
+    :param pairs:           tuple with the arrays (i, j, distance) of
+                            the pairs of the images (i and j are
+                            the indices of the images),
+    :param max_sensitivity: maximal distance of the pairs known for
+                            all the images (the groups with a bigger
+                            sensitivity cannot be found)
+    '''
+
+    def __init__(self, images: Sequence['Image'], pairs: index.Pairs,
+                 max_sensitivity: Sensitivity) -> None:
+        self.max_sensitivity = max_sensitivity
+        self._images = list(images)
+
+        # Kruskal's algorithm: the pairs joining 2 trees in the order
+        # of the distance are the edges of the forest
+        i, j, d = pairs
+        order = np.argsort(d, kind='stable')
+        trees = index.DisjointSet(len(self._images))
+        edges = []
+        for pos, item1, item2 in zip(order.tolist(), i[order].tolist(),
+                                     j[order].tolist()):
+            root, merged = trees.union(item1, item2)
+            if root != merged:
+                edges.append(pos)
+        self._i, self._j, self._d = i[edges], j[edges], d[edges]
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def groups(self, sensitivity: Sensitivity,
+               keep: Callable[['Image'], bool] = None) -> List[Group]:
+        '''Group the images with the sensitivity. The images of a group
+        are in the same order as the images passed to the constructor,
+        the groups are in the order of their first images. The attribute
+        "difference" of an image is set to the difference between it and
+        the first image of the group
+
+        :param sensitivity: maximal difference between hashes of 2 images
+                            when they are considered similar,
+        :param keep:        function returning False if an image has to be
+                            skipped (e.g. it has been deleted), the group
+                            stays the same otherwise (optional),
+        :return:            list with the groups,
+        :raise ValueError:  :sensitivity: is bigger than "max_sensitivity"
+        '''
 
-        # 'closest' goes to the same group as 'image'
-        if image in checked and closest not in checked:
-            yield _add_img_to_existing_group(image, closest, checked,
-                                             image_groups)
-        # and vice versa
-        if image not in checked and closest in checked:
-            yield _add_img_to_existing_group(closest, image, checked,
-                                             image_groups)
-        # create a new group with 'image' and 'closest' it it
-        if image not in checked and closest not in checked:
-            yield _add_new_group(image, closest, checked, image_groups,
-                                 distance)
-
-def _closest(bktree: pybktree.BKTree, image: 'Image',
-             sensitivity: Sensitivity) \
-    -> Tuple[Optional[Distance], Optional['Image']]:
-    closests = bktree.find(image, sensitivity)
-
-    # if len == 1, there's only 'image' itself
-    if len(closests) == 1:
-        return None, None
-
-    distance, closest = closests[1]
-    if image == closest: # again, 'image' itself
-        distance, closest = closests[0]
-
-    return distance, closest
-
-def _add_img_to_existing_group(img_in_group: 'Image',
-                               img_not_in_group: 'Image',
-                               checked: Dict['Image', int],
-                               image_groups: List[Group]) \
-    -> Tuple[GroupIndex, Group]:
-    group_num = checked[img_in_group]
-    first_img = image_groups[group_num][0]
-    img_not_in_group.difference = first_img.hamming(img_not_in_group)
-    image_groups[group_num].append(img_not_in_group)
-    checked[img_not_in_group] = group_num
-
-    return (group_num, image_groups[group_num])
-
-def _add_new_group(img1: 'Image', img2: 'Image', checked: Dict['Image', int],
-                   image_groups: List[Group], distance: Distance) \
-    -> Tuple[GroupIndex, Group]:
-    img2.difference = distance
-    image_groups.append([img1, img2])
-    checked[img1] = len(image_groups) - 1
-    checked[img2] = len(image_groups) - 1
-
-    group_num = len(image_groups) - 1
-    return (group_num, image_groups[group_num])
+        if sensitivity > self.max_sensitivity:
+            raise ValueError('The pairs with such distance are not known')
+
+        # The edges are sorted by the distance
+        end = int(np.searchsorted(self._d, sensitivity, side='right'))
+        sets = index.DisjointSet(len(self._images))
+        for item1, item2 in zip(self._i[:end].tolist(),
+                                self._j[:end].tolist()):
+            sets.union(item1, item2)
+
+        members: Dict[int, List[int]] = {}
+        items = np.unique(np.concatenate((self._i[:end], self._j[:end])))
+        for item in items.tolist():
+            members.setdefault(sets.find(item), []).append(item)
+
+        kept = []
+        for indices in members.values():
+            if keep is not None:
+                indices = [i for i in indices if keep(self._images[i])]
+            if len(indices) > 1:
+                kept.append(indices)
+
+        groups = []
+        for indices in sorted(kept):
+            group = [self._images[i] for i in indices]
+            first = group[0].dhash
+            for image in group:
+                image.difference = bin(first ^ image.dhash).count('1')
+            groups.append(group)
+        return groups
+
+
+class SimilarityIndex:
+    '''Similarity index kept in the cache (see "cache.Cache"): the pairs
+    of the indexed images are read from the cache, only the hashes of
+    the new images (or the images changed since they were indexed) are
+    compared with the hashes of the indexed images and added to the index.
+    The hashes of the indexed images are read from the cache when the first
+    new image comes. The pairs are searched within the max radius
+    ("Cache.RADIUS") whatever the sensitivity of the scan is, so the images
+    can be regrouped with any sensitivity up to it without rescanning
+
+    :param hash_cache:  "Cache" object,
+    :param threads:     number of threads searching the pairs (optional,
+                        1 by default),
+    :raise OSError:     some problem while writing cache file
+    '''
+
+    def __init__(self, hash_cache: cache.Cache, threads: int = 1) -> None:
+        # The pairs found within a smaller radius are searched again
+        hash_cache.widen(hash_cache.RADIUS)
+        self.radius = hash_cache.RADIUS
+        self.threads = threads
+        self._cache = hash_cache
+
+        self._index: Optional[index.IncrementalIndex] = None
+        # Paths of the hashes in the index and positions of the current
+        # hashes by the paths (the old hashes of a path are deleted)
+        self._paths: List[ImagePath] = []
+        self._positions: Dict[ImagePath, int] = {}
+
+    def pairs(self, images: Sequence['Image'],
+              indexed: Container[ImagePath]) -> List[Pair]:
+        '''Find the pairs of the images with all the indexed images
+        (within "radius"). The new images become indexed, their pairs
+        are added to the cache
+
+        :param images:      images with calculated hashes (they have to be
+                            in the cache),
+        :param indexed:     paths of the images indexed already,
+        :return:            list with tuples (path1, path2, distance),
+        :raise OSError:     some problem while reading cache file,
+        :raise TypeError:   any of the hashes is not integer,
+        :raise ValueError:  any of the hashes is not 128-bit unsigned integer
+        '''
+
+        old = [image.path for image in images if image.path in indexed]
+        new = [image for image in images if image.path not in indexed]
+
+        found = self._cache.pairs(old)
+        if new:
+            new_pairs = self._search(new)
+            self._cache.add_pairs([image.path for image in new], new_pairs)
+            found.extend(new_pairs)
+        return found
+
+    def _search(self, images: Sequence['Image']) -> List[Pair]:
+        hashes = hashing.to_hash_array([image.dhash for image in images])
+        if self._index is None:
+            self._load()
+
+        start = len(self._paths)
+        for number, image in enumerate(images, start):
+            self._paths.append(image.path)
+            self._positions[image.path] = number
+
+        i, j, d = self._index.add(hashes)
+        found = []
+        for pos1, pos2, distance in zip(i.tolist(), j.tolist(), d.tolist()):
+            path1, path2 = self._paths[pos1], self._paths[pos2]
+            if self._positions[path1] != pos1 or path1 == path2:
+                continue
+            # The old hash of a changed image is still in the index
+            # until the image is hashed and added again
+            if pos1 < start and self._cache.replaced(path1):
+                continue
+            found.append((path2, path1, distance))
+        return found
+
+    def _load(self) -> None:
+        hashes = self._cache.indexed()
+        self._index = index.IncrementalIndex(self.radius, self.threads)
+        self._paths = list(hashes)
+        self._positions = {path: i for i, path in enumerate(self._paths)}
+        if hashes:
+            self._index.insert(hashing.to_hash_array(list(hashes.values())))
 
 
 class Sort:
@@ -265,56 +698,10 @@ class Image:
         self.difference: Distance = 0
         self.thumb: QtGui.QImage = None
         self.size: FileSize = None
+        self.format: Optional[ImageFormat] = None
         self._width: Width = None
         self._height: Height = None
-
-    def calculate_dhash(self) -> Hash:
-        '''Return perceptual hash of the image and assign it
-        to the attribute "dhash"
-
-        :return: perceptual hash or -1 if the hash cannot be calculated
-        '''
-
-        SIZE = 8 # Hash-vector size is 2 * (SIZE ** 2)
-
-        try:
-            qimg = self.scaled(SIZE+1, SIZE+1)
-        except OSError:
-            self.dhash = -1
-        else:
-            grey = qimg.convertToFormat(QtGui.QImage.Format_Grayscale8)
-            self.dhash = self._form_hash(grey, SIZE)
-
-        return self.dhash
-
-    @staticmethod
-    def _form_hash(image: QtGui.QImage, size: int) -> Hash:
-        # Code is taken from library "dhash" except the "PyQt" parts
-        row_hash, col_hash = 0, 0
-        for y in range(size):
-            for x in range(size):
-                current_pixel = QtGui.qGray(image.pixel(x, y))
-                right_pixel = QtGui.qGray(image.pixel(x+1, y))
-                down_pixel = QtGui.qGray(image.pixel(x, y+1))
-
-                row_bit = current_pixel < right_pixel
-                row_hash = row_hash << 1 | row_bit
-
-                col_bit = current_pixel < down_pixel
-                col_hash = col_hash << 1 | col_bit
-
-        return row_hash << (size * size) | col_hash
-
-    def dhash_parallel(self) -> 'Image':
-        '''Calculate hash and return "Image" object itself with
-        the hash assigned to attribute "dhash". It is used with
-        library "multiprocessing"
-
-        :return: "Image" object (self)
-        '''
-
-        self.calculate_dhash()
-        return self
+        self._stat: os.stat_result = None
 
     def hamming(self, image: 'Image') -> Distance:
         '''Calculate the Hamming distance between two images
@@ -383,6 +770,10 @@ class Image:
 
         path = self.path
         reader = QtGui.QImageReader(path)
+        if self._width is None:
+            # The header is read anyway, so the file is not opened again
+            # when the dimensions are needed
+            self._read_info(reader)
         reader.setScaledSize(QtCore.QSize(width, height))
 
         if not reader.canRead():
@@ -395,13 +786,39 @@ class Image:
             raise OSError(e)
         return img
 
-    def _set_dimensions(self) -> None:
-        image = QtGui.QImageReader(self.path)
-        size = image.size()
+    def _read_info(self, reader: QtGui.QImageReader) -> bool:
+        size = reader.size()
         if not size.isValid():
-            raise OSError(f'Size of the "{self.path}" image cannot be read')
+            return False
 
         self._width, self._height = size.width(), size.height()
+        self.format = bytes(reader.format()).decode() or None
+        return True
+
+    def _set_dimensions(self) -> None:
+        if not self._read_info(QtGui.QImageReader(self.path)):
+            raise OSError(f'Size of the "{self.path}" image cannot be read')
+
+    def set_dimensions(self, width: Width, height: Height) -> None:
+        '''Set the width and height of the image known beforehand (e.g.
+        kept in the cache), so the file is not read to get them
+
+        :param width:   width of the image,
+        :param height:  height of the image
+        '''
+
+        self._width, self._height = width, height
+
+    def info(self) -> Tuple[Optional[Width], Optional[Height],
+                            Optional[ImageFormat]]:
+        '''Return the info of the image known so far (the file is not
+        read)
+
+        :return: tuple with the width, height and format of the image,
+                 None if it has not been read yet
+        '''
+
+        return self._width, self._height, self.format
 
     @property
     def width(self) -> Width:
@@ -428,8 +845,10 @@ class Image:
         return self._height
 
     def _set_filesize(self) -> None:
+        # The status of the file is read once (and it is read anyway
+        # when the cache is checked)
         try:
-            image_size = os.path.getsize(self.path)
+            image_size = self.stat().st_size
         except OSError:
             raise OSError(f'Cannot get the file size of "{self.path}"')
         else:
@@ -450,6 +869,18 @@ class Image:
         formatted_size = round(self.size / size_format.coefficient, 1)
         return formatted_size
 
+    def stat(self) -> os.stat_result:
+        '''Return the status of the image file (see "os.stat"). It is read
+        only once
+
+        :return:        "os.stat_result" object,
+        :raise OSError: the file does not exist, etc.
+        '''
+
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
     def delete(self) -> None:
         '''Delete the image from the disk
 
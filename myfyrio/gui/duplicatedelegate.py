@@ -0,0 +1,121 @@
+'''Copyright 2020 Maxim Shpak <maxim.shpak@posteo.uk>
+
+This file is part of Myfyrio.
+
+Myfyrio is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Myfyrio is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
+
+-------------------------------------------------------------------------------
+
+Module implementing the delegate painting found duplicate images
+'''
+
+from typing import TYPE_CHECKING, List, Tuple
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from myfyrio.gui import duplicatemodel
+
+if TYPE_CHECKING:
+    from myfyrio import config
+
+
+class DuplicateDelegate(QtWidgets.QStyledItemDelegate):
+    '''Delegate painting a duplicate image of "DuplicateModel": its thumbnail
+    and all info about it (its similarity rate, size and path). The selected
+    images are darker. The text wraps at any letter
+
+    :param conf:    programme's preferences as a "Config" object,
+    :param parent:  delegate's parent (optional)
+    '''
+
+    # Space between the images (px)
+    SPACING = 10
+    # Max number of the lines of the size and the path
+    SIZE_LINES = 2
+    PATH_LINES = 3
+
+    def __init__(self, conf: 'config.Config',
+                 parent: QtCore.QObject = None) -> None:
+        super().__init__(parent)
+
+        self._conf = conf
+
+    def _texts(self, index: QtCore.QModelIndex) -> List[Tuple[str, int]]:
+        # Texts shown under the thumbnail and their max numbers of lines
+        texts = []
+        if self._conf['show_similarity']:
+            texts.append((index.data(duplicatemodel.SimilarityRole), 1))
+        if self._conf['show_size']:
+            texts.append((index.data(duplicatemodel.SizeRole),
+                          self.SIZE_LINES))
+        if self._conf['show_path']:
+            texts.append((index.data(QtCore.Qt.DisplayRole),
+                          self.PATH_LINES))
+        return texts
+
+    def sizeHint(self, option: QtWidgets.QStyleOptionViewItem,
+                 index: QtCore.QModelIndex) -> QtCore.QSize:
+        lines = 0
+        if self._conf['show_similarity']:
+            lines += 1
+        if self._conf['show_size']:
+            lines += self.SIZE_LINES
+        if self._conf['show_path']:
+            lines += self.PATH_LINES
+
+        size = self._conf['size']
+        line_height = option.fontMetrics.lineSpacing()
+        return QtCore.QSize(size + self.SPACING,
+                            size + lines * line_height + 2 * self.SPACING)
+
+    def paint(self, painter: QtGui.QPainter,
+              option: QtWidgets.QStyleOptionViewItem,
+              index: QtCore.QModelIndex) -> None:
+        if index.data(duplicatemodel.ImageRole) is None:
+            return
+
+        size = self._conf['size']
+        left = option.rect.x() + self.SPACING // 2
+        top = option.rect.y() + self.SPACING // 2
+
+        painter.save()
+
+        thumb_rect = QtCore.QRect(left, top, size, size)
+        pixmap = index.data(QtCore.Qt.DecorationRole)
+        if pixmap is not None:
+            thumb_rect = QtCore.QRect(
+                left + (size - pixmap.width()) // 2, top,
+                pixmap.width(), pixmap.height()
+            )
+            painter.drawPixmap(thumb_rect, pixmap)
+
+        if index.data(QtCore.Qt.CheckStateRole) == QtCore.Qt.Checked:
+            painter.fillRect(thumb_rect, QtGui.QColor(0, 0, 0, 128))
+
+        text_color = option.palette.color(QtGui.QPalette.WindowText)
+        painter.setPen(text_color)
+        painter.drawRect(thumb_rect.adjusted(0, 0, -1, -1))
+
+        text_option = QtGui.QTextOption(QtCore.Qt.AlignHCenter)
+        text_option.setWrapMode(QtGui.QTextOption.WrapAnywhere)
+        line_height = option.fontMetrics.lineSpacing()
+        y = top + size + self.SPACING // 2
+        for text, lines in self._texts(index):
+            # The lines after the max number of them are cut off
+            rect = QtCore.QRectF(left, y, size, lines * line_height)
+            painter.setClipRect(rect)
+            painter.drawText(rect, text, text_option)
+            y += lines * line_height
+
+        painter.restore()
@@ -0,0 +1,430 @@
+'''Copyright 2020 Maxim Shpak <maxim.shpak@posteo.uk>
+
+This file is part of Myfyrio.
+
+Myfyrio is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Myfyrio is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
+
+-------------------------------------------------------------------------------
+
+Module implementing the model of found duplicate images
+'''
+
+import bisect
+from typing import (TYPE_CHECKING, Any, Dict, Iterable, Iterator, List,
+                    Optional, Set, Tuple)
+
+from PyQt5 import QtCore, QtGui
+
+from myfyrio import core, resources, thumbnailstore
+from myfyrio.gui import thumbnailcache, thumbnailscheduler
+from myfyrio.logger import Logger
+
+if TYPE_CHECKING:
+    from myfyrio import config
+
+logger = Logger.getLogger('duplicatemodel')
+
+# Roles of the data of a duplicate image besides the standard ones
+# (path - "DisplayRole", thumbnail - "DecorationRole", selection
+# - "CheckStateRole")
+ImageRole = QtCore.Qt.UserRole
+SimilarityRole = QtCore.Qt.UserRole + 1
+SizeRole = QtCore.Qt.UserRole + 2
+
+################################## Types ######################################
+# Rectangle of cells: first row, last row, first column, last column
+Cells = Tuple[int, int, int, int]
+###############################################################################
+
+
+class DuplicateModel(QtCore.QAbstractTableModel):
+    '''Model of found duplicate images: a row is a group of duplicate
+    images, a column is the position of an image in the group (the groups
+    are in the order of their indices, the images of a group are sorted
+    with the chosen sort). The thumbnails are made by "ThumbnailScheduler"
+    when they are asked for the first time (so only for the images that
+    are viewed, see also "updateThumbnails") and kept in "ThumbnailCache",
+    so the memory they take is limited by the preference "thumbnail_cache"
+    and the ones viewed recently are shown at once. If the preference
+    "disk_thumbnails" is on, the thumbnails are also kept in
+    "ThumbnailStore" on the disk
+
+    :param conf:    programme's preferences as a "Config" object,
+    :param parent:  model's parent (optional)
+    '''
+
+    def __init__(self, conf: 'config.Config',
+                 parent: QtCore.QObject = None) -> None:
+        super().__init__(parent)
+
+        self._conf = conf
+
+        # Indices of the groups (in ascending order), images of the groups
+        # and number of the images added to the groups by the rows
+        self._indices: List[core.GroupIndex] = []
+        self._groups: List[core.Group] = []
+        self._added: List[int] = []
+        self._columns = 0
+        # Group indices of the images
+        self._group_of: Dict[int, core.GroupIndex] = {}
+        # Paths of the images and the shown (canonical) paths, so the file
+        # system is not asked on every painting
+        self._paths: Dict[int, Tuple[core.ImagePath, str]] = {}
+
+        # Images are identified by "id" as the paths can be changed
+        self._selected: Set[int] = set()
+
+        self._scheduler = thumbnailscheduler.ThumbnailScheduler(self)
+        self._scheduler.made.connect(self._setThumbnail)
+
+        # The cache is kept when the model is cleared, so the thumbnails
+        # of the images found again by the next search are not remade
+        self._cache = thumbnailcache.ThumbnailCache(self._budget())
+        self._store = self._thumbnailStore()
+
+    def _budget(self) -> int:
+        # The preference is in megabytes
+        return self._conf['thumbnail_cache'] * 1024**2
+
+    def _thumbnailStore(self) -> Optional[thumbnailstore.ThumbnailStore]:
+        if self._conf['disk_thumbnails']:
+            return thumbnailstore.ThumbnailStore()
+        return None
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) \
+        -> int:
+        if parent.isValid():
+            return 0
+        return len(self._groups)
+
+    def columnCount(self,
+                    parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return self._columns
+
+    def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlags:
+        if self.image(index) is None:
+            return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsUserCheckable
+
+    def data(self, index: QtCore.QModelIndex,
+             role: int = QtCore.Qt.DisplayRole) -> Any:
+        image = self.image(index)
+        if image is None:
+            return None
+
+        if role == ImageRole:
+            return image
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.ToolTipRole):
+            return self._displayPath(image)
+        if role == QtCore.Qt.DecorationRole:
+            return self._thumbnail(image)
+        if role == QtCore.Qt.CheckStateRole:
+            if id(image) in self._selected:
+                return QtCore.Qt.Checked
+            return QtCore.Qt.Unchecked
+        if role == SimilarityRole:
+            return f'{image.similarity()}%'
+        if role == SizeRole:
+            return self._size(image)
+        return None
+
+    def setData(self, index: QtCore.QModelIndex, value: Any,
+                role: int = QtCore.Qt.EditRole) -> bool:
+        image = self.image(index)
+        if image is None or role != QtCore.Qt.CheckStateRole:
+            return False
+
+        if value == QtCore.Qt.Checked:
+            self._selected.add(id(image))
+        else:
+            self._selected.discard(id(image))
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def image(self, index: QtCore.QModelIndex) -> Optional[core.Image]:
+        '''Return the image at the index
+
+        :param index:   index of the model,
+        :return:        "Image" object or None if there is no image
+        '''
+
+        if not index.isValid() or index.row() >= len(self._groups):
+            return None
+        group = self._groups[index.row()]
+        if index.column() >= len(group):
+            return None
+        return group[index.column()]
+
+    def _displayPath(self, image: core.Image) -> str:
+        # The path is read again only if the image has been renamed
+        path, display_path = self._paths.get(id(image), (None, ''))
+        if path != image.path:
+            display_path = QtCore.QFileInfo(image.path).canonicalFilePath()
+            self._paths[id(image)] = (image.path, display_path)
+        return display_path
+
+    def _size(self, image: core.Image) -> str:
+        try:
+            width, height = image.width, image.height
+        except OSError as e:
+            logger.exception(e)
+            width, height = (0, 0)
+
+        size_format = core.SizeFormat(self._conf['size_format'])
+        try:
+            filesize = image.filesize(size_format)
+        except OSError as e:
+            logger.exception(e)
+            filesize = 0
+
+        return f'{width}x{height}, {filesize} {size_format.name}'
+
+    def addGroup(self, group_index: core.GroupIndex,
+                 images: core.Group) -> None:
+        '''Add a group or the new images of an existing group (the images
+        at the end of :images: the model has not got yet)
+
+        :param group_index: index of the group (the index of a new group
+                            is bigger than the ones of the added groups),
+        :param images:      images of the group
+        '''
+
+        row = bisect.bisect_left(self._indices, group_index)
+        if row == len(self._indices) or self._indices[row] != group_index:
+            self.beginInsertRows(QtCore.QModelIndex(), row, row)
+            self._indices.insert(row, group_index)
+            self._groups.insert(row, [])
+            self._added.insert(row, 0)
+            self.endInsertRows()
+
+        group = self._groups[row]
+        new_images = images[self._added[row]:]
+        self._added[row] = len(images)
+        for image in new_images:
+            group.insert(self._insertIndex(group, image), image)
+            self._group_of[id(image)] = group_index
+            self._displayPath(image)
+            if not self._conf['lazy']:
+                self._thumbnail(image,
+                                thumbnailscheduler.Priority.BACKGROUND)
+
+        self._setColumns(len(group))
+        self.dataChanged.emit(self.index(row, 0),
+                              self.index(row, len(group) - 1))
+
+    def _insertIndex(self, group: core.Group, image: core.Image) -> int:
+        key = core.Sort(self._conf['sort']).key()
+
+        def sort_key(image: core.Image) -> Any:
+            try:
+                if image.size is None:
+                    image.filesize()
+                return key(image)
+            except OSError:
+                # The size of the image cannot be read
+                return 0
+
+        left, right = 0, len(group) - 1
+        image_key = sort_key(image)
+
+        while left <= right:
+            middle = (right + left) // 2
+
+            if image_key < sort_key(group[middle]):
+                right = middle - 1
+            else:
+                left = middle + 1
+
+        return left
+
+    def _setColumns(self, columns: int) -> None:
+        if columns > self._columns:
+            self.beginInsertColumns(QtCore.QModelIndex(), self._columns,
+                                    columns - 1)
+            self._columns = columns
+            self.endInsertColumns()
+
+    def removeGroup(self, group_index: core.GroupIndex) -> None:
+        '''Remove the group (e.g. it has been joined with another one)
+
+        :param group_index: index of the group
+        '''
+
+        row = bisect.bisect_left(self._indices, group_index)
+        if row == len(self._indices) or self._indices[row] != group_index:
+            return
+        self._removeRow(row)
+
+    def _removeRow(self, row: int) -> None:
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        group_index = self._indices.pop(row)
+        del self._added[row]
+        for image in self._groups.pop(row):
+            # The images of a group joined with another one are
+            # in the other group already (added before this one
+            # is removed), they keep their selection and thumbnails
+            if self._group_of.get(id(image)) == group_index:
+                self._forget(image)
+        self.endRemoveRows()
+
+    def _forget(self, image: core.Image) -> None:
+        self._group_of.pop(id(image), None)
+        self._paths.pop(id(image), None)
+        self._selected.discard(id(image))
+
+    def removeImages(self, images: Iterable[core.Image]) -> None:
+        '''Remove the images (e.g. they have been deleted), the groups
+        with less than 2 images left are removed too
+
+        :param images: images to remove
+        '''
+
+        removed = {id(image) for image in images}
+        for row in reversed(range(len(self._groups))):
+            group = self._groups[row]
+            left = [image for image in group if id(image) not in removed]
+            if len(left) == len(group):
+                continue
+
+            if len(left) < 2:
+                self._removeRow(row)
+                continue
+
+            for image in group:
+                if id(image) in removed:
+                    self._forget(image)
+            self._groups[row] = left
+            self.dataChanged.emit(self.index(row, 0),
+                                  self.index(row, len(group) - 1))
+
+    def clear(self) -> None:
+        '''Remove all the groups'''
+
+        self._scheduler.clear()
+
+        self.beginResetModel()
+        self._indices.clear()
+        self._groups.clear()
+        self._added.clear()
+        self._columns = 0
+        self._group_of.clear()
+        self._paths.clear()
+        self._selected.clear()
+        self._cache.setBudget(self._budget())
+        self._store = self._thumbnailStore()
+        self.endResetModel()
+
+    def selectedImages(self) -> List[core.Image]:
+        '''Return the selected images
+
+        :return: list with the selected images in the order of the rows
+        '''
+
+        return [image for group in self._groups for image in group
+                if id(image) in self._selected]
+
+    def hasSelected(self) -> bool:
+        '''Check if there are any selected images
+
+        :return: True - there are selected images, False - otherwise
+        '''
+
+        return bool(self._selected)
+
+    def autoSelect(self) -> None:
+        '''Select all the images of every group except the first one'''
+
+        for group in self._groups:
+            self._selected.update(id(image) for image in group[1:])
+        self._changed()
+
+    def unselect(self) -> None:
+        '''Unselect all the selected images'''
+
+        self._selected.clear()
+        self._changed()
+
+    def _changed(self) -> None:
+        if self._groups:
+            self.dataChanged.emit(
+                self.index(0, 0),
+                self.index(len(self._groups) - 1, self._columns - 1)
+            )
+
+    def _thumbnailKey(self, image: core.Image) \
+        -> thumbnailcache.ThumbnailKey:
+        return thumbnailcache.thumbnailKey(image, self._conf['size'])
+
+    def _thumbnail(self, image: core.Image,
+                   priority: thumbnailscheduler.Priority
+                   = thumbnailscheduler.Priority.VISIBLE) \
+        -> Optional[QtGui.QPixmap]:
+        pixmap = self._cache.get(self._thumbnailKey(image))
+        if pixmap is None:
+            self._scheduler.request(image, self._conf['size'], self._store,
+                                    priority)
+        return pixmap
+
+    def _setThumbnail(self, image: core.Image) -> None:
+        if id(image) not in self._group_of:
+            return # The image has been removed since
+
+        pixmap = QtGui.QPixmap()
+        if not pixmap.convertFromImage(image.thumb):
+            pixmap = self._errorThumbnail(image)
+        image.thumb = None
+        self._cache.put(self._thumbnailKey(image), pixmap)
+
+        row = bisect.bisect_left(self._indices, self._group_of[id(image)])
+        column = next(column for column, img
+                      in enumerate(self._groups[row]) if img is image)
+        index = self.index(row, column)
+        self.dataChanged.emit(index, index, [QtCore.Qt.DecorationRole])
+
+    def _errorThumbnail(self, image: core.Image) -> QtGui.QPixmap:
+        err_msg = ('Something went wrong while converting the image '
+                   f'at "{image.path}" from QImage into QPixmap')
+        logger.error(err_msg)
+
+        size = self._conf['size']
+        err_img = resources.Image.ERR_IMG.get() # pylint: disable=no-member
+        err_pixmap = QtGui.QPixmap(err_img)
+        return err_pixmap.scaled(size, size)
+
+    def _cellImages(self, cells: Cells) -> Iterator[core.Image]:
+        first_row, last_row, first_column, last_column = cells
+        for group in self._groups[max(first_row, 0):last_row+1]:
+            yield from group[max(first_column, 0):last_column+1]
+
+    def updateThumbnails(self, visible: Cells,
+                         prefetch: Optional[Cells] = None) -> None:
+        '''Queue making the thumbnails of the cells that are about to be
+        viewed (with the priority lower than the one of the viewed cells).
+        In "lazy" mode, the queued jobs of the other cells are cancelled
+
+        :param visible:     viewed cells,
+        :param prefetch:    cells that are about to be viewed (optional)
+        '''
+
+        areas = [visible] if prefetch is None else [visible, prefetch]
+        if self._conf['lazy']:
+            keep = {id(image) for cells in areas
+                    for image in self._cellImages(cells)}
+            self._scheduler.cancel(keep)
+
+        if prefetch is not None:
+            for image in self._cellImages(prefetch):
+                self._thumbnail(image, thumbnailscheduler.Priority.PREFETCH)
@@ -20,28 +20,44 @@ along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
 Module implementing widget rendering found duplicate images
 '''
 
-from typing import TYPE_CHECKING, Callable, List, Tuple
+import pathlib
+import subprocess
+import sys
+import threading
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
 
 from PyQt5 import QtCore, QtWidgets
 
-from myfyrio.gui import errornotifier, imagegroupwidget
+from myfyrio import core
+from myfyrio.gui import (duplicatedelegate, duplicatemodel, errornotifier,
+                         utils)
 from myfyrio.logger import Logger
 
 if TYPE_CHECKING:
-    from myfyrio import config, core
+    from myfyrio import config
+    from PyQt5 import QtGui
 
 logger = Logger.getLogger('imageviewwidget')
 
 
-class ImageViewWidget(QtWidgets.QWidget):
-    '''Widget rendering found duplicate images
+class ImageViewWidget(QtWidgets.QTableView):
+    '''Widget rendering found duplicate images: a row is a group of
+    duplicate images, every image is painted with its thumbnail and
+    all info about it by "DuplicateDelegate". Only the visible images
+    are painted (and their thumbnails made), so the memory and time
+    needed do not depend on the number of the found duplicates. While
+    scrolling, the thumbnails of the next screen in the direction of
+    scrolling are made in advance. An image is selected/unselected
+    by clicking it. The groups found in another thread are queued
+    with "queueGroup" and added in batches every "QUEUE_INTERVAL" ms,
+    so the thread finding them does not wait for the widget
 
     :param conf:                programme's preferences as a "Config" object,
     :param parent:              widget's parent (optional),
 
-    :signal selected:           True - there are selected "DuplicateWidget"s,
+    :signal selected:           True - there are selected images,
                                 False - otherwise, emitted when any
-                                "DuplicateWidget" is clicked,
+                                image is clicked,
     :signal finished:           widgets rendering has been finished,
     :signal interrupted:        widgets rendering has been interrupted because
                                 of an error,
@@ -52,100 +68,348 @@ class ImageViewWidget(QtWidgets.QWidget):
     finished = QtCore.pyqtSignal()
     interrupted = QtCore.pyqtSignal()
     error = QtCore.pyqtSignal(str)
+    # The queue of the groups is not empty any more
+    _queued = QtCore.pyqtSignal()
+
+    # Time between adding the batches of the queued groups (in ms)
+    QUEUE_INTERVAL = 50
 
     def __init__(self, conf: 'config.Config',
                  parent: QtWidgets.QWidget = None) -> None:
-        super().__init__(parent=parent)
+        super().__init__(parent)
 
         self._conf = conf
-        self.widgets: List[imagegroupwidget.ImageGroupWidget] = []
-
         self._errors: List[str] = []
 
-        self._layout = QtWidgets.QVBoxLayout()
-        self._layout.setSizeConstraint(QtWidgets.QLayout.SetFixedSize)
-        self._layout.setContentsMargins(9, 9, 9, 9)
-        self._layout.setSpacing(10)
-        self.setLayout(self._layout)
+        self._model = duplicatemodel.DuplicateModel(conf, self)
+        self.setModel(self._model)
+        self._delegate = duplicatedelegate.DuplicateDelegate(conf, self)
+        self.setItemDelegate(self._delegate)
+
+        self._setView()
+
+        # Groups waiting to be added, the timer is started when
+        # the first group is queued
+        self._queue: List[Tuple['core.GroupIndex', 'core.Group']] = []
+        self._queueLock = threading.Lock()
+        self._queueTimer = QtCore.QTimer(self)
+        self._queueTimer.setSingleShot(True)
+        self._queueTimer.setInterval(self.QUEUE_INTERVAL)
+        self._queueTimer.timeout.connect(self._addQueued)
+        # Queued connection: the timer is started in the thread of
+        # the widget whatever thread queues the groups
+        self._queued.connect(self._queueTimer.start,
+                             QtCore.Qt.QueuedConnection)
+
+        # Positions of the scroll bars when the thumbnails to make were
+        # updated last time (to know the direction of scrolling)
+        self._scroll_pos = (0, 0)
+        self.verticalScrollBar().valueChanged.connect(self._updateThumbnails)
+        self.horizontalScrollBar().valueChanged.connect(
+            self._updateThumbnails
+        )
+
+    def _setView(self) -> None:
+        self.setShowGrid(False)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
+        self.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.setFocusPolicy(QtCore.Qt.NoFocus)
+        self.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollMode(
+            QtWidgets.QAbstractItemView.ScrollPerPixel
+        )
+        self.setMinimumHeight(250)
+
+        for header in (self.horizontalHeader(), self.verticalHeader()):
+            header.hide()
+            header.setMinimumSectionSize(1)
+            header.setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self._setCellSize()
+
+    def _setCellSize(self) -> None:
+        # All the images are the same size, so are the rows and columns
+        # (the size depends on the preferences)
+        cell = self._delegate.sizeHint(self.viewOptions(),
+                                       QtCore.QModelIndex())
+        self.horizontalHeader().setDefaultSectionSize(cell.width())
+        self.verticalHeader().setDefaultSectionSize(cell.height())
 
     def addGroup(self, image_group: Tuple['core.GroupIndex', 'core.Group']) \
         -> None:
-        '''Add a new "ImageGroupWidget" with grouped duplicate images or
-        change existing one
+        '''Add a new group of duplicate images or change existing one
+        (the new images of the group are at the end of it). The group
+        is removed if it is empty (it has been joined with another group),
+        the empty group with the index 0 means all the groups have been
+        added
 
         :param image_group: tuple with the group index and list of grouped
                             duplicate images
         '''
 
-        if image_group[1]:
-            try:
-                self._render(image_group)
+        if image_group[1] or image_group[0]:
+            err_msg = self._change(image_group)
+            if err_msg is not None:
+                self._reportError(err_msg)
+        else:
+            self._finish()
 
-            except Exception as e:
-                logger.exception(e)
-                self.error.emit(str(e))
-                self.interrupted.emit()
+    def queueGroup(self, image_group: Tuple['core.GroupIndex',
+                                            'core.Group']) -> None:
+        '''Queue a group to add (see "addGroup") without waiting for it
+        to be added. Can be called from any thread, the groups are added
+        in the order they are queued
 
-        else:
-            self.finished.emit()
+        :param image_group: tuple with the group index and list of grouped
+                            duplicate images
+        '''
 
-            if not self.widgets:
-                msg_box = QtWidgets.QMessageBox(
-                    QtWidgets.QMessageBox.Information,
-                    'No duplicate images found',
-                    ('No duplicate images have been found '
-                     'in the selected folders')
-                )
-                msg_box.exec()
+        with self._queueLock:
+            self._queue.append(image_group)
+            first = len(self._queue) == 1
+        if first:
+            self._queued.emit()
+
+    def _addQueued(self) -> None:
+        with self._queueLock:
+            image_groups, self._queue = self._queue, []
+
+        # The view is repainted once for the whole batch, the dialogs
+        # are shown when the updates are enabled again (otherwise
+        # the view is not repainted while a modal dialog is open)
+        errors = []
+        finished = False
+        self.setUpdatesEnabled(False)
+        try:
+            for image_group in image_groups:
+                if image_group[1] or image_group[0]:
+                    err_msg = self._change(image_group)
+                    if err_msg is not None:
+                        errors.append(err_msg)
+                else:
+                    finished = True
+        finally:
+            self.setUpdatesEnabled(True)
+
+        for err_msg in errors:
+            self._reportError(err_msg)
+        if finished:
+            self._finish()
+
+    def _change(self, image_group: Tuple['core.GroupIndex', 'core.Group']) \
+        -> Optional[str]:
+        # Return the error message if the group cannot be added or removed
+        try:
+            if image_group[1]:
+                self._render(image_group)
+            else:
+                self._remove(image_group[0])
+        except Exception as e:
+            logger.exception(e)
+            return str(e)
+        return None
+
+    def _reportError(self, err_msg: str) -> None:
+        self.error.emit(err_msg)
+        self.interrupted.emit()
+
+    def _finish(self) -> None:
+        self.finished.emit()
+
+        if not self.hasGroups():
+            msg_box = QtWidgets.QMessageBox(
+                QtWidgets.QMessageBox.Information,
+                'No duplicate images found',
+                ('No duplicate images have been found '
+                 'in the selected folders')
+            )
+            msg_box.exec()
 
     def _render(self, image_group: Tuple['core.GroupIndex', 'core.Group']) \
         -> None:
-        if len(self.widgets) == image_group[0]:
-            group_w = imagegroupwidget.ImageGroupWidget(self._conf)
-            group_w.error.connect(self._errors.append)
+        self._model.addGroup(*image_group)
 
-            self._layout.addWidget(group_w)
-            self.widgets.append(group_w)
+    def _remove(self, group_index: 'core.GroupIndex') -> None:
+        self._model.removeGroup(group_index)
 
-            new_images = image_group[1]
+        self._hasSelected()
 
-        else:
-            new_images = [image_group[1][-1]]
+    def _hasSelected(self) -> None:
+        self.selected.emit(self._model.hasSelected())
 
-        for img in new_images:
-            dupl_w = self.widgets[image_group[0]].addDuplicateWidget(img)
-            dupl_w.clicked.connect(self._hasSelected)
+    def hasGroups(self) -> bool:
+        '''Check if there are any groups of duplicate images
 
-    def _hasSelected(self) -> None:
-        for group_w in self.widgets:
-            if group_w.hasSelected():
-                self.selected.emit(True)
-                return
+        :return: True - there are groups, False - otherwise
+        '''
 
-        self.selected.emit(False)
+        return self._model.rowCount() > 0
+
+    @staticmethod
+    def _visible(at: Callable[[int], int], length: int, count: int) \
+        -> Optional[Tuple[int, int]]:
+        # First and last visible rows (or columns)
+        first = at(0)
+        if first == -1:
+            return None
+        last = at(length - 1)
+        if last == -1:
+            last = count - 1
+        return first, last
+
+    def _updateThumbnails(self) -> None:
+        rows = self._visible(self.rowAt, self.viewport().height(),
+                             self._model.rowCount())
+        columns = self._visible(self.columnAt, self.viewport().width(),
+                                self._model.columnCount())
+        if rows is None or columns is None:
+            return
+        visible = rows + columns
+
+        pos = (self.verticalScrollBar().value(),
+               self.horizontalScrollBar().value())
+        down = pos[0] - self._scroll_pos[0]
+        right = pos[1] - self._scroll_pos[1]
+        self._scroll_pos = pos
+
+        # The next screen in the direction of scrolling
+        first_row, last_row = rows
+        first_column, last_column = columns
+        row_count = last_row - first_row + 1
+        column_count = last_column - first_column + 1
+        prefetch = None
+        if down > 0:
+            prefetch = (last_row + 1, last_row + row_count) + columns
+        elif down < 0:
+            prefetch = (first_row - row_count, first_row - 1) + columns
+        elif right > 0:
+            prefetch = rows + (last_column + 1, last_column + column_count)
+        elif right < 0:
+            prefetch = rows + (first_column - column_count, first_column - 1)
+
+        self._model.updateThumbnails(visible, prefetch)
 
     def clear(self) -> None:
         '''Clear the widget from the found duplicate images'''
 
-        threadpool = QtCore.QThreadPool.globalInstance()
-        threadpool.clear()
-        threadpool.waitForDone()
+        with self._queueLock:
+            self._queue = []
+        self._model.clear()
+        self._scroll_pos = (0, 0)
+        self._setCellSize()
+
+    def mouseReleaseEvent(self, event: 'QtGui.QMouseEvent') -> None:
+        index = self.indexAt(event.pos())
+        if self._model.image(index) is None:
+            super().mouseReleaseEvent(event)
+            return
+
+        checked = index.data(QtCore.Qt.CheckStateRole) == QtCore.Qt.Checked
+        self._model.setData(
+            index,
+            QtCore.Qt.Unchecked if checked else QtCore.Qt.Checked,
+            QtCore.Qt.CheckStateRole
+        )
+        self._hasSelected()
+
+    def contextMenuEvent(self, event: 'QtGui.QContextMenuEvent') -> None:
+        index = self.indexAt(event.pos())
+        if self._model.image(index) is None:
+            return
+
+        menu = QtWidgets.QMenu(self)
+        openAction = menu.addAction('Open')
+        menu.addSeparator()
+        renameAction = menu.addAction('Rename')
+
+        action = menu.exec_(self.viewport().mapToGlobal(event.pos()))
+        if action == openAction:
+            self.openImage(index)
+        if action == renameAction:
+            self.renameImage(index)
 
-        for group_w in self.widgets:
-            group_w.deleteLater()
+    def openImage(self, index: QtCore.QModelIndex) -> None:
+        '''Open the image in the OS default image viewer
 
-        self.widgets.clear()
+        :param index: index of the image in the model
+        '''
+
+        path = self._model.image(index).path
+
+        try:
+            utils.openFile(path)
+
+        except subprocess.CalledProcessError:
+            err_msg = f"Something went wrong while opening '{path}'"
+            logger.exception(err_msg)
+            # Crazy hack: on Windows, for some reason, 'explorer's exit code
+            # is 1, even though the image is opened in the image viewer, so
+            # we do not show the error message to the user
+            if not sys.platform.startswith('win32'):
+                errornotifier.errorMessage([err_msg])
+
+    def renameImage(self, index: QtCore.QModelIndex) -> None:
+        '''Rename the image
+
+        :param index: index of the image in the model
+        '''
+
+        image = self._model.image(index)
+        name = pathlib.Path(image.path).name
+        new_name, ok = QtWidgets.QInputDialog.getText(
+            self,
+            'New name',
+            'Input a new name of the image:',
+            text=name,
+        )
+        if ok:
+            try:
+                image.rename(new_name)
+
+            except FileExistsError:
+                err_msg = f'File with the name "{new_name}" already exists'
+                logger.exception(err_msg)
+                errornotifier.errorMessage([err_msg])
+
+            except FileNotFoundError:
+                err_msg = f'File with the name "{name}" does not exist'
+                logger.exception(err_msg)
+                errornotifier.errorMessage([err_msg])
+
+            else:
+                self._model.dataChanged.emit(index, index,
+                                             [QtCore.Qt.DisplayRole])
 
     def _callOnSelected(self, func: Callable[..., None], *args,
                         **kwargs) -> None:
-        for group_w in self.widgets:
-            func(group_w, *args, **kwargs)
+        # The images the function has been called on successfully are
+        # removed from the view (the groups with less than 2 images left
+        # are removed too)
+        done = []
+        for image in self._model.selectedImages():
+            try:
+                func(image, *args, **kwargs)
+
+            except OSError as e:
+                logger.exception(e)
+                self._errors.append(str(e))
+
+            else:
+                done.append(image)
+
+                if self._conf['delete_dirs']:
+                    image.del_parent_dir()
+
+        self._model.removeImages(done)
+        self._hasSelected()
 
         errornotifier.errorMessage(self._errors)
         self._errors.clear()
 
     def delete(self) -> None:
-        '''Delete the selected images'''
+        '''Delete the selected images from the disk and remove them from
+        the widget. If the preference "Delete folders if they are empty..."
+        is on, also delete empty folders
+        '''
 
         confirm = QtWidgets.QMessageBox.question(
             self,
@@ -155,12 +419,12 @@ class ImageViewWidget(QtWidgets.QWidget):
         )
 
         if confirm == QtWidgets.QMessageBox.Yes:
-            self._callOnSelected(imagegroupwidget.ImageGroupWidget.delete)
+            self._callOnSelected(core.Image.delete)
 
     def move(self) -> None:
-        '''Move the selected images into another folder
-
-        :param dst: folder to move the images into
+        '''Move the selected images into another folder and remove them
+        from the widget. If the preference "Delete folders if they are
+        empty..." is on, also delete empty folders
         '''
 
         dialog = QtWidgets.QFileDialog(self, 'Open Folder', '')
@@ -170,16 +434,16 @@ class ImageViewWidget(QtWidgets.QWidget):
 
         if dialog.exec():
             dst = dialog.selectedFiles()[0]
-            self._callOnSelected(imagegroupwidget.ImageGroupWidget.move, dst)
+            self._callOnSelected(core.Image.move, dst)
 
     def autoSelect(self) -> None:
-        '''Automatic selection of "DuplicateWidget"s'''
+        '''Select all the images of every group except the first one'''
 
-        for group_w in self.widgets:
-            group_w.autoSelect()
+        self._model.autoSelect()
+        self._hasSelected()
 
     def unselect(self) -> None:
-        '''Unselect all selected "DuplicateWidget"s'''
+        '''Unselect all the selected images'''
 
-        for group_w in self.widgets:
-            group_w.unselect()
+        self._model.unselect()
+        self._hasSelected()
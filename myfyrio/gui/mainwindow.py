@@ -20,11 +20,12 @@ along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
 Module implementing the main window
 '''
 
-from typing import List
+import os
+from typing import List, Optional
 
 from PyQt5 import QtCore, QtGui, QtWidgets, uic
 
-from myfyrio import resources, workers
+from myfyrio import core, resources, workers
 from myfyrio.gui import (aboutwindow, errornotifier, imageviewwidget,
                          preferenceswindow, sensitivityradiobutton)
 
@@ -46,8 +47,12 @@ class MainWindow(QtWidgets.QMainWindow):
         self.preferencesWindow = preferenceswindow.PreferencesWindow(self)
 
         self._errors: List[str] = []
+        # Dendrogram of the images of the last finished processing
+        self._dendrogram: Optional[core.Dendrogram] = None
 
         self.threadpool = QtCore.QThreadPool.globalInstance()
+        # Hashing processes are kept between the processings
+        self.workerPool = workers.WorkerPool()
 
         # If the "centralWidget" layout margins are set in the .ui file,
         # it does not work for some reason
@@ -70,12 +75,12 @@ class MainWindow(QtWidgets.QMainWindow):
         self.imageViewWidget.finished.connect(self.startBtn.finished)
         self.imageViewWidget.finished.connect(
             lambda: (self.autoSelectBtn.enable()
-                     if self.imageViewWidget.widgets
+                     if self.imageViewWidget.hasGroups()
                      else self.autoSelectBtn.disable())
         )
         self.imageViewWidget.finished.connect(
             lambda: (self.menubar.enableAutoSelectAction()
-                     if self.imageViewWidget.widgets
+                     if self.imageViewWidget.hasGroups()
                      else self.menubar.disableAutoSelectAction())
         )
         self.imageViewWidget.finished.connect(
@@ -91,7 +96,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.imageViewWidget.selected.connect(self.deleteAction.setEnabled)
         self.imageViewWidget.selected.connect(self.unselectAction.setEnabled)
 
-        self.scrollArea.setWidget(self.imageViewWidget)
+        self.verticalLayout.insertWidget(0, self.imageViewWidget)
 
     def _setFolderPathsGroupBox(self) -> None:
         self.pathsList.hasSelection.connect(self.delFolderBtn.setEnabled)
@@ -132,21 +137,12 @@ class MainWindow(QtWidgets.QMainWindow):
         checkedRbtn = sensitivityradiobutton.checkedRadioButton(self)
         self.preferencesWindow.setSensitivity(checkedRbtn.sensitivity)
 
-        self.veryHighRbtn.sensitivityChanged.connect(
-            self.preferencesWindow.setSensitivity
-        )
-        self.highRbtn.sensitivityChanged.connect(
-            self.preferencesWindow.setSensitivity
-        )
-        self.mediumRbtn.sensitivityChanged.connect(
-            self.preferencesWindow.setSensitivity
-        )
-        self.lowRbtn.sensitivityChanged.connect(
-            self.preferencesWindow.setSensitivity
-        )
-        self.veryLowRbtn.sensitivityChanged.connect(
-            self.preferencesWindow.setSensitivity
-        )
+        for rbtn in (self.veryHighRbtn, self.highRbtn, self.mediumRbtn,
+                     self.lowRbtn, self.veryLowRbtn):
+            rbtn.sensitivityChanged.connect(
+                self.preferencesWindow.setSensitivity
+            )
+            rbtn.sensitivityChanged.connect(self._regroup)
 
     def _setActionsGroupBox(self) -> None:
         self.moveBtn.clicked.connect(self.imageViewWidget.move)
@@ -184,8 +180,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self.aboutAction.triggered.connect(self.menubar.openWindow)
 
     def _startProcessing(self):
+        self._dendrogram = None
         conf = self.preferencesWindow.conf
-        p = workers.ImageProcessing(self.pathsList.paths(), conf)
+        p = workers.ImageProcessing(self.pathsList.paths(), conf,
+                                    self.workerPool)
 
         p.images_loaded.connect(self.loadedPicLbl.updateNumber)
         p.found_in_cache.connect(self.foundInCacheLbl.updateNumber)
@@ -194,12 +192,19 @@ class MainWindow(QtWidgets.QMainWindow):
         p.groups_found.connect(self.groupsLbl.updateNumber)
 
         p.update_progressbar.connect(self.processProg.setValue)
-        p.image_group.connect(self.imageViewWidget.addGroup,
-                              QtCore.Qt.BlockingQueuedConnection)
+        p.progress.connect(lambda progress: self.processProg.setEta(
+            progress.eta
+        ))
+        # The groups are queued right in the processing thread, the widget
+        # adds them in batches
+        p.image_group.connect(self.imageViewWidget.queueGroup,
+                              QtCore.Qt.DirectConnection)
+        p.grouped.connect(self._setDendrogram)
         p.error.connect(self._errors.append)
         p.interrupted.connect(self.startBtn.finished)
         p.interrupted.connect(self.stopBtn.disable)
         p.interrupted.connect(lambda: errornotifier.errorMessage(self._errors))
+        p.interrupted.connect(self.processProg.clearEta)
 
         self.imageViewWidget.interrupted.connect(p.interrupt)
         self.stopBtn.clicked.connect(p.interrupt)
@@ -207,6 +212,34 @@ class MainWindow(QtWidgets.QMainWindow):
         worker = workers.Worker(p.run)
         self.threadpool.start(worker)
 
+    def _setDendrogram(self, dendrogram: core.Dendrogram) -> None:
+        self._dendrogram = dendrogram
+
+    def _regroup(self, sensitivity: core.Sensitivity) -> None:
+        # Regroup the images of the last processing without processing
+        # them again (if the pairs with such distance are known)
+        dendrogram = self._dendrogram
+        if dendrogram is None or self.stopBtn.isEnabled():
+            return
+        if sensitivity > dendrogram.max_sensitivity:
+            # The images are processed again with the new sensitivity
+            self.startBtn.click()
+            return
+
+        # The deleted and moved images are not shown again
+        groups = dendrogram.groups(sensitivity,
+                                   lambda image: os.path.exists(image.path))
+
+        self._errors.clear()
+        self.imageViewWidget.clear()
+        self.autoSelectBtn.disable()
+        self.menubar.disableAutoSelectAction()
+        for group_index, group in enumerate(groups):
+            self.imageViewWidget.addGroup((group_index, group))
+        self.duplicatesLbl.updateNumber(sum(map(len, groups)))
+        self.groupsLbl.updateNumber(len(groups))
+        self.imageViewWidget.addGroup((0, []))
+
     def closeEvent(self, event) -> None:
         if self.preferencesWindow.conf['close_confirmation']:
             confirm = QtWidgets.QMessageBox.question(
@@ -227,3 +260,5 @@ class MainWindow(QtWidgets.QMainWindow):
         while self.threadpool.activeThreadCount():
             QtCore.QCoreApplication.processEvents()
             self.threadpool.waitForDone(msecs=100)
+
+        self.workerPool.terminate()
@@ -20,18 +20,46 @@ along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
 Module implementing modified version of QProgressBar widget
 '''
 
+from typing import Optional
+
 from PyQt5 import QtWidgets
 
 
 class ProgressBar(QtWidgets.QProgressBar):
     '''Modified version of QProgressBar widget that has methods for setting
     minimum and maximum values without passing any arguments (quite useful
-    when signals without parameters are used)
+    when signals without parameters are used) and can show the time left
     '''
 
     def setMinValue(self) -> None:
+        self.clearEta()
         self.setValue(self.minimum())
 
 
     def setMaxValue(self) -> None:
+        self.clearEta()
         self.setValue(self.maximum())
+
+    def setEta(self, eta: Optional[float]) -> None:
+        '''Show the time left next to the percentage
+
+        :param eta: seconds left, None if unknown (only the percentage
+                    is shown)
+        '''
+
+        if eta is None:
+            self.clearEta()
+            return
+
+        minutes, seconds = divmod(round(eta), 60)
+        hours, minutes = divmod(minutes, 60)
+        if hours:
+            left = f'{hours}:{minutes:02}:{seconds:02}'
+        else:
+            left = f'{minutes}:{seconds:02}'
+        self.setFormat(f'%p% ({left} left)')
+
+    def clearEta(self) -> None:
+        '''Show only the percentage'''
+
+        self.setFormat('%p%')
@@ -0,0 +1,140 @@
+'''Copyright 2020 Maxim Shpak <maxim.shpak@posteo.uk>
+
+This file is part of Myfyrio.
+
+Myfyrio is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Myfyrio is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
+
+-------------------------------------------------------------------------------
+
+Module implementing the in-memory cache of image thumbnails
+'''
+
+import os
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from PyQt5 import QtGui
+
+from myfyrio import core
+
+################################## Types ######################################
+# Path, modification time (ns) and size of the image file, thumbnail size
+ThumbnailKey = Tuple[core.ImagePath, int, int, int]
+###############################################################################
+
+
+def thumbnailKey(image: core.Image, size: int) -> ThumbnailKey:
+    '''Return the key of the thumbnail of the image. The key changes
+    if the image file is modified. The file status is read every time
+    (the status kept by "Image" is the one read when the image was found,
+    the file can be edited while the thumbnails are shown)
+
+    :param image:   "Image" object,
+    :param size:    size of the thumbnail,
+    :return:        tuple with the image path, the modification time
+                    and the size of the file (0 if they cannot be read)
+                    and :size:
+    '''
+
+    try:
+        stat = os.stat(image.path)
+    except OSError:
+        return (image.path, 0, 0, size)
+    return (image.path, stat.st_mtime_ns, stat.st_size, size)
+
+
+class ThumbnailCache:
+    '''Cache of thumbnails with a memory budget. When the thumbnails take
+    more memory than the budget, the least recently used ones are dropped
+
+    :param budget: max memory (in bytes) the thumbnails can take
+    '''
+
+    def __init__(self, budget: int) -> None:
+        self._budget = budget
+        self._cost = 0
+        self._pixmaps: 'OrderedDict[ThumbnailKey, QtGui.QPixmap]' = \
+            OrderedDict()
+
+    @staticmethod
+    def _pixmapCost(pixmap: QtGui.QPixmap) -> int:
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+    @property
+    def cost(self) -> int:
+        '''Return the memory (in bytes) the cached thumbnails take'''
+
+        return self._cost
+
+    def setBudget(self, budget: int) -> None:
+        '''Change the memory budget, the least recently used thumbnails
+        are dropped if they do not fit in it
+
+        :param budget: max memory (in bytes) the thumbnails can take
+        '''
+
+        self._budget = budget
+        self._evict()
+
+    def get(self, key: ThumbnailKey) -> Optional[QtGui.QPixmap]:
+        '''Return the thumbnail and mark it as the most recently used
+
+        :param key:     key of the thumbnail (see "thumbnailKey"),
+        :return:        "QPixmap" object or None if it is not cached
+        '''
+
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+        return pixmap
+
+    def put(self, key: ThumbnailKey, pixmap: QtGui.QPixmap) -> None:
+        '''Add the thumbnail as the most recently used one. It is not
+        kept if it is bigger than the whole budget
+
+        :param key:     key of the thumbnail (see "thumbnailKey"),
+        :param pixmap:  thumbnail
+        '''
+
+        self.discard(key)
+        self._pixmaps[key] = pixmap
+        self._cost += self._pixmapCost(pixmap)
+        self._evict()
+
+    def discard(self, key: ThumbnailKey) -> None:
+        '''Drop the thumbnail if it is cached
+
+        :param key: key of the thumbnail (see "thumbnailKey")
+        '''
+
+        pixmap = self._pixmaps.pop(key, None)
+        if pixmap is not None:
+            self._cost -= self._pixmapCost(pixmap)
+
+    def _evict(self) -> None:
+        while self._cost > self._budget:
+            _, pixmap = self._pixmaps.popitem(last=False)
+            self._cost -= self._pixmapCost(pixmap)
+
+    def clear(self) -> None:
+        '''Drop all the thumbnails'''
+
+        self._pixmaps.clear()
+        self._cost = 0
+
+    def __len__(self) -> int:
+        return len(self._pixmaps)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._pixmaps
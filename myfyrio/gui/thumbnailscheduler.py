@@ -0,0 +1,162 @@
+'''Copyright 2020 Maxim Shpak <maxim.shpak@posteo.uk>
+
+This file is part of Myfyrio.
+
+Myfyrio is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Myfyrio is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
+
+-------------------------------------------------------------------------------
+
+Module implementing the scheduler of thumbnail making
+'''
+
+import heapq
+import itertools
+import threading
+from enum import IntEnum
+from typing import Container, Dict, List, Optional, Set, Tuple
+
+from PyQt5 import QtCore
+
+from myfyrio import core, thumbnailstore, workers
+
+
+class Priority(IntEnum):
+    '''Priorities of thumbnail jobs (the lower, the sooner the job is
+    started)
+    '''
+
+    VISIBLE = 0     # The image is on the screen
+    PREFETCH = 1    # The image is about to be scrolled to
+    BACKGROUND = 2  # The thumbnail is made in advance ("lazy" mode is off)
+
+
+class ThumbnailScheduler(QtCore.QObject):
+    '''Scheduler making thumbnails in its own thread pool. The queued jobs
+    are started in the order of their priorities, a job asked for again
+    is not queued twice (but its priority can be raised) and the queued
+    jobs can be cancelled before they are started
+
+    :param parent:      scheduler's parent (optional),
+
+    :signal made:       the thumbnail of the image is made and assigned
+                        to the attribute "thumb" of the "Image" object:
+                        "core.Image"
+    '''
+
+    made = QtCore.pyqtSignal(object)
+
+    def __init__(self, parent: QtCore.QObject = None) -> None:
+        super().__init__(parent)
+
+        # Every queued job gets a runnable in the pool. A runnable starts
+        # the job with the highest priority at the moment it is run (or
+        # does nothing if the jobs have been cancelled), so the priorities
+        # can be changed after the runnables are queued
+        self._lock = threading.Lock()
+        self._heap: List[Tuple[Priority, int, int]] = []
+        self._order = itertools.count()
+        self._queued: Dict[int, Tuple[Priority,
+                                      workers.ThumbnailProcessing]] = {}
+        self._running: Set[int] = set()
+
+        self._pool = QtCore.QThreadPool(self)
+        global_pool = QtCore.QThreadPool.globalInstance()
+        self._pool.setMaxThreadCount(global_pool.maxThreadCount())
+
+    def request(self, image: core.Image, size: int,
+                store: Optional[thumbnailstore.ThumbnailStore] = None,
+                priority: Priority = Priority.VISIBLE) -> None:
+        '''Queue making the thumbnail of the image. Nothing is queued if
+        the thumbnail is being made or queued already, only the priority
+        of the queued job is raised if :priority: is higher
+
+        :param image:       "Image" object,
+        :param size:        size of the thumbnail,
+        :param store:       on-disk store of thumbnails (optional),
+        :param priority:    priority of the job (optional, "VISIBLE"
+                            by default)
+        '''
+
+        key = id(image)
+        with self._lock:
+            if key in self._running:
+                return
+
+            job = self._queued.get(key)
+            if job is None:
+                p = workers.ThumbnailProcessing(image, size, store)
+                p.finished.connect(self._finished)
+            elif priority < job[0]:
+                p = job[1]
+            else:
+                return
+
+            self._queued[key] = (priority, p)
+            heapq.heappush(self._heap, (priority, next(self._order), key))
+
+        if job is None:
+            self._pool.start(workers.Worker(self._runNext))
+
+    def _runNext(self) -> None:
+        p = None
+        with self._lock:
+            while self._heap:
+                priority, _, key = heapq.heappop(self._heap)
+                job = self._queued.get(key)
+                # The entries of cancelled jobs and the ones left after
+                # raising the priority are skipped
+                if job is not None and job[0] == priority:
+                    del self._queued[key]
+                    self._running.add(key)
+                    p = job[1]
+                    break
+
+        if p is not None:
+            p.run()
+
+    def _finished(self, image: core.Image) -> None:
+        with self._lock:
+            self._running.discard(id(image))
+        self.made.emit(image)
+
+    def isScheduled(self, image: core.Image) -> bool:
+        '''Check if the thumbnail of the image is queued or being made
+
+        :param image:   "Image" object,
+        :return:        True - it is, False - otherwise
+        '''
+
+        key = id(image)
+        with self._lock:
+            return key in self._queued or key in self._running
+
+    def cancel(self, keep: Container[int]) -> None:
+        '''Cancel the queued jobs (the started ones are finished)
+
+        :param keep: "id"s of the images the jobs of which are kept
+        '''
+
+        with self._lock:
+            for key in list(self._queued):
+                if key not in keep:
+                    del self._queued[key]
+
+    def clear(self) -> None:
+        '''Cancel all the queued jobs and wait for the started ones'''
+
+        with self._lock:
+            self._queued.clear()
+            self._heap.clear()
+        self._pool.clear()
+        self._pool.waitForDone()
@@ -0,0 +1,369 @@
+'''Copyright 2019-2020 Maxim Shpak <maxim.shpak@posteo.uk>
+
+This file is part of Myfyrio.
+
+Myfyrio is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Myfyrio is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
+
+This file incorporates work covered by the following copyright and
+permission notice:
+
+    MIT License
+
+    Copyright (c) 2016 Jetsetter
+
+    Permission is hereby granted, free of charge, to any person obtaining a
+    copy of this software and associated documentation files (the "Software"),
+    to deal in the Software without restriction, including without limitation
+    the rights to use, copy, modify, merge, publish, distribute, sublicense,
+    and/or sell copies of the Software, and to permit persons to whom
+    the Software is furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in
+    all copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+    FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+    DEALINGS IN THE SOFTWARE.
+
+-------------------------------------------------------------------------------
+
+Module implementing perceptual hashing of images. It is the code run
+in the worker processes, so Qt is not imported with the module (the worker
+processes started with "spawn" import the modules of their tasks and
+the main module, which imports the other modules only when they are
+needed), it is imported only when the images are decoded with "QtBackend"
+'''
+
+import abc
+import signal
+from multiprocessing import Event
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+import numpy as np
+
+from myfyrio import cache
+
+################################## Types ######################################
+ImagePath = str # Path to an image
+Hash = int # Perceptual hash of an image
+HashArray = np.ndarray # Hashes as rows of 2 uint64 (high and low 64 bits)
+ImageFormat = str # Format of an image file: 'jpeg', 'png', etc.
+BackendName = str # Name of a decode backend: 'qt', 'pillow'
+Width = int # Width of a image
+Height = int # Height of a image
+# Width, height and format of an image (None if they cannot be read)
+ImageInfo = Tuple[Optional[Width], Optional[Height], Optional[ImageFormat]]
+###############################################################################
+
+NO_INFO: ImageInfo = (None, None, None)
+
+
+# Cancel token of a worker process (see "workers.WorkerPool.cancel")
+_cancelled: Optional[Event] = None
+
+
+def init_worker(cancelled: Event) -> None:
+    '''Initialize a worker process (the initializer of the pool)
+
+    :param cancelled: event set when the tasks are cancelled
+    '''
+
+    # Ctrl+C (in the terminal) is handled by the main process, it stops
+    # the processing and cancels the tasks of the worker processes
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    global _cancelled # pylint: disable=global-statement
+    _cancelled = cancelled
+
+def dhash_task(paths: List[ImagePath], backend: BackendName) \
+    -> List[Tuple[ImagePath, Hash, Optional[Width], Optional[Height],
+                  Optional[ImageFormat]]]:
+    '''Task of a worker process (see "dhash_chunk"), the images are not
+    read after the tasks are cancelled
+
+    :param paths:   paths to the images,
+    :param backend: name of the decode backend,
+    :return:        list with tuples (path, hash, width, height, format)
+    '''
+
+    cancelled = None if _cancelled is None else _cancelled.is_set
+    return dhash_chunk(paths, backend, cancelled)
+
+def decode_backend(name: BackendName) -> 'DecodeBackend':
+    '''Return the decode backend the images are hashed with
+
+    :param name:        name of the backend (any of "BACKENDS"),
+    :return:            "DecodeBackend" object,
+    :raise ValueError:  there is no backend with the name,
+    :raise ImportError: the library of the backend is not installed
+    '''
+
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError as e:
+        raise ValueError(f'Unknown decode backend "{name}"') from e
+    return backend_class()
+
+def calculate_dhashes(paths: Sequence[ImagePath],
+                      backend: Optional['DecodeBackend'] = None,
+                      cancelled: Optional[Callable[[], bool]] = None) \
+    -> Tuple[HashArray, np.ndarray, List[ImageInfo]]:
+    '''Calculate perceptual hashes of the images at :paths: in one pass:
+    the images are decoded into a stack of 9x9 greyscale thumbnails and
+    all the hashes are found with array operations. The info of the images
+    is read on the way
+
+    :param paths:       paths to the images,
+    :param backend:     "DecodeBackend" the images are decoded with
+                        (optional, "QtBackend" by default),
+    :param cancelled:   function checked before reading every image,
+                        if it returns True, only the images read so far
+                        are hashed (optional),
+    :return:            tuple with the hashes as an array of shape (N, 2)
+                        and dtype "uint64" (the high and low 64 bits of
+                        every 128-bit hash), a boolean array of shape
+                        (N,), where False means the image cannot be read
+                        (its hash is 0), and a list with the info
+                        of the images
+    '''
+
+    SIZE = 8 # Hash-vector size is 2 * (SIZE ** 2)
+
+    if backend is None:
+        backend = QtBackend()
+
+    pixels = np.zeros((len(paths), SIZE+1, SIZE+1), np.uint8)
+    readable = np.zeros(len(paths), bool)
+    infos = []
+    for i, path in enumerate(paths):
+        if cancelled is not None and cancelled():
+            pixels, readable = pixels[:i], readable[:i]
+            break
+        try:
+            pixels[i], info = backend.grey_thumbnail(path, SIZE+1)
+        except OSError:
+            infos.append(NO_INFO)
+            continue
+
+        infos.append(info)
+        readable[i] = True
+
+    # 128 bits -> 16 bytes -> 2 big-endian 64-bit words per hash
+    packed = np.packbits(_gradient_bits(pixels), axis=-1)
+    hashes = packed.view('>u8').astype(np.uint64)
+    hashes[~readable] = 0
+
+    return hashes, readable, infos
+
+def from_hash_array(hashes: HashArray) -> List[Hash]:
+    '''Convert hashes from an array of shape (N, 2) (see
+    "calculate_dhashes") into integers
+
+    :param hashes:  array with hashes,
+    :return:        list with hashes as integers
+    '''
+
+    return [high << 64 | low for high, low in hashes.tolist()]
+
+def to_hash_array(hashes: Sequence[Hash]) -> HashArray:
+    '''Convert hashes (integers) into an array of shape (N, 2) (see
+    "calculate_dhashes")
+
+    :param hashes:      hashes as integers,
+    :return:            array with hashes,
+    :raise TypeError:   any of the hashes is not integer,
+    :raise ValueError:  any of the hashes is not 128-bit unsigned integer
+    '''
+
+    MAX_WORD = 2**64 - 1
+
+    try:
+        words = [(dhash >> 64, dhash & MAX_WORD) for dhash in hashes]
+    except TypeError as e:
+        raise TypeError('Hashes must be integers') from e
+
+    if any(not 0 <= high <= MAX_WORD for high, _ in words):
+        raise ValueError('Hashes must be 128-bit unsigned integers')
+
+    return np.array(words, np.uint64).reshape(-1, 2)
+
+def dhash_chunk(paths: Sequence[ImagePath], backend: BackendName = 'qt',
+                cancelled: Optional[Callable[[], bool]] = None) \
+    -> List[Tuple[ImagePath, Hash, Optional[Width], Optional[Height],
+                  Optional[ImageFormat]]]:
+    '''Calculate perceptual hashes of the images at :paths:. It is used
+    with library "multiprocessing": only the paths (and the name of
+    the backend) are sent to a worker process and only tuples with
+    the paths, hashes and the info read from the image files on the way
+    are sent back
+
+    :param paths:       paths to the images,
+    :param backend:     name of the decode backend (optional, "qt"
+                        by default),
+    :param cancelled:   function checked before reading every image,
+                        if it returns True, the rest of the images
+                        are skipped (optional),
+    :return:            list with tuples (path, hash, width, height,
+                        format), the hash is -1 if it cannot be calculated,
+                        the info is None if it cannot be read, the skipped
+                        images are not in it
+    '''
+
+    hashes, readable, infos = calculate_dhashes(paths,
+                                                decode_backend(backend),
+                                                cancelled)
+    return [(path, dhash if ok else -1, *info)
+            for path, dhash, ok, info
+            in zip(paths, from_hash_array(hashes), readable.tolist(), infos)]
+
+def _gradient_bits(pixels: np.ndarray) -> np.ndarray:
+    # Row gradient bits followed by column gradient bits of (a stack of)
+    # images of shape (..., size+1, size+1), flattened along the last axis.
+    # Code is based on library "dhash": the bits are found with array
+    # operations (the result is the same as comparing the pixels one
+    # by one)
+    current = pixels[..., :-1, :-1]
+    row_bits = current < pixels[..., :-1, 1:]
+    col_bits = current < pixels[..., 1:, :-1]
+
+    shape = pixels.shape[:-2] + (current.shape[-2] * current.shape[-1],)
+    return np.concatenate((row_bits.reshape(shape), col_bits.reshape(shape)),
+                          axis=-1)
+
+def _pixel_array(image: Any) -> np.ndarray:
+    # Greyscale ("Format_Grayscale8") "QImage" as an array of shape
+    # (height, width). Lines in the image buffer are 32-bit aligned,
+    # so the padding at the end of every line is cut off
+    width, height = image.width(), image.height()
+    bytes_per_line = image.bytesPerLine()
+
+    buffer = image.constBits()
+    buffer.setsize(bytes_per_line * height)
+    lines = np.frombuffer(buffer, np.uint8).reshape(height, bytes_per_line)
+
+    # The buffer belongs to the image, so make a copy
+    return lines[:, :width].copy()
+
+
+class DecodeBackend(abc.ABC):
+    '''Interface of the backends decoding images for hashing. The hashes
+    of the same image made with different backends can differ a bit (the
+    scaling and the greyscale conversion are not the same), so every
+    backend has its own "HASH_VERSION" and the cache keeps the hashes of
+    the version in use only
+    '''
+
+    NAME: BackendName = ''
+    # Changed whenever the backend starts making different thumbnails
+    HASH_VERSION = ''
+
+    @abc.abstractmethod
+    def grey_thumbnail(self, path: ImagePath, size: int) \
+        -> Tuple[np.ndarray, ImageInfo]:
+        '''Decode the image into a greyscale thumbnail. The dimensions
+        and the format of the image are read on the way
+
+        :param path:    path to the image,
+        :param size:    width and height of the thumbnail,
+        :return:        tuple with an array of shape (size, size) and dtype
+                        "uint8" and the info of the image,
+        :raise OSError: the image cannot be read
+        '''
+
+
+class QtBackend(DecodeBackend):
+    '''Backend decoding images with Qt ("QImageReader")'''
+
+    NAME = 'qt'
+    # All the hashes calculated before the backends were added
+    HASH_VERSION = cache.DEFAULT_HASH_VERSION
+
+    def __init__(self) -> None:
+        # Imported only in the processes decoding the images with Qt
+        from PyQt5 import QtCore, QtGui # pylint: disable=import-outside-toplevel
+
+        self._qtcore: Any = QtCore
+        self._qtgui: Any = QtGui
+
+    def grey_thumbnail(self, path: ImagePath, size: int) \
+        -> Tuple[np.ndarray, ImageInfo]:
+        reader = self._qtgui.QImageReader(path)
+        # The header is read anyway, so the info costs nothing
+        info = NO_INFO
+        image_size = reader.size()
+        if image_size.isValid():
+            info = (image_size.width(), image_size.height(),
+                    bytes(reader.format()).decode() or None)
+        reader.setScaledSize(self._qtcore.QSize(size, size))
+
+        if not reader.canRead():
+            raise OSError(f'The image at "{path}" cannot be read')
+
+        img = reader.read()
+        if img.isNull():
+            raise OSError(reader.errorString())
+
+        grey = img.convertToFormat(self._qtgui.QImage.Format_Grayscale8)
+        return _pixel_array(grey), info
+
+
+class PillowBackend(DecodeBackend):
+    '''Backend decoding images with Pillow (it has to be installed).
+    JPEG images are decoded already scaled down (up to 8 times) and in
+    greyscale, so they are decoded much faster than with Qt. The thumbnails
+    are scaled with the box filter (averaging the pixels as Qt does), so
+    they are within a few grey levels of the thumbnails made with Qt
+
+    :raise ImportError: Pillow is not installed
+    '''
+
+    NAME = 'pillow'
+    HASH_VERSION = 'pillow-2'
+
+    def __init__(self) -> None:
+        # Optional dependency, imported only when the backend is used
+        from PIL import Image as PILImage # pylint: disable=import-outside-toplevel
+
+        self._pil: Any = PILImage
+        # The resampling filters are in "Image.Resampling" since Pillow 9.1
+        resampling = getattr(PILImage, 'Resampling', PILImage)
+        self._box = resampling.BOX
+
+    def grey_thumbnail(self, path: ImagePath, size: int) \
+        -> Tuple[np.ndarray, ImageInfo]:
+        pil = self._pil
+        try:
+            with pil.open(path) as img:
+                width, height = img.size
+                img_format = img.format
+                img.draft('L', (size, size))
+                grey = img.convert('L').resize((size, size), self._box)
+        # Broken files make the plugins raise almost anything (SyntaxError,
+        # struct.error, IndexError, etc.), none of them may stop the scan
+        except Exception as e: # pylint: disable=broad-except
+            raise OSError(f'The image at "{path}" cannot be read') from e
+
+        info = (width, height, img_format.lower() if img_format else None)
+        return np.asarray(grey, np.uint8), info
+
+
+# Decode backends by the names
+BACKENDS: Dict[BackendName, Type[DecodeBackend]] = {
+    QtBackend.NAME: QtBackend,
+    PillowBackend.NAME: PillowBackend,
+}
@@ -0,0 +1,712 @@
+'''Copyright 2020 Maxim Shpak <maxim.shpak@posteo.uk>
+
+This file is part of Myfyrio.
+
+Myfyrio is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Myfyrio is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
+
+-------------------------------------------------------------------------------
+
+Module implementing indexes for finding pairs of similar 128-bit hashes
+(Hamming range search)
+'''
+
+import abc
+import math
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+from typing import Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+################################## Types ######################################
+HashArray = np.ndarray # Hashes as rows of 2 uint64 (high and low 64 bits)
+IndexArray = np.ndarray # Positions of hashes in "HashArray"
+DistanceArray = np.ndarray # Distances between pairs of hashes
+Pairs = Tuple[IndexArray, IndexArray, DistanceArray] # Pairs (i, j, distance)
+Distance = int # Distance between 2 hashes
+Index = Union['BlockedIndex', 'MIHIndex'] # Index finding pairs of hashes
+###############################################################################
+
+HASH_BITS = 128
+
+# Max width of a substring with the table of bucket positions
+MAX_TABLE_BITS = 22
+
+# Time of making an item of the table of bucket positions in probes
+# of the table (measured)
+TABLE_COST = 0.7
+
+# Time of a probe or candidate check of "MIHIndex" in comparisons of
+# 2 hashes by "BlockedIndex" (measured)
+MIH_COST = 6
+
+# Positions of the bucket walked one by one by "_expand"
+EXPAND_STEPS = 4
+
+# NumPy 2.0+ counts bits with the CPU instruction
+HAS_BITWISE_COUNT = hasattr(np, 'bitwise_count')
+
+# Constants of the bit counting ("popcount") in parallel
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = np.uint64(0x0101010101010101)
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    '''Count set bits in every row of :words: (along the last axis)
+
+    :param words:   array of "uint64" of shape (..., K),
+    :return:        array of shape (...) with the number of set bits
+    '''
+
+    words = np.asarray(words, np.uint64)
+    # Reducing along a short last axis is slow, the words are added up
+    total = np.zeros(words.shape[:-1], np.int64)
+    for k in range(words.shape[-1]):
+        total += _bit_count(words[..., k])
+    return total
+
+
+def distances(hashes1: HashArray, hashes2: HashArray) -> DistanceArray:
+    '''Calculate the Hamming distances between the hashes in the same rows
+    of :hashes1: and :hashes2:
+
+    :param hashes1: array with hashes of shape (..., 2),
+    :param hashes2: array with hashes of shape (..., 2),
+    :return:        array of shape (...) with the distances
+    '''
+
+    return popcount(hashes1 ^ hashes2)
+
+
+def make_index(hashes: HashArray, radius: Distance,
+               threads: int = 1) -> Index:
+    '''Make the index that finds pairs of the hashes faster: brute force
+    for small collections and big radii, multi-index hashing for the rest
+
+    :param hashes:  array with hashes of shape (N, 2) and dtype "uint64",
+    :param radius:  max distance between the hashes of a pair,
+    :param threads: number of threads of "MIHIndex" (optional,
+                    1 by default),
+    :return:        "BlockedIndex" or "MIHIndex" object
+    '''
+
+    n = len(hashes)
+    if BlockedIndex.cost(n, radius) <= MIHIndex.cost(n, radius):
+        return BlockedIndex(hashes, radius)
+    return MIHIndex(hashes, radius, threads=threads)
+
+
+def _bit_count(x: np.ndarray) -> np.ndarray:
+    # Set bits in every "uint64" item (as "uint8")
+    if HAS_BITWISE_COUNT:
+        return np.bitwise_count(x) # pylint: disable=no-member
+
+    x = x - ((x >> np.uint64(1)) & _M1)
+    t = x >> np.uint64(2)
+    t &= _M2
+    x &= _M2
+    x += t
+    x += x >> np.uint64(4)
+    x &= _M4
+    x *= _H01
+    x >>= np.uint64(56)
+    return x.astype(np.uint8)
+
+
+class _Index(abc.ABC):
+    '''Base class of the indexes'''
+
+    @abc.abstractmethod
+    def sweep(self) -> Iterator[Tuple[int, Pairs]]:
+        '''Find all the pairs of hashes within the radius block by block
+        of the first hashes of the pairs: when the tuple (end, pairs) is
+        yielded, all the pairs (i, j, distance) with "i < end" have been
+        found, so a hash with the index less than "end" will not be found
+        in any new pair with a hash with the index less than "end". Every
+        pair is found once, i < j
+
+        :yield: tuple with the end of the block and the pairs found
+                in the block
+        '''
+
+    def pairs(self) -> Iterator[Pairs]:
+        '''Find all the pairs of hashes within the radius. Every pair is
+        found once, the pairs are yielded in blocks
+
+        :yield: tuple with arrays (i, j, distance), i < j
+        '''
+
+        for _, found in self.sweep():
+            if len(found[0]):
+                yield found
+
+
+class DisjointSet:
+    '''Disjoint-set forest (union-find) of the items 0, 1, ..., n-1 with
+    path compression and union by rank. Every set is represented by one
+    of its items (root)
+
+    :param n:   number of items (every item is in its own set)
+    '''
+
+    def __init__(self, n: int = 0) -> None:
+        self._parent = list(range(n))
+        self._rank = [0] * n
+
+    def __len__(self) -> int:
+        return len(self._parent)
+
+    def add(self, n: int) -> None:
+        '''Add new items (every new item is in its own set)
+
+        :param n:   number of new items
+        '''
+
+        start = len(self._parent)
+        self._parent.extend(range(start, start + n))
+        self._rank.extend([0] * n)
+
+    def find(self, item: int) -> int:
+        '''Find the root of the set the item is in
+
+        :param item:    item,
+        :return:        root of the set
+        '''
+
+        parent = self._parent
+        root = item
+        while parent[root] != root:
+            root = parent[root]
+
+        # Path compression: all the items on the way point at the root
+        while parent[item] != root:
+            parent[item], item = root, parent[item]
+
+        return root
+
+    def union(self, item1: int, item2: int) -> Tuple[int, int]:
+        '''Merge the sets of 2 items
+
+        :param item1:   first item,
+        :param item2:   second item,
+        :return:        tuple with the root of the merged set and
+                        the root of the set merged into it (the same
+                        roots if the items are already in the same set)
+        '''
+
+        root1, root2 = self.find(item1), self.find(item2)
+        if root1 == root2:
+            return root1, root2
+
+        # The lower tree goes under the higher one
+        if self._rank[root1] < self._rank[root2]:
+            root1, root2 = root2, root1
+        elif self._rank[root1] == self._rank[root2]:
+            self._rank[root1] += 1
+        self._parent[root2] = root1
+
+        return root1, root2
+
+
+class BlockedIndex(_Index):
+    '''Brute force: every hash is compared with every other one. The hashes
+    are compared in tiles of :block: x :block: hashes small enough to stay
+    in the CPU cache, so the memory used does not depend on the number
+    of hashes
+
+    :param hashes:  array with hashes of shape (N, 2) and dtype "uint64",
+    :param radius:  max distance between the hashes of a pair,
+    :param block:   number of hashes in a side of a tile (optional)
+    '''
+
+    def __init__(self, hashes: HashArray, radius: Distance,
+                 block: int = 128) -> None:
+        self.hashes = np.ascontiguousarray(hashes, np.uint64).reshape(-1, 2)
+        self.radius = radius
+        self.block = block
+
+        # The high and low words are compared separately
+        self._high = np.ascontiguousarray(self.hashes[:, 0])
+        self._low = np.ascontiguousarray(self.hashes[:, 1])
+
+    @staticmethod
+    def cost(n: int, radius: Distance) -> float:
+        '''Estimate the time of finding the pairs
+
+        :param n:       number of hashes,
+        :param radius:  max distance between the hashes of a pair,
+        :return:        time in comparisons of 2 hashes
+        '''
+
+        return n * n / 2
+
+    def sweep(self) -> Iterator[Tuple[int, Pairs]]:
+        '''Find all the pairs of hashes within :radius: block by block
+        of the first hashes of the pairs (see "_Index.sweep")
+
+        :yield: tuple with the end of the block and the pairs
+        '''
+
+        n = len(self.hashes)
+        for lo in range(0, n, self.block):
+            end = min(lo + self.block, n)
+            high = self._high[lo:end, np.newaxis]
+            low = self._low[lo:end, np.newaxis]
+            found = []
+            # Only the tiles on and to the right of the diagonal
+            for col in range(lo, n, self.block):
+                d = _bit_count(high ^ self._high[col:col+self.block])
+                d += _bit_count(low ^ self._low[col:col+self.block])
+                i, j = np.nonzero(d <= self.radius)
+                keep = i + lo < j + col
+                if keep.any():
+                    i, j = i[keep], j[keep]
+                    found.append((i + lo, j + col, d[i, j].astype(np.int64)))
+            yield end, _join(found)
+
+    def query(self, hashes: HashArray) -> Pairs:
+        '''Find the pairs of the new :hashes: (not in the index) and
+        the hashes in the index within :radius:
+
+        :param hashes:  array with hashes of shape (M, 2) and dtype "uint64",
+        :return:        tuple with arrays (i, j, distance), i - index of
+                        the hash in :hashes:, j - index of the hash
+                        in the index
+        '''
+
+        hashes = np.ascontiguousarray(hashes, np.uint64).reshape(-1, 2)
+        found = []
+        for lo in range(0, len(hashes), self.block):
+            high = hashes[lo:lo+self.block, 0, np.newaxis]
+            low = hashes[lo:lo+self.block, 1, np.newaxis]
+            for col in range(0, len(self.hashes), self.block):
+                d = _bit_count(high ^ self._high[col:col+self.block])
+                d += _bit_count(low ^ self._low[col:col+self.block])
+                i, j = np.nonzero(d <= self.radius)
+                if len(i):
+                    found.append((i + lo, j + col, d[i, j].astype(np.int64)))
+        return _join(found)
+
+
+class MIHIndex(_Index):
+    '''Multi-index hashing (MIH). Every hash is split into m substrings
+    and there is a sorted table for every substring. Every substring has
+    its own radius and the radii add up to "radius - m + 1": if 2 hashes
+    differ in at most :radius: bits, at least one pair of their substrings
+    differs in at most the radius of the substring (pigeonhole principle),
+    so only the hashes with close enough substrings are compared
+    (candidates). The number of substrings is chosen by the number
+    of hashes and :radius:
+
+    :param hashes:  array with hashes of shape (N, 2) and dtype "uint64",
+    :param radius:  max distance between the hashes of a pair,
+    :param block:   max number of hashes queried at once (it limits
+                    the memory used for candidates, optional),
+    :param threads: number of threads checking the candidates (optional,
+                    1 by default)
+    '''
+
+    def __init__(self, hashes: HashArray, radius: Distance,
+                 block: int = 65536, threads: int = 1) -> None:
+        self.hashes = np.ascontiguousarray(hashes, np.uint64).reshape(-1, 2)
+        self.radius = radius
+        self.block = block
+        self.threads = threads
+
+        m, _ = self._layout(len(self.hashes), radius)
+        split = _split(m, radius)
+        self._substrings = [(start, end) for start, end, _ in split]
+        self._sub_radii = [sub_radius for _, _, sub_radius in split]
+        self._flips = [_flip_masks(start, end, sub_radius)
+                       for start, end, sub_radius in split]
+
+        # The hashes are also kept in the order of every substring, so
+        # the candidates of the queries in the same order are read from
+        # the memory almost one after another (random reads are slow).
+        # A hash is read as one 16-byte item (both words at once)
+        self._masks = []
+        self._orders = []
+        self._sorted_keys = []
+        self._sorted_hashes = []
+        self._starts = []
+        for (start, end), flips in zip(self._substrings, self._flips):
+            self._masks.append(_bit_mask(start, end))
+            keys = _substring(self.hashes, start, end)
+            order = np.argsort(keys, kind='stable')
+            starts = _bucket_starts(keys, end - start, len(flips) * len(keys))
+            self._orders.append(order)
+            # The sorted keys are needed only for the binary search
+            self._sorted_keys.append(keys[order] if starts is None else None)
+            self._sorted_hashes.append(_rows(self.hashes[order]))
+            self._starts.append(starts)
+
+    @classmethod
+    def cost(cls, n: int, radius: Distance) -> float:
+        '''Estimate the time of finding the pairs (see "BlockedIndex.cost")
+
+        :param n:       number of hashes,
+        :param radius:  max distance between the hashes of a pair,
+        :return:        time in comparisons of 2 hashes
+        '''
+
+        _, cost = cls._layout(n, radius)
+        return cost * MIH_COST
+
+    @staticmethod
+    def _layout(n: int, radius: Distance) -> Tuple[int, float]:
+        # Number of substrings and the cost of the search with them
+        # in probes of the tables (see "_probe_cost"). Every candidate
+        # costs about as much as a probe
+        n = max(n, 2)
+        best, best_cost = 2, math.inf
+        # Substrings are at most 64 bits, more than "radius + 1" of them
+        # give only more candidates
+        for m in range(2, min(max(radius + 1, 2), 32) + 1):
+            cost = 0.0
+            for start, end, sub_radius in _split(m, radius):
+                width = end - start
+                probes = _ball(width, sub_radius) * n
+                cost += probes * n / 2**width + _probe_cost(n, width, probes)
+            if cost < best_cost:
+                best, best_cost = m, cost
+        return best, best_cost
+
+    def sweep(self) -> Iterator[Tuple[int, Pairs]]:
+        '''Find all the pairs of hashes within :radius: block by block
+        of the first hashes of the pairs (see "_Index.sweep")
+
+        :yield: tuple with the end of the block and the pairs
+        '''
+
+        n = len(self.hashes)
+        for lo in range(0, n, self.block):
+            end = min(lo + self.block, n)
+            i, j, d = self._search(self.hashes[lo:end])
+            i += lo
+            # Every pair is found from both sides, the first hash
+            # of a pair is the query
+            keep = i < j
+            yield end, (i[keep], j[keep], d[keep])
+
+    def query(self, hashes: HashArray) -> Pairs:
+        '''Find the pairs of the new :hashes: (not in the index) and
+        the hashes in the index within :radius: (see "BlockedIndex.query")
+
+        :param hashes:  array with hashes of shape (M, 2) and dtype "uint64",
+        :return:        tuple with arrays (i, j, distance), i - index of
+                        the hash in :hashes:, j - index of the hash
+                        in the index
+        '''
+
+        hashes = np.ascontiguousarray(hashes, np.uint64).reshape(-1, 2)
+        found = []
+        for lo in range(0, len(hashes), self.block):
+            i, j, d = self._search(hashes[lo:lo+self.block])
+            found.append((i + lo, j, d))
+        return _join(found)
+
+    def _search(self, block: HashArray) -> Pairs:
+        # Pairs (index of the hash in the block, index of the hash
+        # in the index, distance) within the radius
+        queries = []
+        for start, end in self._substrings:
+            # The queries are sorted by the substring as the index is,
+            # so the buckets of the probes are walked in order
+            keys = _substring(block, start, end)
+            order = np.argsort(keys)
+            queries.append((keys[order], order, _rows(block[order])))
+
+        # Small blocks are probed with several flip masks at once
+        step = max(self.block // max(len(block), 1), 1)
+        tasks = [(k, queries[k], flips[first:first+step])
+                 for k, flips in enumerate(self._flips)
+                 for first in range(0, len(flips), step)]
+        if self.threads > 1:
+            # NumPy releases the GIL while it works on the arrays
+            with ThreadPoolExecutor(max_workers=self.threads) as executor:
+                found = list(executor.map(self._probe, *zip(*tasks)))
+        else:
+            found = [self._probe(*task) for task in tasks]
+        return _join(found)
+
+    def _probe(self, k: int, queries: Tuple[np.ndarray, IndexArray,
+                                            np.ndarray],
+               flips: np.ndarray) -> Pairs:
+        # Pairs of the queries (sorted keys of the substring k, positions
+        # of the keys in the block, hashes) found with the flip masks
+        keys, order, hashes = queries
+        i, positions = self._candidates(k, keys, flips)
+        diff = _words(hashes[i]) ^ _words(self._sorted_hashes[k][positions])
+        keep, d = self._close(k, diff[:, 0], diff[:, 1])
+        return order[i[keep]], self._orders[k][positions[keep]], d
+
+    def _candidates(self, k: int, keys: np.ndarray, flips: np.ndarray) \
+        -> Tuple[IndexArray, IndexArray]:
+        # Pairs (position of the query key, position in the sorted
+        # substring k) of the hashes with the substring k equal
+        # to the query key with the bits of a flip mask flipped
+        probes = (flips[:, np.newaxis] ^ keys).ravel()
+        starts = self._starts[k]
+        if starts is not None:
+            probes = probes.astype(np.intp)
+            lo, hi = starts[probes], starts[probes + 1]
+        else:
+            sorted_keys = self._sorted_keys[k]
+            lo = np.searchsorted(sorted_keys, probes, 'left')
+            hi = np.searchsorted(sorted_keys, probes, 'right')
+        i, positions = _expand(lo, hi)
+        if len(flips) > 1:
+            i %= len(keys)
+        return i, positions
+
+    def _close(self, k: int, high: np.ndarray, low: np.ndarray) \
+        -> Tuple[IndexArray, DistanceArray]:
+        # Positions and distances of the candidates (XOR of the high and
+        # low words of the hashes) within the radius found with
+        # the substring k
+        d = _bit_count(high).astype(np.int64)
+        d += _bit_count(low)
+        keep = np.flatnonzero(d <= self.radius)
+        if k and len(keep):
+            keep = keep[self._first_substring(k, high[keep], low[keep])]
+        return keep, d[keep]
+
+    def _first_substring(self, k: int, high: np.ndarray, low: np.ndarray) \
+        -> np.ndarray:
+        # The pair is found with the substring k only if there is no earlier
+        # substring close enough, otherwise it would be yielded twice
+        first = np.ones(len(high), bool)
+        for mask, sub_radius in zip(self._masks[:k], self._sub_radii):
+            d = _bit_count(high & mask[0, 0]).astype(np.int64)
+            d += _bit_count(low & mask[0, 1])
+            first &= d > sub_radius
+        return first
+
+
+class IncrementalIndex:
+    '''Index the hashes are added to block by block. The new pairs are
+    found as soon as the block is added. The hashes are kept in segments,
+    every segment is an index (see "make_index") of a range of the hashes.
+    The new block becomes a new segment and the last segments are merged
+    while they are about the same size (as in log-structured merge trees),
+    so there are about log(N) segments and every hash is indexed again
+    about log(N) times
+
+    :param radius:  max distance between the hashes of a pair,
+    :param threads: number of threads of a segment (see "make_index",
+                    optional, 1 by default)
+    '''
+
+    def __init__(self, radius: Distance, threads: int = 1) -> None:
+        self.radius = radius
+        self.threads = threads
+
+        # Tuples (index of the first hash, segment index)
+        self._segments: List[Tuple[int, Index]] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, hashes: HashArray) -> Pairs:
+        '''Add the hashes and find the pairs of the new hashes with all
+        the hashes (the new ones included) within :radius:. The hashes
+        are numbered in the order they are added
+
+        :param hashes:  array with hashes of shape (M, 2) and dtype "uint64",
+        :return:        tuple with arrays (i, j, distance), i < j,
+                        j - index of a new hash
+        '''
+
+        hashes = np.ascontiguousarray(hashes, np.uint64).reshape(-1, 2)
+        start = self._len
+        j, i, d = self.query(hashes)
+        found = [(i, j + start, d)]
+
+        new = make_index(hashes, self.radius, self.threads)
+        for i, j, d in new.pairs():
+            found.append((i + start, j + start, d))
+        self._insert(new)
+
+        return _join(found)
+
+    def insert(self, hashes: HashArray) -> None:
+        '''Add the hashes without finding the pairs (e.g. the pairs
+        are already known)
+
+        :param hashes:  array with hashes of shape (M, 2) and dtype "uint64"
+        '''
+
+        hashes = np.ascontiguousarray(hashes, np.uint64).reshape(-1, 2)
+        self._insert(make_index(hashes, self.radius, self.threads))
+
+    def query(self, hashes: HashArray) -> Pairs:
+        '''Find the pairs of the new :hashes: (they are not added)
+        and the hashes in the index within :radius:
+
+        :param hashes:  array with hashes of shape (M, 2) and dtype "uint64",
+        :return:        tuple with arrays (i, j, distance), i - index of
+                        the hash in :hashes:, j - index of the hash
+                        in the index
+        '''
+
+        found = []
+        for start, segment in self._segments:
+            i, j, d = segment.query(hashes)
+            found.append((i, j + start, d))
+        return _join(found)
+
+    def _insert(self, new: Index) -> None:
+        self._segments.append((self._len, new))
+        self._len += len(new.hashes)
+        self._merge()
+
+    def _merge(self) -> None:
+        segments = self._segments
+        while len(segments) > 1:
+            (start, prev), (_, last) = segments[-2:]
+            if len(last.hashes) * 2 < len(prev.hashes):
+                break
+
+            hashes = np.concatenate((prev.hashes, last.hashes))
+            merged = make_index(hashes, self.radius, self.threads)
+            segments[-2:] = [(start, merged)]
+
+
+def _substring(hashes: HashArray, start: int, end: int) -> np.ndarray:
+    # Bits [start, end) of the hashes (counted from the highest one)
+    # as "uint64"
+    res = np.zeros(len(hashes), np.uint64)
+    for word in range(2):
+        lo = max(start, 64 * word)
+        hi = min(end, 64 * (word + 1))
+        if lo >= hi:
+            continue
+
+        width = hi - lo
+        part = hashes[:, word] >> np.uint64(64 * (word + 1) - hi)
+        if width < 64:
+            part &= np.uint64((1 << width) - 1)
+            res <<= np.uint64(width)
+        res |= part
+    return res
+
+def _rows(hashes: HashArray) -> np.ndarray:
+    # Hashes as 16-byte items (a row is read from the memory at once)
+    hashes = np.ascontiguousarray(hashes, np.uint64)
+    return hashes.view(np.dtype((np.void, 16))).ravel()
+
+def _words(rows: np.ndarray) -> HashArray:
+    # 16-byte items (see "_rows") as hashes
+    return rows.view(np.uint64).reshape(-1, 2)
+
+def _split(m: int, radius: Distance) -> List[Tuple[int, int, Distance]]:
+    # Substrings (start bit, end bit, radius) of the hashes split into m
+    # substrings. If every substring of 2 hashes differs in more bits than
+    # its radius, the hashes differ in at least "sum of the radii + m"
+    # bits, so the radii add up to "radius - m + 1" (the narrower
+    # substrings get the bigger radii, they have fewer flip masks)
+    bounds = [HASH_BITS * k // m for k in range(m + 1)]
+    base, extra = divmod(max(radius - m + 1, 0), m)
+    narrowest = sorted(range(m), key=lambda k: bounds[k+1] - bounds[k])
+    radii = [base] * m
+    for k in narrowest[:extra]:
+        radii[k] += 1
+    return [(bounds[k], bounds[k+1], radii[k]) for k in range(m)]
+
+def _bucket_starts(keys: np.ndarray, width: int, probes: int) \
+    -> Optional[IndexArray]:
+    # Positions in the sorted keys where every key value starts (a table
+    # lookup is much faster than the binary search but the table has
+    # "2 ** width" items), None if the binary search is cheaper for
+    # the :probes: (see "_probe_cost")
+    if not _has_table(len(keys), width, probes):
+        return None
+
+    counts = np.bincount(keys.astype(np.intp), minlength=2**width)
+    return np.concatenate(([0], np.cumsum(counts)))
+
+def _has_table(n: int, width: int, probes: float) -> bool:
+    # Whether the substring of :width: bits of :n: hashes has the table
+    # of bucket positions, it is made only if the :probes: cost less
+    # with it (it is made with every index, so it costs much when there
+    # are few hashes)
+    if width > MAX_TABLE_BITS:
+        return False
+    return probes + 2**width * TABLE_COST < probes * math.log2(max(n, 2))
+
+def _probe_cost(n: int, width: int, probes: float) -> float:
+    # Cost of the :probes: of the substring of :width: bits of :n: hashes
+    # in probes of the tables: a binary search costs a probe per step,
+    # the table costs "TABLE_COST" per item
+    if _has_table(n, width, probes):
+        return probes + 2**width * TABLE_COST
+    return probes * math.log2(max(n, 2))
+
+def _bit_mask(start: int, end: int) -> HashArray:
+    # Mask of bits [start, end) of a hash as an array of shape (1, 2)
+    mask = (1 << (HASH_BITS - start)) - (1 << (HASH_BITS - end))
+    return np.array([[mask >> 64, mask & (2**64 - 1)]], np.uint64)
+
+def _ball(width: int, radius: Distance) -> int:
+    # Number of values of :width: bits within :radius: of a value
+    total, count = 0, 1
+    for r in range(min(radius, width) + 1):
+        total += count
+        count = count * (width - r) // (r + 1)
+    return total
+
+def _flip_masks(start: int, end: int, radius: Distance) -> np.ndarray:
+    width = end - start
+    masks = []
+    for r in range(min(radius, width) + 1):
+        for bits in combinations(range(width), r):
+            masks.append(sum(1 << b for b in bits))
+    return np.array(masks, np.uint64)
+
+def _join(found: List[Pairs]) -> Pairs:
+    if not found:
+        empty = np.empty(0, np.int64)
+        return empty, empty, empty
+    return tuple(np.concatenate(arrays) for arrays in zip(*found))
+
+def _expand(lo: IndexArray, hi: IndexArray) -> Tuple[IndexArray, IndexArray]:
+    # Pair every query (its position) with every position in its range
+    # [lo, hi). Most of the ranges are short (the layout of "MIHIndex"
+    # keeps about 1 hash in a bucket), so the ranges are walked position
+    # by position first and only the rest of the long ones is repeated
+    queries = np.flatnonzero(hi > lo)
+    found_i, found_pos = [], []
+    offset = 0
+    while len(queries) and offset < EXPAND_STEPS:
+        first = lo[queries] + offset
+        found_i.append(queries)
+        found_pos.append(first)
+        offset += 1
+        queries = queries[first + 1 < hi[queries]]
+
+    if len(queries):
+        first = lo[queries] + offset
+        counts = hi[queries] - first
+        total = counts.sum()
+        found_i.append(np.repeat(queries, counts))
+        starts = np.repeat(first - (np.cumsum(counts) - counts), counts)
+        found_pos.append(starts + np.arange(total))
+
+    if not found_i:
+        empty = np.empty(0, np.intp)
+        return empty, empty
+    return np.concatenate(found_i), np.concatenate(found_pos)
@@ -64,6 +64,21 @@ class Logger:
         sh.setFormatter(formatter)
         logger.addHandler(sh)
 
+    @classmethod
+    def setConsoleLogger(cls) -> None:
+        '''Set the programme's logger for the command line: the messages
+        go only to stderr (stdout is kept for the output), no log files
+        are written. Message format is 'message level: message'
+        '''
+
+        logger = logging.getLogger(cls.NAME)
+        logger.setLevel(logging.WARNING)
+
+        sh = logging.StreamHandler(sys.stderr)
+        sh.setFormatter(logging.Formatter(fmt='{levelname}: {message}',
+                                          style='{'))
+        logger.addHandler(sh)
+
     @classmethod
     def getLogger(cls, suffix: str) -> logging.Logger:
         '''Get the programme's logger with name 'NAME + . + :suffix:'
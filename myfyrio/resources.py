@@ -157,7 +157,9 @@ class Config(DynamicResource):
 class Cache(DynamicResource):
     '''Represent cache file'''
 
-    CACHE = 'cache.p'
+    CACHE = 'cache.db'
+    # Pickled cache (the old format), its hashes are moved into "CACHE"
+    LEGACY = 'cache.p'
 
 
 class Log(DynamicResource):
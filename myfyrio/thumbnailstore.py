@@ -0,0 +1,189 @@
+'''Copyright 2020 Maxim Shpak <maxim.shpak@posteo.uk>
+
+This file is part of Myfyrio.
+
+Myfyrio is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Myfyrio is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
+
+-------------------------------------------------------------------------------
+
+Module implementing the on-disk store of image thumbnails. The layout of
+the store is the one of the freedesktop.org thumbnail specification, so
+the thumbnails made by file managers are used too (and vice versa)
+'''
+
+import hashlib
+import os
+import pathlib
+import threading
+from typing import Optional, Tuple
+
+from PyQt5 import QtCore, QtGui
+
+from myfyrio import core
+
+################################## Types ######################################
+StoreFolder = str # Path to the root folder of the store
+ThumbnailPath = str # Path to a stored thumbnail
+URI = str # URI of an image file
+###############################################################################
+
+
+class ThumbnailStore:
+    '''Store of image thumbnails on the disk. A thumbnail is a PNG file
+    "<MD5 hash of the image URI>.png" in the folder of its size; the URI
+    and the modification time of the image are kept in the PNG file, so
+    the thumbnail of a modified image is not used
+
+    :param root: root folder of the store (optional, the shared one
+                 "$XDG_CACHE_HOME/thumbnails" or its equivalent on other
+                 platforms by default)
+    '''
+
+    # Sizes of the thumbnails (the biggest dimension) and their folders
+    SIZES: Tuple[Tuple[int, str], ...] = (
+        (128, 'normal'),
+        (256, 'large'),
+        (512, 'x-large'),
+        (1024, 'xx-large'),
+    )
+
+    URI_KEY = 'Thumb::URI'
+    MTIME_KEY = 'Thumb::MTime'
+
+    def __init__(self, root: Optional[StoreFolder] = None) -> None:
+        if root is None:
+            root = self.defaultRoot()
+        self._root = root
+
+    @staticmethod
+    def defaultRoot() -> StoreFolder:
+        '''Return the shared folder of thumbnails
+
+        :return: path to the folder
+        '''
+
+        cache_dir = QtCore.QStandardPaths.writableLocation(
+            QtCore.QStandardPaths.GenericCacheLocation
+        )
+        return os.path.join(cache_dir, 'thumbnails')
+
+    @classmethod
+    def storedSize(cls, size: int) -> Optional[int]:
+        '''Return the size of the stored thumbnails which are scaled
+        down to thumbnails of size :size:
+
+        :param size:    the biggest dimension of the thumbnail,
+        :return:        the smallest of "SIZES" not less than :size:
+                        or None if :size: is too big to be stored
+        '''
+
+        for stored_size, _ in cls.SIZES:
+            if stored_size >= size:
+                return stored_size
+        return None
+
+    @staticmethod
+    def fits(image: core.Image, size: int) -> bool:
+        '''Check if the thumbnail of the image can be stored. The stored
+        thumbnails are never scaled up, so the thumbnails of the images
+        smaller than :size: are not stored
+
+        :param image:       "Image" object,
+        :param size:        one of the sizes in "SIZES",
+        :return:            True if the image is not smaller than :size:,
+        :raise OSError:     the image size cannot be read
+        '''
+
+        return max(image.width, image.height) >= size
+
+    @staticmethod
+    def uri(path: core.ImagePath) -> URI:
+        '''Return the URI of the image file
+
+        :param path:    path to the image,
+        :return:        "file://" URI
+        '''
+
+        return pathlib.Path(os.path.abspath(path)).as_uri()
+
+    def path(self, image_path: core.ImagePath, size: int) -> ThumbnailPath:
+        '''Return the path to the stored thumbnail of the image
+
+        :param image_path:  path to the image,
+        :param size:        one of the sizes in "SIZES",
+        :return:            path to the thumbnail
+        '''
+
+        folder = dict(self.SIZES)[size]
+        md5 = hashlib.md5(self.uri(image_path).encode()).hexdigest()
+        return os.path.join(self._root, folder, f'{md5}.png')
+
+    @staticmethod
+    def _mtime(image: core.Image) -> str:
+        return str(int(image.stat().st_mtime))
+
+    def load(self, image: core.Image, size: int) -> Optional[QtGui.QImage]:
+        '''Load the stored thumbnail of the image
+
+        :param image:       "Image" object,
+        :param size:        one of the sizes in "SIZES",
+        :return:            thumbnail as "QImage" object or None if
+                            there is no valid thumbnail in the store,
+        :raise OSError:     the status of the image file cannot be read
+        '''
+
+        thumb = QtGui.QImage(self.path(image.path, size))
+        if thumb.isNull():
+            return None
+        if (thumb.text(self.URI_KEY) != self.uri(image.path)
+                or thumb.text(self.MTIME_KEY) != self._mtime(image)):
+            return None
+        return thumb
+
+    def save(self, image: core.Image, thumb: QtGui.QImage, size: int) \
+        -> None:
+        '''Put the thumbnail of the image into the store. The file is
+        written under a temporary name first, so the other programmes
+        never read a half-written thumbnail. Nothing is written if
+        the image is smaller than :size: (see "fits")
+
+        :param image:       "Image" object,
+        :param thumb:       its thumbnail of size :size:,
+        :param size:        one of the sizes in "SIZES",
+        :raise OSError:     the thumbnail cannot be written
+        '''
+
+        if not self.fits(image, size):
+            return
+
+        path = self.path(image.path, size)
+        folder = os.path.dirname(path)
+        os.makedirs(folder, mode=0o700, exist_ok=True)
+
+        thumb = QtGui.QImage(thumb)
+        thumb.setText(self.URI_KEY, self.uri(image.path))
+        thumb.setText(self.MTIME_KEY, self._mtime(image))
+
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}'
+        if not thumb.save(tmp_path, 'PNG'):
+            raise OSError(f'The thumbnail of "{image.path}" cannot be saved')
+        try:
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
@@ -21,23 +21,95 @@ Module implementing working with worker threads
 '''
 
 import os
+import queue
 import sys
-from multiprocessing import Pool
-from typing import (TYPE_CHECKING, Any, Callable, Collection, Iterable, List,
-                    Set, Tuple, Union)
+import threading
+import time
+from multiprocessing import Event, Pool
+from typing import (TYPE_CHECKING, Any, Callable, Collection, Container, Dict,
+                    Iterable, List, NamedTuple, Optional, Sequence, Set,
+                    Tuple, Union)
 
 from PyQt5 import QtCore, QtGui
 
-from myfyrio import cache, core, resources
+from myfyrio import cache, core, hashing, resources, thumbnailstore
 from myfyrio.logger import Logger
 
 if TYPE_CHECKING:
     from myfyrio import config
-    from myfyrio.gui import thumbnailwidget
 
 logger = Logger.getLogger('workers')
 
 
+class WorkerPool:
+    '''Pool of the worker processes calculating the hashes that is kept
+    between the processings, so the processes (and the imports in them)
+    are not started again on every run. The processes are started on
+    the first use and started again if the number of them changes
+    '''
+
+    def __init__(self) -> None:
+        self._pool: Optional[Pool] = None
+        self._processes = 0
+        self._lock = threading.Lock()
+        # Seen by the worker processes, they stop reading the images
+        # of their tasks when it is set
+        self._cancelled = Event()
+
+    def get(self, processes: int) -> Pool:
+        '''Return the pool, start it if it is not started or has another
+        number of the processes. The tasks given to the pool after this
+        call are not cancelled
+
+        :param processes:   number of the worker processes,
+        :return:            "multiprocessing.Pool" object
+        '''
+
+        with self._lock:
+            self._cancelled.clear()
+            if self._pool is not None and self._processes != processes:
+                self._terminate()
+            if self._pool is None:
+                self._pool = Pool(processes=processes,
+                                  initializer=hashing.init_worker,
+                                  initargs=(self._cancelled,))
+                self._processes = processes
+            return self._pool
+
+    def cancel(self) -> None:
+        '''Make the worker processes finish their tasks after the images
+        they are reading, the rest of the images are not hashed (the tasks
+        return only the calculated hashes)
+        '''
+
+        self._cancelled.set()
+
+    def terminate(self) -> None:
+        '''Stop the worker processes without finishing the tasks, the pool
+        is started again on the next use
+        '''
+
+        with self._lock:
+            self._terminate()
+
+    def _terminate(self) -> None:
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+
+class Progress(NamedTuple):
+    '''Snapshot of the image processing progress'''
+
+    loaded: int # Number of the found images
+    cached: int # Number of the images found in the cache
+    hashed: int # Number of the calculated hashes
+    done: int # Number of the found images with the hashes (or failed)
+    rate: float # Images done per second
+    # Seconds left, None while the images are still being found
+    eta: Optional[float]
+
+
 class Worker(QtCore.QRunnable):
     '''QRunnable class reimplementation to handle a worker thread.
     Pass any function you want to run in a worker thread with
@@ -63,9 +135,12 @@ class Worker(QtCore.QRunnable):
 
 class ImageProcessing(QtCore.QObject):
     '''Function "run" implements all the stages of image processing:
-    finds images in the :folders:, loads the cache file, checks the cache
-    and finds the images with no calculated hashes, runs hash calculation
-    for these images and groups all the similar images
+    finds images in the :folders:, checks the cache for their hashes,
+    calculates the hashes of the images not found in the cache and groups
+    all the similar images. The stages overlap: the images go to the next
+    stage in batches as soon as they are found (the queue of the found
+    images is bounded, so is the number of images being hashed), the groups
+    are emitted while the hashes are still being calculated
 
     :param folders:             folders to search for images in,
     :param sensitivity:         images are considered similar if the difference
@@ -73,20 +148,30 @@ class ImageProcessing(QtCore.QObject):
     :param conf:                "Config" object with the programme's settings,
 
     :signal images_loaded:      number of the found in the :folders:
-                                images: int, emitted when a new image is found,
+                                images: int, emitted when it changes (at most
+                                "1 / PROGRESS_INTERVAL" times per second as
+                                the other progress signals),
     :signal found_in_cache:     number of the found in the cache images: int,
-                                emitted when the whole cache is checked,
-    :signal hashes_calculated:  number of new calculatedhashes: int,
-                                emitted when a new hash is calculated,
+    :signal hashes_calculated:  number of new calculated hashes: int,
     :signal duplicates_found:   number of found duplicate images: int,
-                                emitted when a new image is found,
+                                emitted when new duplicates are found,
     :signal groups_found:       number of found duplicate image groups: int,
-                                emitted when a new group is found,
+                                emitted when new duplicates are found,
     :signal update_progressbar: new progress bar value: int,
+    :signal progress:           "Progress" snapshot with the numbers above,
+                                the throughput and the time left,
     :signal image_group:        tuple with the group index and list of grouped
                                 duplicate images: Tuple[GroupIndex, Group],
-                                emit the empty group ("(0, [])") when
-                                the processing is finished,
+                                emitted when a group is found or changed (the
+                                new images are at the end of the group, the
+                                group is empty if it has been joined with
+                                another one), emit the empty group "(0, [])"
+                                when the processing is finished,
+    :signal grouped:            "core.Dendrogram" of all the found images,
+                                emitted before the processing is finished
+                                (if it has not been interrupted), so
+                                the images can be regrouped with another
+                                sensitivity,
     :signal interrupted:        image processing has been interrupted
                                 by the user,
     :signal error:              error text: str
@@ -99,19 +184,47 @@ class ImageProcessing(QtCore.QObject):
     groups_found = QtCore.pyqtSignal(int)
 
     update_progressbar = QtCore.pyqtSignal(float)
+    progress = QtCore.pyqtSignal(object)
     image_group = QtCore.pyqtSignal(tuple)
+    grouped = QtCore.pyqtSignal(object)
     interrupted = QtCore.pyqtSignal()
     error = QtCore.pyqtSignal(str)
 
     # Progress bar consts
     PROG_MIN = 0
-    PROG_CHECK_CACHE = 15 # Set when the cache is checked
-    PROG_CALC = 75 # Set when all new hashes are calculated
-    PROG_UPD_CACHE = 80 # Set when the cache is updated with the new hashes
     PROG_MAX = 100
+    # Min time between the progress reports (in seconds), the counters are
+    # updated on every step but not sent to the GUI thread every time
+    PROGRESS_INTERVAL = 0.05
+
+    # Max number of found images waiting for the cache check
+    QUEUE_SIZE = 1024
+    # Max number of images checked in the cache at once
+    BATCH_SIZE = 256
+    # Max number of images hashed by a worker process in one task
+    MAX_CHUNK_SIZE = 64
+    # Max number of images being hashed per worker process
+    MAX_HASHING = 2 * MAX_CHUNK_SIZE
+    # New hashes are saved into the cache file when there are this many
+    # of them or this many seconds have passed since the last saving,
+    # so a crash does not lose the work of a long run
+    CHECKPOINT_SIZE = 4096
+    CHECKPOINT_INTERVAL = 30.0
+    # Max time to wait for the worker processes to finish their tasks
+    # after the interruption (in seconds), the processes still busy
+    # are terminated
+    CANCEL_TIME = 1.0
+    # Hashed images are grouped when there are this many of them
+    # or this many seconds have passed since the last grouping
+    GROUPING_SIZE = 4096
+    GROUPING_INTERVAL = 0.5
+    # Max time to wait for new images or hashes (in seconds), so
+    # the interruption is checked
+    WAIT_TIME = 0.1
 
     def __init__(self, folders: Iterable[core.FolderPath],
-                 conf: 'config.Config') -> None:
+                 conf: 'config.Config',
+                 pool: Optional[WorkerPool] = None) -> None:
         super().__init__(parent=None)
 
         self._folders = folders
@@ -120,66 +233,247 @@ class ImageProcessing(QtCore.QObject):
         self._interrupted = False
         self._progressbar_value: float = 0.0
 
+        # Without a shared pool, the processes live only while running
+        self._own_pool = pool is None
+        self._pool = WorkerPool() if pool is None else pool
+        # Number of the tasks given to the worker processes and not
+        # finished yet
+        self._pending = 0
+        # Paths of the images with the pairs in the cache
+        self._indexed: Set[core.ImagePath] = set()
+        self._loaded_num = 0
+        self._cached_num = 0
+        self._calculated_num = 0
+        # Start of the processing, time and counters of the last report
+        self._started = 0.0
+        self._last_report = 0.0
+        self._reported = (0, 0, 0)
+
     def run(self) -> None:
+        stop = threading.Event()
         try:
-            images = self._find_images()
-            if not images:
-                return
+            # Fail early if the library of the backend is not installed
+            hashing.decode_backend(self._conf['backend'])
 
-            cache = self._load_cache()
-            cached, not_cached = self._check_cache(images, cache)
+            found: 'queue.Queue[Any]' = queue.Queue(self.QUEUE_SIZE)
+            finder = threading.Thread(target=self._find_images,
+                                      args=(found, stop), daemon=True)
+            finder.start()
 
-            if not_cached:
-                calculated = self._calculate_hashes(not_cached)
-                self._update_cache(cache, calculated)
-                if self._interrupted:
-                    self.interrupted.emit()
-                    return
-                cached.extend(calculated)
+            cache = self._load_cache()
+            try:
+                self._process(found, cache)
+            finally:
+                cache.close()
 
-            self._image_grouping(cached)
+            if self._interrupted:
+                self.interrupted.emit()
+            else:
+                self._update_progressbar(self.PROG_MAX)
+                self.image_group.emit((0, []))
 
         except Exception as e:
             logger.exception(e)
             self.error.emit(str(e))
             self.interrupted.emit()
 
+        finally:
+            stop.set()
+            # The processes still busy with the tasks of a failed
+            # processing (or not cancelled in time) would hold up
+            # the next one
+            if self._own_pool or self._pending:
+                self._pool.terminate()
+
     def interrupt(self) -> None:
         self._interrupted = True
 
-    def _find_images(self) -> Set[core.Image]:
-        filter_size = self._conf['filter_img_size']
-        min_w, max_w = self._conf['min_width'], self._conf['max_width']
-        min_h, max_h = self._conf['min_height'], self._conf['max_height']
-
-        images = set()
-        gen = core.find_image(self._folders, self._conf['subfolders'])
-        for img in gen:
-            if self._interrupted:
-                self.interrupted.emit()
-                return set()
+    def _find_images(self, found: queue.Queue, stop: threading.Event) \
+        -> None:
+        # Runs in its own thread: puts the found images into the queue,
+        # then None when all the images have been found (or the exception
+        # if the images cannot be found). The images are filtered by
+        # the size later, when the cache has been checked for their
+        # dimensions (see "_size_filter")
+        last: Any = None
+        try:
+            gen = core.find_image(self._folders, self._conf['subfolders'])
+            for img in gen:
+                if stop.is_set() or self._interrupted:
+                    return
 
-            if not filter_size or (min_w <= img.width <= max_w
-                                   and min_h <= img.height <= max_h):
-                images.add(img)
-                # Slower than showing the result number
-                self.images_loaded.emit(len(images))
+                self._put(found, img, stop)
+        except Exception as e: # pylint: disable=broad-except
+            last = e
+        self._put(found, last, stop)
 
-        if not images:
-            self.image_group.emit((0, []))
+    def _put(self, found: queue.Queue, item: Any, stop: threading.Event) \
+        -> None:
+        # The queue is bounded, so wait until there is room for the item
+        # unless the processing has been stopped
+        while not stop.is_set() and not self._interrupted:
+            try:
+                found.put(item, timeout=self.WAIT_TIME)
+                return
+            except queue.Full:
+                pass
+
+    def _take(self, found: queue.Queue, wait: bool) \
+        -> Tuple[List[core.Image], bool]:
+        # Take a batch of the found images, False if all the images
+        # have been found
+        images: List[core.Image] = []
+        try:
+            if wait:
+                item = found.get(timeout=self.WAIT_TIME)
+            else:
+                item = found.get_nowait()
+
+            while True:
+                if item is None:
+                    return images, False
+                if isinstance(item, Exception):
+                    raise item
+
+                images.append(item)
+                if len(images) >= self.BATCH_SIZE:
+                    break
+                item = found.get_nowait()
+        except queue.Empty:
+            pass
 
-        return images
+        return images, True
+
+    def _process(self, found: queue.Queue, cache: cache.Cache) -> None:
+        sensitivity = self._conf['sensitivity']
+        grouping = core.Grouping(sensitivity)
+        copy_finder = core.CopyFinder()
+        # The pairs of the images are kept in the cache if the sensitivity
+        # is within the max radius of the similarity index
+        similarity = None
+        if sensitivity <= cache.RADIUS:
+            similarity = core.SimilarityIndex(cache,
+                                              self._available_cores())
+        max_hashing = self._available_cores() * self.MAX_HASHING
+
+        # Images being hashed by the paths and the copies of them
+        # waiting for their hashes (copies are not decoded and hashed)
+        in_progress: Dict[core.ImagePath, core.Image] = {}
+        copies: Dict[core.Image, List[core.Image]] = {}
+        # Hashes calculated by the worker processes
+        results: 'queue.Queue[Any]' = queue.Queue()
+        # Images with the hashes not grouped yet
+        ready: List[core.Image] = []
+        # Paths of all the found images
+        seen: Set[core.ImagePath] = set()
+        last_grouping = last_checkpoint = self._started = time.monotonic()
+
+        done = 0
+        finding = True
+        while finding or in_progress:
+            if self._interrupted:
+                self._cancel_hashing(results, in_progress, copies, cache)
+                break
+
+            images: List[core.Image] = []
+            if finding and len(in_progress) < max_hashing:
+                images, finding = self._take(found, not in_progress)
+            if images:
+                self._loaded_num += len(images)
+                seen.update(img.path for img in images)
+
+                cached, not_cached = self._check_cache(images, cache)
+                # The images of the other sizes are not hashed (only
+                # the header of an image not in the cache is read)
+                cached = self._size_filter(cached, cache)
+                not_cached = self._size_filter(not_cached)
+                for img in cached:
+                    copy_finder.add(img)
+                ready.extend(cached)
+
+                new = []
+                for img in not_cached:
+                    original = copy_finder.original(img)
+                    if original is None:
+                        in_progress[img.path] = img
+                        new.append(img)
+                    elif original.path in in_progress:
+                        copies.setdefault(original, []).append(img)
+                    else:
+                        self._copy_info(original, img)
+                        ready.extend(self._update_cache(cache, [img]))
+                self._calculate_hashes(new, results)
+
+            ready.extend(self._take_hashes(results, in_progress, copies, cache,
+                                           bool(in_progress) and not images))
+
+            waiting = sum(map(len, copies.values()))
+            done = self._loaded_num - len(in_progress) - waiting
+            now = time.monotonic()
+            if now - self._last_report >= self.PROGRESS_INTERVAL:
+                self._report(done, finding, now)
+
+            if (cache.unsaved() >= self.CHECKPOINT_SIZE
+                    or now - last_checkpoint >= self.CHECKPOINT_INTERVAL):
+                self._save_cache(cache)
+                last_checkpoint = now
+
+            if ready and (len(ready) >= self.GROUPING_SIZE
+                          or now - last_grouping >= self.GROUPING_INTERVAL
+                          or not (finding or in_progress)):
+                self._image_grouping(grouping, ready, similarity)
+                ready = []
+                last_grouping = now
+
+        # The final numbers are always reported
+        self._report(done, finding, time.monotonic())
+        if not self._interrupted:
+            # All the images in the folders have been found
+            self._prune_cache(cache, seen)
+        self._save_cache(cache)
+        if not self._interrupted:
+            # The pairs from the cache are known within its radius
+            max_sensitivity = None if similarity is None else similarity.radius
+            self.grouped.emit(grouping.dendrogram(max_sensitivity))
+
+    def _take_hashes(self, results: queue.Queue,
+                     in_progress: Dict[core.ImagePath, core.Image],
+                     copies: Dict[core.Image, List[core.Image]],
+                     cache: cache.Cache, wait: bool) -> List[core.Image]:
+        # Take the calculated hashes (wait for them if :wait:), give them
+        # to the copies of the hashed images and add all to the cache
+        calculated = self._collect(results, in_progress, wait)
+        for img in calculated.copy():
+            for copy in copies.pop(img, []):
+                self._copy_info(img, copy)
+                calculated.append(copy)
+        return self._update_cache(cache, calculated)
+
+    def _cancel_hashing(self, results: queue.Queue,
+                        in_progress: Dict[core.ImagePath, core.Image],
+                        copies: Dict[core.Image, List[core.Image]],
+                        cache: cache.Cache) -> None:
+        # The tasks finish after the images being read, the hashes
+        # calculated by then go to the cache
+        self._pool.cancel()
+        deadline = time.monotonic() + self.CANCEL_TIME
+        while self._pending and time.monotonic() < deadline:
+            self._take_hashes(results, in_progress, copies, cache, True)
 
     def _load_cache(self) -> cache.Cache:
+        # The hashes of the other backends are recalculated
+        backend = hashing.BACKENDS[self._conf['backend']]
+        c = cache.Cache(backend.HASH_VERSION)
+        cache_file = resources.Cache.CACHE.get() # pylint: disable=no-member
+        legacy_file = resources.Cache.LEGACY.get() # pylint: disable=no-member
+
         try:
-            c = cache.Cache()
-            c.load(resources.Cache.CACHE.get()) # pylint: disable=no-member
-        except FileNotFoundError:
-            # Make an empty cache (it's empty by default) since there's no one
-            pass
+            c.load(cache_file, legacy_file)
         except EOFError:
             err_msg = 'Cache file is corrupted and will be rewritten'
             logger.exception(err_msg)
+            c.remove(cache_file)
+            c.load(cache_file)
 
         return c
 
@@ -188,45 +482,99 @@ class ImageProcessing(QtCore.QObject):
         -> Tuple[List[core.Image], List[core.Image]]:
         cached, not_cached = [], []
 
+        files = {}
         for img in images:
-            dhash = cache.get(img.path, None)
-            if dhash is None:
+            try:
+                files[img.path] = img.stat()
+            except OSError:
+                # The file has been removed, its hash cannot be calculated
+                # either (the error will be shown then)
+                pass
+
+        # The cache is queried for the whole batch, not once per image
+        found = cache.lookup(files)
+        for img in images:
+            entry = found.get(img.path, None)
+            if entry is None:
                 not_cached.append(img)
             else:
-                img.dhash = dhash
+                img.dhash = entry.dhash
+                img.size = entry.size
+                if entry.has_info():
+                    img.set_dimensions(entry.width, entry.height)
+                    img.format = entry.format
                 cached.append(img)
+                if entry.indexed:
+                    self._indexed.add(img.path)
 
-        self.found_in_cache.emit(len(cached))
-        if not_cached:
-            self._update_progressbar(self.PROG_CHECK_CACHE)
-        else:
-            self._update_progressbar(self.PROG_UPD_CACHE)
+        self._cached_num += len(cached)
 
         return cached, not_cached
 
-    def _calculate_hashes(self, images: Collection[core.Image]) \
+    def _calculate_hashes(self, images: Collection[core.Image],
+                          results: queue.Queue) -> None:
+        if not images:
+            return
+
+        cores = self._available_cores()
+        pool = self._pool.get(cores)
+
+        # Only the paths go to the worker processes and only the paths
+        # with the hashes and the image info come back, "Image" objects
+        # stay here
+        backend = self._conf['backend']
+        for chunk in self._chunks([img.path for img in images], cores):
+            self._pending += 1
+            pool.apply_async(hashing.dhash_task, (chunk, backend),
+                             callback=results.put,
+                             error_callback=results.put)
+
+    def _collect(self, results: queue.Queue,
+                 in_progress: Dict[core.ImagePath, core.Image], wait: bool) \
         -> List[core.Image]:
+        # Take the calculated hashes, wait for them if :wait:
         calculated: List[core.Image] = []
-        prog_step = (self.PROG_CALC - self.PROG_CHECK_CACHE) / len(images)
-
-        with Pool(processes=self._available_cores()) as p:
-            gen = p.imap(core.Image.dhash_parallel, images)
-            for i, img in enumerate(gen):
-                if self._interrupted:
-                    return calculated
-
-                calculated.append(img)
+        try:
+            if wait:
+                chunk = results.get(timeout=self.WAIT_TIME)
+            else:
+                chunk = results.get_nowait()
+
+            while True:
+                self._pending -= 1
+                if isinstance(chunk, Exception):
+                    raise chunk
+
+                for path, dhash, width, height, img_format in chunk:
+                    img = in_progress.pop(path)
+                    img.dhash = dhash
+                    if width is not None and height is not None:
+                        img.set_dimensions(width, height)
+                        img.format = img_format
+                    calculated.append(img)
+                chunk = results.get_nowait()
+        except queue.Empty:
+            pass
 
-                self.hashes_calculated.emit(i+1)
-                new_val = self._progressbar_value + prog_step
-                self._update_progressbar(new_val)
+        self._calculated_num += len(calculated)
+        return calculated
 
-        self._update_progressbar(self.PROG_CALC)
+    def _chunks(self, paths: List[core.ImagePath], cores: int) \
+        -> List[List[core.ImagePath]]:
+        # About 4 chunks per worker process (as "multiprocessing" does
+        # by default) but not too big to keep the progress bar moving
+        size, extra = divmod(len(paths), cores * 4)
+        if extra:
+            size += 1
+        size = max(1, min(size, self.MAX_CHUNK_SIZE))
 
-        return calculated
+        return [paths[i:i+size] for i in range(0, len(paths), size)]
 
     def _update_cache(self, cache: cache.Cache, images: Iterable[core.Image]) \
-        -> None:
+        -> List[core.Image]:
+        # Return the images with the calculated hashes (the images
+        # with no hash (-1) cannot be grouped)
+        hashed = []
         for img in images:
             dhash = img.dhash
             path = img.path
@@ -234,45 +582,100 @@ class ImageProcessing(QtCore.QObject):
                 err_msg = f'Hash of the "{path}" image cannot be calculated'
                 logger.error(err_msg)
                 self.error.emit(err_msg)
-            else:
-                cache[path] = dhash
+                continue
 
-        try:
-            cache.save(resources.Cache.CACHE.get()) # pylint: disable=no-member
-        except OSError:
-            err_msg = 'Cache cannot be saved on the disk'
-            logger.exception(err_msg)
+            hashed.append(img)
+            # The file status read before the hash was calculated
+            # (if the file has been changed since, it will be
+            # rehashed next time)
+            try:
+                cache.add(path, dhash, img.stat(), *img.info())
+            except OSError:
+                # The file has been removed, nothing to keep
+                pass
+
+        return hashed
+
+    @staticmethod
+    def _copy_info(original: core.Image, copy: core.Image) -> None:
+        # The copy is the same file, so it is not read
+        copy.dhash = original.dhash
+        width, height, img_format = original.info()
+        if width is not None and height is not None:
+            copy.set_dimensions(width, height)
+            copy.format = img_format
+
+    def _size_filter(self, images: List[core.Image],
+                     cache: Optional[cache.Cache] = None) \
+        -> List[core.Image]:
+        # Return the images of the size set in the preferences before
+        # they are hashed. The dimensions of the cached images are known
+        # from the cache, only the header of the other images (and
+        # of the images with the old cache entries, their entries
+        # in :cache: are updated then) is read
+        if not self._conf['filter_img_size']:
+            return images
 
-        self._update_progressbar(self.PROG_UPD_CACHE)
+        min_w, max_w = self._conf['min_width'], self._conf['max_width']
+        min_h, max_h = self._conf['min_height'], self._conf['max_height']
 
-    def _image_grouping(self, images: Collection[core.Image]) -> None:
-        gen = core.image_grouping(images, self._conf['sensitivity'])
-        duplicates_found = 0
-        groups_num = 0
-        for group in gen:
-            if self._interrupted:
-                self.interrupted.emit()
-                return
+        filtered = []
+        for img in images:
+            known = img.info()[0] is not None
+            try:
+                width, height = img.width, img.height
+            except OSError as e:
+                # The image cannot be hashed either
+                err_msg = str(e)
+                logger.error(err_msg)
+                self.error.emit(err_msg)
+                continue
 
-            group_index, image_group = group
+            if not known and cache is not None:
+                try:
+                    entry = cache[img.path]
+                except KeyError:
+                    pass
+                else:
+                    cache[img.path] = entry._replace(
+                        width=width, height=height, format=img.format
+                    )
 
-            if groups_num == group_index: # new group
-                duplicates_found += len(image_group)
-                groups_num += 1
-            else:
-                # if it's an existing group, a new image was added to the group
-                duplicates_found += 1
+            if min_w <= width <= max_w and min_h <= height <= max_h:
+                filtered.append(img)
 
-            self.duplicates_found.emit(duplicates_found)
-            self.groups_found.emit(groups_num)
+        return filtered
 
-            # shallow copy of an image group
-            # cause don't want to mess with mutexes
-            self.image_group.emit((group_index, image_group.copy()))
+    def _prune_cache(self, cache: cache.Cache,
+                     found: Container[core.ImagePath]) -> None:
+        try:
+            # The entries of the deleted images are removed when saving
+            cache.prune(self._folders, self._conf['subfolders'], found)
+        except OSError:
+            err_msg = 'Cache cannot be pruned'
+            logger.exception(err_msg)
 
-        self._update_progressbar(self.PROG_MAX)
+    def _save_cache(self, cache: cache.Cache) -> None:
+        try:
+            # Only the new hashes are written into the cache file
+            cache.save()
+        except OSError:
+            err_msg = 'Cache cannot be saved on the disk'
+            logger.exception(err_msg)
 
-        self.image_group.emit((0, []))
+    def _image_grouping(self, grouping: core.Grouping,
+                        images: Sequence[core.Image],
+                        similarity: Optional[core.SimilarityIndex] = None) \
+        -> None:
+        pairs = None
+        if similarity is not None:
+            pairs = similarity.pairs(images, self._indexed)
+
+        for group in grouping.add(images, pairs):
+            self.image_group.emit(group)
+
+        self.duplicates_found.emit(grouping.duplicates_num)
+        self.groups_found.emit(grouping.groups_num)
 
     def _available_cores(self) -> int:
         cores = self._conf['cores']
@@ -285,8 +688,34 @@ class ImageProcessing(QtCore.QObject):
             return available_cores
         return cores
 
+    def _report(self, done: int, finding: bool, now: float) -> None:
+        self._last_report = now
+        loaded = self._loaded_num
+        counters = (loaded, self._cached_num, self._calculated_num)
+        signals = (self.images_loaded, self.found_in_cache,
+                   self.hashes_calculated)
+        for signal, value, reported in zip(signals, counters, self._reported):
+            if value != reported:
+                signal.emit(value)
+        self._reported = counters
+
+        self._update_progressbar(self.PROG_MAX * done / loaded
+                                 if loaded else self.PROG_MIN)
+
+        elapsed = now - self._started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if not finding and rate > 0:
+            eta = (loaded - done) / rate
+        self.progress.emit(Progress(*counters, done, rate, eta))
+
     def _update_progressbar(self, value: float) -> None:
         old_val = self._progressbar_value
+        if value <= old_val:
+            # The share of the processed images drops when new images
+            # are found, the progress bar does not go back
+            return
+
         self._progressbar_value = value
         emit_val = int(value)
         if emit_val > old_val:
@@ -299,34 +728,61 @@ class ThumbnailProcessing(QtCore.QObject):
     :param image:       "Image" object to make a thumbnail for,
     :param size:        the biggest dimension (width or height) of
                         the image after having been scaled,
-    :param widget:      "ThumbnailWidget" object (optional) is used
-                        in "lazy" mode (when the thumbnails are not
-                        made all at once),
+    :param store:       on-disk store of thumbnails (optional). If it
+                        has a valid thumbnail of the image, the thumbnail
+                        is scaled down from it instead of decoding the
+                        image, otherwise the made one is put into it,
 
     :signal finished:   image thumbnail is made and assigned to
                         the attribute "thumb" of the "Image" object
+                        (an empty "QImage" if it cannot be made):
+                        "core.Image"
     '''
 
-    finished = QtCore.pyqtSignal()
+    finished = QtCore.pyqtSignal(object)
 
-    def __init__(self, image: core.Image, size: Union[core.Width, core.Height],
-                 widget: 'thumbnailwidget.ThumbnailWidget' = None) -> None:
+    def __init__(self, image: core.Image,
+                 size: Union[core.Width, core.Height],
+                 store: Optional[thumbnailstore.ThumbnailStore] = None) \
+        -> None:
         super().__init__(parent=None)
 
         self._image = image
         self._size = size
-        self._widget = widget
+        self._store = store
 
     def run(self) -> None:
-        # If 'lazy' mode and the widget is not visible,
-        # there's no point in making the thumbnail
-        if self._widget is None or self._widget.isVisible():
-            try:
+        stored_size = None
+        if self._store is not None:
+            stored_size = self._store.storedSize(self._size)
+
+        try:
+            if (stored_size is None
+                    or not self._store.fits(self._image, stored_size)):
+                # The image is too small to be put into the store
+                # (the thumbnail is not scaled up)
                 self._image.thumbnail(self._size)
+            else:
+                self._image.thumb = self._storedThumbnail(stored_size)
+        except OSError:
+            path = self._image.path
+            err_msg = f'The thumbnail of the "{path}" image cannot be made'
+            logger.exception(err_msg)
+            self._image.thumb = QtGui.QImage()
+
+        self.finished.emit(self._image)
+
+    def _storedThumbnail(self, stored_size: int) -> QtGui.QImage:
+        thumb = self._store.load(self._image, stored_size)
+        if thumb is None:
+            thumb = self._image.thumbnail(stored_size)
+            try:
+                self._store.save(self._image, thumb, stored_size)
             except OSError:
                 path = self._image.path
-                err_msg = f'The thumbnail of the "{path}" image cannot be made'
+                err_msg = f'The thumbnail of "{path}" cannot be stored'
                 logger.exception(err_msg)
-                self._image.thumb = QtGui.QImage()
 
-            self.finished.emit()
+        return thumb.scaled(self._size, self._size,
+                            QtCore.Qt.KeepAspectRatio,
+                            QtCore.Qt.SmoothTransformation)
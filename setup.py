@@ -59,9 +59,11 @@ setup(
     ],
     keywords=md.KEYWORDS,
     python_requires='>=3.6, <4',
-    install_requires=['PyQt5>=5.8.1.1', 'pybktree==1.1'],
+    install_requires=['PyQt5>=5.8.1.1', 'numpy>=1.16'],
     extras_require={
         'dev': ['mypy'],
+        # Faster decode backend for hashing ("scan --backend pillow")
+        'pillow': ['Pillow>=5.0'],
     },
     entry_points={
         'console_scripts': [
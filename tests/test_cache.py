@@ -16,6 +16,11 @@ You should have received a copy of the GNU General Public License
 along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
 '''
 
+import os
+import pickle
+import sqlite3
+import tempfile
+from types import SimpleNamespace
 from unittest import TestCase, mock
 
 from myfyrio import cache
@@ -23,79 +28,715 @@ from myfyrio import cache
 # pylint: disable=unused-argument,missing-class-docstring
 
 
-class TestClassCache(TestCase):
+def stat(mtime_ns=1, size=10, dev=1, ino=1):
+    return SimpleNamespace(st_mtime_ns=mtime_ns, st_size=size, st_dev=dev,
+                           st_ino=ino)
+
+
+class TestClassEntry(TestCase):
+
+    def test_from_stat(self):
+        res = cache.Entry.from_stat(5, stat(1, 2, 3, 4))
+
+        self.assertTupleEqual(res, cache.Entry(5, 1, 2, 3, 4))
+
+    def test_matches_if_mtime_and_size_not_changed(self):
+        entry = cache.Entry.from_stat(5, stat())
+
+        self.assertTrue(entry.matches(stat(ino=2)))
+
+    def test_not_matches_if_mtime_changed(self):
+        entry = cache.Entry.from_stat(5, stat())
+
+        self.assertFalse(entry.matches(stat(mtime_ns=2)))
+
+    def test_not_matches_if_size_changed(self):
+        entry = cache.Entry.from_stat(5, stat())
+
+        self.assertFalse(entry.matches(stat(size=11)))
 
-    CACHE_FILE = 'cache_file'
+    def test_matches_if_entry_has_no_file_status(self):
+        entry = cache.Entry(5)
+
+        self.assertTrue(entry.matches(stat()))
+
+    def test_from_stat_with_image_info(self):
+        res = cache.Entry.from_stat(5, stat(1, 2, 3, 4), 10, 20, 'png')
+
+        self.assertTupleEqual(res, (5, 1, 2, 3, 4, False, 10, 20, 'png',
+                                    cache.DEFAULT_HASH_VERSION))
+
+    def test_has_info(self):
+        self.assertTrue(cache.Entry(5, width=10, height=20).has_info())
+        self.assertFalse(cache.Entry(5).has_info())
+
+
+class TestClassCache(TestCase):
 
     def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.CACHE_FILE = os.path.join(self.tmp_dir.name, 'cache.db')
+        self.LEGACY_FILE = os.path.join(self.tmp_dir.name, 'cache.p')
+
         self.c = cache.Cache()
 
+    def tearDown(self):
+        self.c.close()
+        self.tmp_dir.cleanup()
 
-class TestInitMethod(TestClassCache):
+    def h_saved_hashes(self):
+        conn = sqlite3.connect(self.CACHE_FILE)
+        rows = conn.execute('SELECT path, folder, hash FROM hashes').fetchall()
+        conn.close()
+        return {path: (folder, int.from_bytes(dhash, 'big'))
+                for path, folder, dhash in rows}
 
-    def test_assign_empty_dict_to_attr_data(self):
-        self.assertDictEqual(self.c.data, {})
 
+class TestMethodInit(TestClassCache):
 
-class TestMethodLoad(TestClassCache):
+    def test_cache_is_empty(self):
+        self.assertEqual(len(self.c), 0)
 
-    @mock.patch('pickle.load')
-    def test_args_open_called_with(self, mock_load):
-        with mock.patch('builtins.open', mock.mock_open()) as mock_open:
-            self.c.load(self.CACHE_FILE)
+    def test_work_in_memory_if_not_loaded(self):
+        self.c.add('path', 1, stat())
 
-        mock_open.assert_called_once_with(self.CACHE_FILE, 'rb')
+        self.assertEqual(self.c['path'].dhash, 1)
+        self.assertDictEqual(self.c.lookup({'path': stat()}),
+                             {'path': self.c['path']})
 
-    @mock.patch('pickle.load', return_value='hashes')
-    def test_assign_loaded_hashes_to_attr_data(self, mock_load):
-        with mock.patch('builtins.open', mock.mock_open()):
-            self.c.load(self.CACHE_FILE)
 
-        self.assertEqual(self.c.data, 'hashes')
+class TestMethodLoad(TestClassCache):
 
-    @mock.patch('builtins.open', side_effect=FileNotFoundError)
-    def test_raise_FileNotFoundError_if_FileNotFoundError(self, mock_open):
-        with self.assertRaises(FileNotFoundError):
-            self.c.load(self.CACHE_FILE)
+    def test_make_new_cache_file_if_it_does_not_exist(self):
+        self.c.load(self.CACHE_FILE)
+
+        self.assertTrue(os.path.exists(self.CACHE_FILE))
+        self.assertEqual(len(self.c), 0)
+
+    def test_WAL_journal_mode_is_used(self):
+        self.c.load(self.CACHE_FILE)
+        mode = self.c._conn.execute('PRAGMA journal_mode').fetchone()[0]
+
+        self.assertEqual(mode, 'wal')
+
+    def test_schema_version_is_set(self):
+        self.c.load(self.CACHE_FILE)
+        version = self.c._conn.execute('PRAGMA user_version').fetchone()[0]
+
+        self.assertEqual(version, cache.Cache.VERSION)
+
+    def test_load_earlier_saved_hashes(self):
+        self.c.load(self.CACHE_FILE)
+        self.c.add('/folder/path', 2**127, stat(1, 2, 3, 4))
+        self.c.save()
+        self.c.close()
+
+        new_cache = cache.Cache()
+        new_cache.load(self.CACHE_FILE)
+        res = new_cache['/folder/path']
+        new_cache.close()
+
+        self.assertTupleEqual(res, cache.Entry(2**127, 1, 2, 3, 4))
+
+    def test_load_earlier_saved_image_info(self):
+        self.c.load(self.CACHE_FILE)
+        self.c.add('/folder/path', 5, stat(), 10, 20, 'jpeg')
+        self.c.save()
+        self.c.close()
+
+        new_cache = cache.Cache()
+        new_cache.load(self.CACHE_FILE)
+        res = new_cache['/folder/path']
+        new_cache.close()
+
+        self.assertTupleEqual((res.width, res.height, res.format),
+                              (10, 20, 'jpeg'))
+
+    def test_hashes_of_old_cache_file_are_of_default_version(self):
+        conn = sqlite3.connect(self.CACHE_FILE)
+        conn.execute('CREATE TABLE hashes (path TEXT PRIMARY KEY, '
+                     'folder TEXT NOT NULL, hash BLOB NOT NULL)')
+        conn.execute('INSERT INTO hashes VALUES (?, ?, ?)',
+                     ('/folder/path', '/folder', (5).to_bytes(16, 'big')))
+        conn.execute('PRAGMA user_version=1')
+        conn.commit()
+        conn.close()
+        self.c.load(self.CACHE_FILE)
+
+        self.assertEqual(self.c['/folder/path'].hash_version,
+                         cache.DEFAULT_HASH_VERSION)
+
+    def test_cache_file_of_version_3_updated(self):
+        conn = sqlite3.connect(self.CACHE_FILE)
+        conn.execute('CREATE TABLE hashes (path TEXT PRIMARY KEY, '
+                     'folder TEXT NOT NULL, hash BLOB NOT NULL, '
+                     'mtime_ns INTEGER, size INTEGER, dev INTEGER, '
+                     'ino INTEGER, indexed INTEGER)')
+        conn.execute('INSERT INTO hashes VALUES (?, ?, ?, 1, 2, 3, 4, 1)',
+                     ('/folder/path', '/folder', (5).to_bytes(16, 'big')))
+        conn.execute('PRAGMA user_version=3')
+        conn.commit()
+        conn.close()
+        self.c.load(self.CACHE_FILE)
+
+        self.assertTupleEqual(self.c['/folder/path'],
+                              cache.Entry(5, 1, 2, 3, 4, True))
+        # The pairs used to be found within the max radius
+        self.assertEqual(self.c.radius, cache.Cache.RADIUS)
+        version = self.c._conn.execute('PRAGMA user_version').fetchone()[0]
+        self.assertEqual(version, cache.Cache.VERSION)
+
+    def test_cache_file_of_version_1_updated(self):
+        conn = sqlite3.connect(self.CACHE_FILE)
+        conn.execute('CREATE TABLE hashes (path TEXT PRIMARY KEY, '
+                     'folder TEXT NOT NULL, hash BLOB NOT NULL)')
+        conn.execute('INSERT INTO hashes VALUES (?, ?, ?)',
+                     ('/folder/path', '/folder', (5).to_bytes(16, 'big')))
+        conn.execute('PRAGMA user_version=1')
+        conn.commit()
+        conn.close()
+        self.c.load(self.CACHE_FILE)
+
+        self.assertTupleEqual(self.c['/folder/path'], cache.Entry(5))
+        self.assertIsNone(self.c.radius)
+        version = self.c._conn.execute('PRAGMA user_version').fetchone()[0]
+        self.assertEqual(version, cache.Cache.VERSION)
+
+    def test_raise_EOFError_if_file_is_not_cache_file(self):
+        with open(self.CACHE_FILE, 'wb') as f:
+            f.write(b'not a database' * 100)
 
-    @mock.patch('builtins.open', side_effect=EOFError)
-    def test_raise_EOFError_if_open_raise_EOFError(self, mock_open):
         with self.assertRaises(EOFError):
             self.c.load(self.CACHE_FILE)
 
-    @mock.patch('builtins.open', side_effect=OSError)
-    def test_raise_OSError_if_open_raise_OSError(self, mock_open):
+    def test_raise_OSError_if_file_cannot_be_opened(self):
+        file = os.path.join(self.tmp_dir.name, 'no_folder', 'cache.db')
         with self.assertRaises(OSError):
-            self.c.load(self.CACHE_FILE)
+            self.c.load(file)
+
+    def test_hashes_moved_from_legacy_file(self):
+        with open(self.LEGACY_FILE, 'wb') as f:
+            pickle.dump({'/folder/path': 5}, f)
+        self.c.load(self.CACHE_FILE, self.LEGACY_FILE)
+
+        self.assertDictEqual(self.h_saved_hashes(),
+                             {'/folder/path': ('/folder', 5)})
+
+    def test_legacy_file_renamed_after_moving_hashes(self):
+        with open(self.LEGACY_FILE, 'wb') as f:
+            pickle.dump({'/folder/path': 5}, f)
+        self.c.load(self.CACHE_FILE, self.LEGACY_FILE)
+
+        self.assertFalse(os.path.exists(self.LEGACY_FILE))
+        self.assertTrue(os.path.exists(self.LEGACY_FILE + '.bak'))
+
+    def test_saved_hashes_not_replaced_by_legacy_ones(self):
+        self.c.load(self.CACHE_FILE)
+        self.c.add('/folder/path', 7, stat())
+        self.c.save()
+        with open(self.LEGACY_FILE, 'wb') as f:
+            pickle.dump({'/folder/path': 5}, f)
+        self.c.load(self.CACHE_FILE, self.LEGACY_FILE)
+
+        self.assertEqual(self.c['/folder/path'].dhash, 7)
+
+    def test_corrupted_legacy_file_is_ignored(self):
+        with open(self.LEGACY_FILE, 'wb') as f:
+            f.write(b'')
+        self.c.load(self.CACHE_FILE, self.LEGACY_FILE)
+
+        self.assertEqual(len(self.c), 0)
+        self.assertFalse(os.path.exists(self.LEGACY_FILE))
+
+
+class TestMethodLookup(TestClassCache):
+
+    def setUp(self):
+        super().setUp()
+
+        self.c.load(self.CACHE_FILE)
+        self.c.add('/folder1/path1', 1, stat(ino=1))
+        self.c.add('/folder1/path2', 2, stat(ino=2))
+        self.c.add('/folder2/path3', 3, stat(ino=3))
+        self.c.save()
+
+    def test_return_only_found_entries(self):
+        res = self.c.lookup({'/folder1/path1': stat(ino=1),
+                             '/folder2/path3': stat(ino=3),
+                             '/folder2/not_cached': stat(ino=4)})
+
+        self.assertDictEqual({path: e.dhash for path, e in res.items()},
+                             {'/folder1/path1': 1, '/folder2/path3': 3})
+
+    def test_cache_file_queried_once_per_MAX_PARAMS_paths(self):
+        files = {f'/folder1/other{i}': stat(ino=10+i) for i in range(600)}
+        files['/folder1/path1'] = stat(ino=1)
+        with mock.patch.object(self.c, '_conn') as mock_conn:
+            mock_conn.execute.return_value.fetchall.return_value = []
+            with mock.patch('myfyrio.cache.Cache._moved', return_value=None):
+                self.c.lookup(files)
+
+        self.assertEqual(mock_conn.execute.call_count, 2)
+        queried = [path for call in mock_conn.execute.call_args_list
+                   for path in call[0][1]]
+        self.assertCountEqual(queried, files)
+
+    def test_only_rows_of_looked_up_paths_read(self):
+        with mock.patch('myfyrio.cache._entry',
+                        side_effect=cache._entry) as mock_entry_call:
+            self.c.lookup({'/folder1/path1': stat(ino=1)})
+
+        self.assertEqual(mock_entry_call.call_count, 1)
+
+    def test_new_not_saved_entries_are_found(self):
+        self.c.add('/folder1/path1', 10, stat(ino=1))
+        res = self.c.lookup({'/folder1/path1': stat(ino=1)})
+
+        self.assertEqual(res['/folder1/path1'].dhash, 10)
+
+    def test_entry_not_found_if_file_changed(self):
+        res = self.c.lookup({'/folder1/path1': stat(mtime_ns=2, ino=1)})
+
+        self.assertDictEqual(res, {})
+
+    def test_entry_of_moved_file_found_by_inode(self):
+        res = self.c.lookup({'/folder3/moved': stat(ino=2)})
+
+        self.assertEqual(res['/folder3/moved'].dhash, 2)
+
+    def test_entry_of_moved_file_added_with_new_path(self):
+        self.c.lookup({'/folder3/moved': stat(ino=2)})
+        self.c.save()
+
+        self.assertEqual(self.h_saved_hashes()['/folder3/moved'],
+                         ('/folder3', 2))
+
+    def test_entry_of_old_path_of_moved_file_removed(self):
+        self.c.lookup({'/folder3/moved': stat(ino=2)})
+
+        self.assertNotIn('/folder1/path2', self.c)
+        self.c.save()
+        self.assertNotIn('/folder1/path2', self.h_saved_hashes())
+
+    def test_entry_of_old_path_kept_if_it_is_looked_up_too(self):
+        self.c.lookup({'/folder3/moved': stat(ino=2),
+                       '/folder1/path2': stat(ino=2)})
+        self.c.save()
+
+        self.assertIn('/folder1/path2', self.h_saved_hashes())
+
+    def test_entry_of_old_path_kept_if_file_still_there(self):
+        path = os.path.join(self.tmp_dir.name, 'image.png')
+        link = os.path.join(self.tmp_dir.name, 'link.png')
+        with open(path, 'wb'):
+            pass
+        os.link(path, link)
+        self.c.add(path, 5, os.stat(path))
+        self.c.save()
+        self.c.lookup({link: os.stat(link)})
+        self.c.save()
+
+        self.assertIn(path, self.h_saved_hashes())
+        self.assertIn(link, self.h_saved_hashes())
+
+    def test_entry_not_found_by_inode_if_file_changed(self):
+        res = self.c.lookup({'/folder3/moved': stat(size=1, ino=2)})
+
+        self.assertDictEqual(res, {})
+
+    def test_entry_without_file_status_found_and_updated(self):
+        self.c._conn.execute("INSERT INTO hashes (path, folder, hash) "
+                             "VALUES ('/folder4/old', '/folder4', ?)",
+                             ((4).to_bytes(16, 'big'),))
+        res = self.c.lookup({'/folder4/old': stat(5, 6, 7, 8)})
+
+        self.assertTupleEqual(res['/folder4/old'], cache.Entry(4, 5, 6, 7, 8))
+        self.assertTupleEqual(self.c['/folder4/old'],
+                              cache.Entry(4, 5, 6, 7, 8))
+
+    def test_entry_of_other_hash_version_not_found(self):
+        self.c.save()
+        other = cache.Cache('other')
+        other.load(self.CACHE_FILE)
+        res = other.lookup({'/folder1/path1': stat(ino=1)})
+        other.close()
+
+        self.assertDictEqual(res, {})
+
+    def test_entry_added_with_hash_version_in_use(self):
+        other = cache.Cache('other')
+        other.add('path', 1, stat())
+
+        self.assertEqual(other['path'].hash_version, 'other')
+        self.assertDictEqual(other.lookup({'path': stat()}),
+                             {'path': other['path']})
 
 
 class TestMethodSave(TestClassCache):
-    '''!!! BE AWARE WHEN CHANGE THESE TESTS. IF THERE'S
-    ALREADY POPULATED CACHE FILE AND YOU DON'T PATCH OPEN()
-    AND DUMP(), YOU'LL REWRITE THE FILE
-    '''
 
     def setUp(self):
         super().setUp()
 
-        self.cache = {'path1': 'hash1'}
-        self.c.data = self.cache
+        self.c.load(self.CACHE_FILE)
 
-    @mock.patch('pickle.dump')
-    def test_args_open_called_with(self, mock_dump):
-        with mock.patch('builtins.open', mock.mock_open()) as mock_open:
-            self.c.save(self.CACHE_FILE)
+    def test_new_hashes_written_into_file(self):
+        self.c.add('/folder/path', 2**128 - 1, stat())
+        self.c.save()
 
-        mock_open.assert_called_once_with(self.CACHE_FILE, 'wb')
+        self.assertDictEqual(self.h_saved_hashes(),
+                             {'/folder/path': ('/folder', 2**128 - 1)})
 
-    @mock.patch('pickle.dump')
-    def test_dump_called_with_cache_arg(self, mock_dump):
-        with mock.patch('builtins.open', mock.mock_open()):
-            self.c.save(self.CACHE_FILE)
+    def test_no_unsaved_entries_after_saving(self):
+        self.c.add('/folder/path1', 1, stat())
+        self.c.add('/folder/path2', 2, stat())
+        unsaved = self.c.unsaved()
+        self.c.save()
 
-        self.assertEqual(mock_dump.call_args[0][0], self.cache)
+        self.assertEqual(unsaved, 2)
+        self.assertEqual(self.c.unsaved(), 0)
 
-    @mock.patch('builtins.open', side_effect=OSError)
-    def test_raise_OSError_if_open_raise_OSError(self, mock_open):
-        with self.assertRaises(OSError):
-            self.c.save(self.CACHE_FILE)
+    def test_changed_hash_replaced(self):
+        self.c.add('/folder/path', 1, stat())
+        self.c.save()
+        self.c.add('/folder/path', 2, stat())
+        self.c.save()
+
+        self.assertDictEqual(self.h_saved_hashes(),
+                             {'/folder/path': ('/folder', 2)})
+
+    def test_only_new_hashes_written(self):
+        self.c.add('/folder/path1', 1, stat())
+        self.c.save()
+        self.c.add('/folder/path2', 2, stat())
+        with mock.patch.object(self.c, '_conn') as mock_conn:
+            self.c.save()
+
+        rows = mock_conn.executemany.call_args[0][1]
+        self.assertListEqual([row[0] for row in rows], ['/folder/path2'])
+
+    def test_nothing_written_if_no_new_hashes(self):
+        with mock.patch.object(self.c, '_conn') as mock_conn:
+            self.c.save()
+
+        mock_conn.executemany.assert_not_called()
+
+    def test_raise_OSError_if_hashes_cannot_be_written(self):
+        self.c.add('/folder/path', 1, stat())
+        with mock.patch.object(self.c, '_conn') as mock_conn:
+            mock_conn.executemany.side_effect = sqlite3.OperationalError
+            with self.assertRaises(OSError):
+                self.c.save()
+
+
+class TestMethodPrune(TestClassCache):
+
+    def setUp(self):
+        super().setUp()
+
+        self.c.load(self.CACHE_FILE)
+        self.paths = ['/folder1/path1', '/folder1/sub/path2',
+                      '/folder10/path3', '/folder2/path4']
+        for i, path in enumerate(self.paths, 1):
+            self.c.add(path, i, stat(ino=i))
+        self.c.add_pairs(self.paths, [('/folder1/path1', '/folder2/path4', 3)])
+        self.c.save()
+
+    def h_pruned(self, folders, recursive, found=()):
+        self.c.prune(folders, recursive, found)
+        self.c.save()
+        return [path for path in self.paths
+                if path not in self.h_saved_hashes()]
+
+    def test_entries_of_deleted_images_in_folder_removed(self):
+        res = self.h_pruned(['/folder1'], False)
+
+        self.assertListEqual(res, ['/folder1/path1'])
+
+    def test_entries_of_deleted_images_in_subfolders_removed(self):
+        res = self.h_pruned(['/folder1/'], True)
+
+        self.assertListEqual(res, ['/folder1/path1', '/folder1/sub/path2'])
+
+    def test_entries_of_found_images_kept(self):
+        res = self.h_pruned(['/folder1'], True, {'/folder1/path1'})
+
+        self.assertListEqual(res, ['/folder1/sub/path2'])
+
+    def test_entries_of_existing_images_kept(self):
+        path = os.path.join(self.tmp_dir.name, 'image.png')
+        with open(path, 'wb'):
+            pass
+        self.c.add(path, 5, os.stat(path))
+        self.c.save()
+        self.h_pruned([self.tmp_dir.name], True)
+
+        self.assertIn(path, self.h_saved_hashes())
+
+    def test_pairs_of_removed_entries_removed(self):
+        self.h_pruned(['/folder1'], False)
+
+        self.assertListEqual(self.c.pairs(['/folder2/path4']), [])
+        self.assertNotIn('/folder1/path1', self.c.indexed())
+
+    def test_not_all_rows_read(self):
+        with mock.patch.object(self.c, '_query',
+                               return_value=[]) as mock_query_call:
+            self.c.prune(['/folder1'], True, ())
+        sql, params = mock_query_call.call_args[0]
+        plan = self.c._conn.execute('EXPLAIN QUERY PLAN ' + sql,
+                                    params).fetchall()
+
+        details = [row[-1] for row in plan]
+        self.assertFalse(any(detail.startswith('SCAN') for detail in details))
+
+
+class TestMethodsSimilarityIndex(TestClassCache):
+
+    def setUp(self):
+        super().setUp()
+
+        self.c.load(self.CACHE_FILE)
+        for i in range(1, 5):
+            self.c.add(f'/folder/path{i}', i, stat(ino=i))
+        self.c.add_pairs(['/folder/path1', '/folder/path2', '/folder/path3'],
+                         [('/folder/path1', '/folder/path2', 3),
+                          ('/folder/path3', '/folder/path1', 5)])
+
+    def test_added_pairs_found_by_both_paths(self):
+        res1 = self.c.pairs(['/folder/path1'])
+        res2 = self.c.pairs(['/folder/path2', '/folder/path3'])
+
+        self.assertCountEqual(res1, [('/folder/path1', '/folder/path2', 3),
+                                     ('/folder/path3', '/folder/path1', 5)])
+        self.assertCountEqual(res1, res2)
+
+    def test_saved_pairs_found(self):
+        self.c.save()
+        res = self.c.pairs(['/folder/path2', '/folder/path1'])
+
+        self.assertCountEqual(res, [('/folder/path1', '/folder/path2', 3),
+                                    ('/folder/path3', '/folder/path1', 5)])
+
+    def test_pairs_found_if_many_paths(self):
+        self.c.save()
+        paths = [f'/folder/other{i}' for i in range(1000)] + ['/folder/path2']
+        res = self.c.pairs(paths)
+
+        self.assertListEqual(res, [('/folder/path1', '/folder/path2', 3)])
+
+    def test_entries_with_added_pairs_are_indexed(self):
+        res = [self.c[f'/folder/path{i}'].indexed for i in range(1, 5)]
+
+        self.assertListEqual(res, [True, True, True, False])
+
+    def test_indexed_return_hashes_of_indexed_entries(self):
+        self.c.save()
+        self.c.add('/folder/path3', 30, stat(ino=3))
+
+        self.assertDictEqual(self.c.indexed(), {'/folder/path1': 1,
+                                                '/folder/path2': 2})
+
+    def test_indexed_return_only_hashes_of_version_in_use(self):
+        self.c.save()
+        other = cache.Cache('other')
+        other._conn = self.c._conn
+
+        self.assertDictEqual(other.indexed(), {})
+        other._conn = None
+
+    def test_pairs_removed_if_entry_replaced(self):
+        self.c.save()
+        self.c.add('/folder/path1', 10, stat(ino=1))
+        self.c.save()
+
+        self.assertListEqual(self.c.pairs(['/folder/path2', '/folder/path3']),
+                             [])
+        self.assertFalse(self.c['/folder/path1'].indexed)
+
+    def test_pairs_of_replaced_entry_added_again_kept(self):
+        self.c.save()
+        self.c.add('/folder/path1', 10, stat(ino=1))
+        self.c.add_pairs(['/folder/path1'],
+                         [('/folder/path1', '/folder/path4', 2)])
+        self.c.save()
+
+        self.assertListEqual(self.c.pairs(['/folder/path1']),
+                             [('/folder/path1', '/folder/path4', 2)])
+
+    def test_moved_entry_not_indexed(self):
+        self.c.save()
+        res = self.c.lookup({'/folder2/moved': stat(ino=1)})
+
+        self.assertFalse(res['/folder2/moved'].indexed)
+
+    def test_pairs_of_old_path_of_moved_entry_removed(self):
+        self.c.save()
+        self.c.lookup({'/folder2/moved': stat(ino=1)})
+
+        self.assertListEqual(self.c.pairs(['/folder/path2', '/folder/path3']),
+                             [])
+        self.assertNotIn('/folder/path1', self.c.indexed())
+        self.c.save()
+        self.assertListEqual(self.c.pairs(['/folder/path2', '/folder/path3']),
+                             [])
+
+    def test_pairs_of_replaced_entry_not_found_before_saving(self):
+        self.c.save()
+        self.c.add('/folder/path1', 10, stat(ino=1))
+
+        self.assertListEqual(self.c.pairs(['/folder/path2', '/folder/path3']),
+                             [])
+
+    def test_pairs_of_changed_entry_not_found(self):
+        self.c.save()
+        self.c.lookup({'/folder/path1': stat(mtime_ns=2, ino=1)})
+
+        self.assertTrue(self.c.replaced('/folder/path1'))
+        self.assertListEqual(self.c.pairs(['/folder/path2', '/folder/path3']),
+                             [])
+
+    def test_changed_entry_not_indexed(self):
+        self.c.save()
+        self.c.lookup({'/folder/path1': stat(mtime_ns=2, ino=1)})
+
+        self.assertDictEqual(self.c.indexed(), {'/folder/path2': 2,
+                                                '/folder/path3': 3})
+
+    def test_pairs_with_changed_entry_not_saved(self):
+        self.c.save()
+        self.c.lookup({'/folder/path1': stat(mtime_ns=2, ino=1)})
+        self.c.add_pairs(['/folder/path4'],
+                         [('/folder/path1', '/folder/path4', 1)])
+        self.c.save()
+
+        self.assertListEqual(self.c.pairs(['/folder/path4']), [])
+        self.assertFalse(self.c['/folder/path1'].indexed)
+
+    def test_changed_entry_indexed_again_not_replaced(self):
+        self.c.save()
+        self.c.lookup({'/folder/path1': stat(mtime_ns=2, ino=1)})
+        self.c.add('/folder/path1', 10, stat(mtime_ns=2, ino=1))
+        self.c.add_pairs(['/folder/path1'],
+                         [('/folder/path1', '/folder/path4', 2)])
+        self.c.save()
+
+        self.assertFalse(self.c.replaced('/folder/path1'))
+        self.assertListEqual(self.c.pairs(['/folder/path1']),
+                             [('/folder/path1', '/folder/path4', 2)])
+
+    def test_pairs_removed_with_entry(self):
+        self.c.save()
+        del self.c['/folder/path1']
+
+        self.assertListEqual(self.c.pairs(['/folder/path2', '/folder/path3']),
+                             [])
+
+
+class TestMethodWiden(TestClassCache):
+
+    def setUp(self):
+        super().setUp()
+
+        self.c.load(self.CACHE_FILE)
+        self.c.widen(5)
+        for i in range(1, 3):
+            self.c.add(f'/folder/path{i}', i, stat(ino=i))
+        self.c.add_pairs(['/folder/path1', '/folder/path2'],
+                         [('/folder/path1', '/folder/path2', 2)])
+        self.c.save()
+
+    def test_new_cache_file_has_no_radius(self):
+        self.c.close()
+        cache.Cache.remove(self.CACHE_FILE)
+        self.c.load(self.CACHE_FILE)
+
+        self.assertIsNone(self.c.radius)
+
+    def test_radius_saved(self):
+        self.c.load(self.CACHE_FILE)
+
+        self.assertEqual(self.c.radius, 5)
+
+    def test_pairs_kept_if_radius_not_bigger(self):
+        self.c.widen(3)
+
+        self.assertEqual(self.c.radius, 5)
+        self.assertListEqual(self.c.pairs(['/folder/path1']),
+                             [('/folder/path1', '/folder/path2', 2)])
+
+    def test_pairs_removed_if_radius_bigger(self):
+        self.c.widen(10)
+        self.c.load(self.CACHE_FILE)
+
+        self.assertEqual(self.c.radius, 10)
+        self.assertListEqual(self.c.pairs(['/folder/path1']), [])
+        self.assertDictEqual(self.c.indexed(), {})
+
+    def test_unsaved_entries_not_indexed_if_radius_bigger(self):
+        self.c.add('/folder/path3', 3, stat(ino=3))
+        self.c.add_pairs(['/folder/path3'], [])
+        self.c.widen(10)
+
+        self.assertFalse(self.c['/folder/path3'].indexed)
+        self.assertDictEqual(self.c.indexed(), {})
+
+    def test_raise_ValueError_if_radius_bigger_than_max(self):
+        with self.assertRaises(ValueError):
+            self.c.widen(cache.Cache.RADIUS + 1)
+
+
+class TestMethodRemove(TestClassCache):
+
+    def test_cache_file_removed(self):
+        self.c.load(self.CACHE_FILE)
+        self.c.close()
+        cache.Cache.remove(self.CACHE_FILE)
+
+        self.assertFalse(os.path.exists(self.CACHE_FILE))
+
+    def test_nothing_happens_if_cache_file_does_not_exist(self):
+        cache.Cache.remove(self.CACHE_FILE)
+
+        self.assertFalse(os.path.exists(self.CACHE_FILE))
+
+
+class TestMappingInterface(TestClassCache):
+
+    def setUp(self):
+        super().setUp()
+
+        self.c.load(self.CACHE_FILE)
+        self.c['/folder/saved'] = cache.Entry(1, 2, 3, 4, 5)
+        self.c.save()
+        self.c['/folder/new'] = cache.Entry(2)
+
+    def test_getitem(self):
+        self.assertTupleEqual(self.c['/folder/saved'],
+                              cache.Entry(1, 2, 3, 4, 5))
+        self.assertTupleEqual(self.c['/folder/new'], cache.Entry(2))
+
+    def test_getitem_raise_KeyError_if_not_cached(self):
+        with self.assertRaises(KeyError):
+            self.c['/folder/not_cached'] # pylint: disable=pointless-statement
+
+    def test_get_return_default_if_not_cached(self):
+        self.assertIsNone(self.c.get('/folder/not_cached', None))
+
+    def test_contains(self):
+        self.assertIn('/folder/saved', self.c)
+        self.assertNotIn('/folder/not_cached', self.c)
+
+    def test_iter_and_len(self):
+        self.assertSetEqual(set(self.c), {'/folder/saved', '/folder/new'})
+        self.assertEqual(len(self.c), 2)
+
+    def test_delitem(self):
+        del self.c['/folder/saved']
+        del self.c['/folder/new']
+
+        self.assertEqual(len(self.c), 0)
+        self.assertDictEqual(self.h_saved_hashes(), {})
+
+    def test_delitem_raise_KeyError_if_not_cached(self):
+        with self.assertRaises(KeyError):
+            del self.c['/folder/not_cached']
@@ -0,0 +1,281 @@
+'''Copyright 2020 Maxim Shpak <maxim.shpak@posteo.uk>
+
+This file is part of Myfyrio.
+
+Myfyrio is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Myfyrio is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import argparse
+import io
+import json
+import signal
+from unittest import TestCase, mock
+
+from myfyrio import cli, config, core
+
+# pylint: disable=unused-argument,missing-class-docstring
+
+CLI = 'myfyrio.cli.'
+
+
+def image(path, difference=0, info=(10, 20, 'png'), size=1024):
+    mock_image = mock.Mock(spec=core.Image)
+    mock_image.path = path
+    mock_image.difference = difference
+    mock_image.info.return_value = info
+    mock_image.filesize.return_value = size
+    return mock_image
+
+def parse(*argv):
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest='command')
+    cli.add_scan_parser(subparsers)
+    return parser.parse_args(['scan', *argv])
+
+
+class TestClassGroupWriter(TestCase):
+
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.image1 = image('path1')
+        self.image2 = image('path2', 3, (None, None, None))
+        self.image3 = image('path3')
+
+    def h_records(self):
+        return [json.loads(line)
+                for line in self.stream.getvalue().splitlines()]
+
+    def test_jsonl_record_of_every_image(self):
+        writer = cli.GroupWriter(self.stream)
+        writer.write((0, [self.image1, self.image2]))
+
+        self.assertListEqual(self.h_records(), [
+            {'group': 0, 'path': 'path1', 'difference': 0, 'width': 10,
+             'height': 20, 'size': 1024, 'format': 'png'},
+            {'group': 0, 'path': 'path2', 'difference': 3, 'width': None,
+             'height': None, 'size': 1024, 'format': None},
+        ])
+
+    def test_only_new_images_of_changed_group_written(self):
+        writer = cli.GroupWriter(self.stream)
+        writer.write((0, [self.image1, self.image2]))
+        writer.write((0, [self.image1, self.image2, self.image3]))
+
+        self.assertListEqual([r['path'] for r in self.h_records()],
+                             ['path1', 'path2', 'path3'])
+
+    def test_images_of_joined_group_written_with_new_index(self):
+        writer = cli.GroupWriter(self.stream)
+        writer.write((0, [self.image1]))
+        writer.write((1, [self.image2, self.image3]))
+        writer.write((1, []))
+        writer.write((0, [self.image1, self.image2, self.image3]))
+
+        records = [(r['group'], r['path']) for r in self.h_records()]
+        self.assertListEqual(records[-2:], [(0, 'path2'), (0, 'path3')])
+
+    def test_empty_group_not_written(self):
+        writer = cli.GroupWriter(self.stream)
+        writer.write((0, []))
+
+        self.assertEqual(self.stream.getvalue(), '')
+
+    def test_size_is_None_if_file_cannot_be_read(self):
+        self.image1.filesize.side_effect = OSError
+        writer = cli.GroupWriter(self.stream)
+        writer.write((0, [self.image1]))
+
+        self.assertIsNone(self.h_records()[0]['size'])
+
+    def test_csv_header_and_rows(self):
+        writer = cli.GroupWriter(self.stream, cli.OutputFormat.CSV)
+        writer.write((2, [self.image1, self.image2]))
+
+        self.assertListEqual(self.stream.getvalue().splitlines(), [
+            'group,path,difference,width,height,size,format',
+            '2,path1,0,10,20,1024,png',
+            '2,path2,3,,,1024,',
+        ])
+
+    def test_stream_flushed_after_group(self):
+        stream = mock.Mock(spec=io.StringIO)
+        writer = cli.GroupWriter(stream)
+        writer.write((0, [self.image1]))
+
+        stream.flush.assert_called_once_with()
+
+
+class TestClassScanner(TestCase):
+
+    def setUp(self):
+        self.conf = config.Config.default()
+        self.writer = mock.Mock(spec=cli.GroupWriter)
+        self.scanner = cli.Scanner(['folder'], self.conf, self.writer)
+        self.p = self.scanner._processing
+
+    def h_run(self, *emits):
+        def run():
+            for emit in emits:
+                emit()
+        with mock.patch.object(self.p, 'run', side_effect=run):
+            return self.scanner.run()
+
+    def test_image_groups_written(self):
+        self.h_run(lambda: self.p.image_group.emit((0, ['image'])))
+
+        self.writer.write.assert_called_once_with((0, ['image']))
+
+    def test_return_NO_DUPLICATES_if_nothing_found(self):
+        res = self.h_run()
+
+        self.assertEqual(res, cli.ExitCode.NO_DUPLICATES)
+
+    def test_return_DUPLICATES_if_duplicates_found(self):
+        res = self.h_run(lambda: self.p.duplicates_found.emit(2))
+
+        self.assertEqual(res, cli.ExitCode.DUPLICATES)
+
+    def test_return_ERROR_if_processing_failed(self):
+        res = self.h_run(lambda: self.p.duplicates_found.emit(2),
+                         lambda: self.p.error.emit('error'),
+                         self.p.interrupted.emit)
+
+        self.assertEqual(res, cli.ExitCode.ERROR)
+
+    def test_return_INTERRUPTED_if_interrupted(self):
+        res = self.h_run(self.scanner.interrupt, self.p.interrupted.emit)
+
+        self.assertEqual(res, cli.ExitCode.INTERRUPTED)
+        self.assertTrue(self.p._interrupted)
+
+    def test_summary_has_numbers_and_throughput(self):
+        self.h_run(lambda: self.p.images_loaded.emit(100),
+                   lambda: self.p.found_in_cache.emit(60),
+                   lambda: self.p.hashes_calculated.emit(40),
+                   lambda: self.p.duplicates_found.emit(5),
+                   lambda: self.p.groups_found.emit(2))
+        self.scanner._elapsed = 4.0
+
+        self.assertEqual(self.scanner.summary(),
+                         '100 images (60 from cache, 40 hashed), 5 '
+                         'duplicates in 2 groups, 4.00 s, 25.0 images/s')
+
+
+class TestFuncAddScanParser(TestCase):
+
+    def test_defaults(self):
+        args = parse('folder1', 'folder2')
+        conf = config.Config.default()
+
+        self.assertListEqual(args.folders, ['folder1', 'folder2'])
+        self.assertEqual(args.sensitivity, conf['sensitivity'])
+        self.assertEqual(args.cores, conf['cores'])
+        self.assertFalse(args.no_subfolders)
+        self.assertEqual(args.out_format, cli.OutputFormat.JSONL)
+        self.assertEqual(args.backend, conf['backend'])
+
+    def test_exit_if_unknown_backend(self):
+        with mock.patch('sys.stderr'):
+            with self.assertRaises(SystemExit):
+                parse('-b', 'unknown', 'folder')
+
+    def test_exit_if_no_folders(self):
+        with mock.patch('sys.stderr'):
+            with self.assertRaises(SystemExit):
+                parse()
+
+    def test_exit_if_negative_sensitivity(self):
+        with mock.patch('sys.stderr'):
+            with self.assertRaises(SystemExit):
+                parse('-s', '-1', 'folder')
+
+    def test_exit_if_no_cores(self):
+        with mock.patch('sys.stderr'):
+            with self.assertRaises(SystemExit):
+                parse('-c', '0', 'folder')
+
+
+class TestFuncScanConfig(TestCase):
+
+    def test_args_assigned(self):
+        conf = cli.scan_config(parse('-s', '5', '-c', '2', '-b', 'pillow',
+                                     '--no-subfolders', 'folder'))
+
+        self.assertEqual(conf['sensitivity'], 5)
+        self.assertEqual(conf['cores'], 2)
+        self.assertEqual(conf['backend'], 'pillow')
+        self.assertFalse(conf['subfolders'])
+        self.assertFalse(conf['filter_img_size'])
+
+    def test_size_filter_on_if_any_limit_passed(self):
+        conf = cli.scan_config(parse('--min-width', '10', 'folder'))
+
+        self.assertTrue(conf['filter_img_size'])
+        self.assertEqual(conf['min_width'], 10)
+        self.assertEqual(conf['max_width'],
+                         config.Config.default()['max_width'])
+
+
+class TestFuncScan(TestCase):
+
+    def setUp(self):
+        self.stream = io.StringIO()
+
+    def h_scan(self, args, code=cli.ExitCode.NO_DUPLICATES):
+        with mock.patch(CLI+'Scanner') as mock_scanner_call:
+            mock_scanner_call.return_value.run.return_value = code
+            mock_scanner_call.return_value.summary.return_value = 'summary'
+            with mock.patch(CLI+'Logger.setConsoleLogger'):
+                with mock.patch('sys.stderr', new=io.StringIO()) as stderr:
+                    res = cli.scan(args, self.stream)
+        return res, mock_scanner_call, stderr.getvalue()
+
+    def test_return_ERROR_if_folder_does_not_exist(self):
+        res, mock_scanner_call, stderr = self.h_scan(parse('/no/folder'))
+
+        self.assertEqual(res, cli.ExitCode.ERROR)
+        mock_scanner_call.assert_not_called()
+        self.assertIn('/no/folder', stderr)
+
+    @mock.patch('os.path.isdir', return_value=True)
+    def test_return_ERROR_if_backend_not_installed(self, mock_isdir):
+        with mock.patch('myfyrio.hashing.decode_backend',
+                        side_effect=ImportError):
+            res, mock_scanner_call, stderr = self.h_scan(
+                parse('-b', 'pillow', 'folder')
+            )
+
+        self.assertEqual(res, cli.ExitCode.ERROR)
+        mock_scanner_call.assert_not_called()
+        self.assertIn('pillow', stderr)
+
+    @mock.patch('os.path.isdir', return_value=True)
+    def test_return_exit_code_of_scanner(self, mock_isdir):
+        res, _, _ = self.h_scan(parse('folder'), cli.ExitCode.DUPLICATES)
+
+        self.assertEqual(res, cli.ExitCode.DUPLICATES)
+
+    @mock.patch('os.path.isdir', return_value=True)
+    def test_summary_written_to_stderr(self, mock_isdir):
+        _, _, stderr = self.h_scan(parse('folder'))
+
+        self.assertEqual(stderr, 'summary\n')
+        self.assertEqual(self.stream.getvalue(), '')
+
+    @mock.patch('os.path.isdir', return_value=True)
+    def test_SIGINT_handler_restored(self, mock_isdir):
+        handler = signal.getsignal(signal.SIGINT)
+        self.h_scan(parse('folder'))
+
+        self.assertIs(signal.getsignal(signal.SIGINT), handler)
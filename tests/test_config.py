@@ -58,6 +58,9 @@ class TestMethodDefault(TestClassConfig):
             'max_height': 1000000,
             'cores': os.cpu_count() or 1,
             'lazy': False,
+            'thumbnail_cache': 256,
+            'disk_thumbnails': True,
+            'backend': 'qt',
             'sensitivity': 0
         }
         self.c._default()
@@ -65,6 +68,17 @@ class TestMethodDefault(TestClassConfig):
         self.assertEqual(self.c.data, DEFAULT_CONFIG)
 
 
+class TestClassMethodDefault(TestCase):
+
+    def test_return_config_with_default_data(self):
+        conf = config.Config.default()
+        expected = config.Config()
+        expected._default()
+
+        self.assertIsInstance(conf, config.Config)
+        self.assertDictEqual(conf.data, expected.data)
+
+
 class TestMethodSave(TestClassConfig):
 
     def setUp(self):
@@ -100,20 +114,28 @@ class TestMethodLoad(TestClassConfig):
 
         self.file = 'config_file'
 
-    @mock.patch('pickle.load')
+    @mock.patch('pickle.load', return_value={})
     def test_load_from_file(self, mock_load_call):
         with mock.patch('builtins.open', mock.mock_open()) as mock_open_call:
             self.c.load(self.file)
 
         mock_open_call.assert_called_once_with(self.file, 'rb')
 
-    @mock.patch('pickle.load', return_value='test')
+    @mock.patch('pickle.load', return_value={'size': 300})
     @mock.patch('builtins.open')
     def test_load_assign_loaded_conf_to_attr_data(self, mock_open_call,
                                                   mock_load_call):
         self.c.load(self.file)
 
-        self.assertEqual('test', self.c.data)
+        self.assertEqual(self.c.data['size'], 300)
+
+    @mock.patch('pickle.load', return_value={'size': 300})
+    @mock.patch('builtins.open')
+    def test_load_set_default_values_of_missing_prefs(self, mock_open_call,
+                                                      mock_load_call):
+        self.c.load(self.file)
+
+        self.assertEqual(self.c.data['thumbnail_cache'], 256)
 
     @mock.patch('myfyrio.config.Config._default')
     @mock.patch('builtins.open', side_effect=FileNotFoundError)
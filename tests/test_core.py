@@ -16,13 +16,15 @@ You should have received a copy of the GNU General Public License
 along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
 '''
 
+import os
+import tempfile
 from pathlib import Path
 from unittest import TestCase, mock
 
-from pybktree import BKTree
+import numpy as np
 from PyQt5 import QtCore, QtGui
 
-from myfyrio import core
+from myfyrio import cache, core
 
 CORE = 'myfyrio.core.'
 
@@ -32,7 +34,22 @@ CORE = 'myfyrio.core.'
 class TestFuncFindImage(TestCase):
 
     def setUp(self):
-        self.mock_path = mock.Mock(spec=Path)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.folder = self.tmp_dir.name
+        self.sub = os.path.join(self.folder, 'sub')
+        os.mkdir(self.sub)
+        for path in ('b.png', 'a.jpg', 'text.txt', 'sub/c.png'):
+            with open(os.path.join(self.folder, path), 'w'):
+                pass
+        # Folder with the image suffix is not an image
+        os.mkdir(os.path.join(self.folder, 'folder.png'))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def h_found(self, *args, **kwargs):
+        images = core.find_image(*args, **kwargs)
+        return [os.path.relpath(img.path, self.folder) for img in images]
 
     def test_return_nothing_if_pass_empty_folders_list(self):
         paths = list(core.find_image([]))
@@ -40,327 +57,442 @@ class TestFuncFindImage(TestCase):
         self.assertListEqual(paths, [])
 
     def test_raise_FileNotFoundError(self):
-        self.mock_path.exists.return_value = False
-        with mock.patch(CORE+'Path', return_value=self.mock_path):
-            with self.assertRaises(FileNotFoundError):
-                list(core.find_image(['folder']))
+        with self.assertRaises(FileNotFoundError):
+            list(core.find_image([os.path.join(self.folder, 'not_exist')]))
 
-    def test_glob_pattern_if_recursive_search(self):
-        self.mock_path.exists.return_value = True
-        self.mock_path.glob.return_value = []
-        with mock.patch(CORE+'Path', return_value=self.mock_path):
-            list(core.find_image(['folder'], recursive=True))
+    def test_return_images_in_subfolders_if_recursive_search(self):
+        res = self.h_found([self.folder], recursive=True)
 
-        self.mock_path.glob.assert_called_once_with('**/*')
+        self.assertCountEqual(res, ['b.png', 'a.jpg', 'sub/c.png'])
 
-    def test_glob_pattern_if_nonrecursive_search(self):
-        self.mock_path.exists.return_value = True
-        self.mock_path.glob.return_value = []
-        with mock.patch(CORE+'Path', return_value=self.mock_path):
-            list(core.find_image(['folder'], recursive=False))
-
-        self.mock_path.glob.assert_called_once_with('*')
+    def test_return_images_in_folder_only_if_nonrecursive_search(self):
+        res = self.h_found([self.folder], recursive=False)
 
-    def test_return_nothing_if_path_isnt_file(self):
-        self.mock_path.exists.return_value = True
-        image_path = mock.Mock(spec=Path)
-        image_path.is_file.return_value = False
-        self.mock_path.glob.return_value = [image_path]
-        with mock.patch(CORE+'Path', return_value=self.mock_path):
-            res = list(core.find_image(['folder'], recursive=False))
+        self.assertCountEqual(res, ['b.png', 'a.jpg'])
 
-        self.assertListEqual(res, [])
+    def test_return_proper_Image_obj(self):
+        res = list(core.find_image([self.sub]))
 
-    def test_return_nothing_if_path_is_file_but_wrong_suffix(self):
-        self.mock_path.exists.return_value = True
-        image_path = mock.Mock(spec=Path)
-        image_path.is_file.return_value = True
-        image_path.suffix = '.www'
-        self.mock_path.glob.return_value = [image_path]
-        with mock.patch(CORE+'Path', return_value=self.mock_path):
-            res = list(core.find_image(['folder'], recursive=False))
+        self.assertEqual(len(res), 1)
+        self.assertIsInstance(res[0], core.Image)
+        self.assertEqual(res[0].path, os.path.join(self.sub, 'c.png'))
 
-        self.assertListEqual(res, [])
+    def test_return_images_in_folder_order_if_ordered(self):
+        res = self.h_found([self.folder], ordered=True, threads=4)
 
-    def test_return_proper_Image_obj(self):
-        self.mock_path.exists.return_value = True
-        image_path = mock.MagicMock(spec=Path)
-        image_path.is_file.return_value = True
-        image_path.suffix = '.png'
-        image_path.__str__.return_value = 'img_path'
-        self.mock_path.glob.return_value = [image_path]
-        with mock.patch(CORE+'Path', return_value=self.mock_path):
-            res = list(core.find_image(['folder'], recursive=False))
+        self.assertListEqual(res, ['a.jpg', 'b.png', 'sub/c.png'])
 
-        self.assertEqual(len(res), 1)
-        self.assertEqual(res[0].path, 'img_path')
+    def test_folder_scanned_once_if_passed_twice(self):
+        res = self.h_found([self.folder, self.sub])
 
+        self.assertCountEqual(res, ['b.png', 'a.jpg', 'sub/c.png'])
 
-class TestFuncImageGrouping(TestCase):
+    def test_symlink_loop_not_followed(self):
+        os.symlink(self.folder, os.path.join(self.sub, 'loop'))
+        res = self.h_found([self.folder])
 
-    def setUp(self):
-        self.mock_image1 = mock.Mock(spec=core.Image)
-        self.mock_image1.dhash = 0
-        self.mock_image2 = mock.Mock(spec=core.Image)
-        self.mock_image2.dhash = 1
-        self.images = [self.mock_image1, self.mock_image2]
+        self.assertCountEqual(res, ['b.png', 'a.jpg', 'sub/c.png'])
 
-    def test_return_nothing_if_no_image_groups(self):
-        res = list(core.image_grouping([], 0))
+    def test_folder_skipped_if_it_cannot_be_read(self):
+        with mock.patch('os.scandir', side_effect=PermissionError):
+            res = self.h_found([self.folder])
 
         self.assertListEqual(res, [])
 
-    def test_BKTree_called_with_hamming_dist_and_images_args(self):
-        with mock.patch('pybktree.BKTree') as mock_tree_call:
-            with mock.patch(CORE+'_closest', return_value=(None, None)):
-                list(core.image_grouping(self.images, 0))
-
-        mock_tree_call.assert_called_once_with(core.Image.hamming, self.images)
-
-    def test_raise_TypeError_if_BKTree_raise_TypeError(self):
-        with mock.patch('pybktree.BKTree', side_effect=TypeError):
-            with self.assertRaises(TypeError):
-                list(core.image_grouping(self.images, 0))
-
-    def test_closest_called_with_bktree_image_and_sensitivity_args(self):
-        with mock.patch('pybktree.BKTree', return_value='bktree'):
-            with mock.patch(CORE+'_closest',
-                            return_value=(None, None)) as mock_closest_call:
-                list(core.image_grouping(self.images, 0))
-
-        calls = [mock.call('bktree', self.mock_image1, 0),
-                 mock.call('bktree', self.mock_image2, 0)]
-        mock_closest_call.assert_has_calls(calls)
-
-    def test_loop_continue_if_there_is_no_closest_image(self):
-        with mock.patch(CORE+'_closest', return_value=(None, None)):
-            with mock.patch(CORE+'_add_new_group') as mock_add_call:
-                list(core.image_grouping(self.images, 0))
-
-        mock_add_call.assert_not_called()
-
-    def test_yield_add_new_group_res_if_image_and_closest_not_in_checked(self):
-        checked = {}
-        with mock.patch('builtins.dict', return_value=checked):
-            with mock.patch(CORE+'_closest',
-                            return_value=(1, self.mock_image2)):
-                with mock.patch(CORE+'_add_new_group',
-                                return_value='new_group') as mock_add_call:
-                    res = list(core.image_grouping([self.mock_image1], 1))
-
-        mock_add_call.assert_called_once_with(
-            self.mock_image1, self.mock_image2, checked, [], 1
-        )
-        self.assertListEqual(res, ['new_group'])
-
-    def test_res_if_image_in_checked_and_closest_not_in_checked(self):
-        checked = {self.mock_image1: 0}
-        with mock.patch('builtins.dict', return_value=checked):
-            with mock.patch(CORE+'_closest',
-                            return_value=(1, self.mock_image2)):
-                with mock.patch(CORE+'_add_img_to_existing_group',
-                                return_value='exist_group') as mock_add_call:
-                    res = list(core.image_grouping([self.mock_image1], 1))
-
-        mock_add_call.assert_called_once_with(
-            self.mock_image1, self.mock_image2, checked, []
-        )
-        self.assertListEqual(res, ['exist_group'])
-
-    def test_return_if_image_not_in_checked_and_closest_in_checked(self):
-        checked = {self.mock_image2: 0}
-        with mock.patch('builtins.dict', return_value=checked):
-            with mock.patch(CORE+'_closest',
-                            return_value=(1, self.mock_image2)):
-                with mock.patch(CORE+'_add_img_to_existing_group',
-                                return_value='exist_group') as mock_add_call:
-                    res = list(core.image_grouping([self.mock_image1], 1))
-
-        mock_add_call.assert_called_once_with(
-            self.mock_image2, self.mock_image1, checked, []
-        )
-        self.assertListEqual(res, ['exist_group'])
-
-
-class TestFuncClosest(TestCase):
+
+class TestClassCopyFinder(TestCase):
 
     def setUp(self):
-        self.mock_tree = mock.Mock(spec=BKTree)
-        self.mock_image = mock.Mock(spec=core.Image)
-        self.mock_tree.find.return_value = [(0, self.mock_image)]
-        self.sensitivity = 0
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        big = bytes(range(256)) * 1024 # 256 KB
+        changed_middle = big[:1000] + b'x' + big[1001:]
+        self.images = []
+        for i, content in enumerate((b'small', big, b'other', big, b'small',
+                                     changed_middle, b'unique file')):
+            path = os.path.join(self.tmp_dir.name, f'{i}.png')
+            with open(path, 'wb') as f:
+                f.write(content)
+            self.images.append(core.Image(path))
+        self.finder = core.CopyFinder()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+
+    def test_return_earlier_identical_image(self):
+        res = [self.finder.original(img) for img in self.images]
+
+        self.assertListEqual(res, [None, None, None, self.images[1],
+                                   self.images[0], None, None])
+
+    def test_file_with_same_ends_but_changed_middle_not_copy(self):
+        res = [self.finder.original(img) for img in self.images[3:6]]
+
+        self.assertListEqual(res, [None, None, None])
+
+    def test_files_of_unique_size_not_read(self):
+        with mock.patch(CORE+'_file_digest') as mock_digest_call:
+            for img in self.images[5:]:
+                self.finder.original(img)
+
+        mock_digest_call.assert_not_called()
+
+    def test_unreadable_files_skipped(self):
+        os.remove(self.images[4].path)
+        res = [self.finder.original(img) for img in self.images]
 
-    def test_pybktree_find_called_with_image_and_sensitivity_args(self):
-        core._closest(self.mock_tree, self.mock_image, self.sensitivity)
+        self.assertListEqual(res, [None, None, None, self.images[1],
+                                   None, None, None])
 
-        self.mock_tree.find.assert_called_once_with(self.mock_image,
-                                                    self.sensitivity)
+    def test_return_added_image_if_identical(self):
+        self.finder.add(self.images[0])
+        res = self.finder.original(self.images[4])
 
-    def test_return_None_if_result_is_image_itself(self):
-        res = core._closest(self.mock_tree, self.mock_image, self.sensitivity)
+        self.assertIs(res, self.images[0])
 
-        self.assertTupleEqual(res, (None, None))
+    def test_added_image_not_read(self):
+        with mock.patch(CORE+'_file_digest') as mock_digest_call:
+            self.finder.add(self.images[0])
 
-    def test_return_if_image_itself_is_first(self):
-        close_img = mock.Mock()
-        self.mock_tree.find.return_value = [(0, self.mock_image),
-                                            (0, close_img)]
-        res = core._closest(self.mock_tree, self.mock_image, self.sensitivity)
+        mock_digest_call.assert_not_called()
 
-        self.assertTupleEqual(res, (0, close_img))
+    def test_digest_calculated_once(self):
+        self.finder.original(self.images[0])
+        self.finder.original(self.images[2])
+        with mock.patch(CORE+'_file_digest',
+                        return_value=b'digest') as mock_digest_call:
+            self.finder.original(self.images[4])
 
-    def test_return_if_image_itself_is_second(self):
-        close_img = mock.Mock()
-        self.mock_tree.find.return_value = [(0, close_img),
-                                            (0, self.mock_image)]
-        res = core._closest(self.mock_tree, self.mock_image, self.sensitivity)
+        # Digests of the images 0 and 2 are kept
+        self.assertEqual(mock_digest_call.call_count, 1)
 
-        self.assertTupleEqual(res, (0, close_img))
+    def test_image_not_compared_with_every_image_of_same_size(self):
+        for i in range(10):
+            path = os.path.join(self.tmp_dir.name, f'same_size{i}.png')
+            with open(path, 'wb') as f:
+                f.write(b'%05d' % i)
+            self.finder.original(core.Image(path))
+        with mock.patch(CORE+'_file_digest',
+                        return_value=b'digest') as mock_digest_call:
+            res = self.finder.original(self.images[0])
 
+        # Only the digest of the image itself is calculated
+        self.assertIsNone(res)
+        self.assertEqual(mock_digest_call.call_count, 1)
 
-class TestFuncAddImgToExistingGroup(TestCase):
+
+class TestClassGrouping(TestCase):
 
     def setUp(self):
-        self.mock_image = mock.Mock(spec=core.Image)
-        self.mock_image.hash = 235
-        self.checked = {self.mock_image: 0}
-        self.image_groups = [[self.mock_image]]
+        self.images = []
+        for i, dhash in enumerate((0b0000, 0b1111_0000_0000, 0b0001,
+                                   0b1111_1000_0000, 0b0011, 2**128 - 1)):
+            mock_image = mock.Mock(spec=core.Image)
+            mock_image.path = f'path{i}'
+            mock_image.dhash = dhash
+            self.images.append(mock_image)
+        self.grouping = core.Grouping(1)
+
+    def h_groups(self, images, pairs=None):
+        return [(i, [self.images.index(img) for img in group])
+                for i, group in self.grouping.add(images, pairs)]
+
+    def test_return_nothing_if_no_images(self):
+        res = self.grouping.add([])
 
-        self.mock_img_not_in = mock.Mock(spec=core.Image)
-        self.mock_img_not_in.hash = 487
+        self.assertListEqual(res, [])
 
-    def test_image_added_to_proper_group(self):
-        core._add_img_to_existing_group(self.mock_image, self.mock_img_not_in,
-                                        self.checked, self.image_groups)
+    def test_return_new_groups(self):
+        res = self.h_groups(self.images)
 
-        self.assertListEqual(self.image_groups, [[self.mock_image,
-                                                  self.mock_img_not_in]])
+        self.assertListEqual(res, [(0, [0, 2, 4]), (1, [1, 3])])
 
-    def test_assign_distance_to_image_difference_attr(self):
-        dist = 999
-        self.mock_image.hamming.return_value = dist
-        core._add_img_to_existing_group(self.mock_image, self.mock_img_not_in,
-                                        self.checked, self.image_groups)
+    def test_return_changed_groups_only(self):
+        self.grouping.add(self.images[:4])
+        res = self.h_groups(self.images[4:])
 
-        self.assertEqual(self.mock_img_not_in.difference, dist)
+        self.assertListEqual(res, [(0, [0, 2, 4])])
 
-    def test_checked_dict_changed_properly(self):
-        core._add_img_to_existing_group(self.mock_image, self.mock_img_not_in,
-                                        self.checked, self.image_groups)
+    def test_new_images_at_end_of_group(self):
+        self.grouping.add([self.images[0], self.images[2]])
+        res = self.h_groups([self.images[4], self.images[5], self.images[0]])
 
-        self.assertDictEqual(self.checked, {self.mock_image: 0,
-                                            self.mock_img_not_in: 0})
+        self.assertListEqual(res, [(0, [0, 2, 4, 0])])
 
-    def test_return_tuple_with_group_index_and_image_group_list(self):
-        res = core._add_img_to_existing_group(self.mock_image,
-                                              self.mock_img_not_in,
-                                              self.checked, self.image_groups)
+    def h_bridge(self):
+        # The image 4 joins the groups of the images 0, 2 and 1, 3
+        for img, dhash in zip(self.images, (0b0000, 0b0111, 0b0001, 0b1111,
+                                            0b0011)):
+            img.dhash = dhash
+        self.grouping.add(self.images[:4])
 
-        self.assertTupleEqual(res,
-                              (0, [self.mock_image, self.mock_img_not_in]))
+    def test_joined_group_returned_empty(self):
+        self.h_bridge()
+        res = self.h_groups([self.images[4]])
 
-class TestFuncAddNewGroup(TestCase):
+        self.assertEqual(len(res), 2)
+        self.assertEqual(res[0][0], 0)
+        self.assertCountEqual(res[0][1], [0, 1, 2, 3, 4])
+        self.assertTupleEqual(res[1], (1, []))
 
-    def setUp(self):
-        self.mock_main_image = mock.Mock(spec=core.Image)
-        self.mock_closest_img = mock.Mock(spec=core.Image)
-        self.checked = {}
-        self.image_groups = []
-        self.distance = 888
+    def test_group_with_smaller_index_keeps_its_images_first(self):
+        self.h_bridge()
+        res = self.h_groups([self.images[4]])
 
-    def test_images_added_to_proper_group(self):
-        core._add_new_group(self.mock_main_image, self.mock_closest_img,
-                            self.checked, self.image_groups, self.distance)
+        self.assertListEqual(res[0][1][:2], [0, 2])
 
-        self.assertListEqual(self.image_groups, [[self.mock_main_image,
-                                                  self.mock_closest_img]])
+    def test_difference_set_to_difference_with_first_image_of_group(self):
+        self.grouping.add(self.images)
 
-    def test_assign_distance_to_image_difference_attr(self):
-        core._add_new_group(self.mock_main_image, self.mock_closest_img,
-                            self.checked, self.image_groups, self.distance)
+        differences = [img.difference for img in self.images[:5]]
+        self.assertListEqual(differences, [0, 0, 1, 1, 2])
 
-        self.assertEqual(self.mock_closest_img.difference, self.distance)
+    def test_groups_num_and_duplicates_num(self):
+        self.h_bridge()
+        groups_num = self.grouping.groups_num
+        self.grouping.add(self.images[4:])
 
-    def test_checked_dict_changed_properly(self):
-        core._add_new_group(self.mock_main_image, self.mock_closest_img,
-                            self.checked, self.image_groups, self.distance)
+        self.assertEqual(groups_num, 2)
+        self.assertEqual(self.grouping.groups_num, 1)
+        self.assertEqual(self.grouping.duplicates_num, 5)
 
-        self.assertDictEqual(self.checked, {self.mock_main_image: 0,
-                                            self.mock_closest_img: 0})
+    def test_raise_ValueError_if_hash_is_not_calculated(self):
+        self.images[1].dhash = -1
+        with self.assertRaises(ValueError):
+            self.grouping.add(self.images)
 
-    def test_return_tuple_with_group_index_and_image_group_list(self):
-        res = core._add_new_group(self.mock_main_image, self.mock_closest_img,
-                                  self.checked, self.image_groups,
-                                  self.distance)
+    def test_passed_pairs_used_instead_of_hashes(self):
+        pairs = [('path0', 'path5', 1), ('path1', 'path3', 0)]
+        res = self.h_groups(self.images, pairs)
 
-        image_group = [self.mock_main_image, self.mock_closest_img]
-        self.assertTupleEqual(res, (0, image_group))
+        self.assertListEqual(res, [(0, [0, 5]), (1, [1, 3])])
 
+    def test_pairs_with_bigger_distance_skipped(self):
+        pairs = [('path0', 'path5', 2), ('path1', 'path3', 1)]
+        res = self.h_groups(self.images, pairs)
 
-class TestClassImage(TestCase):
+        self.assertListEqual(res, [(0, [1, 3])])
 
-    IMAGE = CORE + 'Image.'
+    def test_pairs_with_images_not_added_skipped(self):
+        pairs = [('path0', 'path5', 1), ('path0', 'path2', 1)]
+        res = self.h_groups(self.images[:3], pairs)
+
+        self.assertListEqual(res, [(0, [0, 2])])
+
+    def test_pairs_with_earlier_added_images_used(self):
+        self.grouping.add(self.images[:3], [])
+        res = self.h_groups(self.images[3:], [('path4', 'path1', 0)])
+
+        self.assertListEqual(res, [(0, [1, 4])])
+
+    def h_regroup(self, dendrogram, sensitivity):
+        return [[self.images.index(img) for img in group]
+                for group in dendrogram.groups(sensitivity)]
+
+    def test_dendrogram_max_sensitivity_is_sensitivity_by_default(self):
+        self.grouping.add(self.images)
+
+        self.assertEqual(self.grouping.dendrogram().max_sensitivity, 1)
+        self.assertEqual(self.grouping.dendrogram(20).max_sensitivity, 20)
+
+    def test_dendrogram_has_all_added_images(self):
+        self.grouping.add(self.images[:2])
+        self.grouping.add(self.images[2:])
+
+        self.assertEqual(len(self.grouping.dendrogram()), 6)
+
+    def test_dendrogram_has_pairs_with_bigger_distance(self):
+        pairs = [('path0', 'path5', 2), ('path1', 'path3', 1)]
+        self.grouping.add(self.images, pairs)
+        dendrogram = self.grouping.dendrogram(2)
+
+        self.assertListEqual(self.h_regroup(dendrogram, 2), [[0, 5], [1, 3]])
+
+
+class TestClassDendrogram(TestCase):
 
     def setUp(self):
-        self.image = core.Image('image.png')
+        self.images = []
+        for i, dhash in enumerate((0b0000, 0b1111_0000_0000, 0b0001,
+                                   0b1111_1000_0000, 0b0111, 2**128 - 1)):
+            mock_image = mock.Mock(spec=core.Image)
+            mock_image.path = f'path{i}'
+            mock_image.dhash = dhash
+            self.images.append(mock_image)
+        grouping = core.Grouping(4)
+        grouping.add(self.images)
+        self.dendrogram = grouping.dendrogram()
+
+    def h_groups(self, sensitivity, keep=None):
+        return [[self.images.index(img) for img in group]
+                for group in self.dendrogram.groups(sensitivity, keep)]
+
+    def test_return_nothing_if_no_images(self):
+        empty = np.empty(0, np.intp)
+        dendrogram = core.Dendrogram([], (empty, empty, empty), 10)
+
+        self.assertListEqual(dendrogram.groups(10), [])
+
+    def test_same_groups_as_Grouping_with_sensitivity(self):
+        for sensitivity in range(5):
+            res = self.h_groups(sensitivity)
+            grouping = core.Grouping(sensitivity)
+            expected = [sorted(self.images.index(img) for img in group)
+                        for _, group in grouping.add(self.images) if group]
+
+            self.assertCountEqual(res, expected)
+
+    def test_groups_in_order_of_first_images(self):
+        res = self.h_groups(1)
+
+        self.assertListEqual(res, [[0, 2], [1, 3]])
 
+    def test_difference_set_to_difference_with_first_image_of_group(self):
+        self.dendrogram.groups(2)
 
-class TestMethodCalculateDhash(TestClassImage):
+        differences = [img.difference for img in self.images[:5]]
+        self.assertListEqual(differences, [0, 0, 1, 1, 3])
+
+    def test_skipped_images_not_in_groups(self):
+        res = self.h_groups(2, lambda img: img is not self.images[0])
+
+        self.assertListEqual(res, [[1, 3], [2, 4]])
+
+    def test_group_with_one_image_left_skipped(self):
+        res = self.h_groups(1, lambda img: img is not self.images[0])
+
+        self.assertListEqual(res, [[1, 3]])
+
+    def test_raise_ValueError_if_sensitivity_bigger_than_max_sensitivity(self):
+        with self.assertRaises(ValueError):
+            self.dendrogram.groups(5)
+
+
+class TestClassSimilarityIndex(TestCase):
 
     def setUp(self):
-        super().setUp()
+        self.cache = cache.Cache()
+        self.images = []
+        # The 3rd hash is farther than the max radius from the others
+        far = (1 << 64) - 1 << 64
+        for i, dhash in enumerate((0b0000, 0b0011, far, 0b0001)):
+            image = core.Image(f'path{i}')
+            image.dhash = dhash
+            self.images.append(image)
+            self.cache[image.path] = cache.Entry(dhash)
+        self.index = core.SimilarityIndex(self.cache)
+
+    def h_stat(self, mtime_ns):
+        return mock.Mock(st_mtime_ns=mtime_ns, st_size=10, st_dev=1, st_ino=1)
+
+    def test_new_images_compared_with_each_other(self):
+        res = self.index.pairs(self.images[:3], ())
+
+        self.assertListEqual(res, [('path1', 'path0', 2)])
+
+    def test_new_images_compared_with_indexed_ones(self):
+        self.index.pairs(self.images[:3], ())
+        res = self.index.pairs(self.images[3:], ())
+
+        self.assertCountEqual(res, [('path3', 'path0', 1),
+                                    ('path3', 'path1', 1)])
+
+    def test_new_images_indexed_and_pairs_added_to_cache(self):
+        self.index.pairs(self.images[:2], ())
+
+        self.assertTrue(self.cache['path0'].indexed)
+        self.assertListEqual(self.cache.pairs(['path0']),
+                             [('path1', 'path0', 2)])
+
+    def test_pairs_of_indexed_images_taken_from_cache(self):
+        self.cache.add_pairs(['path0', 'path2'], [('path0', 'path2', 4)])
+        res = self.index.pairs(self.images[2:3], ['path2'])
+
+        self.assertListEqual(res, [('path0', 'path2', 4)])
+
+    def test_indexed_images_not_compared(self):
+        with mock.patch('myfyrio.index.IncrementalIndex.add') as mock_add:
+            self.index.pairs(self.images, [img.path for img in self.images])
+
+        mock_add.assert_not_called()
+
+    def test_hashes_of_indexed_images_read_from_cache(self):
+        self.cache.add_pairs(['path0', 'path2'], [])
+        res = self.index.pairs(self.images[3:], ())
+
+        self.assertListEqual(res, [('path3', 'path0', 1)])
+
+    def test_old_hash_of_changed_image_deleted(self):
+        self.index.pairs(self.images[:2], ())
+        self.images[0].dhash = (1 << 64) - 1
+        res = self.index.pairs(self.images[:1], ())
+
+        self.assertListEqual(res, [])
+        self.assertListEqual(self.index.pairs(self.images[3:], ()),
+                             [('path3', 'path1', 1)])
+
+    def test_pairs_searched_within_max_radius(self):
+        self.images[2].dhash = (1 << cache.Cache.RADIUS) - 1
+        res = self.index.pairs(self.images[:3], ())
 
-        self.mock_qimage = mock.Mock(spec=QtGui.QImage)
+        self.assertEqual(self.index.radius, cache.Cache.RADIUS)
+        self.assertEqual(self.cache.radius, cache.Cache.RADIUS)
+        self.assertIn(('path2', 'path0', cache.Cache.RADIUS), res)
 
-    def test_Image_scaled_called_with_size_9(self):
-        with mock.patch(CORE+'Image.scaled') as mock_scaled:
-            with mock.patch(CORE+'Image._form_hash'):
-                self.image.calculate_dhash()
+    def test_threads_passed_to_index(self):
+        similarity = core.SimilarityIndex(self.cache, 2)
+        similarity.pairs(self.images, ())
 
-        mock_scaled.assert_called_once_with(9, 9)
+        self.assertEqual(similarity._index.threads, 2)
 
-    def test_scaled_img_converted_to_greyscale(self):
-        with mock.patch(CORE+'Image.scaled', return_value=self.mock_qimage):
-            with mock.patch(CORE+'Image._form_hash'):
-                self.image.calculate_dhash()
+    def test_pairs_found_within_smaller_radius_searched_again(self):
+        old_cache = cache.Cache()
+        old_cache['path0'] = old_cache['path1'] = cache.Entry(0)
+        old_cache.widen(2)
+        old_cache.add_pairs(['path0', 'path1'], [('path1', 'path0', 0)])
+        core.SimilarityIndex(old_cache)
 
-        self.mock_qimage.convertToFormat.assert_called_once_with(
-            QtGui.QImage.Format_Grayscale8
-        )
+        self.assertEqual(old_cache.radius, cache.Cache.RADIUS)
+        self.assertFalse(old_cache['path0'].indexed)
+        self.assertListEqual(old_cache.pairs(['path0']), [])
 
-    def test_form_hash_called_with_grey_img_and_size_8(self):
-        self.mock_qimage.convertToFormat.return_value = 'grey_img'
-        with mock.patch(CORE+'Image.scaled', return_value=self.mock_qimage):
-            with mock.patch(CORE+'Image._form_hash') as mock_hash:
-                self.image.calculate_dhash()
+    def test_images_grouped_with_sensitivity_0_regrouped_with_bigger_one(self):
+        grouping = core.Grouping(0)
+        grouping.add(self.images, self.index.pairs(self.images, ()))
+        dendrogram = grouping.dendrogram(self.index.radius)
 
-        mock_hash.assert_called_once_with('grey_img', 8)
+        self.assertEqual(grouping.groups_num, 0)
+        groups = dendrogram.groups(10)
+        self.assertListEqual(groups, [[self.images[0], self.images[1],
+                                       self.images[3]]])
 
-    def test_form_hash_result_assigned_to_attr_dhash(self):
-        with mock.patch(CORE+'Image.scaled', return_value=self.mock_qimage):
-            with mock.patch(CORE+'Image._form_hash', return_value='hash'):
-                self.image.calculate_dhash()
+    def test_old_hash_of_changed_image_not_compared(self):
+        self.cache['path0'] = cache.Entry.from_stat(0, self.h_stat(1))
+        self.index.pairs(self.images[:2], ())
+        self.cache.lookup({'path0': self.h_stat(2)})
+        res = self.index.pairs(self.images[3:], ())
 
-        self.assertEqual(self.image.dhash, 'hash')
+        self.assertListEqual(res, [('path3', 'path1', 1)])
+        self.assertListEqual(self.cache.pairs(['path1']),
+                             [('path3', 'path1', 1)])
 
-    def test_return_attr_dhash(self):
-        with mock.patch(CORE+'Image.scaled', return_value=self.mock_qimage):
-            with mock.patch(CORE+'Image._form_hash', return_value='hash'):
-                res = self.image.calculate_dhash()
+    def test_changed_image_compared_again(self):
+        self.cache['path0'] = cache.Entry.from_stat(0, self.h_stat(1))
+        self.index.pairs(self.images[:2], ())
+        self.cache.lookup({'path0': self.h_stat(2)})
+        res = self.index.pairs(self.images[:1] + self.images[3:], ())
 
-        self.assertEqual(res, self.image.dhash)
+        self.assertCountEqual(res, [('path3', 'path0', 1),
+                                    ('path3', 'path1', 1),
+                                    ('path0', 'path1', 2)])
 
-    def test_assign_minus_1_to_attr_dhash_if_Image_scaled_raise_OSError(self):
-        with mock.patch(CORE+'Image.scaled', side_effect=OSError):
-            self.image.calculate_dhash()
 
-        self.assertEqual(self.image.dhash, -1)
+class TestClassImage(TestCase):
 
-    def test_return_attr_dhash_if_Image_scaled_raise_OSError(self):
-        with mock.patch(CORE+'Image.scaled', side_effect=OSError):
-            res = self.image.calculate_dhash()
+    IMAGE = CORE + 'Image.'
 
-        self.assertEqual(res, self.image.dhash)
+    def setUp(self):
+        self.image = core.Image('image.png')
 
 
 class TestMethodSimilarity(TestClassImage):
@@ -462,6 +594,8 @@ class TestMethodScaled(TestClassImage):
         self.QIR = 'PyQt5.QtGui.QImageReader'
         self.reader = mock.Mock(spec=QtGui.QImageReader)
         self.reader.canRead.return_value = True
+        self.reader.size.return_value = QtCore.QSize(30, 40)
+        self.reader.format.return_value = QtCore.QByteArray(b'jpeg')
         self.qimage = mock.Mock(spec=QtGui.QImage)
         self.qimage.isNull.return_value = False
         self.reader.read.return_value = self.qimage
@@ -496,6 +630,20 @@ class TestMethodScaled(TestClassImage):
             with self.assertRaises(OSError):
                 self.image.scaled(self.width, self.height)
 
+    def test_info_read_if_not_known(self):
+        with mock.patch(self.QIR, return_value=self.reader):
+            self.image.scaled(self.width, self.height)
+
+        self.assertTupleEqual(self.image.info(), (30, 40, 'jpeg'))
+
+    def test_info_not_read_if_known(self):
+        self.image.set_dimensions(1, 2)
+        with mock.patch(self.QIR, return_value=self.reader):
+            self.image.scaled(self.width, self.height)
+
+        self.reader.size.assert_not_called()
+        self.assertTupleEqual(self.image.info(), (1, 2, None))
+
 
 class TestMethodSetDimensions(TestClassImage):
 
@@ -517,9 +665,10 @@ class TestMethodSetDimensions(TestClassImage):
     def test_width_and_height_assigned_to_proper_attrs(self):
         width = 333
         height = 444
-        mock_qimg = mock.Mock(spec=QtGui.QImage)
+        mock_qimg = mock.Mock(spec=QtGui.QImageReader)
         mock_qsize = mock.Mock(spec=QtCore.QSize)
         mock_qimg.size.return_value = mock_qsize
+        mock_qimg.format.return_value = QtCore.QByteArray(b'png')
         mock_qsize.width.return_value = width
         mock_qsize.height.return_value = height
 
@@ -528,6 +677,18 @@ class TestMethodSetDimensions(TestClassImage):
 
         self.assertEqual(self.image._width, width)
         self.assertEqual(self.image._height, height)
+        self.assertEqual(self.image.format, 'png')
+
+
+class TestMethodInfo(TestClassImage):
+
+    def test_return_None_if_not_read(self):
+        self.assertTupleEqual(self.image.info(), (None, None, None))
+
+    def test_return_set_dimensions(self):
+        self.image.set_dimensions(3, 4)
+
+        self.assertTupleEqual(self.image.info(), (3, 4, None))
 
 
 class TestPropertyWidth(TestClassImage):
@@ -566,19 +727,19 @@ class TestPropertyHeight(TestClassImage):
 
 class TestMethodSetFilesize(TestClassImage):
 
-    @mock.patch('os.path.getsize', return_value=1024)
-    def test_getsize_called_with_image_path_arg(self, mock_size):
+    @mock.patch('os.stat', return_value=mock.Mock(st_size=1024))
+    def test_stat_called_with_image_path_arg(self, mock_stat):
         self.image.filesize()
 
-        mock_size.assert_called_once_with(self.image.path)
+        mock_stat.assert_called_once_with(self.image.path)
 
-    @mock.patch('os.path.getsize', side_effect=OSError)
-    def test_raise_OSError_if_getsize_raise_OSError(self, mock_size):
+    @mock.patch('os.stat', side_effect=OSError)
+    def test_raise_OSError_if_stat_raise_OSError(self, mock_stat):
         with self.assertRaises(OSError):
             self.image.filesize()
 
-    @mock.patch('os.path.getsize', return_value=1024)
-    def test_assign_result_of_getsize_to_size_attr(self, mock_size):
+    @mock.patch('os.stat', return_value=mock.Mock(st_size=1024))
+    def test_assign_file_size_to_size_attr(self, mock_stat):
         self.image.filesize(core.SizeFormat.B)
 
         self.assertEqual(self.image.size, 1024)
@@ -623,6 +784,28 @@ class TestMethodFilesize(TestClassImage):
         mock_size_call.assert_not_called()
 
 
+class TestMethodStat(TestClassImage):
+
+    @mock.patch('os.stat', return_value='stat')
+    def test_stat_called_with_image_path_arg(self, mock_stat):
+        res = self.image.stat()
+
+        mock_stat.assert_called_once_with(self.image.path)
+        self.assertEqual(res, 'stat')
+
+    @mock.patch('os.stat', return_value='stat')
+    def test_status_read_only_once(self, mock_stat):
+        self.image.stat()
+        self.image.stat()
+
+        mock_stat.assert_called_once_with(self.image.path)
+
+    @mock.patch('os.stat', side_effect=OSError)
+    def test_raise_OSError_if_stat_raise_OSError(self, mock_stat):
+        with self.assertRaises(OSError):
+            self.image.stat()
+
+
 class TestMethodDelete(TestClassImage):
 
     @mock.patch('os.remove', side_effect=OSError)
@@ -0,0 +1,97 @@
+'''Copyright 2020 Maxim Shpak <maxim.shpak@posteo.uk>
+
+This file is part of Myfyrio.
+
+Myfyrio is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Myfyrio is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
+'''
+
+from unittest import TestCase, mock
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from myfyrio.gui import duplicatedelegate, duplicatemodel
+
+# Check if there's QApplication instance already
+app = QtWidgets.QApplication.instance()
+if app is None:
+    app = QtWidgets.QApplication([])
+
+# pylint: disable=missing-class-docstring
+
+
+class TestDuplicateDelegate(TestCase):
+
+    def setUp(self):
+        self.conf = {'size': 200, 'show_similarity': True, 'show_size': True,
+                     'show_path': True}
+        self.d = duplicatedelegate.DuplicateDelegate(self.conf)
+
+        self.option = QtWidgets.QStyleOptionViewItem()
+        self.line = self.option.fontMetrics.lineSpacing()
+
+
+class TestDuplicateDelegateMethodSizeHint(TestDuplicateDelegate):
+
+    def test_size_with_all_info(self):
+        res = self.d.sizeHint(self.option, QtCore.QModelIndex())
+
+        self.assertEqual(res.width(), 200 + self.d.SPACING)
+        self.assertEqual(res.height(),
+                         200 + 6 * self.line + 2 * self.d.SPACING)
+
+    def test_size_without_info(self):
+        self.conf['show_similarity'] = False
+        self.conf['show_size'] = False
+        self.conf['show_path'] = False
+        res = self.d.sizeHint(self.option, QtCore.QModelIndex())
+
+        self.assertEqual(res.height(), 200 + 2 * self.d.SPACING)
+
+
+class TestDuplicateDelegateMethodTexts(TestDuplicateDelegate):
+
+    def setUp(self):
+        super().setUp()
+
+        self.mock_index = mock.Mock(spec=QtCore.QModelIndex)
+        self.mock_index.data.side_effect = lambda role: role
+
+    def test_all_texts_with_their_lines(self):
+        res = self.d._texts(self.mock_index)
+
+        self.assertListEqual(res, [
+            (duplicatemodel.SimilarityRole, 1),
+            (duplicatemodel.SizeRole, self.d.SIZE_LINES),
+            (QtCore.Qt.DisplayRole, self.d.PATH_LINES),
+        ])
+
+    def test_only_shown_texts(self):
+        self.conf['show_similarity'] = False
+        self.conf['show_path'] = False
+        res = self.d._texts(self.mock_index)
+
+        self.assertListEqual(res, [
+            (duplicatemodel.SizeRole, self.d.SIZE_LINES),
+        ])
+
+
+class TestDuplicateDelegateMethodPaint(TestDuplicateDelegate):
+
+    def test_nothing_painted_if_no_image(self):
+        mock_painter = mock.Mock(spec=QtGui.QPainter)
+        mock_index = mock.Mock(spec=QtCore.QModelIndex)
+        mock_index.data.return_value = None
+        self.d.paint(mock_painter, self.option, mock_index)
+
+        mock_painter.save.assert_not_called()
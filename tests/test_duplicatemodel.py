@@ -0,0 +1,480 @@
+'''Copyright 2020 Maxim Shpak <maxim.shpak@posteo.uk>
+
+This file is part of Myfyrio.
+
+Myfyrio is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Myfyrio is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import logging
+from unittest import TestCase, mock
+
+from PyQt5 import QtCore, QtGui, QtTest, QtWidgets
+
+from myfyrio import core
+from myfyrio.gui import duplicatemodel, thumbnailscheduler
+
+# Configure a logger for testing purposes
+logger = logging.getLogger('main')
+logger.setLevel(logging.WARNING)
+if not logger.handlers:
+    nh = logging.NullHandler()
+    logger.addHandler(nh)
+
+# Check if there's QApplication instance already
+app = QtWidgets.QApplication.instance()
+if app is None:
+    app = QtWidgets.QApplication([])
+
+MODEL_MODULE = 'myfyrio.gui.duplicatemodel.'
+
+# pylint: disable=missing-class-docstring
+
+
+class TestDuplicateModel(TestCase):
+
+    DM = MODEL_MODULE + 'DuplicateModel.'
+
+    def setUp(self):
+        self.conf = {'size': 200, 'size_format': 1, 'sort': 3, 'lazy': True,
+                     'thumbnail_cache': 1, 'disk_thumbnails': False}
+        self.images = []
+        for i in range(6):
+            mock_image = mock.Mock(spec=core.Image)
+            mock_image.path = f'path{i}'
+            mock_image.size = 1024
+            mock_image.difference = i
+            mock_image.stat.return_value.st_mtime_ns = 1
+            self.images.append(mock_image)
+
+        self.m = duplicatemodel.DuplicateModel(self.conf)
+
+    def h_rows(self):
+        rows = []
+        for row in range(self.m.rowCount()):
+            rows.append([self.images.index(image) for image in
+                         self.m._groups[row]])
+        return rows
+
+
+class TestDuplicateModelMethodAddGroup(TestDuplicateModel):
+
+    def test_new_group_added(self):
+        self.m.addGroup(0, self.images[:2])
+        self.m.addGroup(1, self.images[2:4])
+
+        self.assertListEqual(self.h_rows(), [[0, 1], [2, 3]])
+        self.assertEqual(self.m.columnCount(), 2)
+
+    def test_only_new_images_of_existing_group_added(self):
+        self.m.addGroup(0, self.images[:2])
+        self.m.addGroup(0, self.images[:3])
+
+        self.assertListEqual(self.h_rows(), [[0, 1, 2]])
+        self.assertEqual(self.m.columnCount(), 3)
+
+    def test_images_sorted_with_sort_from_conf(self):
+        self.conf['sort'] = 0
+        for image, difference in zip(self.images, (0, 5, 3)):
+            image.difference = difference
+        self.m.addGroup(0, self.images[:2])
+        self.m.addGroup(0, self.images[:3])
+
+        self.assertListEqual(self.h_rows(), [[0, 2, 1]])
+
+    def test_image_put_first_if_its_size_cannot_be_read(self):
+        self.conf['sort'] = 1
+        self.images[2].size = None
+        self.images[2].filesize.side_effect = OSError
+        self.m.addGroup(0, self.images[:3])
+
+        self.assertListEqual(self.h_rows(), [[0, 1, 2]])
+
+    def test_rows_inserted_signal_emitted(self):
+        spy = QtTest.QSignalSpy(self.m.rowsInserted)
+        self.m.addGroup(0, self.images[:2])
+        self.m.addGroup(0, self.images[:3])
+
+        self.assertEqual(len(spy), 1)
+
+    def test_thumbnails_made_in_background_if_not_lazy(self):
+        self.conf['lazy'] = False
+        with mock.patch(self.DM+'_thumbnail') as mock_thumb_call:
+            self.m.addGroup(0, self.images[:2])
+
+        mock_thumb_call.assert_has_calls([
+            mock.call(image, thumbnailscheduler.Priority.BACKGROUND)
+            for image in self.images[:2]
+        ])
+
+    def test_thumbnails_not_made_if_lazy(self):
+        with mock.patch(self.DM+'_thumbnail') as mock_thumb_call:
+            self.m.addGroup(0, self.images[:2])
+
+        mock_thumb_call.assert_not_called()
+
+
+class TestDuplicateModelMethodRemoveGroup(TestDuplicateModel):
+
+    def setUp(self):
+        super().setUp()
+
+        self.m.addGroup(0, self.images[:2])
+        self.m.addGroup(3, self.images[2:4])
+        self.m.addGroup(5, self.images[4:])
+
+    def test_group_removed(self):
+        self.m.removeGroup(3)
+
+        self.assertListEqual(self.h_rows(), [[0, 1], [4, 5]])
+        self.assertListEqual(self.m._indices, [0, 5])
+
+    def test_images_of_removed_group_unselected(self):
+        self.m.setData(self.m.index(1, 0), QtCore.Qt.Checked,
+                       QtCore.Qt.CheckStateRole)
+        self.m.removeGroup(3)
+
+        self.assertFalse(self.m.hasSelected())
+
+    def test_nothing_removed_if_no_such_group(self):
+        self.m.removeGroup(4)
+
+        self.assertEqual(self.m.rowCount(), 3)
+
+    def h_join(self):
+        # Group 3 is joined with group 0: the joined group is added first,
+        # then the emptied one is removed
+        self.m.addGroup(0, self.images[:4])
+        self.m.removeGroup(3)
+
+    def test_images_of_joined_group_keep_selection(self):
+        self.m.setData(self.m.index(1, 0), QtCore.Qt.Checked,
+                       QtCore.Qt.CheckStateRole)
+        self.h_join()
+
+        self.assertListEqual(self.h_rows(), [[0, 1, 2, 3], [4, 5]])
+        self.assertListEqual(self.m.selectedImages(), [self.images[2]])
+
+    def test_thumbnails_of_images_of_joined_group_kept(self):
+        self.h_join()
+        self.images[2].thumb = QtGui.QImage(10, 10, QtGui.QImage.Format_RGB32)
+        spy = QtTest.QSignalSpy(self.m.dataChanged)
+        self.m._setThumbnail(self.images[2])
+
+        self.assertEqual(len(self.m._cache), 1)
+        self.assertEqual((spy[0][0].row(), spy[0][0].column()), (0, 2))
+
+
+class TestDuplicateModelMethodData(TestDuplicateModel):
+
+    def setUp(self):
+        super().setUp()
+
+        self.m.addGroup(0, self.images[:3])
+        self.m.addGroup(1, self.images[3:5])
+
+    def test_return_None_if_no_image(self):
+        self.assertIsNone(self.m.data(self.m.index(1, 2)))
+        self.assertEqual(self.m.flags(self.m.index(1, 2)),
+                         QtCore.Qt.NoItemFlags)
+
+    def test_return_image(self):
+        res = self.m.data(self.m.index(1, 1), duplicatemodel.ImageRole)
+
+        self.assertIs(res, self.images[4])
+
+    def test_return_similarity(self):
+        self.images[0].similarity.return_value = 97
+        res = self.m.data(self.m.index(0, 0), duplicatemodel.SimilarityRole)
+
+        self.assertEqual(res, '97%')
+
+    def test_return_size(self):
+        self.images[0].width = 10
+        self.images[0].height = 20
+        self.images[0].filesize.return_value = 1.5
+        res = self.m.data(self.m.index(0, 0), duplicatemodel.SizeRole)
+
+        self.images[0].filesize.assert_called_once_with(core.SizeFormat.KB)
+        self.assertEqual(res, '10x20, 1.5 KB')
+
+    def test_return_size_0_if_filesize_raise_OSError(self):
+        self.images[0].width = 10
+        self.images[0].height = 20
+        self.images[0].filesize.side_effect = OSError
+        with self.assertLogs('main.duplicatemodel', 'ERROR'):
+            res = self.m.data(self.m.index(0, 0), duplicatemodel.SizeRole)
+
+        self.assertEqual(res, '10x20, 0 KB')
+
+    def test_return_canonical_path_read_once(self):
+        with mock.patch('PyQt5.QtCore.QFileInfo') as mock_info_call:
+            mock_info_call.return_value.canonicalFilePath.return_value = \
+                '/canonical/path0'
+            self.m.clear()
+            self.m.addGroup(0, self.images[:2])
+            res = [self.m.data(self.m.index(0, 0), role)
+                   for role in (QtCore.Qt.DisplayRole,
+                                QtCore.Qt.ToolTipRole,
+                                QtCore.Qt.DisplayRole)]
+
+        self.assertListEqual(res, ['/canonical/path0'] * 3)
+        # Once for every added image
+        self.assertEqual(mock_info_call.call_count, 2)
+
+    def test_path_read_again_if_image_renamed(self):
+        self.images[0].path = 'renamed'
+        with mock.patch('PyQt5.QtCore.QFileInfo') as mock_info_call:
+            self.m.data(self.m.index(0, 0), QtCore.Qt.DisplayRole)
+
+        mock_info_call.assert_called_once_with('renamed')
+
+    def test_return_unselected_by_default(self):
+        res = self.m.data(self.m.index(0, 0), QtCore.Qt.CheckStateRole)
+
+        self.assertEqual(res, QtCore.Qt.Unchecked)
+
+    def test_thumbnail_asked_for_decoration(self):
+        with mock.patch(self.DM+'_thumbnail',
+                        return_value='pixmap') as mock_thumb_call:
+            res = self.m.data(self.m.index(0, 1), QtCore.Qt.DecorationRole)
+
+        mock_thumb_call.assert_called_once_with(self.images[1])
+        self.assertEqual(res, 'pixmap')
+
+
+class TestDuplicateModelMethodsSelection(TestDuplicateModel):
+
+    def setUp(self):
+        super().setUp()
+
+        self.m.addGroup(0, self.images[:3])
+        self.m.addGroup(1, self.images[3:5])
+
+    def test_setData_select_and_unselect_image(self):
+        index = self.m.index(0, 1)
+        self.m.setData(index, QtCore.Qt.Checked, QtCore.Qt.CheckStateRole)
+        selected = self.m.selectedImages()
+        self.m.setData(index, QtCore.Qt.Unchecked, QtCore.Qt.CheckStateRole)
+
+        self.assertListEqual(selected, [self.images[1]])
+        self.assertFalse(self.m.hasSelected())
+
+    def test_setData_return_False_if_no_image(self):
+        res = self.m.setData(self.m.index(1, 2), QtCore.Qt.Checked,
+                             QtCore.Qt.CheckStateRole)
+
+        self.assertFalse(res)
+        self.assertFalse(self.m.hasSelected())
+
+    def test_autoSelect_select_all_images_except_first_ones(self):
+        self.m.autoSelect()
+
+        self.assertListEqual(self.m.selectedImages(),
+                             [self.images[1], self.images[2], self.images[4]])
+
+    def test_unselect_all(self):
+        self.m.autoSelect()
+        self.m.unselect()
+
+        self.assertFalse(self.m.hasSelected())
+
+
+class TestDuplicateModelMethodRemoveImages(TestDuplicateModel):
+
+    def setUp(self):
+        super().setUp()
+
+        self.m.addGroup(0, self.images[:3])
+        self.m.addGroup(1, self.images[3:5])
+
+    def test_images_removed(self):
+        self.m.removeImages([self.images[1]])
+
+        self.assertListEqual(self.h_rows(), [[0, 2], [3, 4]])
+
+    def test_group_with_less_than_2_images_left_removed(self):
+        self.m.removeImages([self.images[1], self.images[4]])
+
+        self.assertListEqual(self.h_rows(), [[0, 2]])
+
+    def test_new_images_of_group_added_after_removal(self):
+        self.m.removeImages([self.images[1]])
+        self.m.addGroup(0, self.images[:3] + [self.images[5]])
+
+        self.assertListEqual(self.h_rows(), [[0, 2, 5], [3, 4]])
+
+
+class TestDuplicateModelMethodClear(TestDuplicateModel):
+
+    def test_everything_removed(self):
+        self.m.addGroup(0, self.images[:3])
+        self.m.autoSelect()
+        self.m.clear()
+
+        self.assertEqual(self.m.rowCount(), 0)
+        self.assertEqual(self.m.columnCount(), 0)
+        self.assertFalse(self.m.hasSelected())
+
+
+class TestDuplicateModelMethodsThumbnail(TestDuplicateModel):
+
+    def setUp(self):
+        super().setUp()
+
+        self.m.addGroup(0, self.images[:2])
+
+    def h_thumbnail(self, image):
+        with mock.patch.object(self.m._scheduler,
+                               'request') as mock_request_call:
+            res = self.m._thumbnail(image)
+        return res, mock_request_call
+
+    def test_thumbnail_requested_from_scheduler(self):
+        res, mock_request_call = self.h_thumbnail(self.images[0])
+
+        self.assertIsNone(res)
+        mock_request_call.assert_called_once_with(
+            self.images[0], 200, None, thumbnailscheduler.Priority.VISIBLE
+        )
+
+    def test_made_thumbnail_set_when_scheduler_emit_made(self):
+        self.images[0].thumb = QtGui.QImage(10, 10, QtGui.QImage.Format_RGB32)
+        self.m._scheduler.made.emit(self.images[0])
+        res, mock_request_call = self.h_thumbnail(self.images[0])
+
+        self.assertEqual(res.width(), 10)
+        mock_request_call.assert_not_called()
+
+    def test_made_thumbnail_returned_and_dataChanged_emitted(self):
+        self.h_thumbnail(self.images[1])
+        self.images[1].thumb = QtGui.QImage(10, 10, QtGui.QImage.Format_RGB32)
+        spy = QtTest.QSignalSpy(self.m.dataChanged)
+        self.m._setThumbnail(self.images[1])
+        res, _ = self.h_thumbnail(self.images[1])
+
+        self.assertEqual(res.width(), 10)
+        self.assertIsNone(self.images[1].thumb)
+        self.assertEqual(len(spy), 1)
+        self.assertEqual(spy[0][0].column(), 1)
+
+    def test_error_thumbnail_if_thumbnail_not_converted(self):
+        self.h_thumbnail(self.images[0])
+        self.images[0].thumb = QtGui.QImage()
+        err_pixmap = QtGui.QPixmap(10, 10)
+        with mock.patch(self.DM+'_errorThumbnail',
+                        return_value=err_pixmap) as mock_err_call:
+            self.m._setThumbnail(self.images[0])
+        res, _ = self.h_thumbnail(self.images[0])
+
+        mock_err_call.assert_called_once_with(self.images[0])
+        self.assertIs(res, err_pixmap)
+
+    def test_thumbnail_of_removed_image_dropped(self):
+        self.h_thumbnail(self.images[0])
+        self.m.clear()
+        self.images[0].thumb = QtGui.QImage(10, 10, QtGui.QImage.Format_RGB32)
+        self.m._setThumbnail(self.images[0])
+
+        self.assertEqual(len(self.m._cache), 0)
+
+    def test_thumbnails_kept_when_model_cleared(self):
+        self.h_thumbnail(self.images[0])
+        self.images[0].thumb = QtGui.QImage(10, 10, QtGui.QImage.Format_RGB32)
+        self.m._setThumbnail(self.images[0])
+        self.m.clear()
+        self.m.addGroup(0, self.images[:2])
+        res, mock_proc_call = self.h_thumbnail(self.images[0])
+
+        self.assertEqual(res.width(), 10)
+        mock_proc_call.assert_not_called()
+
+    @mock.patch('os.stat')
+    def test_thumbnail_remade_if_image_file_modified(self, mock_stat_call):
+        mock_stat_call.return_value = mock.Mock(st_mtime_ns=1, st_size=10)
+        self.h_thumbnail(self.images[0])
+        self.images[0].thumb = QtGui.QImage(10, 10, QtGui.QImage.Format_RGB32)
+        self.m._setThumbnail(self.images[0])
+        mock_stat_call.return_value = mock.Mock(st_mtime_ns=2, st_size=10)
+        res, mock_proc_call = self.h_thumbnail(self.images[0])
+
+        self.assertIsNone(res)
+        mock_proc_call.assert_called_once_with(
+            self.images[0], 200, None, thumbnailscheduler.Priority.VISIBLE
+        )
+
+    def test_store_passed_if_disk_thumbnails_on(self):
+        self.conf['disk_thumbnails'] = True
+        with mock.patch('myfyrio.thumbnailstore.ThumbnailStore') as mock_st:
+            self.m.clear()
+        self.m.addGroup(0, self.images[:2])
+        _, mock_proc_call = self.h_thumbnail(self.images[0])
+
+        mock_proc_call.assert_called_once_with(
+            self.images[0], 200, mock_st.return_value,
+            thumbnailscheduler.Priority.VISIBLE
+        )
+
+    def test_cache_budget_updated_when_model_cleared(self):
+        self.conf['thumbnail_cache'] = 2
+        with mock.patch.object(self.m._cache, 'setBudget') as mock_set_call:
+            self.m.clear()
+
+        mock_set_call.assert_called_once_with(2 * 1024**2)
+
+
+class TestDuplicateModelMethodUpdateThumbnails(TestDuplicateModel):
+
+    def setUp(self):
+        super().setUp()
+
+        self.m.addGroup(0, self.images[:3])
+        self.m.addGroup(1, self.images[3:5])
+        self.m.addGroup(2, self.images[5:])
+
+    def h_update(self, visible, prefetch=None):
+        with mock.patch.object(self.m._scheduler,
+                               'request') as mock_request_call:
+            with mock.patch.object(self.m._scheduler,
+                                   'cancel') as mock_cancel_call:
+                self.m.updateThumbnails(visible, prefetch)
+        return mock_request_call, mock_cancel_call
+
+    def test_prefetch_cells_requested_with_prefetch_priority(self):
+        mock_request_call, _ = self.h_update((0, 0, 0, 2), (1, 5, 0, 0))
+
+        mock_request_call.assert_has_calls([
+            mock.call(self.images[3], 200, None,
+                      thumbnailscheduler.Priority.PREFETCH),
+            mock.call(self.images[5], 200, None,
+                      thumbnailscheduler.Priority.PREFETCH),
+        ])
+        self.assertEqual(mock_request_call.call_count, 2)
+
+    def test_prefetch_cells_out_of_model_skipped(self):
+        mock_request_call, _ = self.h_update((0, 0, 0, 2), (-3, -1, 0, 2))
+
+        mock_request_call.assert_not_called()
+
+    def test_jobs_of_other_cells_cancelled_if_lazy(self):
+        _, mock_cancel_call = self.h_update((0, 0, 1, 2), (1, 1, 1, 2))
+
+        keep = mock_cancel_call.call_args[0][0]
+        self.assertSetEqual(keep, {id(self.images[1]), id(self.images[2]),
+                                   id(self.images[4])})
+
+    def test_jobs_not_cancelled_if_not_lazy(self):
+        self.conf['lazy'] = False
+        _, mock_cancel_call = self.h_update((0, 0, 1, 2))
+
+        mock_cancel_call.assert_not_called()
@@ -0,0 +1,384 @@
+'''Copyright 2020 Maxim Shpak <maxim.shpak@posteo.uk>
+
+This file is part of Myfyrio.
+
+Myfyrio is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Myfyrio is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase, mock
+
+import numpy as np
+from PyQt5 import QtGui
+
+from myfyrio import cache, hashing
+
+try:
+    import PIL
+except ImportError:
+    PIL = None
+
+HASHING = 'myfyrio.hashing.'
+
+# pylint: disable=unused-argument,missing-class-docstring
+
+
+class TestFuncCalculateDhashes(TestCase):
+
+    def setUp(self):
+        self.paths = ['image1.png', 'image2.png']
+
+        self.pixels = []
+        for shift in (0, 50):
+            x, y = np.meshgrid(np.arange(9), np.arange(9))
+            self.pixels.append(((x * 67 + y * 29 + shift) % 256)
+                               .astype(np.uint8))
+        self.mock_backend = mock.Mock(spec=hashing.DecodeBackend)
+        self.mock_backend.grey_thumbnail.side_effect = [
+            (self.pixels[0], (10, 20, 'png')), (self.pixels[1], (30, 40, None))
+        ]
+
+    def h_pixel_by_pixel_hash(self, pixels):
+        row_hash, col_hash = 0, 0
+        for y in range(8):
+            for x in range(8):
+                current_pixel = pixels[y, x]
+                right_pixel = pixels[y, x+1]
+                down_pixel = pixels[y+1, x]
+
+                row_hash = row_hash << 1 | int(current_pixel < right_pixel)
+                col_hash = col_hash << 1 | int(current_pixel < down_pixel)
+
+        return row_hash << 64 | col_hash
+
+    def test_return_empty_arrays_if_pass_empty_paths_list(self):
+        hashes, readable, infos = hashing.calculate_dhashes([])
+
+        self.assertTupleEqual(hashes.shape, (0, 2))
+        self.assertTupleEqual(readable.shape, (0,))
+        self.assertListEqual(infos, [])
+
+    def test_thumbnails_of_size_9_decoded(self):
+        hashing.calculate_dhashes(self.paths, self.mock_backend)
+
+        self.mock_backend.grey_thumbnail.assert_has_calls(
+            [mock.call('image1.png', 9), mock.call('image2.png', 9)]
+        )
+
+    def test_return_uint64_array_with_2_columns(self):
+        hashes, _, _ = hashing.calculate_dhashes(self.paths,
+                                                 self.mock_backend)
+
+        self.assertEqual(hashes.dtype, np.uint64)
+        self.assertTupleEqual(hashes.shape, (2, 2))
+
+    def test_return_same_hashes_as_pixel_by_pixel_comparison(self):
+        hashes, readable, _ = hashing.calculate_dhashes(self.paths,
+                                                        self.mock_backend)
+
+        expected = [self.h_pixel_by_pixel_hash(p) for p in self.pixels]
+        self.assertListEqual(hashing.from_hash_array(hashes), expected)
+        self.assertListEqual(readable.tolist(), [True, True])
+
+    def test_return_info_read_with_thumbnails(self):
+        _, _, infos = hashing.calculate_dhashes(self.paths, self.mock_backend)
+
+        self.assertListEqual(infos, [(10, 20, 'png'), (30, 40, None)])
+
+    def test_unreadable_image_has_0_hash_and_is_marked(self):
+        self.mock_backend.grey_thumbnail.side_effect = [
+            OSError, (self.pixels[1], (30, 40, None))
+        ]
+        hashes, readable, infos = hashing.calculate_dhashes(self.paths,
+                                                            self.mock_backend)
+
+        res = hashing.from_hash_array(hashes)
+        self.assertEqual(res[0], 0)
+        self.assertEqual(res[1], self.h_pixel_by_pixel_hash(self.pixels[1]))
+        self.assertListEqual(readable.tolist(), [False, True])
+        self.assertTupleEqual(infos[0], (None, None, None))
+
+    def test_return_0_if_image_is_plain(self):
+        self.pixels[0][:] = 128
+        hashes, _, _ = hashing.calculate_dhashes(self.paths,
+                                                 self.mock_backend)
+
+        self.assertEqual(hashing.from_hash_array(hashes)[0], 0)
+
+    def test_return_all_bits_set_if_pixels_increase_right_and_down(self):
+        x, y = np.meshgrid(np.arange(9), np.arange(9))
+        self.pixels[0][:] = 10 * x + 20 * y
+        hashes, _, _ = hashing.calculate_dhashes(self.paths,
+                                                 self.mock_backend)
+
+        self.assertEqual(hashing.from_hash_array(hashes)[0], 2**128 - 1)
+
+    def test_only_images_read_before_cancelled_hashed(self):
+        cancelled = mock.Mock(side_effect=[False, True])
+        hashes, readable, infos = hashing.calculate_dhashes(
+            self.paths, self.mock_backend, cancelled
+        )
+
+        self.assertTupleEqual(hashes.shape, (1, 2))
+        self.assertListEqual(readable.tolist(), [True])
+        self.assertEqual(len(infos), 1)
+
+
+class TestFuncDecodeBackend(TestCase):
+
+    def test_return_backend_by_name(self):
+        self.assertIsInstance(hashing.decode_backend('qt'), hashing.QtBackend)
+
+    def test_raise_ValueError_if_unknown_name(self):
+        with self.assertRaises(ValueError):
+            hashing.decode_backend('unknown')
+
+    def test_backends_have_different_hash_versions(self):
+        versions = [b.HASH_VERSION for b in hashing.BACKENDS.values()]
+
+        self.assertEqual(len(set(versions)), len(versions))
+        self.assertEqual(hashing.QtBackend.HASH_VERSION,
+                         cache.DEFAULT_HASH_VERSION)
+
+    def test_interface_cannot_be_instantiated(self):
+        # pylint: disable=abstract-class-instantiated
+        with self.assertRaises(TypeError):
+            hashing.DecodeBackend()
+
+
+class TestClassBackends(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'image.jpg')
+        qimg = QtGui.QImage(40, 30, QtGui.QImage.Format_RGB32)
+        for y in range(30):
+            for x in range(40):
+                qimg.setPixel(x, y, QtGui.qRgb(x * 6, y * 8, 100))
+        qimg.save(self.path)
+
+        self.broken = os.path.join(self.tmp_dir.name, 'broken.jpg')
+        with open(self.broken, 'wb') as f:
+            f.write(b'not an image')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_qt_thumbnail_and_info(self):
+        res, info = hashing.QtBackend().grey_thumbnail(self.path, 9)
+
+        self.assertTupleEqual(res.shape, (9, 9))
+        self.assertEqual(res.dtype, np.uint8)
+        self.assertTupleEqual(info, (40, 30, 'jpeg'))
+
+    def test_qt_raise_OSError_if_image_cannot_be_read(self):
+        with self.assertRaises(OSError):
+            hashing.QtBackend().grey_thumbnail(self.broken, 9)
+
+    @mock.patch.dict('sys.modules', {'PIL': None})
+    def test_pillow_raise_ImportError_if_not_installed(self):
+        with self.assertRaises(ImportError):
+            hashing.PillowBackend()
+
+    def test_pillow_thumbnail_and_info(self):
+        if PIL is None:
+            self.skipTest('Pillow is not installed')
+        res, info = hashing.PillowBackend().grey_thumbnail(self.path, 9)
+
+        self.assertTupleEqual(res.shape, (9, 9))
+        self.assertEqual(res.dtype, np.uint8)
+        self.assertTupleEqual(info, (40, 30, 'jpeg'))
+
+    def test_pillow_raise_OSError_if_image_cannot_be_read(self):
+        if PIL is None:
+            self.skipTest('Pillow is not installed')
+        with self.assertRaises(OSError) as context:
+            hashing.PillowBackend().grey_thumbnail(self.broken, 9)
+
+        self.assertIsNotNone(context.exception.__cause__)
+
+    def test_pillow_raise_OSError_if_plugin_raises_any_error(self):
+        if PIL is None:
+            self.skipTest('Pillow is not installed')
+        backend = hashing.PillowBackend()
+        for error in (SyntaxError, struct.error, IndexError, TypeError):
+            with mock.patch('PIL.Image.open', side_effect=error):
+                with self.assertRaises(OSError):
+                    backend.grey_thumbnail(self.path, 9)
+
+    def test_pillow_image_not_read_if_plugin_raises_any_error(self):
+        if PIL is None:
+            self.skipTest('Pillow is not installed')
+        with mock.patch('PIL.Image.open', side_effect=struct.error):
+            _, readable, infos = hashing.calculate_dhashes(
+                [self.path], hashing.PillowBackend()
+            )
+
+        self.assertListEqual(readable.tolist(), [False])
+        self.assertListEqual(infos, [hashing.NO_INFO])
+
+    def test_pillow_box_filter_of_old_versions_used(self):
+        mock_pil = mock.Mock(spec=['Image'])
+        mock_pil.Image = mock.Mock(spec=['open', 'BOX'])
+        with mock.patch.dict('sys.modules', {'PIL': mock_pil,
+                                             'PIL.Image': mock_pil.Image}):
+            backend = hashing.PillowBackend()
+
+        self.assertIs(backend._box, mock_pil.Image.BOX)
+
+    def test_pillow_hash_close_to_qt_hash(self):
+        if PIL is None:
+            self.skipTest('Pillow is not installed')
+        # Smooth image (as photos are) saved losslessly
+        y, x = np.mgrid[0:480, 0:640] / 100
+        grey = 127 + 60 * np.sin(x * 2.2) + 60 * np.cos(y * 2.1 + x * 0.5)
+        pixels = np.ascontiguousarray(np.stack(
+            (grey, (grey + x * 10) % 256, 255 - grey), axis=-1
+        ).astype(np.uint8))
+        qimg = QtGui.QImage(pixels.data, 640, 480, 640 * 3,
+                            QtGui.QImage.Format_RGB888)
+        path = os.path.join(self.tmp_dir.name, 'smooth.png')
+        qimg.save(path)
+
+        qt_hash = hashing.calculate_dhashes([path])[0]
+        pillow_hash = hashing.calculate_dhashes([path],
+                                                hashing.PillowBackend())[0]
+        qt_dhash, pillow_dhash = hashing.from_hash_array(
+            np.concatenate((qt_hash, pillow_hash))
+        )
+        # Within the step between the sensitivities
+        self.assertLessEqual(bin(qt_dhash ^ pillow_dhash).count('1'), 5)
+
+
+class TestFuncFromHashArray(TestCase):
+
+    def test_return_high_and_low_words_joined(self):
+        hashes = np.array([[1, 2], [2**64-1, 0]], np.uint64)
+        res = hashing.from_hash_array(hashes)
+
+        self.assertListEqual(res, [2**64 + 2, (2**64-1) << 64])
+
+
+class TestFuncDhashChunk(TestCase):
+
+    def h_calculated(self, hashes, readable, infos):
+        return mock.patch(HASHING+'calculate_dhashes',
+                          return_value=(np.array(hashes, np.uint64),
+                                        np.array(readable, bool), infos))
+
+    def test_images_decoded_with_backend_by_name(self):
+        with self.h_calculated(np.zeros((0, 2)), [], []) as mock_calc_call:
+            hashing.dhash_chunk([], 'qt')
+
+        self.assertIsInstance(mock_calc_call.call_args[0][1],
+                              hashing.QtBackend)
+
+    def test_return_paths_with_hashes_and_info(self):
+        with self.h_calculated([[0, 5], [1, 0]], [True, True],
+                               [(10, 20, 'png'), (None, None, None)]):
+            res = hashing.dhash_chunk(['path1', 'path2'])
+
+        self.assertListEqual(res, [('path1', 5, 10, 20, 'png'),
+                                   ('path2', 2**64, None, None, None)])
+
+    def test_return_minus_1_if_image_cannot_be_read(self):
+        with self.h_calculated([[0, 0]], [False], [(None, None, None)]):
+            res = hashing.dhash_chunk(['path'])
+
+        self.assertListEqual(res, [('path', -1, None, None, None)])
+
+    def test_skipped_images_not_returned_if_cancelled(self):
+        cancelled = mock.Mock(side_effect=[False, True])
+        thumbnail = (np.zeros((9, 9), np.uint8), (None, None, None))
+        with mock.patch(HASHING+'QtBackend.grey_thumbnail',
+                        return_value=thumbnail) as mock_thumbnail_call:
+            res = hashing.dhash_chunk(['path1', 'path2'], 'qt', cancelled)
+
+        mock_thumbnail_call.assert_called_once_with('path1', 9)
+        self.assertListEqual([r[0] for r in res], ['path1'])
+
+
+class TestFuncDhashTask(TestCase):
+
+    def tearDown(self):
+        hashing._cancelled = None
+
+    def test_cancel_token_of_worker_passed(self):
+        cancelled = mock.Mock()
+        with mock.patch('signal.signal'):
+            hashing.init_worker(cancelled)
+        with mock.patch(HASHING+'dhash_chunk') as mock_chunk_call:
+            hashing.dhash_task(['path'], 'qt')
+
+        mock_chunk_call.assert_called_once_with(['path'], 'qt',
+                                                cancelled.is_set)
+
+    def test_Qt_not_imported_with_module(self):
+        # The worker processes started with "spawn" import the module
+        # of their tasks only
+        code = ('import sys; import myfyrio.hashing; '
+                "sys.exit('PyQt5' in sys.modules)")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        res = subprocess.run([sys.executable, '-c', code], cwd=root,
+                             check=False)
+
+        self.assertEqual(res.returncode, 0)
+
+
+class TestFuncToHashArray(TestCase):
+
+    def test_return_high_and_low_64_bits_of_hashes(self):
+        res = hashing.to_hash_array([2**127 + 5, 3])
+
+        self.assertEqual(res.dtype, np.uint64)
+        self.assertListEqual(res.tolist(), [[2**63, 5], [0, 3]])
+
+    def test_return_array_of_shape_0_2_if_no_hashes(self):
+        res = hashing.to_hash_array([])
+
+        self.assertTupleEqual(res.shape, (0, 2))
+
+    def test_raise_TypeError_if_hash_is_not_integer(self):
+        with self.assertRaises(TypeError):
+            hashing.to_hash_array([1, 'hash'])
+
+    def test_raise_ValueError_if_hash_is_negative(self):
+        with self.assertRaises(ValueError):
+            hashing.to_hash_array([1, -1])
+
+    def test_raise_ValueError_if_hash_is_longer_than_128_bits(self):
+        with self.assertRaises(ValueError):
+            hashing.to_hash_array([2**128])
+
+    def test_from_hash_array_return_same_hashes(self):
+        hashes = [2**128 - 1, 2**64, 7]
+        res = hashing.from_hash_array(hashing.to_hash_array(hashes))
+
+        self.assertListEqual(res, hashes)
+
+
+class TestFuncPixelArray(TestCase):
+
+    def test_return_array_without_line_padding(self):
+        image = QtGui.QImage(3, 2, QtGui.QImage.Format_Grayscale8)
+        image.fill(QtGui.QColor(0, 0, 0))
+        image.setPixel(2, 1, QtGui.qRgb(7, 7, 7))
+        res = hashing._pixel_array(image)
+
+        self.assertTupleEqual(res.shape, (2, 3))
+        self.assertListEqual(res.tolist(), [[0, 0, 0], [0, 0, 7]])
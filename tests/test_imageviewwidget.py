@@ -18,11 +18,14 @@ along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
 
 
 import logging
+import sys
+from subprocess import CalledProcessError
 from unittest import TestCase, mock
 
-from PyQt5 import QtCore, QtTest, QtWidgets
+from PyQt5 import QtCore, QtGui, QtTest, QtWidgets
 
-from myfyrio.gui import duplicatewidget, imagegroupwidget, imageviewwidget
+from myfyrio import core
+from myfyrio.gui import duplicatemodel, imageviewwidget
 
 # Configure a logger for testing purposes
 logger = logging.getLogger('main')
@@ -46,29 +49,50 @@ class TestImageViewWidget(TestCase):
     IVW = VIEW_MODULE + 'ImageViewWidget.'
 
     def setUp(self):
-        self.conf = {'param': 'val'}
+        self.conf = {'size': 200, 'size_format': 1, 'sort': 0, 'lazy': False,
+                     'thumbnail_cache': 16, 'disk_thumbnails': False,
+                     'show_similarity': True, 'show_size': True,
+                     'show_path': True, 'delete_dirs': False}
+
+        self.images = []
+        for i in range(4):
+            mock_image = mock.Mock(spec=core.Image)
+            mock_image.path = f'/folder/file{i}'
+            mock_image.size = 1024
+            mock_image.difference = i
+            self.images.append(mock_image)
 
         self.w = imageviewwidget.ImageViewWidget(self.conf)
+        self.w._model._thumbnail = mock.Mock(return_value=None)
+
+    def h_fill(self):
+        self.w._model.addGroup(0, self.images[:2])
+        self.w._model.addGroup(1, self.images[2:])
 
 
 class TestImageViewWidgetMethodInit(TestImageViewWidget):
 
     def test_default_values(self):
         self.assertEqual(self.w._conf, self.conf)
-        self.assertListEqual(self.w.widgets, [])
         self.assertListEqual(self.w._errors, [])
+        self.assertFalse(self.w.hasGroups())
+
+    def test_model_and_delegate_set(self):
+        self.assertIs(self.w.model(), self.w._model)
+        self.assertIs(self.w.itemDelegate(), self.w._delegate)
+
+    def test_cell_size_set_with_delegate_size_hint(self):
+        hint = self.w._delegate.sizeHint(self.w.viewOptions(),
+                                         QtCore.QModelIndex())
 
-    def test_layout(self):
-        margins = self.w._layout.contentsMargins()
-        self.assertEqual(margins.top(), 9)
-        self.assertEqual(margins.right(), 9)
-        self.assertEqual(margins.bottom(), 9)
-        self.assertEqual(margins.left(), 9)
+        self.assertEqual(self.w.horizontalHeader().defaultSectionSize(),
+                         hint.width())
+        self.assertEqual(self.w.verticalHeader().defaultSectionSize(),
+                         hint.height())
 
-        self.assertEqual(self.w._layout.spacing(), 10)
-        self.assertIsInstance(self.w._layout, QtWidgets.QVBoxLayout)
-        self.assertEqual(self.w._layout.sizeConstraint(),
-                         QtWidgets.QLayout.SetFixedSize)
+    def test_headers_hidden(self):
+        self.assertTrue(self.w.horizontalHeader().isHidden())
+        self.assertTrue(self.w.verticalHeader().isHidden())
 
 
 class TestImageViewWidgetMethodAddGroup(TestImageViewWidget):
@@ -76,8 +100,6 @@ class TestImageViewWidgetMethodAddGroup(TestImageViewWidget):
     def setUp(self):
         super().setUp()
 
-        self.w.widgets = ['image_group']
-
         self.image_group = (0, ['image'])
         self.empty_image_group = (0, [])
 
@@ -107,175 +129,269 @@ class TestImageViewWidgetMethodAddGroup(TestImageViewWidget):
 
         self.assertEqual(len(spy), 1)
 
+    def test_remove_called_if_empty_group_with_index_not_0(self):
+        with mock.patch(self.IVW+'_remove') as mock_remove_call:
+            self.w.addGroup((2, []))
+
+        mock_remove_call.assert_called_once_with(2)
+
+    def test_finished_not_emitted_if_empty_group_with_index_not_0(self):
+        spy = QtTest.QSignalSpy(self.w.finished)
+        with mock.patch(self.IVW+'_remove'):
+            self.w.addGroup((2, []))
+
+        self.assertEqual(len(spy), 0)
+
     def test_render_not_called_if_empty_image_groups(self):
         with mock.patch(self.IVW+'_render') as mock_render_call:
-            self.w.addGroup(self.empty_image_group)
+            with mock.patch('PyQt5.QtWidgets.QMessageBox'):
+                self.w.addGroup(self.empty_image_group)
 
         mock_render_call.assert_not_called()
 
-    def test_finished_signal_emitted_ifempty__image_group(self):
+    def test_finished_signal_emitted_if_empty_image_group(self):
         spy = QtTest.QSignalSpy(self.w.finished)
-        self.w.addGroup(self.empty_image_group)
+        with mock.patch('PyQt5.QtWidgets.QMessageBox'):
+            self.w.addGroup(self.empty_image_group)
 
         self.assertEqual(len(spy), 1)
 
     @mock.patch('PyQt5.QtWidgets.QMessageBox')
-    def test_QMessageBox_not_called_if_empty_image_group__no_widgets(self,
-                                                                     mock_box):
-        self.w.widgets = []
+    def test_QMessageBox_called_if_empty_image_group__no_groups(self,
+                                                                mock_box):
         self.w.addGroup(self.empty_image_group)
 
         mock_box.assert_called_once()
 
     @mock.patch('PyQt5.QtWidgets.QMessageBox')
-    def test_QMessageBox_called_if_empty_image_group__widgets_found(self,
-                                                                    mock_box):
-
+    def test_QMessageBox_not_called_if_empty_image_group__groups(self,
+                                                                 mock_box):
+        self.h_fill()
         self.w.addGroup(self.empty_image_group)
 
         mock_box.assert_not_called()
 
 
-class TestImageViewWidgetMethodRender(TestImageViewWidget):
+class TestImageViewWidgetMethodQueueGroup(TestImageViewWidget):
 
-    IGW = 'myfyrio.gui.imagegroupwidget.ImageGroupWidget'
+    def test_groups_queued_not_added(self):
+        with mock.patch(self.IVW+'addGroup') as mock_add_call:
+            self.w.queueGroup((0, self.images[:2]))
+            self.w.queueGroup((1, self.images[2:]))
 
-    def setUp(self):
-        super().setUp()
+        mock_add_call.assert_not_called()
+        self.assertListEqual(self.w._queue, [(0, self.images[:2]),
+                                             (1, self.images[2:])])
 
-        self.w._layout = mock.Mock(spec=QtWidgets.QVBoxLayout)
+    def test_queued_emitted_only_for_first_group(self):
+        spy = QtTest.QSignalSpy(self.w._queued)
+        self.w.queueGroup((0, self.images[:2]))
+        self.w.queueGroup((1, self.images[2:]))
 
-        self.image_group = (0, ['image1', 'image2'])
-        self.mock_groupW = mock.Mock(spec=imagegroupwidget.ImageGroupWidget)
-        self.mock_groupW.widgets = []
+        self.assertEqual(len(spy), 1)
 
-    def test_call_ImageGroupWidget_with_conf_arg_if_new_group(self):
-        with mock.patch(self.IGW, return_value=self.mock_groupW) as mock_widg:
-            self.w._render(self.image_group)
+    def test_queued_groups_added_by_timer(self):
+        spy = QtTest.QSignalSpy(self.w.finished)
+        self.w.queueGroup((0, self.images[:2]))
+        self.w.queueGroup((1, self.images[2:]))
+        self.w.queueGroup((0, []))
+
+        self.assertTrue(spy.wait(1000))
+        self.assertEqual(self.w._model.rowCount(), 2)
+
+
+class TestImageViewWidgetMethodAddQueued(TestImageViewWidget):
+
+    def test_queued_groups_added_in_order_and_queue_emptied(self):
+        self.w._queue = [(0, self.images[:2]), (1, [])]
+        with mock.patch(self.IVW+'_change', return_value=None) \
+            as mock_change_call:
+            self.w._addQueued()
+
+        self.assertListEqual(mock_change_call.call_args_list,
+                             [mock.call((0, self.images[:2])),
+                              mock.call((1, []))])
+        self.assertListEqual(self.w._queue, [])
+
+    def test_updates_disabled_while_adding(self):
+        self.w._queue = [(0, self.images[:2])]
+        enabled = []
+        with mock.patch(self.IVW+'_change',
+                        side_effect=lambda group: enabled.append(
+                            self.w.updatesEnabled()
+                        )):
+            self.w._addQueued()
+
+        self.assertListEqual(enabled, [False])
+        self.assertTrue(self.w.updatesEnabled())
+
+    def test_errors_reported_when_updates_enabled(self):
+        self.w._queue = [(0, self.images[:2]), (1, self.images[2:])]
+        enabled = []
+        self.w.error.connect(
+            lambda err_msg: enabled.append(self.w.updatesEnabled())
+        )
+        with mock.patch(self.IVW+'_render', side_effect=Exception('Error')):
+            with self.assertLogs('main.imageviewwidget', 'ERROR'):
+                self.w._addQueued()
 
-        mock_widg.assert_called_once_with(self.conf)
+        self.assertListEqual(enabled, [True, True])
 
-    def test_ImageGroupWidget_error_connect_to_attr_errors_append_if_new(self):
-        with mock.patch(self.IGW, return_value=self.mock_groupW):
-            self.w._render(self.image_group)
+    @mock.patch('PyQt5.QtWidgets.QMessageBox')
+    def test_QMessageBox_shown_when_updates_enabled(self, mock_box):
+        self.w._queue = [(0, [])]
+        enabled = []
+        mock_box.return_value.exec.side_effect = lambda: enabled.append(
+            self.w.updatesEnabled()
+        )
+        self.w._addQueued()
 
-        self.mock_groupW.error.connect(self.w._errors.append)
+        self.assertListEqual(enabled, [True])
 
-    def test_ImageGroupWidget_added_to_layout_if_new_group(self):
-        with mock.patch(self.IGW, return_value=self.mock_groupW):
-            self.w._render(self.image_group)
 
-        self.w._layout.addWidget.assert_called_once_with(self.mock_groupW)
+class TestImageViewWidgetMethodsRenderAndRemove(TestImageViewWidget):
 
-    def test_ImageGroupWidget_added_to_attr_widgets_if_new_group(self):
-        with mock.patch(self.IGW, return_value=self.mock_groupW):
-            self.w._render(self.image_group)
+    def test_render_add_group_to_model(self):
+        self.w._render((0, self.images[:2]))
+        self.w._render((0, self.images[:3]))
 
-        self.assertListEqual(self.w.widgets, [self.mock_groupW])
+        self.assertEqual(self.w._model.rowCount(), 1)
+        self.assertEqual(self.w._model.columnCount(), 3)
 
-    def test_new_DuplicateWidgets_added_if_new_group(self):
-        mock_duplW1 = mock.Mock(spec=duplicatewidget.DuplicateWidget)
-        mock_duplW2 = mock.Mock(spec=duplicatewidget.DuplicateWidget)
-        self.mock_groupW.addDuplicateWidget.side_effect = [mock_duplW1,
-                                                           mock_duplW2]
-        with mock.patch(self.IGW, return_value=self.mock_groupW):
-            self.w._render(self.image_group)
+    def test_remove_remove_group_from_model(self):
+        self.h_fill()
+        self.w._remove(1)
 
-        calls = [mock.call('image1'), mock.call('image2')]
-        self.mock_groupW.addDuplicateWidget.assert_has_calls(calls)
+        self.assertEqual(self.w._model.rowCount(), 1)
 
-    def test_new_DuplicateWidgets_connected_to_hasSelected_if_new_group(self):
-        mock_duplW1 = mock.Mock(spec=duplicatewidget.DuplicateWidget)
-        mock_duplW2 = mock.Mock(spec=duplicatewidget.DuplicateWidget)
-        self.mock_groupW.addDuplicateWidget.side_effect = [mock_duplW1,
-                                                           mock_duplW2]
-        with mock.patch(self.IGW, return_value=self.mock_groupW):
-            self.w._render(self.image_group)
+    def test_remove_emit_selected_signal(self):
+        self.h_fill()
+        self.w.autoSelect()
+        spy = QtTest.QSignalSpy(self.w.selected)
+        self.w._remove(0)
+        self.w._remove(1)
 
-        mock_duplW1.clicked.connect.assert_called_once_with(
-            self.w._hasSelected
-        )
-        mock_duplW2.clicked.connect.assert_called_once_with(
-            self.w._hasSelected
-        )
+        self.assertListEqual([args[0] for args in spy], [True, False])
 
-    def test_new_DuplicateWidget_added_to_existing_group(self):
-        self.w.widgets = [self.mock_groupW]
-        self.image_group[1].append('image3')
-        self.w._render(self.image_group)
 
-        self.mock_groupW.addDuplicateWidget.assert_called_once_with('image3')
+class TestImageViewWidgetMethodUpdateThumbnails(TestImageViewWidget):
 
-    def test_new_DuplicateWidget_connected_to_hasSelected_if_existing(self):
-        self.w.widgets = [self.mock_groupW]
-        self.image_group[1].append('image3')
-        mock_duplW = mock.Mock(spec=duplicatewidget.DuplicateWidget)
-        self.mock_groupW.addDuplicateWidget.return_value = mock_duplW
-        self.w._render(self.image_group)
+    def setUp(self):
+        super().setUp()
 
-        mock_duplW.clicked.connect.assert_called_once_with(
-            self.w._hasSelected
-        )
+        self.h_fill()
 
+    def h_update(self, rows, columns, pos):
+        with mock.patch(self.IVW+'rowAt', side_effect=rows):
+            with mock.patch(self.IVW+'columnAt', side_effect=columns):
+                with mock.patch.object(self.w.verticalScrollBar(), 'value',
+                                       return_value=pos[0]):
+                    with mock.patch.object(self.w.horizontalScrollBar(),
+                                           'value', return_value=pos[1]):
+                        with mock.patch.object(
+                                self.w._model,
+                                'updateThumbnails') as mock_update_call:
+                            self.w._updateThumbnails()
+        return mock_update_call
 
-class TestImageViewWidgetMethodHasSelected(TestImageViewWidget):
+    def test_nothing_updated_if_no_visible_cells(self):
+        mock_update_call = self.h_update([-1, -1], [-1, -1], (0, 0))
 
-    def setUp(self):
-        super().setUp()
+        mock_update_call.assert_not_called()
 
-        self.mock_groupW = mock.Mock(spec=imagegroupwidget.ImageGroupWidget)
-        self.w.widgets = [self.mock_groupW]
+    def test_no_prefetch_if_not_scrolled(self):
+        mock_update_call = self.h_update([0, -1], [0, 1], (0, 0))
 
-    def test_selected_signal_with_True_emitted_if_there_are_selected(self):
-        self.mock_groupW.hasSelected.return_value = True
-        spy = QtTest.QSignalSpy(self.w.selected)
-        self.w._hasSelected()
+        mock_update_call.assert_called_once_with((0, 1, 0, 1), None)
 
-        self.assertEqual(len(spy), 1)
-        self.assertTrue(spy[0][0])
+    def test_next_rows_prefetched_if_scrolled_down(self):
+        mock_update_call = self.h_update([2, 4], [0, 1], (10, 0))
 
-    def test_selected_signal_with_False_emitted_if_there_are_no_selected(self):
-        self.mock_groupW.hasSelected.return_value = False
-        spy = QtTest.QSignalSpy(self.w.selected)
-        self.w._hasSelected()
+        mock_update_call.assert_called_once_with((2, 4, 0, 1), (5, 7, 0, 1))
 
-        self.assertEqual(len(spy), 1)
-        self.assertFalse(spy[0][0])
+    def test_previous_rows_prefetched_if_scrolled_up(self):
+        self.w._scroll_pos = (20, 0)
+        mock_update_call = self.h_update([3, 4], [0, 1], (10, 0))
 
+        mock_update_call.assert_called_once_with((3, 4, 0, 1), (1, 2, 0, 1))
 
-class TestImageViewWidgetMethodClear(TestImageViewWidget):
+    def test_next_columns_prefetched_if_scrolled_right(self):
+        mock_update_call = self.h_update([0, 1], [2, 3], (0, 10))
 
-    def setUp(self):
-        super().setUp()
+        mock_update_call.assert_called_once_with((0, 1, 2, 3), (0, 1, 4, 5))
 
-        self.mock_groupW = mock.Mock()
-        self.w.widgets = [self.mock_groupW]
+    def test_previous_columns_prefetched_if_scrolled_left(self):
+        self.w._scroll_pos = (0, 20)
+        mock_update_call = self.h_update([0, 1], [2, 3], (0, 10))
 
-    def test_threadpool_clear_called(self):
-        threadpool = mock.Mock(spec=QtCore.QThreadPool)
-        with mock.patch('PyQt5.QtCore.QThreadPool.globalInstance',
-                        return_value=threadpool):
-            self.w.clear()
+        mock_update_call.assert_called_once_with((0, 1, 2, 3), (0, 1, 0, 1))
 
-        threadpool.clear.assert_called_once_with()
+    def test_scroll_position_remembered(self):
+        self.h_update([0, 1], [2, 3], (5, 10))
 
-    def test_threadpool_waitForDone_called(self):
-        threadpool = mock.Mock(spec=QtCore.QThreadPool)
-        with mock.patch('PyQt5.QtCore.QThreadPool.globalInstance',
-                        return_value=threadpool):
-            self.w.clear()
+        self.assertTupleEqual(self.w._scroll_pos, (5, 10))
 
-        threadpool.waitForDone.assert_called_once_with()
 
-    def test_deleteLater_called(self):
+class TestImageViewWidgetMethodClear(TestImageViewWidget):
+
+    def h_clear(self):
         self.w.clear()
 
-        self.mock_groupW.deleteLater.assert_called_once_with()
+    def test_thumbnail_jobs_cleared(self):
+        with mock.patch.object(self.w._model._scheduler,
+                               'clear') as mock_clear_call:
+            self.h_clear()
 
-    def test_clear_widgets_attr(self):
-        self.w.clear()
+        mock_clear_call.assert_called_once_with()
+
+    def test_model_cleared(self):
+        self.h_fill()
+        self.h_clear()
+
+        self.assertFalse(self.w.hasGroups())
+
+    def test_queued_groups_dropped(self):
+        self.w.queueGroup((0, self.images[:2]))
+        self.h_clear()
+
+        self.assertListEqual(self.w._queue, [])
+
+    def test_cell_size_set_with_new_preferences(self):
+        self.conf['size'] = 100
+        self.h_clear()
+
+        self.assertEqual(self.w.horizontalHeader().defaultSectionSize(),
+                         100 + self.w._delegate.SPACING)
+
+
+class TestImageViewWidgetMethodMouseReleaseEvent(TestImageViewWidget):
+
+    def setUp(self):
+        super().setUp()
 
-        self.assertListEqual(self.w.widgets, [])
+        self.h_fill()
+        self.mock_event = mock.Mock(spec=QtGui.QMouseEvent)
+
+    def test_image_selected_and_unselected(self):
+        spy = QtTest.QSignalSpy(self.w.selected)
+        with mock.patch(self.IVW+'indexAt',
+                        return_value=self.w._model.index(1, 1)):
+            self.w.mouseReleaseEvent(self.mock_event)
+            selected = self.w._model.selectedImages()
+            self.w.mouseReleaseEvent(self.mock_event)
+
+        self.assertListEqual(selected, [self.images[3]])
+        self.assertFalse(self.w._model.hasSelected())
+        self.assertListEqual([args[0] for args in spy], [True, False])
+
+    def test_nothing_selected_if_no_image(self):
+        spy = QtTest.QSignalSpy(self.w.selected)
+        with mock.patch(self.IVW+'indexAt',
+                        return_value=QtCore.QModelIndex()):
+            with mock.patch('PyQt5.QtWidgets.QTableView.mouseReleaseEvent'):
+                self.w.mouseReleaseEvent(self.mock_event)
+
+        self.assertEqual(len(spy), 0)
 
 
 class TestImageViewWidgetMethodCallOnSelected(TestImageViewWidget):
@@ -285,36 +401,64 @@ class TestImageViewWidgetMethodCallOnSelected(TestImageViewWidget):
     def setUp(self):
         super().setUp()
 
-        self.mock_groupW = mock.Mock(spec=imagegroupwidget.ImageGroupWidget)
-        self.w.widgets = [self.mock_groupW]
+        self.h_fill()
+        self.w.autoSelect()
 
         self.mock_func = mock.Mock()
         self.args = 'arg'
         self.kwargs = 'kwarg'
 
-    def test_passed_func_called_with_ImageGroupWidget__args_and_kwargs(self):
-        self.w._callOnSelected(self.mock_func, self.args, kwarg=self.kwargs)
-
-        self.mock_func.assert_called_once_with(
-            self.mock_groupW, self.args, kwarg=self.kwargs
-        )
-
-    def test_errorMessage_called_with_attr_errors_arg(self):
-        self.w._errors = ['Error']
+    def h_call(self):
         with mock.patch(self.PATCH_ERRN+'errorMessage') as mock_err_call:
             self.w._callOnSelected(self.mock_func, self.args,
                                    kwarg=self.kwargs)
+        return mock_err_call
 
-        mock_err_call.assert_called_once_with(self.w._errors)
+    def test_passed_func_called_with_selected_images__args_and_kwargs(self):
+        self.h_call()
 
-    def test_attr_errors_cleared(self):
-        self.w._errors = ['Error']
-        with mock.patch(self.PATCH_ERRN+'errorMessage'):
-            self.w._callOnSelected(self.mock_func, self.args,
-                                   kwarg=self.kwargs)
+        self.mock_func.assert_has_calls([
+            mock.call(self.images[1], self.args, kwarg=self.kwargs),
+            mock.call(self.images[3], self.args, kwarg=self.kwargs),
+        ])
+
+    def test_done_images_removed_from_model(self):
+        self.h_call()
+
+        self.assertFalse(self.w.hasGroups())
+
+    def test_failed_images_left_and_errors_passed_to_errorMessage(self):
+        self.mock_func.side_effect = [None, OSError('Error')]
+        errors = []
+        with mock.patch(self.PATCH_ERRN+'errorMessage',
+                        side_effect=lambda errs: errors.extend(errs)):
+            with self.assertLogs('main.imageviewwidget', 'ERROR'):
+                self.w._callOnSelected(self.mock_func)
 
+        self.assertEqual(self.w._model.rowCount(), 1)
+        self.assertListEqual(self.w._model.selectedImages(),
+                             [self.images[3]])
+        self.assertListEqual(errors, ['Error'])
         self.assertListEqual(self.w._errors, [])
 
+    def test_del_parent_dir_called_if_delete_dirs_on(self):
+        self.conf['delete_dirs'] = True
+        self.h_call()
+
+        self.images[1].del_parent_dir.assert_called_once_with()
+
+    def test_del_parent_dir_not_called_if_delete_dirs_off(self):
+        self.h_call()
+
+        self.images[1].del_parent_dir.assert_not_called()
+
+    def test_selected_signal_emitted(self):
+        spy = QtTest.QSignalSpy(self.w.selected)
+        self.h_call()
+
+        self.assertEqual(len(spy), 1)
+        self.assertFalse(spy[0][0])
+
 
 class TestImageViewWidgetMethodDelete(TestImageViewWidget):
 
@@ -324,9 +468,7 @@ class TestImageViewWidgetMethodDelete(TestImageViewWidget):
             with mock.patch(self.IVW+'_callOnSelected') as mock_call_call:
                 self.w.delete()
 
-        mock_call_call.assert_called_once_with(
-            imagegroupwidget.ImageGroupWidget.delete
-        )
+        mock_call_call.assert_called_once_with(core.Image.delete)
 
     def test_callOnSelected_not_called_if_QMessageBox_return_Cancel(self):
         with mock.patch('PyQt5.QtWidgets.QMessageBox.question',
@@ -361,35 +503,208 @@ class TestImageViewWidgetMethodMove(TestImageViewWidget):
             with mock.patch(self.IVW+'_callOnSelected') as mock_call_call:
                 self.w.move()
 
-        mock_call_call.assert_called_once_with(
-            imagegroupwidget.ImageGroupWidget.move,
-            'new_folder'
-        )
+        mock_call_call.assert_called_once_with(core.Image.move, 'new_folder')
 
 
-class TestImageViewWidgetMethodAutoSelect(TestImageViewWidget):
+class TestImageViewWidgetMethodsAutoSelectAndUnselect(TestImageViewWidget):
 
     def setUp(self):
         super().setUp()
 
-        self.mock_groupW = mock.Mock(spec=imagegroupwidget.ImageGroupWidget)
-        self.w.widgets = [self.mock_groupW]
+        self.h_fill()
 
-    def test_ImageGroupWidget_autoSelect_called(self):
+    def test_autoSelect_select_all_except_first_images(self):
+        spy = QtTest.QSignalSpy(self.w.selected)
         self.w.autoSelect()
 
-        self.mock_groupW.autoSelect.assert_called_once_with()
+        self.assertListEqual(self.w._model.selectedImages(),
+                             [self.images[1], self.images[3]])
+        self.assertTrue(spy[0][0])
 
+    def test_unselect_unselect_all(self):
+        self.w.autoSelect()
+        spy = QtTest.QSignalSpy(self.w.selected)
+        self.w.unselect()
 
-class TestImageViewWidgetMethodUnselect(TestImageViewWidget):
+        self.assertFalse(self.w._model.hasSelected())
+        self.assertFalse(spy[0][0])
+
+
+class TestImageViewWidgetMethodOpenImage(TestImageViewWidget):
+
+    PATCH_ERRM = 'myfyrio.gui.errornotifier.errorMessage'
+    PATCH_OPENFILE = 'myfyrio.gui.utils.openFile'
 
     def setUp(self):
         super().setUp()
 
-        self.mock_groupW = mock.Mock(spec=imagegroupwidget.ImageGroupWidget)
-        self.w.widgets = [self.mock_groupW]
+        self.real_platform = sys.platform
 
-    def test_ImageGroupWidget_unselect_called(self):
-        self.w.unselect()
+        self.h_fill()
+        self.index = self.w._model.index(0, 1)
+
+    def tearDown(self):
+        sys.platform = self.real_platform
+
+    def test_openFile_called_with_image_path_arg(self):
+        with mock.patch(self.PATCH_OPENFILE) as mock_openFile:
+            self.w.openImage(self.index)
+
+        mock_openFile.assert_called_once_with('/folder/file1')
+
+    def test_log_error_if_subprocess_run_raise_CalledProcessError(self):
+        with mock.patch(self.PATCH_OPENFILE,
+                        side_effect=CalledProcessError(0, 'cmd')):
+            with mock.patch(self.PATCH_ERRM):
+                with self.assertLogs('main.imageviewwidget', 'ERROR'):
+                    self.w.openImage(self.index)
+
+    def test_call_errorMessage_if_raise_CalledProcessError_and_not_Win(self):
+        sys.platform = 'linux'
+        with mock.patch(self.PATCH_OPENFILE,
+                        side_effect=CalledProcessError(0, 'cmd')):
+            with mock.patch(self.PATCH_ERRM) as mock_msg_call:
+                self.w.openImage(self.index)
+
+        err_msg = ["Something went wrong while opening '/folder/file1'"]
+        mock_msg_call.assert_called_once_with(err_msg)
+
+    def test_not_call_errorMessage_if_raise_CalledProcessError_and_Win(self):
+        sys.platform = 'win32'
+        with mock.patch(self.PATCH_OPENFILE,
+                        side_effect=CalledProcessError(0, 'cmd')):
+            with mock.patch(self.PATCH_ERRM) as mock_msg_call:
+                self.w.openImage(self.index)
+
+        mock_msg_call.assert_not_called()
+
+
+class TestImageViewWidgetMethodRenameImage(TestImageViewWidget):
+
+    PATCH_INPUT = 'PyQt5.QtWidgets.QInputDialog.getText'
+    PATCH_ERRN = 'myfyrio.gui.errornotifier.'
+
+    def setUp(self):
+        super().setUp()
+
+        self.h_fill()
+        self.index = self.w._model.index(0, 0)
+        self.mock_image = self.images[0]
+        self.mock_image.path = '/folder/file'
+
+    def test_QInputDialog_called_with_image_file_name(self):
+        with mock.patch(self.PATCH_INPUT,
+                        return_value=('new_name', False)) as mock_dialog_call:
+            self.w.renameImage(self.index)
+
+        mock_dialog_call.assert_called_once_with(
+            self.w,
+            'New name',
+            'Input a new name of the image:',
+            text='file'
+        )
+
+    def test_nothing_happens_if_QInputDialog_not_return_ok(self):
+        with mock.patch(self.PATCH_INPUT, return_value=('new_name', False)):
+            self.w.renameImage(self.index)
+
+        self.mock_image.rename.assert_not_called()
+
+    def test_image_rename_called_with_new_name_arg(self):
+        with mock.patch(self.PATCH_INPUT, return_value=('new_name', True)):
+            self.w.renameImage(self.index)
+
+        self.mock_image.rename.assert_called_once_with('new_name')
+
+    def test_dataChanged_emitted_if_image_name_is_changed(self):
+        spy = QtTest.QSignalSpy(self.w._model.dataChanged)
+        with mock.patch(self.PATCH_INPUT, return_value=('new_name', True)):
+            self.w.renameImage(self.index)
+
+        self.assertEqual(len(spy), 1)
+        self.assertEqual(spy[0][0], self.index)
+
+    def test_log_error_if_image_rename_raise_FileExistsError(self):
+        self.mock_image.rename.side_effect = FileExistsError
+        with mock.patch(self.PATCH_INPUT, return_value=('new_name', True)):
+            with mock.patch(self.PATCH_ERRN+'errorMessage'):
+                with self.assertLogs('main.imageviewwidget', 'ERROR'):
+                    self.w.renameImage(self.index)
+
+    def test_call_errorMessage_if_image_rename_raise_FileExistsError(self):
+        self.mock_image.rename.side_effect = FileExistsError
+        with mock.patch(self.PATCH_INPUT, return_value=('new_name', True)):
+            with mock.patch(self.PATCH_ERRN+'errorMessage') as mock_msg_call:
+                self.w.renameImage(self.index)
+
+        err_msg = ['File with the name "new_name" already exists']
+        mock_msg_call.assert_called_once_with(err_msg)
+
+    def test_call_errorMessage_if_image_rename_raise_FileNotFoundError(self):
+        self.mock_image.rename.side_effect = FileNotFoundError
+        with mock.patch(self.PATCH_INPUT, return_value=('new_name', True)):
+            with mock.patch(self.PATCH_ERRN+'errorMessage') as mock_msg_call:
+                self.w.renameImage(self.index)
+
+        err_msg = ['File with the name "file" does not exist']
+        mock_msg_call.assert_called_once_with(err_msg)
+
+
+class TestImageViewWidgetMethodContextMenuEvent(TestImageViewWidget):
+
+    def setUp(self):
+        super().setUp()
+
+        self.h_fill()
+        self.index = self.w._model.index(1, 0)
+
+        self.mock_menu = mock.Mock(spec=QtWidgets.QMenu)
+        self.mock_menu.addAction.side_effect = ['Open', 'Rename']
+        self.mock_event = mock.Mock(spec=QtGui.QContextMenuEvent)
+        self.mock_event.pos.return_value = QtCore.QPoint(0, 0)
+
+    def h_event(self, index):
+        with mock.patch('PyQt5.QtWidgets.QMenu',
+                        return_value=self.mock_menu) as mock_menu_call:
+            with mock.patch(self.IVW+'indexAt', return_value=index):
+                with mock.patch(self.IVW+'openImage') as mock_open:
+                    with mock.patch(self.IVW+'renameImage') as mock_rename:
+                        self.w.contextMenuEvent(self.mock_event)
+        return mock_menu_call, mock_open, mock_rename
+
+    def test_openImage_called(self):
+        self.mock_menu.exec_.return_value = 'Open'
+        _, mock_open, mock_rename = self.h_event(self.index)
+
+        mock_open.assert_called_once_with(self.index)
+        mock_rename.assert_not_called()
+
+    def test_renameImage_called(self):
+        self.mock_menu.exec_.return_value = 'Rename'
+        _, mock_open, mock_rename = self.h_event(self.index)
+
+        mock_rename.assert_called_once_with(self.index)
+        mock_open.assert_not_called()
+
+    def test_no_menu_if_no_image(self):
+        mock_menu_call, _, _ = self.h_event(QtCore.QModelIndex())
+
+        mock_menu_call.assert_not_called()
+
+
+class TestImageViewWidgetPainting(TestImageViewWidget):
+
+    def test_cells_painted_without_errors(self):
+        self.h_fill()
+        self.images[0].similarity.return_value = 100
+        self.images[0].width = 10
+        self.images[0].height = 10
+        self.images[0].filesize.return_value = 1
+        self.w._model.setData(self.w._model.index(0, 0), QtCore.Qt.Checked,
+                              QtCore.Qt.CheckStateRole)
+        self.w.resize(600, 600)
+
+        pixmap = self.w.grab()
 
-        self.mock_groupW.unselect.assert_called_once_with()
+        self.assertFalse(pixmap.isNull())
+        self.assertIsInstance(self.w.model(), duplicatemodel.DuplicateModel)
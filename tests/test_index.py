@@ -0,0 +1,400 @@
+'''Copyright 2020 Maxim Shpak <maxim.shpak@posteo.uk>
+
+This file is part of Myfyrio.
+
+Myfyrio is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Myfyrio is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
+'''
+
+from unittest import TestCase, mock
+
+import numpy as np
+
+from myfyrio import index
+
+INDEX = 'myfyrio.index.'
+
+# pylint: disable=unused-argument,missing-class-docstring
+
+
+def h_hashes(n, radius, seed=0):
+    # Groups of 5 hashes close to each other
+    rng = np.random.RandomState(seed)
+    hashes = rng.randint(0, 2**63, (n, 2), dtype=np.uint64)
+    hashes = np.repeat(hashes[:n//5], 5, axis=0)
+    for row in hashes:
+        for bit in rng.randint(0, 128, rng.randint(0, radius // 2 + 2)):
+            row[bit // 64] ^= np.uint64(1) << np.uint64(63 - bit % 64)
+    return hashes
+
+def h_brute_force(hashes, radius):
+    pairs = set()
+    for i in range(len(hashes)):
+        d = index.distances(hashes[i:i+1], hashes)
+        pairs.update((i, j, d[j]) for j in range(i + 1, len(hashes))
+                     if d[j] <= radius)
+    return pairs
+
+def h_cross(hashes1, hashes2, radius):
+    pairs = set()
+    for i in range(len(hashes1)):
+        d = index.distances(hashes1[i:i+1], hashes2)
+        pairs.update((i, j, d[j]) for j in range(len(hashes2))
+                     if d[j] <= radius)
+    return pairs
+
+def h_pairs(found):
+    i, j, d = found
+    return list(zip(i.tolist(), j.tolist(), d.tolist()))
+
+def h_found(idx):
+    pairs = []
+    for i, j, d in idx.pairs():
+        pairs.extend(zip(i.tolist(), j.tolist(), d.tolist()))
+    return pairs
+
+
+class TestFuncPopcount(TestCase):
+
+    def test_return_number_of_set_bits_in_every_row(self):
+        words = np.array([[0, 0], [2**64 - 1, 1], [0b1011, 2**63]], np.uint64)
+        res = index.popcount(words)
+
+        self.assertListEqual(res.tolist(), [0, 65, 4])
+
+    def test_same_result_if_numpy_has_no_bitwise_count(self):
+        words = np.array([[0, 0], [2**64 - 1, 1], [0b1011, 2**63]], np.uint64)
+        with mock.patch(INDEX+'HAS_BITWISE_COUNT', False):
+            res = index.popcount(words)
+
+        self.assertListEqual(res.tolist(), [0, 65, 4])
+
+
+class TestFuncDistances(TestCase):
+
+    def test_return_distances_between_rows(self):
+        hashes1 = np.array([[0, 0], [1, 2**63]], np.uint64)
+        hashes2 = np.array([[0, 7], [1, 0]], np.uint64)
+        res = index.distances(hashes1, hashes2)
+
+        self.assertListEqual(res.tolist(), [3, 1])
+
+
+class TestFuncSubstring(TestCase):
+
+    def test_return_bits_within_one_word(self):
+        hashes = np.array([[0xABCD << 48, 0]], np.uint64)
+        res = index._substring(hashes, 4, 12)
+
+        self.assertListEqual(res.tolist(), [0xBC])
+
+    def test_return_bits_from_both_words(self):
+        hashes = np.array([[0xA, 0xB << 60]], np.uint64)
+        res = index._substring(hashes, 60, 68)
+
+        self.assertListEqual(res.tolist(), [0xAB])
+
+
+class TestClassDisjointSet(TestCase):
+
+    def setUp(self):
+        self.sets = index.DisjointSet(5)
+
+    def test_every_item_in_its_own_set(self):
+        res = [self.sets.find(item) for item in range(5)]
+
+        self.assertListEqual(res, [0, 1, 2, 3, 4])
+
+    def test_len(self):
+        self.assertEqual(len(self.sets), 5)
+
+    def test_union_return_new_root_and_merged_root(self):
+        root, merged = self.sets.union(1, 3)
+
+        self.assertSetEqual({root, merged}, {1, 3})
+        self.assertEqual(self.sets.find(1), root)
+        self.assertEqual(self.sets.find(3), root)
+
+    def test_union_return_same_roots_if_items_in_same_set(self):
+        self.sets.union(1, 3)
+        root, merged = self.sets.union(3, 1)
+
+        self.assertEqual(root, merged)
+
+    def test_lower_tree_goes_under_higher_one(self):
+        self.sets.union(0, 1)
+        self.sets.union(0, 2)
+        root, merged = self.sets.union(4, 1)
+
+        self.assertEqual(merged, 4)
+        self.assertEqual(self.sets.find(4), root)
+
+    def test_add_new_items_in_their_own_sets(self):
+        self.sets.union(0, 1)
+        self.sets.add(2)
+        res = [self.sets.find(item) for item in range(5, 7)]
+
+        self.assertEqual(len(self.sets), 7)
+        self.assertListEqual(res, [5, 6])
+
+    def test_path_compressed_after_find(self):
+        self.sets._parent = [0, 0, 1, 2, 3]
+        self.sets.find(4)
+
+        self.assertListEqual(self.sets._parent, [0, 0, 0, 0, 0])
+
+
+class TestFuncMakeIndex(TestCase):
+
+    def test_return_BlockedIndex_if_few_hashes(self):
+        res = index.make_index(h_hashes(10, 0), 10)
+
+        self.assertIsInstance(res, index.BlockedIndex)
+
+    def test_return_MIHIndex_if_many_hashes_and_small_radius(self):
+        with mock.patch(INDEX+'MIHIndex.cost', return_value=1):
+            res = index.make_index(h_hashes(10, 0), 10)
+
+        self.assertIsInstance(res, index.MIHIndex)
+
+    def test_MIHIndex_cheaper_if_many_hashes_and_small_radius(self):
+        self.assertLess(index.MIHIndex.cost(10**6, 15),
+                        index.BlockedIndex.cost(10**6, 15))
+
+    def test_BlockedIndex_cheaper_if_big_radius(self):
+        self.assertLess(index.BlockedIndex.cost(10**4, 40),
+                        index.MIHIndex.cost(10**4, 40))
+
+
+class TestClassIndex(TestCase):
+
+    def test_base_class_cannot_be_instantiated(self):
+        # pylint: disable=abstract-class-instantiated
+        with self.assertRaises(TypeError):
+            index._Index()
+
+
+class TestClassBlockedIndex(TestCase):
+
+    def test_pairs_same_as_brute_force(self):
+        for radius in (0, 10, 20):
+            hashes = h_hashes(200, radius, seed=radius)
+            res = h_found(index.BlockedIndex(hashes, radius, block=32))
+
+            self.assertSetEqual(set(res), h_brute_force(hashes, radius))
+
+    def test_every_pair_found_once_and_first_index_less_than_second(self):
+        hashes = h_hashes(100, 10)
+        res = h_found(index.BlockedIndex(hashes, 10, block=16))
+
+        self.assertEqual(len(res), len(set(res)))
+        self.assertTrue(all(i < j for i, j, _ in res))
+
+    def test_nothing_found_if_no_hashes(self):
+        hashes = np.empty((0, 2), np.uint64)
+        res = h_found(index.BlockedIndex(hashes, 10))
+
+        self.assertListEqual(res, [])
+
+    def test_sweep_yield_pairs_with_first_index_before_block_end(self):
+        hashes = h_hashes(100, 10)
+        done = 0
+        for end, (i, _, _) in index.BlockedIndex(hashes, 10, 16).sweep():
+            self.assertTrue(((done <= i) & (i < end)).all())
+            done = end
+
+        self.assertEqual(done, 100)
+
+    def test_query_same_as_brute_force(self):
+        hashes = h_hashes(100, 10)
+        idx = index.BlockedIndex(hashes[::2], 10, block=16)
+        res = h_pairs(idx.query(hashes[1::2]))
+
+        self.assertSetEqual(set(res), h_cross(hashes[1::2], hashes[::2], 10))
+
+
+class TestClassMIHIndex(TestCase):
+
+    def test_pairs_same_as_brute_force(self):
+        for radius in (0, 5, 10, 15, 20):
+            hashes = h_hashes(200, radius, seed=radius)
+            res = h_found(index.MIHIndex(hashes, radius))
+
+            self.assertSetEqual(set(res), h_brute_force(hashes, radius))
+
+    def test_every_pair_found_once(self):
+        hashes = h_hashes(200, 10)
+        res = h_found(index.MIHIndex(hashes, 10))
+
+        self.assertEqual(len(res), len(set(res)))
+
+    def test_first_index_of_pair_less_than_second(self):
+        hashes = h_hashes(200, 10)
+        res = h_found(index.MIHIndex(hashes, 10))
+
+        self.assertTrue(all(i < j for i, j, _ in res))
+
+    def test_identical_hashes_paired(self):
+        hashes = np.array([[1, 2], [3, 4], [1, 2]], np.uint64)
+        res = h_found(index.MIHIndex(hashes, 0))
+
+        self.assertListEqual(res, [(0, 2, 0)])
+
+    def test_all_pairs_found_if_many_identical_hashes(self):
+        # More identical hashes than the positions of a bucket walked
+        # one by one
+        hashes = np.repeat(h_hashes(5, 0), 3, axis=0)
+        res = h_found(index.MIHIndex(hashes, 5))
+
+        self.assertSetEqual(set(res), h_brute_force(hashes, 5))
+
+    def test_pairs_found_if_hashes_queried_in_small_blocks(self):
+        hashes = h_hashes(100, 10)
+        res = h_found(index.MIHIndex(hashes, 10, block=7))
+
+        self.assertSetEqual(set(res), h_brute_force(hashes, 10))
+
+    def test_pairs_same_if_candidates_checked_in_threads(self):
+        hashes = h_hashes(200, 10)
+        res = h_found(index.MIHIndex(hashes, 10, block=16, threads=3))
+
+        self.assertEqual(len(res), len(set(res)))
+        self.assertSetEqual(set(res), h_brute_force(hashes, 10))
+
+    def test_nothing_found_if_no_hashes(self):
+        hashes = np.empty((0, 2), np.uint64)
+        res = h_found(index.MIHIndex(hashes, 10))
+
+        self.assertListEqual(res, [])
+
+    def test_sweep_yield_pairs_with_first_index_before_block_end(self):
+        hashes = h_hashes(100, 10)
+        done = 0
+        for end, (i, _, _) in index.MIHIndex(hashes, 10, 16).sweep():
+            self.assertTrue(((done <= i) & (i < end)).all())
+            done = end
+
+        self.assertEqual(done, 100)
+
+    def test_query_same_as_brute_force(self):
+        for radius in (0, 10, 20):
+            hashes = h_hashes(200, radius, seed=radius)
+            idx = index.MIHIndex(hashes[::2], radius, block=16)
+            res = h_pairs(idx.query(hashes[1::2]))
+
+            self.assertEqual(len(res), len(set(res)))
+            self.assertSetEqual(set(res),
+                                h_cross(hashes[1::2], hashes[::2], radius))
+
+    def test_query_few_hashes_probed_with_all_flip_masks_at_once(self):
+        hashes = h_hashes(200, 10)
+        idx = index.MIHIndex(hashes[::2], 10)
+        with mock.patch(INDEX+'MIHIndex._candidates',
+                        wraps=idx._candidates) as mock_candidates:
+            res = h_pairs(idx.query(hashes[1:10:2]))
+
+        self.assertEqual(mock_candidates.call_count, len(idx._substrings))
+        self.assertSetEqual(set(res),
+                            h_cross(hashes[1:10:2], hashes[::2], 10))
+
+    def test_no_tables_of_substrings_if_few_hashes(self):
+        idx = index.MIHIndex(h_hashes(100, 0), 5)
+
+        self.assertListEqual(idx._starts, [None] * len(idx._substrings))
+
+    def test_tables_of_short_substrings_if_many_hashes(self):
+        self.assertTrue(index._has_table(10**6, 21, 10**6))
+        self.assertFalse(index._has_table(10**6, 42, 10**6))
+
+    def test_radii_of_substrings_add_up_to_radius_minus_m_plus_1(self):
+        idx = index.MIHIndex(h_hashes(10, 0), 15)
+        m = len(idx._substrings)
+
+        self.assertEqual(sum(idx._sub_radii), 15 - m + 1)
+
+    def test_substrings_are_at_most_64_bits(self):
+        for radius in (0, 1, 20, 40):
+            idx = index.MIHIndex(h_hashes(10, 0), radius)
+
+            self.assertTrue(all(end - start <= 64
+                                for start, end in idx._substrings))
+
+
+class TestClassIncrementalIndex(TestCase):
+
+    def test_pairs_same_as_brute_force(self):
+        hashes = h_hashes(300, 10)
+        idx = index.IncrementalIndex(10)
+        res = []
+        for lo in range(0, 300, 37):
+            res.extend(h_pairs(idx.add(hashes[lo:lo+37])))
+
+        self.assertEqual(len(res), len(set(res)))
+        self.assertSetEqual(set(res), h_brute_force(hashes, 10))
+
+    def test_add_return_pairs_with_new_hashes_only(self):
+        hashes = h_hashes(100, 10)
+        idx = index.IncrementalIndex(10)
+        idx.add(hashes[:50])
+        i, j, _ = idx.add(hashes[50:])
+
+        self.assertTrue((i < j).all())
+        self.assertTrue((j >= 50).all())
+
+    def test_len(self):
+        idx = index.IncrementalIndex(10)
+        idx.add(h_hashes(10, 0))
+        idx.add(h_hashes(15, 0))
+
+        self.assertEqual(len(idx), 25)
+
+    def test_segments_merged_if_about_same_size(self):
+        idx = index.IncrementalIndex(10)
+        for _ in range(8):
+            idx.add(h_hashes(10, 0))
+
+        self.assertListEqual([start for start, _ in idx._segments], [0])
+
+    def test_smaller_segment_not_merged(self):
+        idx = index.IncrementalIndex(10)
+        idx.add(h_hashes(100, 0))
+        idx.add(h_hashes(10, 0))
+
+        self.assertListEqual([start for start, _ in idx._segments], [0, 100])
+
+    def test_query_same_as_brute_force_and_hashes_not_added(self):
+        hashes = h_hashes(100, 10)
+        idx = index.IncrementalIndex(10)
+        idx.add(hashes[:30])
+        idx.add(hashes[30:50])
+        res = h_pairs(idx.query(hashes[50:]))
+
+        self.assertEqual(len(idx), 50)
+        self.assertSetEqual(set(res), h_cross(hashes[50:], hashes[:50], 10))
+
+    def test_threads_passed_to_segments(self):
+        hashes = h_hashes(10, 0)
+        idx = index.IncrementalIndex(10, threads=2)
+        with mock.patch(INDEX+'make_index',
+                        wraps=index.make_index) as mock_make:
+            idx.add(hashes)
+
+        mock_make.assert_called_once_with(mock.ANY, 10, 2)
+
+    def test_inserted_hashes_found_by_next_hashes(self):
+        hashes = np.array([[0, 0], [0, 1], [0, 3]], np.uint64)
+        idx = index.IncrementalIndex(1)
+        idx.insert(hashes[:2])
+        res = h_pairs(idx.add(hashes[2:]))
+
+        self.assertListEqual(res, [(1, 2, 1)])
@@ -20,7 +20,7 @@ from unittest import TestCase, mock
 
 from PyQt5 import QtCore, QtTest, QtWidgets
 
-from myfyrio import workers
+from myfyrio import core, workers
 from myfyrio.gui import (aboutwindow, imageviewwidget, mainwindow,
                          pathslistwidget, preferenceswindow, pushbutton,
                          sensitivityradiobutton)
@@ -48,6 +48,7 @@ class TestMainWindowMethodInit(TestMainWindow):
                               preferenceswindow.PreferencesWindow)
         self.assertListEqual(self.mw._errors, [])
         self.assertIsInstance(self.mw.threadpool, QtCore.QThreadPool)
+        self.assertIsInstance(self.mw.workerPool, workers.WorkerPool)
         self.assertEqual(self.mw.verticalLayout.contentsMargins().top(), 9)
         self.assertEqual(self.mw.verticalLayout.contentsMargins().bottom(), 9)
         self.assertEqual(self.mw.verticalLayout.contentsMargins().right(), 9)
@@ -102,7 +103,7 @@ class TestMainWindowMethodSetImageViewWidget(TestMainWindow):
     PATCH_ERRN = 'myfyrio.gui.errornotifier.'
 
     def setUp(self):
-        self.mw.scrollArea = mock.Mock(spec=QtWidgets.QScrollArea)
+        self.mw.verticalLayout = mock.Mock(spec=QtWidgets.QVBoxLayout)
 
         self.mock_IVW = mock.Mock(spec=imageviewwidget.ImageViewWidget)
 
@@ -114,6 +115,14 @@ class TestMainWindowMethodSetImageViewWidget(TestMainWindow):
             self.mw.preferencesWindow.conf, self.mw
         )
 
+    def test_ImageViewWidget_inserted_at_top_of_layout(self):
+        with mock.patch(self.PACTH_IVW, return_value=self.mock_IVW):
+            self.mw._setImageViewWidget()
+
+        self.mw.verticalLayout.insertWidget.assert_called_once_with(
+            0, self.mock_IVW
+        )
+
     def test_finished_signal_connected_to_6_slots(self):
         with mock.patch(self.PACTH_IVW, return_value=self.mock_IVW):
             self.mw._setImageViewWidget()
@@ -142,7 +151,7 @@ class TestMainWindowMethodSetImageViewWidget(TestMainWindow):
         self.mock_IVW.finished.connect.assert_has_calls(calls)
 
     def test_finished_signal_connected_to_autoSelectBtn_enable(self):
-        self.mock_IVW.widgets = ['widget']
+        self.mock_IVW.hasGroups.return_value = True
         self.mw.autoSelectBtn.setEnabled(False)
         with mock.patch(self.PACTH_IVW, return_value=self.mock_IVW):
             self.mw._setImageViewWidget()
@@ -154,7 +163,7 @@ class TestMainWindowMethodSetImageViewWidget(TestMainWindow):
         self.assertTrue(self.mw.autoSelectBtn.isEnabled())
 
     def test_finished_signal_connected_to_autoSelectBtn_disable(self):
-        self.mock_IVW.widgets = []
+        self.mock_IVW.hasGroups.return_value = False
         self.mw.autoSelectBtn.setEnabled(True)
         with mock.patch(self.PACTH_IVW, return_value=self.mock_IVW):
             self.mw._setImageViewWidget()
@@ -166,7 +175,7 @@ class TestMainWindowMethodSetImageViewWidget(TestMainWindow):
         self.assertFalse(self.mw.autoSelectBtn.isEnabled())
 
     def test_finished_connected_to_menubar_disableAutoSelectAction(self):
-        self.mock_IVW.widgets = ['widget']
+        self.mock_IVW.hasGroups.return_value = True
         self.mw.autoSelectAction.setEnabled(False)
         with mock.patch(self.PACTH_IVW, return_value=self.mock_IVW):
             self.mw._setImageViewWidget()
@@ -178,7 +187,7 @@ class TestMainWindowMethodSetImageViewWidget(TestMainWindow):
         self.assertTrue(self.mw.autoSelectAction.isEnabled())
 
     def test_finished_signal_connected_to_menubar_enableAutoSelectAction(self):
-        self.mock_IVW.widgets = []
+        self.mock_IVW.hasGroups.return_value = False
         self.mw.autoSelectAction.setEnabled(True)
         with mock.patch(self.PACTH_IVW, return_value=self.mock_IVW):
             self.mw._setImageViewWidget()
@@ -456,7 +465,7 @@ class TestMainWindowMethodSetSensitivityGroupBox(TestMainWindow):
         self.mw.veryHighRbtn = mock_btn
         self.mw._setSensitivityGroupBox()
 
-        mock_btn.sensitivityChanged.connect.assert_called_once_with(
+        mock_btn.sensitivityChanged.connect.assert_any_call(
             self.mw.preferencesWindow.setSensitivity
         )
 
@@ -465,7 +474,7 @@ class TestMainWindowMethodSetSensitivityGroupBox(TestMainWindow):
         self.mw.highRbtn = mock_btn
         self.mw._setSensitivityGroupBox()
 
-        mock_btn.sensitivityChanged.connect.assert_called_once_with(
+        mock_btn.sensitivityChanged.connect.assert_any_call(
             self.mw.preferencesWindow.setSensitivity
         )
 
@@ -474,7 +483,7 @@ class TestMainWindowMethodSetSensitivityGroupBox(TestMainWindow):
         self.mw.mediumRbtn = mock_btn
         self.mw._setSensitivityGroupBox()
 
-        mock_btn.sensitivityChanged.connect.assert_called_once_with(
+        mock_btn.sensitivityChanged.connect.assert_any_call(
             self.mw.preferencesWindow.setSensitivity
         )
 
@@ -483,7 +492,7 @@ class TestMainWindowMethodSetSensitivityGroupBox(TestMainWindow):
         self.mw.lowRbtn = mock_btn
         self.mw._setSensitivityGroupBox()
 
-        mock_btn.sensitivityChanged.connect.assert_called_once_with(
+        mock_btn.sensitivityChanged.connect.assert_any_call(
             self.mw.preferencesWindow.setSensitivity
         )
 
@@ -492,10 +501,17 @@ class TestMainWindowMethodSetSensitivityGroupBox(TestMainWindow):
         self.mw.veryLowRbtn = mock_btn
         self.mw._setSensitivityGroupBox()
 
-        mock_btn.sensitivityChanged.connect.assert_called_once_with(
+        mock_btn.sensitivityChanged.connect.assert_any_call(
             self.mw.preferencesWindow.setSensitivity
         )
 
+    def test_sensitivityChanged_connected_to_regroup(self):
+        mock_btn = mock.Mock(spec=sensitivityradiobutton.MediumRadioButton)
+        self.mw.mediumRbtn = mock_btn
+        self.mw._setSensitivityGroupBox()
+
+        mock_btn.sensitivityChanged.connect.assert_any_call(self.mw._regroup)
+
 
 class TestMainWindowMethodSetActionsGroupBox(TestMainWindow):
 
@@ -669,7 +685,8 @@ class TestMainWindowMethodStartProcessing(TestMainWindow):
 
         mock_proc_call.assert_called_once_with(
             self.mw.pathsList.paths(),
-            self.mw.preferencesWindow.conf
+            self.mw.preferencesWindow.conf,
+            self.mw.workerPool
         )
 
     def test_images_loaded_connected_to_loadedPicLbl_updateNumber(self):
@@ -720,15 +737,40 @@ class TestMainWindowMethodStartProcessing(TestMainWindow):
             self.mw.processProg.setValue
         )
 
-    def test_image_group_connected_to_imageViewWidget_render(self):
+    def test_progress_eta_shown_in_processProg(self):
+        with mock.patch(self.PATCH_PROC, return_value=self.mock_proc):
+            self.mw._startProcessing()
+
+        f = self.mock_proc.progress.connect.call_args[0][0]
+        with mock.patch.object(self.mw.processProg, 'setEta') as mock_eta_call:
+            f(workers.Progress(10, 4, 2, 6, 3.0, 1.5))
+
+        mock_eta_call.assert_called_once_with(1.5)
+
+    def test_image_group_connected_to_imageViewWidget_queueGroup(self):
         with mock.patch(self.PATCH_PROC, return_value=self.mock_proc):
             self.mw._startProcessing()
 
         self.mock_proc.image_group.connect.assert_called_once_with(
-            self.mw.imageViewWidget.addGroup,
-            QtCore.Qt.BlockingQueuedConnection
+            self.mw.imageViewWidget.queueGroup,
+            QtCore.Qt.DirectConnection
         )
 
+    def test_grouped_connected_to_setDendrogram(self):
+        with mock.patch(self.PATCH_PROC, return_value=self.mock_proc):
+            self.mw._startProcessing()
+
+        self.mock_proc.grouped.connect.assert_called_once_with(
+            self.mw._setDendrogram
+        )
+
+    def test_attr_dendrogram_reset(self):
+        self.mw._dendrogram = mock.Mock(spec=core.Dendrogram)
+        with mock.patch(self.PATCH_PROC, return_value=self.mock_proc):
+            self.mw._startProcessing()
+
+        self.assertIsNone(self.mw._dendrogram)
+
     def test_error_connected_to_attr_errors_append_method(self):
         with mock.patch(self.PATCH_PROC, return_value=self.mock_proc):
             self.mw._startProcessing()
@@ -737,14 +779,21 @@ class TestMainWindowMethodStartProcessing(TestMainWindow):
             self.mw._errors.append
         )
 
-    def test_interrupted_signal_connected_to_3_slots(self):
+    def test_interrupted_signal_connected_to_4_slots(self):
         with mock.patch(self.PATCH_PROC, return_value=self.mock_proc):
             self.mw._startProcessing()
 
         self.assertEqual(
-            len(self.mock_proc.interrupted.connect.call_args_list), 3
+            len(self.mock_proc.interrupted.connect.call_args_list), 4
         )
 
+    def test_interrupted_connected_to_processProg_clearEta(self):
+        with mock.patch(self.PATCH_PROC, return_value=self.mock_proc):
+            self.mw._startProcessing()
+
+        calls = [mock.call(self.mw.processProg.clearEta)]
+        self.mock_proc.interrupted.connect.assert_has_calls(calls)
+
     def test_interrupted_connected_to_startBtn_finished(self):
         with mock.patch(self.PATCH_PROC, return_value=self.mock_proc):
             self.mw._startProcessing()
@@ -800,6 +849,73 @@ class TestMainWindowMethodStartProcessing(TestMainWindow):
         self.mock_threadpool.start.assert_called_once_with(mock_worker)
 
 
+class TestMainWindowMethodRegroup(TestMainWindow):
+
+    def setUp(self):
+        self.mock_dendrogram = mock.Mock(spec=core.Dendrogram)
+        self.mock_dendrogram.max_sensitivity = 20
+        self.mock_dendrogram.groups.return_value = []
+        self.mw._dendrogram = self.mock_dendrogram
+
+        self.mock_stopBtn = mock.Mock(spec=pushbutton.PushButton)
+        self.mock_stopBtn.isEnabled.return_value = False
+        self.mw.stopBtn = self.mock_stopBtn
+
+        self.mock_ivw = mock.Mock(spec=imageviewwidget.ImageViewWidget)
+        self.mw.imageViewWidget = self.mock_ivw
+
+    def test_nothing_done_if_no_dendrogram(self):
+        self.mw._dendrogram = None
+        self.mw._regroup(10)
+
+        self.mock_ivw.clear.assert_not_called()
+
+    def test_nothing_done_if_processing(self):
+        self.mock_stopBtn.isEnabled.return_value = True
+        self.mw._regroup(10)
+
+        self.mock_dendrogram.groups.assert_not_called()
+        self.mock_ivw.clear.assert_not_called()
+
+    def test_rescan_if_sensitivity_bigger_than_max_sensitivity(self):
+        with mock.patch.object(self.mw.startBtn, 'click') as mock_click_call:
+            self.mw._regroup(25)
+
+        mock_click_call.assert_called_once_with()
+        self.mock_dendrogram.groups.assert_not_called()
+        self.mock_ivw.clear.assert_not_called()
+
+    def test_no_rescan_if_sensitivity_within_max_sensitivity(self):
+        with mock.patch.object(self.mw.startBtn, 'click') as mock_click_call:
+            self.mw._regroup(10)
+
+        mock_click_call.assert_not_called()
+
+    def test_deleted_images_skipped(self):
+        self.mw._regroup(10)
+
+        keep = self.mock_dendrogram.groups.call_args[0][1]
+        with mock.patch('os.path.exists', return_value=False):
+            self.assertFalse(keep(mock.Mock(path='path')))
+
+    def test_groups_added_to_cleared_imageViewWidget(self):
+        groups = [['img1', 'img2'], ['img3', 'img4', 'img5']]
+        self.mock_dendrogram.groups.return_value = groups
+        with mock.patch.object(self.mw.duplicatesLbl,
+                               'updateNumber') as mock_dupl_call:
+            with mock.patch.object(self.mw.groupsLbl,
+                                   'updateNumber') as mock_groups_call:
+                self.mw._regroup(10)
+
+        self.assertEqual(self.mock_dendrogram.groups.call_args[0][0], 10)
+        self.mock_ivw.clear.assert_called_once_with()
+        calls = [mock.call((0, groups[0])), mock.call((1, groups[1])),
+                 mock.call((0, []))]
+        self.assertListEqual(self.mock_ivw.addGroup.call_args_list, calls)
+        mock_dupl_call.assert_called_once_with(5)
+        mock_groups_call.assert_called_once_with(2)
+
+
 class TestMainWindowMethodCloseEvent(TestMainWindow):
 
     def setUp(self):
@@ -811,6 +927,15 @@ class TestMainWindowMethodCloseEvent(TestMainWindow):
 
         self.spy = QtTest.QSignalSpy(self.mw.stopBtn.clicked)
 
+        self.mw.workerPool = mock.Mock(spec=workers.WorkerPool)
+
+    def test_workerPool_terminated_if_no_confirmation(self):
+        self.mw.preferencesWindow.conf['close_confirmation'] = False
+
+        self.mw.closeEvent(self.mock_event)
+
+        self.mw.workerPool.terminate.assert_called_once_with()
+
     def test_event_ignore_not_called_if_no_confirmation(self):
         self.mw.preferencesWindow.conf['close_confirmation'] = False
 
@@ -887,6 +1012,14 @@ class TestMainWindowMethodCloseEvent(TestMainWindow):
 
         self.mock_event.ignore.assert_called_once_with()
 
+    def test_workerPool_not_terminated_if_confirmation_and_Cancel(self):
+        self.mw.preferencesWindow.conf['close_confirmation'] = True
+        with mock.patch('PyQt5.QtWidgets.QMessageBox.question',
+                        return_value=QtWidgets.QMessageBox.Cancel):
+            self.mw.closeEvent(self.mock_event)
+
+        self.mw.workerPool.terminate.assert_not_called()
+
     def test_stopBtn_clicked_not_emitted_if_confirmation__Cancel__disabl(self):
         self.mw.preferencesWindow.conf['close_confirmation'] = True
         self.mw.stopBtn.setEnabled(False)
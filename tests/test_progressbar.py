@@ -0,0 +1,77 @@
+'''Copyright 2020 Maxim Shpak <maxim.shpak@posteo.uk>
+
+This file is part of Myfyrio.
+
+Myfyrio is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Myfyrio is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
+'''
+
+from unittest import TestCase
+
+from PyQt5 import QtWidgets
+
+from myfyrio.gui import progressbar
+
+# Check if there's QApplication instance already
+app = QtWidgets.QApplication.instance()
+if app is None:
+    app = QtWidgets.QApplication([])
+
+# pylint: disable=missing-class-docstring
+
+
+class TestClassProgressBar(TestCase):
+
+    def setUp(self):
+        self.w = progressbar.ProgressBar()
+        self.w.setRange(0, 100)
+        self.w.setValue(50)
+
+
+class TestClassProgressBarMethodSetMinValue(TestClassProgressBar):
+
+    def test_minimum_set_and_eta_cleared(self):
+        self.w.setEta(10)
+        self.w.setMinValue()
+
+        self.assertEqual(self.w.value(), 0)
+        self.assertEqual(self.w.format(), '%p%')
+
+
+class TestClassProgressBarMethodSetMaxValue(TestClassProgressBar):
+
+    def test_maximum_set_and_eta_cleared(self):
+        self.w.setEta(10)
+        self.w.setMaxValue()
+
+        self.assertEqual(self.w.value(), 100)
+        self.assertEqual(self.w.format(), '%p%')
+
+
+class TestClassProgressBarMethodSetEta(TestClassProgressBar):
+
+    def test_minutes_and_seconds_left_shown(self):
+        self.w.setEta(125.4)
+
+        self.assertEqual(self.w.text(), '50% (2:05 left)')
+
+    def test_hours_shown_if_more_than_hour_left(self):
+        self.w.setEta(3 * 3600 + 61)
+
+        self.assertEqual(self.w.text(), '50% (3:01:01 left)')
+
+    def test_only_percentage_shown_if_eta_unknown(self):
+        self.w.setEta(10)
+        self.w.setEta(None)
+
+        self.assertEqual(self.w.text(), '50%')
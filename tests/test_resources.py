@@ -385,7 +385,10 @@ class TestCache(TestCase):
 class TestCacheValues(TestCache):
 
     def test_CACHE_value(self):
-        self.assertEqual(resources.Cache.CACHE.value, 'cache.p')
+        self.assertEqual(resources.Cache.CACHE.value, 'cache.db')
+
+    def test_LEGACY_value(self):
+        self.assertEqual(resources.Cache.LEGACY.value, 'cache.p')
 
 
 class TestCacheMethodNonfrozen(TestCache):
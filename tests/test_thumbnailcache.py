@@ -0,0 +1,137 @@
+'''Copyright 2020 Maxim Shpak <maxim.shpak@posteo.uk>
+
+This file is part of Myfyrio.
+
+Myfyrio is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Myfyrio is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from PyQt5 import QtGui, QtWidgets
+
+from myfyrio import core
+from myfyrio.gui import thumbnailcache
+
+# Check if there's QApplication instance already
+app = QtWidgets.QApplication.instance()
+if app is None:
+    app = QtWidgets.QApplication([])
+
+# pylint: disable=missing-class-docstring
+
+
+class TestFuncThumbnailKey(TestCase):
+
+    def setUp(self):
+        self.mock_image = mock.Mock(spec=core.Image)
+        self.mock_image.path = 'path'
+
+    @mock.patch('os.stat')
+    def test_return_path_mtime_file_size_and_size(self, mock_stat_call):
+        mock_stat_call.return_value.st_mtime_ns = 123
+        mock_stat_call.return_value.st_size = 456
+        res = thumbnailcache.thumbnailKey(self.mock_image, 200)
+
+        mock_stat_call.assert_called_once_with('path')
+        self.assertTupleEqual(res, ('path', 123, 456, 200))
+
+    @mock.patch('os.stat', side_effect=OSError)
+    def test_mtime_and_file_size_0_if_stat_raise_OSError(self, _):
+        res = thumbnailcache.thumbnailKey(self.mock_image, 200)
+
+        self.assertTupleEqual(res, ('path', 0, 0, 200))
+
+    def test_key_changed_if_file_edited(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.mock_image.path = os.path.join(tmp_dir, 'image.png')
+            with open(self.mock_image.path, 'wb') as f:
+                f.write(b'image')
+            key = thumbnailcache.thumbnailKey(self.mock_image, 200)
+            with open(self.mock_image.path, 'ab') as f:
+                f.write(b'edited')
+            res = thumbnailcache.thumbnailKey(self.mock_image, 200)
+
+        self.assertNotEqual(res, key)
+
+
+class TestClassThumbnailCache(TestCase):
+
+    def setUp(self):
+        self.pixmap = QtGui.QPixmap(10, 10)
+        self.cost = 10 * 10 * self.pixmap.depth() // 8
+
+        self.cache = thumbnailcache.ThumbnailCache(3 * self.cost)
+
+    def h_fill(self, n):
+        for i in range(n):
+            self.cache.put(('path', i, 10), QtGui.QPixmap(10, 10))
+
+    def test_put_and_get(self):
+        self.cache.put('key', self.pixmap)
+
+        self.assertIs(self.cache.get('key'), self.pixmap)
+        self.assertEqual(self.cache.cost, self.cost)
+
+    def test_get_return_None_if_not_cached(self):
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_least_recently_used_dropped_if_budget_exceeded(self):
+        self.h_fill(3)
+        self.cache.get(('path', 0, 10))
+        self.cache.put('key', self.pixmap)
+
+        self.assertIn(('path', 0, 10), self.cache)
+        self.assertNotIn(('path', 1, 10), self.cache)
+        self.assertIn(('path', 2, 10), self.cache)
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(self.cache.cost, 3 * self.cost)
+
+    def test_put_same_key_replace_thumbnail(self):
+        self.cache.put('key', QtGui.QPixmap(10, 10))
+        self.cache.put('key', self.pixmap)
+
+        self.assertIs(self.cache.get('key'), self.pixmap)
+        self.assertEqual(self.cache.cost, self.cost)
+
+    def test_thumbnail_bigger_than_budget_not_kept(self):
+        self.cache.put('key', QtGui.QPixmap(100, 100))
+
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.cost, 0)
+
+    def test_setBudget_drop_thumbnails_not_fitting(self):
+        self.h_fill(3)
+        self.cache.setBudget(self.cost)
+
+        self.assertListEqual([key in self.cache for key in
+                              (('path', 0, 10), ('path', 2, 10))],
+                             [False, True])
+        self.assertEqual(len(self.cache), 1)
+
+    def test_discard(self):
+        self.cache.put('key', self.pixmap)
+        self.cache.discard('key')
+        self.cache.discard('key')
+
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.cost, 0)
+
+    def test_clear(self):
+        self.h_fill(3)
+        self.cache.clear()
+
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.cost, 0)
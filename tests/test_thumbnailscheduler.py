@@ -0,0 +1,150 @@
+'''Copyright 2020 Maxim Shpak <maxim.shpak@posteo.uk>
+
+This file is part of Myfyrio.
+
+Myfyrio is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Myfyrio is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
+'''
+
+from unittest import TestCase, mock
+
+from PyQt5 import QtCore, QtTest, QtWidgets
+
+from myfyrio import core, workers
+from myfyrio.gui import thumbnailscheduler
+
+# Check if there's QApplication instance already
+app = QtWidgets.QApplication.instance()
+if app is None:
+    app = QtWidgets.QApplication([])
+
+SCHEDULER_MODULE = 'myfyrio.gui.thumbnailscheduler.'
+Priority = thumbnailscheduler.Priority
+ThumbnailProcessing = workers.ThumbnailProcessing
+
+# pylint: disable=missing-class-docstring
+
+
+class TestClassThumbnailScheduler(TestCase):
+
+    def setUp(self):
+        self.s = thumbnailscheduler.ThumbnailScheduler()
+        # The runnables are not run by the pool, "h_run" runs them
+        self.mock_pool = mock.Mock(spec=QtCore.QThreadPool)
+        self.s._pool = self.mock_pool
+
+        self.images = []
+        for i in range(3):
+            mock_image = mock.Mock(spec=core.Image)
+            mock_image.path = f'path{i}'
+            self.images.append(mock_image)
+
+        self.made = []
+        patcher = mock.patch(SCHEDULER_MODULE+'workers.ThumbnailProcessing',
+                             side_effect=self.h_proc)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def h_proc(self, image, size, store):
+        mock_proc = mock.Mock(spec=ThumbnailProcessing)
+        mock_proc.run.side_effect = lambda: self.made.append(image)
+        return mock_proc
+
+    def h_run(self):
+        # Run the queued runnables, return the images in the order
+        # their thumbnails are made
+        for start_call in self.mock_pool.start.call_args_list:
+            start_call[0][0].run()
+        return self.made
+
+
+class TestClassThumbnailSchedulerMethodRequest(TestClassThumbnailScheduler):
+
+    def test_thumbnail_processing_called_with_image_size_and_store(self):
+        with mock.patch(SCHEDULER_MODULE+'workers.ThumbnailProcessing') \
+            as mock_proc_call:
+            self.s.request(self.images[0], 200, 'store')
+
+        mock_proc_call.assert_called_once_with(self.images[0], 200, 'store')
+
+    def test_same_image_queued_once(self):
+        self.s.request(self.images[0], 200)
+        self.s.request(self.images[0], 200, priority=Priority.PREFETCH)
+
+        self.assertEqual(self.mock_pool.start.call_count, 1)
+        self.assertListEqual(self.h_run(), [self.images[0]])
+
+    def test_image_not_queued_while_its_thumbnail_made(self):
+        self.s.request(self.images[0], 200)
+        self.h_run()
+        self.s.request(self.images[0], 200)
+
+        self.assertEqual(self.mock_pool.start.call_count, 1)
+        self.assertTrue(self.s.isScheduled(self.images[0]))
+
+    def test_jobs_run_in_order_of_priorities(self):
+        self.s.request(self.images[0], 200, priority=Priority.BACKGROUND)
+        self.s.request(self.images[1], 200, priority=Priority.PREFETCH)
+        self.s.request(self.images[2], 200, priority=Priority.VISIBLE)
+
+        self.assertListEqual(self.h_run(), self.images[::-1])
+
+    def test_priority_raised(self):
+        self.s.request(self.images[0], 200, priority=Priority.PREFETCH)
+        self.s.request(self.images[1], 200, priority=Priority.PREFETCH)
+        self.s.request(self.images[1], 200, priority=Priority.VISIBLE)
+
+        self.assertEqual(self.mock_pool.start.call_count, 2)
+        self.assertListEqual(self.h_run(), [self.images[1], self.images[0]])
+
+
+class TestClassThumbnailSchedulerMethodCancel(TestClassThumbnailScheduler):
+
+    def test_queued_jobs_not_kept_cancelled(self):
+        for image in self.images:
+            self.s.request(image, 200)
+        self.s.cancel({id(self.images[1])})
+
+        self.assertListEqual(self.h_run(), [self.images[1]])
+        self.assertFalse(self.s.isScheduled(self.images[0]))
+
+    def test_cancelled_image_queued_again(self):
+        self.s.request(self.images[0], 200)
+        self.s.cancel(set())
+        self.s.request(self.images[0], 200)
+
+        self.assertListEqual(self.h_run(), [self.images[0]])
+
+
+class TestClassThumbnailSchedulerMethodFinished(TestClassThumbnailScheduler):
+
+    def test_made_signal_emitted_and_image_not_scheduled(self):
+        spy = QtTest.QSignalSpy(self.s.made)
+        self.s.request(self.images[0], 200)
+        self.h_run()
+        self.s._finished(self.images[0])
+
+        self.assertEqual(len(spy), 1)
+        self.assertIs(spy[0][0], self.images[0])
+        self.assertFalse(self.s.isScheduled(self.images[0]))
+
+
+class TestClassThumbnailSchedulerMethodClear(TestClassThumbnailScheduler):
+
+    def test_queued_jobs_cancelled_and_pool_waited_for(self):
+        self.s.request(self.images[0], 200)
+        self.s.clear()
+
+        self.assertListEqual(self.h_run(), [])
+        self.mock_pool.clear.assert_called_once_with()
+        self.mock_pool.waitForDone.assert_called_once_with()
@@ -0,0 +1,139 @@
+'''Copyright 2020 Maxim Shpak <maxim.shpak@posteo.uk>
+
+This file is part of Myfyrio.
+
+Myfyrio is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Myfyrio is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import hashlib
+import os
+import stat
+import tempfile
+from unittest import TestCase, mock
+
+from PyQt5 import QtGui
+
+from myfyrio import core, thumbnailstore
+
+# pylint: disable=missing-class-docstring
+
+
+class TestClassThumbnailStore(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'thumbnails')
+        self.store = thumbnailstore.ThumbnailStore(self.root)
+
+        self.image_path = os.path.join(self.tmp.name, 'my image.png')
+        QtGui.QImage(512, 256, QtGui.QImage.Format_RGB32).save(
+            self.image_path
+        )
+        self.image = core.Image(self.image_path)
+
+        self.thumb = QtGui.QImage(256, 128, QtGui.QImage.Format_RGB32)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+class TestClassThumbnailStoreMethodStoredSize(TestClassThumbnailStore):
+
+    def test_smallest_stored_size_not_less_than_size(self):
+        self.assertEqual(self.store.storedSize(100), 128)
+        self.assertEqual(self.store.storedSize(128), 128)
+        self.assertEqual(self.store.storedSize(200), 256)
+        self.assertEqual(self.store.storedSize(1000), 1024)
+
+    def test_None_if_size_too_big(self):
+        self.assertIsNone(self.store.storedSize(1025))
+
+
+class TestClassThumbnailStoreMethodPath(TestClassThumbnailStore):
+
+    def test_uri_is_percent_encoded(self):
+        uri = self.store.uri(self.image_path)
+
+        self.assertTrue(uri.startswith('file:///'))
+        self.assertTrue(uri.endswith('/my%20image.png'))
+
+    def test_path_is_md5_of_uri_in_size_folder(self):
+        md5 = hashlib.md5(self.store.uri(self.image_path).encode())
+        res = self.store.path(self.image_path, 256)
+
+        self.assertEqual(res, os.path.join(self.root, 'large',
+                                           f'{md5.hexdigest()}.png'))
+
+    def test_default_root_is_thumbnails_folder(self):
+        with mock.patch('PyQt5.QtCore.QStandardPaths.writableLocation',
+                        return_value='/cache'):
+            store = thumbnailstore.ThumbnailStore()
+
+        self.assertEqual(store._root, os.path.join('/cache', 'thumbnails'))
+
+
+class TestClassThumbnailStoreMethodsSaveAndLoad(TestClassThumbnailStore):
+
+    def test_saved_thumbnail_loaded(self):
+        self.store.save(self.image, self.thumb, 256)
+        res = self.store.load(self.image, 256)
+
+        self.assertEqual(res.size(), self.thumb.size())
+        self.assertEqual(res.text('Thumb::URI'),
+                         self.store.uri(self.image_path))
+        self.assertEqual(res.text('Thumb::MTime'),
+                         str(int(os.stat(self.image_path).st_mtime)))
+
+    def test_only_thumbnail_file_left_with_private_permissions(self):
+        self.store.save(self.image, self.thumb, 256)
+        path = self.store.path(self.image_path, 256)
+
+        self.assertListEqual(os.listdir(os.path.dirname(path)),
+                             [os.path.basename(path)])
+        if os.name == 'posix':
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+
+    def test_None_if_not_stored(self):
+        self.assertIsNone(self.store.load(self.image, 256))
+
+    def test_None_if_stored_for_other_size(self):
+        self.store.save(self.image, self.thumb, 128)
+
+        self.assertIsNone(self.store.load(self.image, 256))
+
+    def test_None_if_image_modified(self):
+        self.store.save(self.image, self.thumb, 256)
+        mtime = os.stat(self.image_path).st_mtime
+        os.utime(self.image_path, (mtime + 10, mtime + 10))
+
+        self.assertIsNone(self.store.load(core.Image(self.image_path), 256))
+
+    def test_save_raise_OSError_if_thumbnail_not_saved(self):
+        with self.assertRaises(OSError):
+            self.store.save(self.image, QtGui.QImage(), 256)
+
+    def test_thumbnail_of_smaller_image_not_saved(self):
+        self.store.save(self.image, self.thumb, 1024)
+
+        self.assertFalse(os.path.exists(self.store.path(self.image_path,
+                                                        1024)))
+
+
+class TestClassThumbnailStoreMethodFits(TestClassThumbnailStore):
+
+    def test_True_if_image_not_smaller_than_size(self):
+        self.assertTrue(self.store.fits(self.image, 512))
+
+    def test_False_if_image_smaller_than_size(self):
+        self.assertFalse(self.store.fits(self.image, 1024))
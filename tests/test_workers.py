@@ -16,15 +16,17 @@ You should have received a copy of the GNU General Public License
 along with Myfyrio. If not, see <https://www.gnu.org/licenses/>.
 '''
 
+import itertools
 import logging
+import queue
 import sys
+import threading
 from multiprocessing import pool
 from unittest import TestCase, mock
 
 from PyQt5 import QtGui, QtTest, QtWidgets
 
-from myfyrio import cache, core, workers
-from myfyrio.gui import thumbnailwidget
+from myfyrio import cache, core, hashing, thumbnailstore, workers
 
 # Configure a logger for testing purposes
 logger = logging.getLogger('main')
@@ -57,6 +59,7 @@ class TestClassImageProcessing(TestCase):
                      'min_height': 5,
                      'max_height': 10,
                      'cores': 16,
+                     'backend': 'qt',
                      'sensitivity': 0}
         self.proc = workers.ImageProcessing(self.folders, self.conf)
 
@@ -68,287 +71,564 @@ class TestMethodInit(TestClassImageProcessing):
         self.assertEqual(self.proc._conf, self.conf)
         self.assertFalse(self.proc._interrupted)
         self.assertEqual(self.proc._progressbar_value, 0.0)
+        self.assertTrue(self.proc._own_pool)
+        self.assertIsInstance(self.proc._pool, workers.WorkerPool)
+        self.assertEqual(self.proc._pending, 0)
+        self.assertSetEqual(self.proc._indexed, set())
+        self.assertEqual(self.proc._loaded_num, 0)
+        self.assertEqual(self.proc._cached_num, 0)
+        self.assertEqual(self.proc._calculated_num, 0)
+        self.assertEqual(self.proc._reported, (0, 0, 0))
+
+    def test_shared_pool_used_if_passed(self):
+        worker_pool = workers.WorkerPool()
+        proc = workers.ImageProcessing(self.folders, self.conf, worker_pool)
+
+        self.assertFalse(proc._own_pool)
+        self.assertIs(proc._pool, worker_pool)
 
     def test_attributes(self):
         self.assertEqual(workers.ImageProcessing.PROG_MIN, 0)
-        self.assertEqual(workers.ImageProcessing.PROG_CHECK_CACHE, 15)
-        self.assertEqual(workers.ImageProcessing.PROG_CALC, 75)
-        self.assertEqual(workers.ImageProcessing.PROG_UPD_CACHE, 80)
         self.assertEqual(workers.ImageProcessing.PROG_MAX, 100)
 
 
 class TestClassImageProcessingMethodRun(TestClassImageProcessing):
 
-    PATCH_FIND = PROCESSING+'ImageProcessing._find_images'
     PATCH_LOAD = PROCESSING+'ImageProcessing._load_cache'
+    PATCH_PROCESS = PROCESSING+'ImageProcessing._process'
 
-    def test_early_return_if_images_not_found(self):
-        with mock.patch(self.PATCH_FIND, return_value=[]):
-            with mock.patch(self.PATCH_LOAD) as mock_load_call:
-                self.proc.run()
+    def setUp(self):
+        super().setUp()
 
-        mock_load_call.assert_not_called()
+        self.mock_cache = mock.Mock(spec=cache.Cache)
 
-    # FUNCTION '_FIND_IMAGES' IS USED IN THESE TESTS JUST
-    # SO WE DO NOT HAVE TO GO THROUGH MAIN BRANCH IN 'TRY'
-    # SINCE WE TEST OTHER BLOCKS
+    def h_run(self, process=None):
+        with mock.patch(PROCESSING+'ImageProcessing._find_images'):
+            with mock.patch(self.PATCH_LOAD, return_value=self.mock_cache):
+                with mock.patch(self.PATCH_PROCESS,
+                                side_effect=process) as mock_process_call:
+                    self.proc.run()
+        return mock_process_call
 
-    def test_log_error_if_any_func_raise_Exception(self):
-        with mock.patch(self.PATCH_FIND, side_effect=Exception):
-            with self.assertLogs('main.workers', 'ERROR'):
-                self.proc.run()
+    def test_process_called_with_queue_and_cache(self):
+        mock_process_call = self.h_run()
 
-    def test_set_attr_error_to_True_if_any_func_raise_Exception(self):
-        with mock.patch(self.PATCH_FIND, side_effect=Exception):
-            self.proc.run()
+        found, c = mock_process_call.call_args[0]
+        self.assertIsInstance(found, queue.Queue)
+        self.assertIs(c, self.mock_cache)
+
+    def test_cache_closed(self):
+        self.h_run()
+
+        self.mock_cache.close.assert_called_once_with()
+
+    def test_cache_closed_if_process_raise_Exception(self):
+        self.h_run(Exception)
+
+        self.mock_cache.close.assert_called_once_with()
+
+    def test_emit_stop_image_group_if_not_interrupted(self):
+        spy = QtTest.QSignalSpy(self.proc.image_group)
+        self.h_run()
 
-        self.assertTrue(self.proc.error)
+        self.assertEqual(len(spy), 1)
+        self.assertEqual(spy[0][0], (0, []))
+
+    def test_update_progressbar_called_with_PROG_MAX(self):
+        with mock.patch(PROCESSING+'ImageProcessing._update_progressbar') \
+            as mock_bar_call:
+            self.h_run()
+
+        mock_bar_call.assert_called_once_with(
+            workers.ImageProcessing.PROG_MAX
+        )
+
+    def test_emit_interrupted_not_stop_image_group_if_interrupted(self):
+        group_spy = QtTest.QSignalSpy(self.proc.image_group)
+        interrupted_spy = QtTest.QSignalSpy(self.proc.interrupted)
+        self.proc._interrupted = True
+        self.h_run()
+
+        self.assertEqual(len(group_spy), 0)
+        self.assertEqual(len(interrupted_spy), 1)
+
+    def test_own_pool_terminated(self):
+        self.proc._pool = mock.Mock(spec=workers.WorkerPool)
+        self.h_run()
+
+        self.proc._pool.terminate.assert_called_once_with()
+
+    def test_shared_pool_not_terminated_if_no_pending_tasks(self):
+        self.proc._pool = mock.Mock(spec=workers.WorkerPool)
+        self.proc._own_pool = False
+        self.proc._interrupted = True
+        self.h_run()
+
+        self.proc._pool.terminate.assert_not_called()
+
+    def test_shared_pool_terminated_if_pending_tasks(self):
+        self.proc._pool = mock.Mock(spec=workers.WorkerPool)
+        self.proc._own_pool = False
+
+        def process(found, c):
+            self.proc._pending = 2
+            raise Exception
+
+        with self.assertLogs('main.workers', 'ERROR'):
+            self.h_run(process)
+
+        self.proc._pool.terminate.assert_called_once_with()
+
+    def test_log_error_if_any_func_raise_Exception(self):
+        with self.assertLogs('main.workers', 'ERROR'):
+            self.h_run(Exception)
 
     def test_emit_signal_error_with_err_msg_if_any_func_raise_Exception(self):
         spy = QtTest.QSignalSpy(self.proc.error)
-        with mock.patch(self.PATCH_FIND, side_effect=Exception('Error')):
-            self.proc.run()
+        self.h_run(Exception('Error'))
 
         self.assertEqual(len(spy), 1)
         self.assertEqual(spy[0][0], 'Error')
 
     def test_emit_signal_interrupted_if_any_func_raise_Exception(self):
         spy = QtTest.QSignalSpy(self.proc.interrupted)
-        with mock.patch(self.PATCH_FIND, side_effect=Exception):
-            self.proc.run()
+        self.h_run(Exception)
 
         self.assertEqual(len(spy), 1)
 
+    def test_emit_error_not_process_if_backend_not_installed(self):
+        spy = QtTest.QSignalSpy(self.proc.error)
+        with mock.patch('myfyrio.hashing.decode_backend',
+                        side_effect=ImportError('No Pillow')):
+            mock_process_call = self.h_run()
 
-class TestClassImageProcessingMethodFindImages(TestClassImageProcessing):
+        mock_process_call.assert_not_called()
+        self.assertEqual(spy[0][0], 'No Pillow')
+
+
+class TestClassImageProcessingMethodProcess(TestClassImageProcessing):
+
+    PATCH_CHECK = PROCESSING+'ImageProcessing._check_cache'
+    PATCH_CALC = PROCESSING+'ImageProcessing._calculate_hashes'
+    PATCH_GROUPING = PROCESSING+'ImageProcessing._image_grouping'
 
     def setUp(self):
         super().setUp()
 
-        self.mock_image = mock.Mock(spec=core.Image)
-        self.mock_image.width = 5
-        self.mock_image.height = 5
-        self.found_images = (img for img in [self.mock_image])
+        self.mock_cache = mock.Mock(spec=cache.Cache)
+        self.mock_cache.RADIUS = cache.Cache.RADIUS
+        self.mock_cache.unsaved.return_value = 0
+        self.images = []
+        for i in range(3):
+            mock_image = mock.Mock(spec=core.Image)
+            mock_image.path = f'path{i}'
+            mock_image.dhash = None
+            mock_image.info.return_value = (None, None, None)
+            self.images.append(mock_image)
+        self.found = queue.Queue()
+
+    def h_calculate(self, hashes):
+        def calculate(images, results):
+            if images:
+                self.proc._pending += 1
+                results.put([(img.path, hashes[img.path], None, None, None)
+                             for img in images])
+        return calculate
+
+    def h_process(self, cached, not_cached, hashes=None, originals=None):
+        for img in cached + not_cached:
+            self.found.put(img)
+        self.found.put(None)
+
+        with mock.patch(self.PATCH_CHECK, return_value=(cached, not_cached)):
+            with mock.patch(self.PATCH_CALC,
+                            side_effect=self.h_calculate(hashes or {})) \
+                as mock_calc_call:
+                with mock.patch(CORE+'CopyFinder.original',
+                                side_effect=originals or
+                                (lambda img: None)):
+                    with mock.patch(self.PATCH_GROUPING) as mock_group_call:
+                        self.proc._process(self.found, self.mock_cache)
+        return mock_calc_call, mock_group_call
+
+    def test_cached_images_grouped_and_not_hashed(self):
+        for img in self.images:
+            img.dhash = 1
+        mock_calc_call, mock_group_call = self.h_process(self.images, [])
+
+        mock_calc_call.assert_called_once_with([], mock.ANY)
+        mock_group_call.assert_called_once_with(mock.ANY, self.images,
+                                                mock.ANY)
+
+    def test_emit_images_loaded_with_found_images_number(self):
+        spy = QtTest.QSignalSpy(self.proc.images_loaded)
+        self.h_process(self.images, [])
+
+        self.assertEqual(spy[-1][0], 3)
+
+    def test_progress_reported_once_per_PROGRESS_INTERVAL(self):
+        self.proc._last_report = float('inf')
+        with mock.patch(PROCESSING+'ImageProcessing._report') \
+            as mock_report_call:
+            self.h_process([], self.images, {'path0': 1, 'path1': 2,
+                                             'path2': 3})
+
+        # Only the final report
+        mock_report_call.assert_called_once_with(3, False, mock.ANY)
+
+    def test_hashed_images_grouped(self):
+        hashes = {'path0': 1, 'path1': 2, 'path2': 3}
+        _, mock_group_call = self.h_process([], self.images, hashes)
+
+        self.assertListEqual([img.dhash for img in self.images], [1, 2, 3])
+        self.assertCountEqual(mock_group_call.call_args[0][1], self.images)
+
+    def test_images_with_not_calculated_hashes_not_grouped(self):
+        hashes = {'path0': 1, 'path1': -1, 'path2': 3}
+        _, mock_group_call = self.h_process([], self.images, hashes)
+
+        self.assertCountEqual(mock_group_call.call_args[0][1],
+                              [self.images[0], self.images[2]])
+
+    def test_copies_not_hashed_but_get_hash_of_original(self):
+        original, copy = self.images[:2]
+        originals = {original: None, copy: original}
+        mock_calc_call, _ = self.h_process([], [original, copy],
+                                           {'path0': 5}, originals.get)
+
+        mock_calc_call.assert_called_once_with([original], mock.ANY)
+        self.assertEqual(copy.dhash, 5)
+
+    def test_copy_of_cached_image_get_its_hash(self):
+        original, copy = self.images[:2]
+        original.dhash = 7
+        originals = {copy: original}
+        mock_calc_call, mock_group_call = self.h_process([original], [copy],
+                                                         {}, originals.get)
+
+        mock_calc_call.assert_called_once_with([], mock.ANY)
+        self.assertEqual(copy.dhash, 7)
+        self.assertListEqual(mock_group_call.call_args[0][1], [original, copy])
+
+    def test_copy_get_info_of_original(self):
+        original, copy = self.images[:2]
+        original.info.return_value = (10, 20, 'png')
+        originals = {original: None, copy: original}
+        self.h_process([], [original, copy], {'path0': 5}, originals.get)
+
+        copy.set_dimensions.assert_called_once_with(10, 20)
+        self.assertEqual(copy.format, 'png')
+
+    def test_images_filtered_by_size_before_hashing(self):
+        cached, not_cached = self.images[:1], self.images[1:]
+        cached[0].dhash = 1
+        with mock.patch(PROCESSING+'ImageProcessing._size_filter',
+                        side_effect=lambda images, *args: images[:1]) \
+            as mock_filter_call:
+            mock_calc_call, mock_group_call = self.h_process(
+                cached, not_cached, {'path1': 2}
+            )
+
+        mock_filter_call.assert_has_calls([mock.call(cached, self.mock_cache),
+                                           mock.call(not_cached)])
+        mock_calc_call.assert_called_once_with(self.images[1:2], mock.ANY)
+        mock_group_call.assert_called_once_with(mock.ANY, self.images[:2],
+                                                mock.ANY)
+
+    def test_hashing_cancelled_if_interrupted(self):
+        self.proc._interrupted = True
+        with mock.patch(PROCESSING+'ImageProcessing._cancel_hashing') \
+            as mock_cancel_call:
+            self.h_process([], self.images)
+
+        mock_cancel_call.assert_called_once_with(mock.ANY, {}, {},
+                                                 self.mock_cache)
+
+    def test_cache_updated_and_saved(self):
+        hashes = {'path0': 1, 'path1': 2, 'path2': 3}
+        with mock.patch(PROCESSING+'ImageProcessing._save_cache') \
+            as mock_save_call:
+            self.h_process([], self.images, hashes)
+
+        self.assertEqual(self.mock_cache.add.call_count, 3)
+        mock_save_call.assert_called_once_with(self.mock_cache)
+
+    def test_cache_pruned_with_all_found_images(self):
+        with mock.patch(PROCESSING+'ImageProcessing._prune_cache') \
+            as mock_prune_call:
+            self.h_process(self.images[:1], self.images[1:],
+                           {'path1': 1, 'path2': 2})
+
+        mock_prune_call.assert_called_once_with(
+            self.mock_cache, {'path0', 'path1', 'path2'}
+        )
 
-    def test_core_find_images_called_with_folders_and_recursive_args(self):
-        with mock.patch(CORE+'find_image') as mock_find_call:
-            self.proc._find_images()
+    def test_cache_not_pruned_if_interrupted(self):
+        self.proc._interrupted = True
+        with mock.patch(PROCESSING+'ImageProcessing._prune_cache') \
+            as mock_prune_call:
+            self.h_process([], self.images)
 
-        mock_find_call.assert_called_once_with(self.folders,
-                                               self.conf['subfolders'])
+        mock_prune_call.assert_not_called()
 
-    def test_return_images_if_no_size_filter(self):
-        self.mock_image.width = 100
-        self.mock_image.height = 100
-        with mock.patch(CORE+'find_image', return_value=self.found_images):
-            res = self.proc._find_images()
+    def test_cache_saved_if_CHECKPOINT_SIZE_new_hashes(self):
+        hashes = {'path0': 1, 'path1': 2, 'path2': 3}
+        self.mock_cache.unsaved.return_value = \
+            workers.ImageProcessing.CHECKPOINT_SIZE
+        with mock.patch(PROCESSING+'ImageProcessing._save_cache') \
+            as mock_save_call:
+            self.h_process([], self.images, hashes)
 
-        self.assertSetEqual(res, {self.mock_image})
+        self.assertGreater(mock_save_call.call_count, 1)
 
-    def test_emit_images_loaded_signal_if_no_size_filter(self):
-        self.mock_image.width = 100
-        self.mock_image.height = 100
-        spy = QtTest.QSignalSpy(self.proc.images_loaded)
-        with mock.patch(CORE+'find_image', return_value=self.found_images):
-            self.proc._find_images()
+    def test_cache_saved_if_CHECKPOINT_INTERVAL_passed(self):
+        hashes = {'path0': 1, 'path1': 2, 'path2': 3}
+        interval = workers.ImageProcessing.CHECKPOINT_INTERVAL
+        with mock.patch('time.monotonic', side_effect=itertools.count(
+                0.0, interval)):
+            with mock.patch(PROCESSING+'ImageProcessing._save_cache') \
+                as mock_save_call:
+                self.h_process([], self.images, hashes)
 
-        self.assertEqual(len(spy), 1)
-        self.assertEqual(spy[0][0], 1)
+        self.assertGreater(mock_save_call.call_count, 1)
 
-    def test_return_images_if_size_filter_and_image_fits(self):
-        self.conf['filter_img_size'] = True
-        with mock.patch(CORE+'find_image', return_value=self.found_images):
-            res = self.proc._find_images()
+    def test_SimilarityIndex_passed_if_sensitivity_within_its_radius(self):
+        self.conf['sensitivity'] = cache.Cache.RADIUS
+        _, mock_group_call = self.h_process(self.images, [])
 
-        self.assertSetEqual(res, {self.mock_image})
+        similarity = mock_group_call.call_args[0][2]
+        self.assertIsInstance(similarity, core.SimilarityIndex)
 
-    def test_emit_images_loaded_signal_if_size_filter_and_image_fits(self):
-        self.conf['filter_img_size'] = True
-        spy = QtTest.QSignalSpy(self.proc.images_loaded)
-        with mock.patch(CORE+'find_image', return_value=self.found_images):
-            self.proc._find_images()
+    def test_SimilarityIndex_searches_pairs_in_available_cores(self):
+        self.conf['sensitivity'] = 0
+        with mock.patch(PROCESSING+'ImageProcessing._available_cores',
+                        return_value=3):
+            _, mock_group_call = self.h_process(self.images, [])
 
-        self.assertEqual(len(spy), 1)
-        self.assertEqual(spy[0][0], 1)
+        self.assertEqual(mock_group_call.call_args[0][2].threads, 3)
 
-    def test_return_empty_set_if_size_filter_and_too_small_width(self):
-        self.conf['filter_img_size'] = True
-        self.mock_image.width = 4
-        with mock.patch(CORE+'find_image', return_value=self.found_images):
-            res = self.proc._find_images()
+    def test_cache_radius_widened_to_max_radius_whatever_sensitivity(self):
+        self.conf['sensitivity'] = 0
+        self.h_process(self.images, [])
 
-        self.assertSetEqual(res, set())
+        self.mock_cache.widen.assert_called_once_with(cache.Cache.RADIUS)
 
-    def test_not_emit_images_loaded_if_size_filter_and_too_small_width(self):
-        self.conf['filter_img_size'] = True
-        self.mock_image.width = 4
-        spy = QtTest.QSignalSpy(self.proc.images_loaded)
-        with mock.patch(CORE+'find_image', return_value=self.found_images):
-            self.proc._find_images()
+    def test_SimilarityIndex_not_passed_if_sensitivity_too_big(self):
+        self.conf['sensitivity'] = cache.Cache.RADIUS + 1
+        _, mock_group_call = self.h_process(self.images, [])
 
-        self.assertEqual(len(spy), 0)
+        self.assertIsNone(mock_group_call.call_args[0][2])
 
-    def test_emit_stop_image_group_if_size_filter_and_too_small_width(self):
-        self.conf['filter_img_size'] = True
-        self.mock_image.width = 4
-        spy = QtTest.QSignalSpy(self.proc.image_group)
-        with mock.patch(CORE+'find_image', return_value=self.found_images):
-            self.proc._find_images()
+    def test_nothing_grouped_if_interrupted(self):
+        self.proc._interrupted = True
+        _, mock_group_call = self.h_process(self.images, [])
+
+        mock_group_call.assert_not_called()
+
+    def test_emit_grouped_with_dendrogram_with_radius_of_SimilarityIndex(self):
+        self.conf['sensitivity'] = 0
+        spy = QtTest.QSignalSpy(self.proc.grouped)
+        self.h_process(self.images, [])
 
         self.assertEqual(len(spy), 1)
-        self.assertTupleEqual(spy[0][0], (0, []))
+        self.assertIsInstance(spy[0][0], core.Dendrogram)
+        self.assertEqual(spy[0][0].max_sensitivity, cache.Cache.RADIUS)
 
-    def test_return_empty_set_if_size_filter_and_too_big_width(self):
-        self.conf['filter_img_size'] = True
-        self.mock_image.width = 11
-        with mock.patch(CORE+'find_image', return_value=self.found_images):
-            res = self.proc._find_images()
+    def test_emit_grouped_with_dendrogram_with_sensitivity_if_too_big(self):
+        self.conf['sensitivity'] = cache.Cache.RADIUS + 1
+        spy = QtTest.QSignalSpy(self.proc.grouped)
+        self.h_process(self.images, [])
 
-        self.assertSetEqual(res, set())
+        self.assertEqual(spy[0][0].max_sensitivity, cache.Cache.RADIUS + 1)
 
-    def test_not_emit_images_loaded_if_size_filter_and_too_big_width(self):
-        self.conf['filter_img_size'] = True
-        self.mock_image.width = 11
-        spy = QtTest.QSignalSpy(self.proc.images_loaded)
-        with mock.patch(CORE+'find_image', return_value=self.found_images):
-            self.proc._find_images()
+    def test_grouped_not_emitted_if_interrupted(self):
+        self.proc._interrupted = True
+        spy = QtTest.QSignalSpy(self.proc.grouped)
+        self.h_process(self.images, [])
 
         self.assertEqual(len(spy), 0)
 
-    def test_emit_stop_image_group_if_size_filter_and_too_big_width(self):
-        self.conf['filter_img_size'] = True
-        self.mock_image.width = 11
-        spy = QtTest.QSignalSpy(self.proc.image_group)
-        with mock.patch(CORE+'find_image', return_value=self.found_images):
-            self.proc._find_images()
 
-        self.assertEqual(len(spy), 1)
-        self.assertTupleEqual(spy[0][0], (0, []))
+class TestClassImageProcessingMethodFindImages(TestClassImageProcessing):
 
-    def test_return_empty_set_if_size_filter_and_too_small_height(self):
-        self.conf['filter_img_size'] = True
-        self.mock_image.height = 4
-        with mock.patch(CORE+'find_image', return_value=self.found_images):
-            res = self.proc._find_images()
+    def setUp(self):
+        super().setUp()
 
-        self.assertSetEqual(res, set())
+        self.mock_image = mock.Mock(spec=core.Image)
+        self.mock_image.width = 3
+        self.mock_image.height = 7
+        self.found = queue.Queue()
+        self.stop = threading.Event()
+
+    def h_found(self, images):
+        with mock.patch(CORE+'find_image', return_value=images) \
+            as mock_find_call:
+            self.proc._find_images(self.found, self.stop)
+
+        self.mock_find_call = mock_find_call
+        res = []
+        while not self.found.empty():
+            res.append(self.found.get_nowait())
+        return res
 
-    def test_not_emit_images_loaded_if_size_filter_and_too_small_height(self):
-        self.conf['filter_img_size'] = True
-        self.mock_image.height = 4
-        spy = QtTest.QSignalSpy(self.proc.images_loaded)
-        with mock.patch(CORE+'find_image', return_value=self.found_images):
-            self.proc._find_images()
+    def test_core_find_images_called_with_folders_and_recursive_args(self):
+        self.h_found([])
 
-        self.assertEqual(len(spy), 0)
+        self.mock_find_call.assert_called_once_with(
+            self.folders, self.conf['subfolders']
+        )
 
-    def test_emit_stop_image_group_if_size_filter_and_too_small_height(self):
-        self.conf['filter_img_size'] = True
-        self.mock_image.height = 4
-        spy = QtTest.QSignalSpy(self.proc.image_group)
-        with mock.patch(CORE+'find_image', return_value=self.found_images):
-            self.proc._find_images()
+    def test_put_images_and_None(self):
+        res = self.h_found([self.mock_image])
 
-        self.assertEqual(len(spy), 1)
-        self.assertTupleEqual(spy[0][0], (0, []))
+        self.assertListEqual(res, [self.mock_image, None])
 
-    def test_return_empty_set_if_size_filter_and_too_big_height(self):
+    def test_images_not_read_even_if_size_filter(self):
         self.conf['filter_img_size'] = True
-        self.mock_image.height = 11
-        with mock.patch(CORE+'find_image', return_value=self.found_images):
-            res = self.proc._find_images()
+        self.mock_image = core.Image('path')
+        with mock.patch(CORE+'Image._set_dimensions') as mock_dim_call:
+            res = self.h_found([self.mock_image])
 
-        self.assertSetEqual(res, set())
+        mock_dim_call.assert_not_called()
+        self.assertListEqual(res, [self.mock_image, None])
 
-    def test_not_emit_images_loaded_if_size_filter_and_too_big_height(self):
-        self.conf['filter_img_size'] = True
-        self.mock_image.height = 11
-        spy = QtTest.QSignalSpy(self.proc.images_loaded)
-        with mock.patch(CORE+'find_image', return_value=self.found_images):
-            self.proc._find_images()
+    def test_nothing_put_if_attr_interrupted_is_True(self):
+        self.proc._interrupted = True
+        res = self.h_found([self.mock_image])
 
-        self.assertEqual(len(spy), 0)
+        self.assertListEqual(res, [])
 
-    def test_emit_stop_image_group_if_size_filter_and_too_big_height(self):
-        self.conf['filter_img_size'] = True
-        self.mock_image.height = 11
-        spy = QtTest.QSignalSpy(self.proc.image_group)
-        with mock.patch(CORE+'find_image', return_value=self.found_images):
-            self.proc._find_images()
+    def test_nothing_put_if_stopped(self):
+        self.stop.set()
+        res = self.h_found([self.mock_image])
 
-        self.assertEqual(len(spy), 1)
-        self.assertTupleEqual(spy[0][0], (0, []))
+        self.assertListEqual(res, [])
 
-    def test_emit_interrupted_signal_if_attr_interrupt_True(self):
-        self.proc._interrupted = True
-        spy = QtTest.QSignalSpy(self.proc.interrupted)
-        with mock.patch(CORE+'find_image', return_value=self.found_images):
-            self.proc._find_images()
+    def test_put_exception_if_images_cannot_be_found(self):
+        error = FileNotFoundError('folder')
+        with mock.patch(CORE+'find_image', side_effect=error):
+            self.proc._find_images(self.found, self.stop)
 
-        self.assertEqual(len(spy), 1)
+        self.assertIs(self.found.get_nowait(), error)
+
+
+class TestClassImageProcessingMethodPut(TestClassImageProcessing):
+
+    def test_wait_for_room_in_queue(self):
+        found = queue.Queue(1)
+        found.put('image1')
+        threading.Timer(0.05, found.get).start()
+        self.proc._put(found, 'image2', threading.Event())
+
+        self.assertEqual(found.get_nowait(), 'image2')
 
-    def test_return_empty_set_if_attr_interrupt_True(self):
+    def test_not_wait_if_interrupted(self):
+        found = queue.Queue(1)
+        found.put('image1')
         self.proc._interrupted = True
-        with mock.patch(CORE+'find_image', return_value=self.found_images):
-            res = self.proc._find_images()
+        self.proc._put(found, 'image2', threading.Event())
 
-        self.assertSetEqual(res, set())
+        self.assertEqual(found.get_nowait(), 'image1')
 
-    def test_emit_image_group_signal_with_empty_list_if_images_not_found(self):
-        found_images = (img for img in [])
-        spy = QtTest.QSignalSpy(self.proc.image_group)
-        with mock.patch(CORE+'find_image', return_value=found_images):
-            self.proc._find_images()
 
-        self.assertEqual(len(spy), 1)
-        self.assertTupleEqual(spy[0][0], (0, []))
+class TestClassImageProcessingMethodTake(TestClassImageProcessing):
+
+    def setUp(self):
+        super().setUp()
 
-    def test_return_empty_set_if_images_not_found(self):
-        found_images = (img for img in [])
-        with mock.patch(CORE+'find_image', return_value=found_images):
-            res = self.proc._find_images()
+        self.found = queue.Queue()
 
-        self.assertSetEqual(res, set())
+    def test_return_images_and_True_if_not_all_images_found(self):
+        self.found.put('image1')
+        self.found.put('image2')
+        res = self.proc._take(self.found, False)
+
+        self.assertTupleEqual(res, (['image1', 'image2'], True))
+
+    def test_return_images_and_False_if_all_images_found(self):
+        self.found.put('image1')
+        self.found.put(None)
+        res = self.proc._take(self.found, False)
+
+        self.assertTupleEqual(res, (['image1'], False))
+
+    def test_return_at_most_BATCH_SIZE_images(self):
+        for i in range(workers.ImageProcessing.BATCH_SIZE + 1):
+            self.found.put(i)
+        images, _ = self.proc._take(self.found, False)
+
+        self.assertEqual(len(images), workers.ImageProcessing.BATCH_SIZE)
+
+    def test_return_nothing_if_wait_and_no_images(self):
+        res = self.proc._take(self.found, True)
+
+        self.assertTupleEqual(res, ([], True))
+
+    def test_raise_exception_from_queue(self):
+        self.found.put(FileNotFoundError('folder'))
+        with self.assertRaises(FileNotFoundError):
+            self.proc._take(self.found, False)
 
 
 class TestClassImageProcessingMethodLoadCache(TestClassImageProcessing):
 
     PATCH_CACHE = 'myfyrio.cache.'
 
-    def test_load_called_with_cache_file_path(self):
-        mock_cache = mock.Mock(spec=cache.Cache)
-        with mock.patch(self.PATCH_CACHE+'Cache', return_value=mock_cache):
-            with mock.patch('myfyrio.resources.Cache.get',
-                            return_value='cache_path'):
-                self.proc._load_cache()
+    def setUp(self):
+        super().setUp()
 
-        mock_cache.load.assert_called_once_with('cache_path')
+        self.mock_cache = mock.Mock(spec=cache.Cache)
 
-    def test_return_Cache_object(self):
-        mock_cache = mock.Mock(spec=cache.Cache)
-        with mock.patch(self.PATCH_CACHE+'Cache', return_value=mock_cache):
-            res = self.proc._load_cache()
+    def h_resource(self, resource):
+        return {'cache.db': 'cache_path', 'cache.p': 'legacy_path'}[
+            resource.value
+        ]
 
-        self.assertEqual(res, mock_cache)
+    def test_load_called_with_cache_and_legacy_file_paths(self):
+        with mock.patch(self.PATCH_CACHE+'Cache',
+                        return_value=self.mock_cache):
+            with mock.patch('myfyrio.resources.Cache.get', autospec=True,
+                            side_effect=self.h_resource):
+                self.proc._load_cache()
 
-    def test_cache_empty_if_load_raise_FileNotFoundError(self):
-        with mock.patch(self.PATCH_CACHE+'Cache.load',
-                        side_effect=FileNotFoundError):
+        self.mock_cache.load.assert_called_once_with('cache_path',
+                                                     'legacy_path')
+
+    def test_return_Cache_object(self):
+        with mock.patch(self.PATCH_CACHE+'Cache',
+                        return_value=self.mock_cache):
             res = self.proc._load_cache()
 
-        self.assertDictEqual(res.data, {})
+        self.assertEqual(res, self.mock_cache)
 
-    def test_cache_empty_if_load_raise_EOFError(self):
-        with mock.patch(self.PATCH_CACHE+'Cache.load', side_effect=EOFError):
-            res = self.proc._load_cache()
+    def test_Cache_called_with_hash_version_of_backend(self):
+        self.conf['backend'] = 'pillow'
+        with mock.patch(self.PATCH_CACHE+'Cache',
+                        return_value=self.mock_cache) as mock_cache_call:
+            self.proc._load_cache()
 
-        self.assertDictEqual(res.data, {})
+        mock_cache_call.assert_called_once_with(
+            hashing.PillowBackend.HASH_VERSION
+        )
 
     def test_logging_if_load_raise_EOFError(self):
-        with mock.patch(self.PATCH_CACHE+'Cache.load', side_effect=EOFError):
+        self.mock_cache.load.side_effect = [EOFError, None]
+        with mock.patch(self.PATCH_CACHE+'Cache',
+                        return_value=self.mock_cache):
             with self.assertLogs('main.workers', 'ERROR'):
                 self.proc._load_cache()
 
+    def test_corrupted_file_removed_and_loaded_again_if_EOFError(self):
+        self.mock_cache.load.side_effect = [EOFError, None]
+        with mock.patch(self.PATCH_CACHE+'Cache',
+                        return_value=self.mock_cache):
+            with mock.patch('myfyrio.resources.Cache.get', autospec=True,
+                            side_effect=self.h_resource):
+                self.proc._load_cache()
+
+        self.mock_cache.remove.assert_called_once_with('cache_path')
+        self.mock_cache.load.assert_called_with('cache_path')
+
 
 class TestMethodCheckCache(TestClassImageProcessing):
 
@@ -357,10 +637,27 @@ class TestMethodCheckCache(TestClassImageProcessing):
 
         self.mock_img1 = mock.Mock(spec=core.Image)
         self.mock_img1.path = 'path'
+        self.mock_img1.stat.return_value = 'stat1'
         self.mock_img2 = mock.Mock(spec=core.Image)
         self.mock_img2.path = 'path_not_in_cache'
+        self.mock_img2.stat.return_value = 'stat2'
         self.paths = [self.mock_img1, self.mock_img2]
-        self.cache = {'path': 'hash'}
+        self.cache = mock.Mock(spec=cache.Cache)
+        self.cache.lookup.return_value = {'path': cache.Entry('hash')}
+
+    def test_cache_lookup_called_with_image_paths_and_file_status(self):
+        self.proc._check_cache(self.paths, self.cache)
+
+        self.cache.lookup.assert_called_once_with(
+            {'path': 'stat1', 'path_not_in_cache': 'stat2'}
+        )
+
+    def test_image_not_looked_up_if_file_status_cannot_be_read(self):
+        self.mock_img2.stat.side_effect = OSError
+        cached, not_cached = self.proc._check_cache(self.paths, self.cache)
+
+        self.cache.lookup.assert_called_once_with({'path': 'stat1'})
+        self.assertListEqual(not_cached, [self.mock_img2])
 
     def test_return_right_cached_and_not_cached_lists(self):
         cached, not_cached = self.proc._check_cache(self.paths, self.cache)
@@ -368,99 +665,288 @@ class TestMethodCheckCache(TestClassImageProcessing):
         self.assertListEqual(cached, [self.mock_img1])
         self.assertListEqual(not_cached, [self.mock_img2])
 
+    def test_indexed_image_path_added_to_attr_indexed(self):
+        self.cache.lookup.return_value = {
+            'path': cache.Entry('hash', indexed=True)
+        }
+        self.proc._check_cache(self.paths, self.cache)
+
+        self.assertSetEqual(self.proc._indexed, {'path'})
+
     def test_hash_from_cache_assigned_to_attr_dhash_of_cached_image(self):
         self.proc._check_cache(self.paths, self.cache)
 
         self.assertEqual(self.mock_img1.dhash, 'hash')
 
-    def test_emit_found_in_cache_with_found_in_cache_images_number_arg(self):
+    def test_info_from_cache_assigned_to_cached_image(self):
+        self.cache.lookup.return_value = {
+            'path': cache.Entry('hash', 1, 1024, width=10, height=20,
+                                format='png')
+        }
+        self.proc._check_cache(self.paths, self.cache)
+
+        self.assertEqual(self.mock_img1.size, 1024)
+        self.mock_img1.set_dimensions.assert_called_once_with(10, 20)
+        self.assertEqual(self.mock_img1.format, 'png')
+
+    def test_dimensions_not_assigned_if_cache_entry_has_no_info(self):
+        self.proc._check_cache(self.paths, self.cache)
+
+        self.mock_img1.set_dimensions.assert_not_called()
+
+    def test_found_in_cache_number_counted_not_emitted(self):
         spy = QtTest.QSignalSpy(self.proc.found_in_cache)
         self.proc._check_cache(self.paths, self.cache)
 
-        self.assertEqual(len(spy), 1)
-        self.assertEqual(spy[0][0], 1)
+        self.assertEqual(len(spy), 0)
+        self.assertEqual(self.proc._cached_num, 1)
+
+    def test_found_in_cache_number_added_up_for_all_batches(self):
+        self.proc._check_cache(self.paths, self.cache)
+        self.proc._check_cache(self.paths, self.cache)
 
-    def test_update_progressbar_called_with_35_if_there_arent_not_cached(self):
-        paths = self.paths[:1]
-        PATCH_PROGBAR = PROCESSING+'ImageProcessing._update_progressbar'
-        with mock.patch(PATCH_PROGBAR) as mock_bar_call:
-            self.proc._check_cache(paths, self.cache)
+        self.assertEqual(self.proc._cached_num, 2)
 
-        mock_bar_call.assert_called_once_with(
-            workers.ImageProcessing.PROG_UPD_CACHE
-        )
 
-    def test_update_progressbar_called_with_5_if_there_are_not_cached(self):
-        PATCH_PROGBAR = PROCESSING+'ImageProcessing._update_progressbar'
-        with mock.patch(PATCH_PROGBAR) as mock_bar_call:
-            self.proc._check_cache(self.paths, self.cache)
+class TestClassImageProcessingMethodCalculateHashes(TestClassImageProcessing):
 
-        mock_bar_call.assert_called_once_with(
-            workers.ImageProcessing.PROG_CHECK_CACHE
+    def setUp(self):
+        super().setUp()
+
+        self.mock_image = mock.Mock(spec=core.Image)
+        self.mock_image.path = 'path'
+        self.results = queue.Queue()
+        self.mock_pool = mock.Mock(spec=pool.Pool)
+        self.proc._pool = mock.Mock(spec=workers.WorkerPool)
+        self.proc._pool.get.return_value = self.mock_pool
+
+    def h_calculate(self, images):
+        with mock.patch(PROCESSING+'ImageProcessing._available_cores',
+                        return_value=2):
+            self.proc._calculate_hashes(images, self.results)
+
+    def test_pool_got_with_available_cores_result(self):
+        self.h_calculate([self.mock_image])
+
+        self.proc._pool.get.assert_called_once_with(2)
+
+    def test_pool_not_got_if_no_images(self):
+        self.h_calculate([])
+
+        self.proc._pool.get.assert_not_called()
+
+    def test_apply_async_called_with_dhash_chunk_and_path_chunks(self):
+        self.h_calculate([self.mock_image])
+
+        self.mock_pool.apply_async.assert_called_once_with(
+            hashing.dhash_task, (['path'], 'qt'), callback=self.results.put,
+            error_callback=self.results.put
         )
 
+    def test_tasks_counted_as_pending(self):
+        self.proc._pending = 1
+        self.h_calculate([self.mock_image])
 
-class TestClassImageProcessingMethodCalculateHashes(TestClassImageProcessing):
+        self.assertEqual(self.proc._pending, 2)
+
+
+class TestClassImageProcessingMethodCancelHashing(TestClassImageProcessing):
+
+    PATCH_TAKE = PROCESSING+'ImageProcessing._take_hashes'
 
     def setUp(self):
         super().setUp()
 
-        mock_img = mock.Mock(spec=core.Image)
-        self.images = [mock_img]
+        self.proc._pool = mock.Mock(spec=workers.WorkerPool)
+        self.mock_cache = mock.Mock(spec=cache.Cache)
+        self.results = queue.Queue()
+
+    def h_cancel(self, take):
+        with mock.patch(self.PATCH_TAKE, side_effect=take) as mock_take_call:
+            self.proc._cancel_hashing(self.results, {}, {}, self.mock_cache)
+        return mock_take_call
+
+    def test_pool_cancelled(self):
+        self.h_cancel(None)
+
+        self.proc._pool.cancel.assert_called_once_with()
+
+    def test_hashes_taken_until_no_pending_tasks(self):
+        self.proc._pending = 2
+
+        def take(results, in_progress, copies, c, wait):
+            self.proc._pending -= 1
+            return []
+
+        mock_take_call = self.h_cancel(take)
+
+        self.assertEqual(mock_take_call.call_count, 2)
+        mock_take_call.assert_called_with(self.results, {}, {},
+                                          self.mock_cache, True)
+
+    def test_not_wait_longer_than_CANCEL_TIME(self):
+        self.proc._pending = 1
+        with mock.patch('time.monotonic', side_effect=[0.0, 0.5, 1.0]):
+            mock_take_call = self.h_cancel(lambda *args: [])
+
+        self.assertEqual(mock_take_call.call_count, 1)
+        self.assertEqual(self.proc._pending, 1)
+
 
-        self.mock_Pool = mock.MagicMock(spec=pool.Pool)
-        self.mock_context_obj = mock.Mock()
-        self.mock_Pool.__enter__.return_value = self.mock_context_obj
-        imap_return = (h for h in self.images)
-        self.mock_context_obj.imap.return_value = imap_return
+class TestClassWorkerPool(TestCase):
 
-    def test_Pool_called_with_available_cores_result(self):
-        with mock.patch(PROCESSING+'Pool') as mock_Pool_call:
-            with mock.patch(PROCESSING+'ImageProcessing._available_cores',
-                            return_value=7):
-                self.proc._calculate_hashes(self.images)
+    def setUp(self):
+        self.worker_pool = workers.WorkerPool()
+
+    def h_get(self, *processes):
+        pools = [mock.Mock(spec=pool.Pool) for _ in processes]
+        with mock.patch(PROCESSING+'Pool',
+                        side_effect=pools) as mock_pool_call:
+            res = [self.worker_pool.get(num) for num in processes]
+        return res, pools, mock_pool_call
+
+    def test_Pool_started_on_first_get(self):
+        res, pools, mock_pool_call = self.h_get(2)
+
+        mock_pool_call.assert_called_once_with(
+            processes=2, initializer=hashing.init_worker,
+            initargs=(self.worker_pool._cancelled,)
+        )
+        self.assertIs(res[0], pools[0])
+
+    def test_Pool_reused_if_same_number_of_processes(self):
+        res, pools, mock_pool_call = self.h_get(2, 2)
 
-        mock_Pool_call.assert_called_once_with(processes=7)
+        self.assertEqual(mock_pool_call.call_count, 1)
+        self.assertIs(res[1], pools[0])
 
-    def test_imap_called_with_dhash_parallel_and_images_args(self):
-        with mock.patch(PROCESSING+'Pool', return_value=self.mock_Pool):
-            self.proc._calculate_hashes(self.images)
+    def test_Pool_restarted_if_number_of_processes_changed(self):
+        res, pools, mock_pool_call = self.h_get(2, 4)
 
-        self.mock_context_obj.imap.assert_called_once_with(
-            core.Image.dhash_parallel, self.images
+        pools[0].terminate.assert_called_once_with()
+        mock_pool_call.assert_called_with(
+            processes=4, initializer=hashing.init_worker,
+            initargs=(self.worker_pool._cancelled,)
         )
+        self.assertIs(res[1], pools[1])
+
+    def test_cancel_sets_cancel_token(self):
+        self.worker_pool.cancel()
+
+        self.assertTrue(self.worker_pool._cancelled.is_set())
+
+    def test_get_clears_cancel_token(self):
+        self.worker_pool.cancel()
+        self.h_get(2)
+
+        self.assertFalse(self.worker_pool._cancelled.is_set())
+
+    def test_terminate(self):
+        _, pools, _ = self.h_get(2)
+        self.worker_pool.terminate()
 
-    def test_return_same_passed_images(self):
-        with mock.patch(PROCESSING+'Pool', return_value=self.mock_Pool):
-            res = self.proc._calculate_hashes(self.images)
+        pools[0].terminate.assert_called_once_with()
+        self.assertIsNone(self.worker_pool._pool)
 
-        self.assertListEqual(res, self.images)
+    def test_terminate_if_not_started(self):
+        self.worker_pool.terminate()
 
-    def test_emit_hashes_calculated_with_calculated_hashes_number_arg(self):
+        self.assertIsNone(self.worker_pool._pool)
+
+    def test_Pool_started_again_after_terminate(self):
+        self.h_get(2)
+        self.worker_pool.terminate()
+        res, pools, _ = self.h_get(2)
+
+        self.assertIs(res[0], pools[0])
+
+
+class TestClassImageProcessingMethodCollect(TestClassImageProcessing):
+
+    def setUp(self):
+        super().setUp()
+
+        self.mock_image1 = mock.Mock(spec=core.Image)
+        self.mock_image2 = mock.Mock(spec=core.Image)
+        self.in_progress = {'path1': self.mock_image1,
+                            'path2': self.mock_image2}
+        self.results = queue.Queue()
+        self.results.put([('path1', 'hash1', 10, 20, 'png')])
+        self.results.put([('path2', 'hash2', None, None, None)])
+
+    def test_returned_hashes_assigned_to_attr_dhash_of_images(self):
+        self.proc._collect(self.results, self.in_progress, False)
+
+        self.assertEqual(self.mock_image1.dhash, 'hash1')
+        self.assertEqual(self.mock_image2.dhash, 'hash2')
+
+    def test_returned_info_assigned_to_images(self):
+        self.proc._collect(self.results, self.in_progress, False)
+
+        self.mock_image1.set_dimensions.assert_called_once_with(10, 20)
+        self.assertEqual(self.mock_image1.format, 'png')
+        self.mock_image2.set_dimensions.assert_not_called()
+
+    def test_return_hashed_images_and_remove_them_from_in_progress(self):
+        res = self.proc._collect(self.results, self.in_progress, False)
+
+        self.assertListEqual(res, [self.mock_image1, self.mock_image2])
+        self.assertDictEqual(self.in_progress, {})
+
+    def test_calculated_hashes_counted_not_emitted(self):
         spy = QtTest.QSignalSpy(self.proc.hashes_calculated)
-        with mock.patch(PROCESSING+'Pool', return_value=self.mock_Pool):
-            self.proc._calculate_hashes(self.images)
+        self.proc._calculated_num = 3
+        self.proc._collect(self.results, self.in_progress, False)
 
-        self.assertEqual(len(spy), 1)
-        self.assertEqual(spy[0][0], 1)
+        self.assertEqual(len(spy), 0)
+        self.assertEqual(self.proc._calculated_num, 5)
 
-    def test_update_progressbar_called_with_current_value_plus_step(self):
-        self.proc._progressbar_value = 2
-        PATCH_PROGBAR = PROCESSING+'ImageProcessing._update_progressbar'
-        with mock.patch(PROCESSING+'Pool', return_value=self.mock_Pool):
-            with mock.patch(PATCH_PROGBAR) as mock_bar_call:
-                self.proc._calculate_hashes(self.images)
+    def test_return_nothing_if_wait_and_no_results(self):
+        res = self.proc._collect(queue.Queue(), self.in_progress, True)
 
-        # step == 30 / len(collection) == 30 in this case
-        calls = [mock.call(62), mock.call(workers.ImageProcessing.PROG_CALC)]
-        mock_bar_call.assert_has_calls(calls)
+        self.assertListEqual(res, [])
 
-    def test_return_sublist_of_passed_images_if_attr_interrupted_is_True(self):
-        self.proc._interrupted = True
-        with mock.patch(PROCESSING+'Pool', return_value=self.mock_Pool):
-            res = self.proc._calculate_hashes(self.images)
+    def test_raise_exception_of_worker_process(self):
+        results = queue.Queue()
+        results.put(MemoryError())
+        with self.assertRaises(MemoryError):
+            self.proc._collect(results, self.in_progress, False)
+
+    def test_finished_tasks_not_pending(self):
+        self.proc._pending = 3
+        self.proc._collect(self.results, self.in_progress, False)
+
+        self.assertEqual(self.proc._pending, 1)
 
-        self.assertGreater(self.images, res)
+
+class TestClassImageProcessingMethodChunks(TestClassImageProcessing):
+
+    def test_about_4_chunks_per_core(self):
+        paths = [str(i) for i in range(80)]
+        res = self.proc._chunks(paths, 2)
+
+        self.assertEqual(len(res), 8)
+        self.assertListEqual(res[0], paths[:10])
+
+    def test_chunk_size_is_rounded_up(self):
+        paths = [str(i) for i in range(9)]
+        res = self.proc._chunks(paths, 1)
+
+        self.assertListEqual([len(chunk) for chunk in res], [3, 3, 3])
+
+    def test_chunk_size_is_not_bigger_than_MAX_CHUNK_SIZE(self):
+        max_size = workers.ImageProcessing.MAX_CHUNK_SIZE
+        paths = [str(i) for i in range(max_size * 10)]
+        res = self.proc._chunks(paths, 1)
+
+        self.assertEqual(len(res), 10)
+        self.assertEqual(len(res[0]), max_size)
+
+    def test_all_paths_are_in_chunks(self):
+        paths = [str(i) for i in range(1001)]
+        res = self.proc._chunks(paths, 3)
+
+        self.assertListEqual([p for chunk in res for p in chunk], paths)
 
 
 class TestClassImageProcessingMethodUpdateCache(TestClassImageProcessing):
@@ -473,12 +959,21 @@ class TestClassImageProcessingMethodUpdateCache(TestClassImageProcessing):
         self.mock_image = mock.Mock(spec=core.Image)
         self.mock_image.path = 'path'
         self.mock_image.dhash = 'hash'
+        self.mock_image.stat.return_value = 'stat'
+        self.mock_image.info.return_value = (10, 20, 'png')
         self.images = [self.mock_image]
 
     def test_hash_added_to_cache_if_it_is_not_minus_1(self):
         self.proc._update_cache(self.mock_cache, self.images)
 
-        self.mock_cache.__setitem__.assert_called_once_with('path', 'hash')
+        self.mock_cache.add.assert_called_once_with('path', 'hash', 'stat',
+                                                    10, 20, 'png')
+
+    def test_hash_not_added_to_cache_if_file_status_cannot_be_read(self):
+        self.mock_image.stat.side_effect = OSError
+        self.proc._update_cache(self.mock_cache, self.images)
+
+        self.mock_cache.add.assert_not_called()
 
     def test_log_error_if_hash_is_minus_1(self):
         self.mock_image.dhash = -1
@@ -494,94 +989,187 @@ class TestClassImageProcessingMethodUpdateCache(TestClassImageProcessing):
         err_msg = 'Hash of the "path" image cannot be calculated'
         self.assertEqual(spy[0][0], err_msg)
 
-    def test_cache_save_called_with_cache_file_path_arg(self):
-        with mock.patch('myfyrio.resources.Cache.get',
-                        return_value='cache_path'):
-            self.proc._update_cache(self.mock_cache, self.images)
+    def test_return_images_with_calculated_hashes(self):
+        mock_image = mock.Mock(spec=core.Image)
+        mock_image.path = 'path2'
+        mock_image.dhash = -1
+        res = self.proc._update_cache(self.mock_cache,
+                                      [self.mock_image, mock_image])
+
+        self.assertListEqual(res, [self.mock_image])
+
+
+class TestClassImageProcessingMethodSizeFilter(TestClassImageProcessing):
+
+    def setUp(self):
+        super().setUp()
+
+        self.conf['filter_img_size'] = True
+        self.mock_cache = mock.MagicMock(spec=cache.Cache)
+        self.mock_cache.__getitem__.side_effect = KeyError
+
+        self.mock_image = mock.Mock(spec=core.Image)
+        self.mock_image.path = 'path'
+        self.mock_image.format = 'png'
+        self.mock_image.width = 7
+        self.mock_image.height = 7
+        self.mock_image.info.return_value = (7, 7, 'png')
+
+    def h_filter(self):
+        return self.proc._size_filter([self.mock_image], self.mock_cache)
+
+    def test_return_all_images_if_no_size_filter(self):
+        self.conf['filter_img_size'] = False
+        self.mock_image.width = 3
 
-        self.mock_cache.save.assert_called_once_with('cache_path')
+        self.assertListEqual(self.h_filter(), [self.mock_image])
+
+    def test_return_image_if_it_fits(self):
+        self.assertListEqual(self.h_filter(), [self.mock_image])
+
+    def test_not_return_image_if_too_small_width(self):
+        self.mock_image.width = 3
+
+        self.assertListEqual(self.h_filter(), [])
+
+    def test_not_return_image_if_too_big_width(self):
+        self.mock_image.width = 11
+
+        self.assertListEqual(self.h_filter(), [])
+
+    def test_not_return_image_if_too_small_height(self):
+        self.mock_image.height = 3
+
+        self.assertListEqual(self.h_filter(), [])
+
+    def test_not_return_image_if_too_big_height(self):
+        self.mock_image.height = 11
+
+        self.assertListEqual(self.h_filter(), [])
+
+    def test_not_return_image_if_it_cannot_be_read(self):
+        mock_image = mock.Mock(spec=core.Image)
+        mock_image.info.return_value = (None, None, None)
+        type(mock_image).width = mock.PropertyMock(side_effect=OSError)
+        spy = QtTest.QSignalSpy(self.proc.error)
+        res = self.proc._size_filter([mock_image], self.mock_cache)
+
+        self.assertListEqual(res, [])
+        self.assertEqual(len(spy), 1)
+
+    def test_cache_entry_not_touched_if_info_known(self):
+        self.h_filter()
+
+        self.mock_cache.__getitem__.assert_not_called()
+        self.mock_cache.__setitem__.assert_not_called()
+
+    def test_cache_not_touched_if_no_cache_passed(self):
+        self.mock_image.info.return_value = (None, None, None)
+        self.proc._size_filter([self.mock_image])
+
+        self.mock_cache.__getitem__.assert_not_called()
+
+    def test_old_cache_entry_updated_with_read_info(self):
+        self.mock_image.info.return_value = (None, None, None)
+        self.mock_cache.__getitem__.side_effect = None
+        self.mock_cache.__getitem__.return_value = cache.Entry(5, indexed=True)
+        self.h_filter()
+
+        self.mock_cache.__setitem__.assert_called_once_with(
+            'path', cache.Entry(5, indexed=True, width=7, height=7,
+                                format='png')
+        )
+
+
+class TestClassImageProcessingMethodSaveCache(TestClassImageProcessing):
+
+    def setUp(self):
+        super().setUp()
+
+        self.mock_cache = mock.Mock(spec=cache.Cache)
+
+    def test_cache_save_called(self):
+        self.proc._save_cache(self.mock_cache)
+
+        self.mock_cache.save.assert_called_once_with()
 
     def test_logging_if_cache_save_raise_OSError(self):
         self.mock_cache.save.side_effect = OSError
         with self.assertLogs('main.workers', 'ERROR'):
-            self.proc._update_cache(self.mock_cache, self.images)
+            self.proc._save_cache(self.mock_cache)
 
-    @mock.patch(PROCESSING+'ImageProcessing._update_progressbar')
-    def test_update_progressbar_called_with_40(self, mock_bar):
-        self.proc._update_cache(self.mock_cache, self.images)
 
-        mock_bar.assert_called_once_with(
-            workers.ImageProcessing.PROG_UPD_CACHE
+class TestClassImageProcessingMethodPruneCache(TestClassImageProcessing):
+
+    def setUp(self):
+        super().setUp()
+
+        self.mock_cache = mock.Mock(spec=cache.Cache)
+
+    def test_cache_prune_called_with_folders(self):
+        self.proc._prune_cache(self.mock_cache, {'path'})
+
+        self.mock_cache.prune.assert_called_once_with(
+            self.proc._folders, self.conf['subfolders'], {'path'}
         )
 
+    def test_logging_if_cache_prune_raise_OSError(self):
+        self.mock_cache.prune.side_effect = OSError
+        with self.assertLogs('main.workers', 'ERROR'):
+            self.proc._prune_cache(self.mock_cache, set())
+
 
 class TestClassImageProcessingMethodImageGrouping(TestClassImageProcessing):
 
     def setUp(self):
         super().setUp()
 
-        self.images = ['image1', 'image2']
+        self.mock_grouping = mock.Mock(spec=core.Grouping)
+        self.mock_grouping.add.return_value = [(0, ['image1', 'image2']),
+                                               (3, [])]
+        self.mock_grouping.duplicates_num = 2
+        self.mock_grouping.groups_num = 1
 
-    def test_core_image_grouping_called_with_images_and_sensitivity_args(self):
-        with mock.patch(CORE+'image_grouping') as mock_group_call:
-            self.proc._image_grouping(self.images)
+    def test_grouping_add_called_with_images(self):
+        self.proc._image_grouping(self.mock_grouping, ['image1', 'image2'])
 
-        mock_group_call.assert_called_once_with(self.images,
-                                                self.conf['sensitivity'])
+        self.mock_grouping.add.assert_called_once_with(['image1', 'image2'],
+                                                       None)
 
-    def test_emit_image_group_signal_with_found_group_and_stop_group(self):
-        gen = (g for g in [(0, self.images)])
-        spy = QtTest.QSignalSpy(self.proc.image_group)
-        with mock.patch(CORE+'image_grouping', return_value=gen):
-            self.proc._image_grouping(self.images)
+    def test_grouping_add_called_with_pairs_from_similarity_index(self):
+        mock_similarity = mock.Mock(spec=core.SimilarityIndex)
+        mock_similarity.pairs.return_value = ['pair']
+        self.proc._indexed = {'path'}
+        self.proc._image_grouping(self.mock_grouping, ['image1', 'image2'],
+                                  mock_similarity)
 
-        self.assertEqual(len(spy), 2)
-        self.assertTupleEqual(spy[0][0], (0, self.images))
-        self.assertTupleEqual(spy[1][0], (0, []))
-
-    def test_emit_interrupted_signal_if_attr_interrupted_is_True(self):
-        self.proc._interrupted = True
-        gen = (g for g in [(0, self.images)])
-        spy = QtTest.QSignalSpy(self.proc.interrupted)
-        with mock.patch(CORE+'image_grouping', return_value=gen):
-            self.proc._image_grouping(self.images)
-
-        self.assertEqual(len(spy), 1)
+        mock_similarity.pairs.assert_called_once_with(['image1', 'image2'],
+                                                      {'path'})
+        self.mock_grouping.add.assert_called_once_with(['image1', 'image2'],
+                                                       ['pair'])
 
-    def test_not_emit_image_group_signal_if_attr_interrupted_is_True(self):
-        self.proc._interrupted = True
-        gen = (g for g in [(0, self.images)])
+    def test_emit_image_group_signal_with_changed_groups(self):
         spy = QtTest.QSignalSpy(self.proc.image_group)
-        with mock.patch(CORE+'image_grouping', return_value=gen):
-            self.proc._image_grouping(self.images)
+        self.proc._image_grouping(self.mock_grouping, ['image1', 'image2'])
 
-        self.assertEqual(len(spy), 0)
+        self.assertEqual(len(spy), 2)
+        self.assertEqual(spy[0][0], (0, ['image1', 'image2']))
+        self.assertEqual(spy[1][0], (3, []))
 
-    def test_emit_duplicates_found_signal_with_duplicates_found_num_arg(self):
-        gen = (g for g in [(0, self.images)])
+    def test_emit_duplicates_found_signal_with_duplicates_num_arg(self):
         spy = QtTest.QSignalSpy(self.proc.duplicates_found)
-        with mock.patch(CORE+'image_grouping', return_value=gen):
-            self.proc._image_grouping(self.images)
+        self.proc._image_grouping(self.mock_grouping, ['image1', 'image2'])
 
+        self.assertEqual(len(spy), 1)
         self.assertEqual(spy[0][0], 2)
 
-    def test_emit_groups_found_signal_with_duplicate_groups_found_arg(self):
-        gen = (g for g in [(0, self.images)])
+    def test_emit_groups_found_signal_with_groups_num_arg(self):
         spy = QtTest.QSignalSpy(self.proc.groups_found)
-        with mock.patch(CORE+'image_grouping', return_value=gen):
-            self.proc._image_grouping(self.images)
+        self.proc._image_grouping(self.mock_grouping, ['image1', 'image2'])
 
+        self.assertEqual(len(spy), 1)
         self.assertEqual(spy[0][0], 1)
 
-    def test_update_progress_bar_called_with_class_attr_PROG_MAX(self):
-        gen = (g for g in [(0, self.images)])
-        PATCH_UPD = PROCESSING + 'ImageProcessing._update_progressbar'
-        with mock.patch(CORE+'image_grouping', return_value=gen):
-            with mock.patch(PATCH_UPD) as mock_upd_call:
-                self.proc._image_grouping(self.images)
-
-        mock_upd_call.assert_called_once_with(self.proc.PROG_MAX)
-
 
 class TestClassImageProcessingMethodAvailableCores(TestClassImageProcessing):
 
@@ -627,6 +1215,57 @@ class TestClassImageProcessingMethodAvailableCores(TestClassImageProcessing):
         self.assertEqual(res, self.proc._conf['cores'])
 
 
+class TestClassImageProcessingMethodReport(TestClassImageProcessing):
+
+    def setUp(self):
+        super().setUp()
+
+        self.proc._loaded_num = 10
+        self.proc._cached_num = 4
+        self.proc._calculated_num = 2
+        self.proc._started = 100.0
+
+    def test_emit_changed_counters(self):
+        self.proc._reported = (10, 4, 1)
+        loaded_spy = QtTest.QSignalSpy(self.proc.images_loaded)
+        cached_spy = QtTest.QSignalSpy(self.proc.found_in_cache)
+        hashed_spy = QtTest.QSignalSpy(self.proc.hashes_calculated)
+        self.proc._report(6, False, 102.0)
+
+        self.assertEqual(len(loaded_spy), 0)
+        self.assertEqual(len(cached_spy), 0)
+        self.assertEqual(hashed_spy[0][0], 2)
+        self.assertEqual(self.proc._reported, (10, 4, 2))
+        self.assertEqual(self.proc._last_report, 102.0)
+
+    def test_progressbar_updated_with_done_share(self):
+        with mock.patch(PROCESSING+'ImageProcessing._update_progressbar') \
+            as mock_bar_call:
+            self.proc._report(6, False, 102.0)
+
+        mock_bar_call.assert_called_once_with(60.0)
+
+    def test_emit_progress_with_rate_and_eta(self):
+        spy = QtTest.QSignalSpy(self.proc.progress)
+        self.proc._report(6, False, 102.0)
+
+        self.assertEqual(spy[0][0], workers.Progress(10, 4, 2, 6, 3.0,
+                                                     4 / 3.0))
+
+    def test_no_eta_if_still_finding(self):
+        spy = QtTest.QSignalSpy(self.proc.progress)
+        self.proc._report(6, True, 102.0)
+
+        self.assertIsNone(spy[0][0].eta)
+
+    def test_no_eta_if_nothing_done(self):
+        spy = QtTest.QSignalSpy(self.proc.progress)
+        self.proc._report(0, False, 102.0)
+
+        self.assertEqual(spy[0][0].rate, 0.0)
+        self.assertIsNone(spy[0][0].eta)
+
+
 class TestClassImageProcessingMetodUpdateProgressbar(TestClassImageProcessing):
 
     def test_emit_update_progressbar_signal_if_whole_part_changed(self):
@@ -644,6 +1283,14 @@ class TestClassImageProcessingMetodUpdateProgressbar(TestClassImageProcessing):
 
         self.assertEqual(len(spy), 0)
 
+    def test_progressbar_value_not_decreased(self):
+        self.proc._progressbar_value = 10.5
+        spy = QtTest.QSignalSpy(self.proc.update_progressbar)
+        self.proc._update_progressbar(5.2)
+
+        self.assertEqual(len(spy), 0)
+        self.assertEqual(self.proc._progressbar_value, 10.5)
+
 
 class TestClassThumbnailProcessing(TestCase):
 
@@ -661,92 +1308,90 @@ class TestClassThumbnailProcessingMethodInit(TestClassThumbnailProcessing):
     def test_init_values(self):
         self.assertIs(self.proc._image, self.mock_image)
         self.assertEqual(self.proc._size, self.size)
-        self.assertIsNone(self.proc._widget)
 
 
 class TestClassThumbnailProcessingMethodRun(TestClassThumbnailProcessing):
 
-    def test_image_thumbnail_called_with_size_arg_if_widget_None(self):
+    def test_image_thumbnail_called_with_size_arg(self):
         self.mock_image.thumbnail.return_value = QtGui.QImage()
         self.proc.run()
 
         self.mock_image.thumbnail.assert_called_once_with(self.size)
 
-    def test_logging_if_image_thumbnail_raise_OSError_and_widget_None(self):
+    def test_logging_if_image_thumbnail_raise_OSError(self):
         self.mock_image.thumbnail.side_effect = OSError
         with self.assertLogs('main.workers', 'ERROR'):
             self.proc.run()
 
-    def test_empty_QImage_assigned_to_thumb_if_OSError_and_widget_None(self):
+    def test_empty_QImage_assigned_to_thumb_if_OSError(self):
         self.mock_image.thumbnail.side_effect = OSError
         self.proc.run()
 
         self.assertEqual(self.proc._image.thumb, QtGui.QImage())
 
-    def test_signal_finished_emitted_if_widget_None(self):
+    def test_signal_finished_emitted_with_image(self):
         spy = QtTest.QSignalSpy(self.proc.finished)
         self.proc.run()
 
         self.assertEqual(len(spy), 1)
+        self.assertIs(spy[0][0], self.mock_image)
 
-    def test_thumbnail_called_with_size_arg_if_widg_not_None_and_visible(self):
-        widget = mock.Mock(spec=thumbnailwidget.ThumbnailWidget)
-        widget.isVisible.return_value = True
-        self.proc._widget = widget
-        self.mock_image.thumbnail.return_value = QtGui.QImage()
-        self.proc.run()
 
-        self.mock_image.thumbnail.assert_called_once_with(self.size)
+class TestClassThumbnailProcessingMethodRunWithStore(
+        TestClassThumbnailProcessing):
 
-    def test_logging_if_OSError_and_widget_not_None_and_visible(self):
-        widget = mock.Mock(spec=thumbnailwidget.ThumbnailWidget)
-        widget.isVisible.return_value = True
-        self.proc._widget = widget
-        self.mock_image.thumbnail.side_effect = OSError
-        with self.assertLogs('main.workers', 'ERROR'):
-            self.proc.run()
+    def setUp(self):
+        super().setUp()
 
-    def test_empty_QImage_set_to_thumb_if_OSError_widg_not_None_and_vis(self):
-        widget = mock.Mock(spec=thumbnailwidget.ThumbnailWidget)
-        widget.isVisible.return_value = True
-        self.proc._widget = widget
-        self.mock_image.thumbnail.side_effect = OSError
-        self.proc.run()
+        self.mock_store = mock.Mock(spec=thumbnailstore.ThumbnailStore)
+        self.mock_store.storedSize.return_value = 256
+        self.mock_store.fits.return_value = True
+        self.stored = QtGui.QImage(256, 128, QtGui.QImage.Format_RGB32)
 
-        self.assertEqual(self.proc._image.thumb, QtGui.QImage())
+        self.proc = workers.ThumbnailProcessing(self.mock_image, self.size,
+                                                self.mock_store)
 
-    def test_signal_finished_emitted_if_widget_not_None_and_visible(self):
-        widget = mock.Mock(spec=thumbnailwidget.ThumbnailWidget)
-        widget.isVisible.return_value = True
-        self.proc._widget = widget
-        spy = QtTest.QSignalSpy(self.proc.finished)
+    def test_thumbnail_of_small_image_not_stored(self):
+        self.mock_store.fits.return_value = False
+        self.mock_image.thumbnail.return_value = QtGui.QImage()
         self.proc.run()
 
-        self.assertEqual(len(spy), 1)
+        self.mock_store.fits.assert_called_once_with(self.mock_image, 256)
+        self.mock_image.thumbnail.assert_called_once_with(self.size)
+        self.mock_store.load.assert_not_called()
+        self.mock_store.save.assert_not_called()
 
-    def test_thumbnail_not_called_with_size_arg_if_widg_not_None_not_vis(self):
-        widget = mock.Mock(spec=thumbnailwidget.ThumbnailWidget)
-        widget.isVisible.return_value = False
-        self.proc._widget = widget
-        self.mock_image.thumbnail.return_value = QtGui.QImage()
+    def test_stored_thumbnail_scaled_down(self):
+        self.mock_store.load.return_value = self.stored
         self.proc.run()
 
+        self.mock_store.load.assert_called_once_with(self.mock_image, 256)
         self.mock_image.thumbnail.assert_not_called()
+        self.assertEqual(self.mock_image.thumb.width(), 200)
+        self.assertEqual(self.mock_image.thumb.height(), 100)
 
-    def test_empty_QImage_not_to_thumb_if_OSError_widg_not_None_not_vis(self):
-        widget = mock.Mock(spec=thumbnailwidget.ThumbnailWidget)
-        widget.isVisible.return_value = False
-        self.proc._widget = widget
-        self.mock_image.thumbnail.side_effect = OSError
+    def test_thumbnail_made_and_stored_if_not_in_store(self):
+        self.mock_store.load.return_value = None
+        self.mock_image.thumbnail.return_value = self.stored
         self.proc.run()
 
-        self.assertIsNone(self.proc._image.thumb)
+        self.mock_image.thumbnail.assert_called_once_with(256)
+        self.mock_store.save.assert_called_once_with(self.mock_image,
+                                                     self.stored, 256)
+        self.assertEqual(self.mock_image.thumb.width(), 200)
 
-    def test_signal_finished_not_emitted_if_widget_not_None_and_not_vis(self):
-        widget = mock.Mock(spec=thumbnailwidget.ThumbnailWidget)
-        widget.isVisible.return_value = False
-        self.proc._widget = widget
-        spy = QtTest.QSignalSpy(self.proc.finished)
+    def test_thumbnail_made_if_store_save_raise_OSError(self):
+        self.mock_store.load.return_value = None
+        self.mock_store.save.side_effect = OSError
+        self.mock_image.thumbnail.return_value = self.stored
+        with self.assertLogs('main.workers', 'ERROR'):
+            self.proc.run()
+
+        self.assertEqual(self.mock_image.thumb.width(), 200)
+
+    def test_store_not_used_if_size_too_big(self):
+        self.mock_store.storedSize.return_value = None
         self.proc.run()
 
-        self.assertEqual(len(spy), 0)
+        self.mock_store.load.assert_not_called()
+        self.mock_image.thumbnail.assert_called_once_with(self.size)